@@ -1,4 +1,10 @@
+import asyncio
+import copy
+import time
 import warnings
+import weakref
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 
 import mmcv
 import numpy as np
@@ -80,63 +86,150 @@ class LoadImage(object):
         return results
 
 
+class InferenceSession(object):
+    """Inference images with a detector, reusing the test pipeline.
+
+    The test pipeline of ``model.cfg`` is compiled once, for image files and
+    for loaded images. Images passed in one call are preprocessed in a
+    thread pool and collated into a single batch, padded to the largest
+    image as in testing with ``samples_per_gpu > 1``.
+
+    Args:
+        model (nn.Module): The loaded detector.
+        num_workers (int): Number of threads to preprocess the images of a
+            batch. If 0, they are preprocessed in the calling thread.
+            Default: 4.
+
+    Example:
+        >>> session = InferenceSession(model)  # doctest: +SKIP
+        >>> results = session(['demo.jpg', mmcv.imread('demo.jpg')])
+    """
+
+    def __init__(self, model, num_workers=4):
+        self.model = model
+        self.device = next(model.parameters()).device  # model device
+        if not next(model.parameters()).is_cuda:
+            for m in model.modules():
+                assert not isinstance(
+                    m, RoIPool
+                ), 'CPU inference with RoIPool is not supported currently.'
+        # build the data pipelines
+        self.pipeline_cfg = copy.deepcopy(model.cfg.data.test.pipeline)
+        pipeline = replace_ImageToTensor(self.pipeline_cfg)
+        self.test_pipeline = Compose(pipeline)
+        pipeline = copy.deepcopy(pipeline)
+        # set loading pipeline type
+        pipeline[0].type = 'LoadImageFromWebcam'
+        self.array_test_pipeline = Compose(pipeline)
+        self.executor = ThreadPoolExecutor(
+            num_workers) if num_workers > 0 else None
+
+    def preprocess(self, img):
+        """Run the test pipeline on an image.
+
+        Args:
+            img (str | ndarray): Either an image file or a loaded image.
+
+        Returns:
+            dict: The processed data of the image.
+        """
+        if isinstance(img, np.ndarray):
+            # directly add img
+            return self.array_test_pipeline(dict(img=img))
+        # add information into dict
+        return self.test_pipeline(
+            dict(img_info=dict(filename=img), img_prefix=None))
+
+    def prepare(self, imgs):
+        """Preprocess images and collate them into a batch on the device of
+        the model.
+
+        Args:
+            imgs (list[str | ndarray]): Either image files or loaded images.
+
+        Returns:
+            dict: The input data of the model.
+        """
+        if self.executor is not None and len(imgs) > 1:
+            datas = list(self.executor.map(self.preprocess, imgs))
+        else:
+            datas = [self.preprocess(img) for img in imgs]
+        data = collate(datas, samples_per_gpu=len(datas))
+        # just get the actual data from DataContainer
+        data['img_metas'] = [
+            img_metas.data[0] for img_metas in data['img_metas']
+        ]
+        data['img'] = [img.data[0] for img in data['img']]
+        if self.device.type == 'cuda':
+            # scatter to specified GPU
+            data = scatter(data, [self.device])[0]
+        return data
+
+    def __call__(self, imgs):
+        """Inference image(s) with the detector.
+
+        Args:
+            imgs (str | ndarray | list[str | ndarray]): Either image files or
+                loaded images.
+
+        Returns:
+            If imgs is a list, a list of the detection results of the images
+            is returned, otherwise the detection result of the image.
+        """
+        is_batch = isinstance(imgs, (list, tuple))
+        data = self.prepare(imgs if is_batch else [imgs])
+        # forward the model
+        with torch.no_grad():
+            results = self.model(return_loss=False, rescale=True, **data)
+        return results if is_batch else results[0]
+
+
+# the sessions refer to their models weakly so that the models are not kept
+# alive by the cache
+_inference_sessions = weakref.WeakKeyDictionary()
+
+
 def inference_detector(model, img):
     """Inference image(s) with the detector.
 
+    The :obj:`InferenceSession` of the model is built at the first call and
+    reused afterwards, until the test pipeline in ``model.cfg`` or the device
+    of the model changes.
+
     Args:
         model (nn.Module): The loaded detector.
-        imgs (str/ndarray or list[str/ndarray]): Either image files or loaded
+        img (str/ndarray or list[str/ndarray]): Either image files or loaded
             images.
 
     Returns:
-        If imgs is a str, a generator will be returned, otherwise return the
-        detection results directly.
+        If img is a list, the detection results of the images are returned
+        in a list, otherwise the detection result of the image.
     """
-    cfg = model.cfg
-    device = next(model.parameters()).device  # model device
-    # prepare data
-    if isinstance(img, np.ndarray):
-        # directly add img
-        data = dict(img=img)
-        cfg = cfg.copy()
-        # set loading pipeline type
-        cfg.data.test.pipeline[0].type = 'LoadImageFromWebcam'
-    else:
-        # add information into dict
-        data = dict(img_info=dict(filename=img), img_prefix=None)
-    # build the data pipeline
-    cfg.data.test.pipeline = replace_ImageToTensor(cfg.data.test.pipeline)
-    test_pipeline = Compose(cfg.data.test.pipeline)
-    data = test_pipeline(data)
-    data = collate([data], samples_per_gpu=1)
-    # just get the actual data from DataContainer
-    data['img_metas'] = [img_metas.data[0] for img_metas in data['img_metas']]
-    data['img'] = [img.data[0] for img in data['img']]
-    if next(model.parameters()).is_cuda:
-        # scatter to specified GPU
-        data = scatter(data, [device])[0]
-    else:
-        for m in model.modules():
-            assert not isinstance(
-                m, RoIPool
-            ), 'CPU inference with RoIPool is not supported currently.'
-
-    # forward the model
-    with torch.no_grad():
-        result = model(return_loss=False, rescale=True, **data)[0]
-    return result
+    session = _inference_sessions.get(model)
+    if (session is None or session.pipeline_cfg != model.cfg.data.test.pipeline
+            or session.device != next(model.parameters()).device):
+        session = InferenceSession(weakref.proxy(model))
+        _inference_sessions[model] = session
+    return session(img)
 
 
-async def async_inference_detector(model, img):
+async def async_inference_detector(model, img, server=None):
     """Async inference image(s) with the detector.
 
     Args:
         model (nn.Module): The loaded detector.
         img (str | ndarray): Either image files or loaded images.
+        server (:obj:`BatchInferenceServer`, optional): If specified, the
+            image is inferenced by the server of the model, which coalesces
+            concurrent calls into batches. Default: None.
 
     Returns:
         Awaitable detection results.
     """
+    if server is not None:
+        assert server.session.model is model, \
+            'the server does not serve the model'
+        return await server(img)
     cfg = model.cfg
     device = next(model.parameters()).device  # model device
     # prepare data
@@ -161,6 +254,217 @@ async def async_inference_detector(model, img):
     return result
 
 
+class BatchInferenceServer(object):
+    """Serve concurrent inference requests in dynamic micro-batches.
+
+    Requests are put in an asyncio queue. A batch is dispatched as soon as
+    ``max_batch_size`` requests are queued or ``max_wait_time`` has passed
+    since its first request. The images of a batch are preprocessed by an
+    :obj:`InferenceSession` in a thread, then the batch is forwarded at once
+    in another thread, so the event loop is never blocked. At most two
+    batches are in flight, one being preprocessed while the other is
+    forwarded, and the requests arriving meanwhile make up larger batches.
+
+    Args:
+        model (nn.Module): The loaded detector.
+        max_batch_size (int): Maximum number of images in a batch.
+            Default: 8.
+        max_wait_time (float): Maximum time in seconds to wait for more
+            requests after the first request of a batch. Default: 0.005.
+        num_workers (int): Number of threads to preprocess the images of a
+            batch. Default: 4.
+        max_records (int): Number of latest requests whose latencies are kept
+            for :meth:`get_stats`. Default: 10000.
+
+    Example:
+        >>> async def detect(model, imgs):  # doctest: +SKIP
+        ...     async with BatchInferenceServer(model) as server:
+        ...         return await asyncio.gather(*[server(img) for img in imgs])
+    """
+
+    stages = ('queue', 'preprocess', 'forward', 'total')
+
+    def __init__(self,
+                 model,
+                 max_batch_size=8,
+                 max_wait_time=0.005,
+                 num_workers=4,
+                 max_records=10000):
+        assert max_batch_size > 0
+        self.session = InferenceSession(model, num_workers=num_workers)
+        self.max_batch_size = max_batch_size
+        self.max_wait_time = max_wait_time
+        self.batch_sizes = Counter()
+        self.max_queue_depth = 0
+        self.latencies = {
+            stage: deque(maxlen=max_records)
+            for stage in self.stages
+        }
+        self._queue = None
+        self._dispatcher = None
+        self._batch_tasks = set()
+        # the forwards are run one by one in a dedicated thread
+        self._forward_executor = ThreadPoolExecutor(1)
+        self._preprocess_executor = ThreadPoolExecutor(1)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def _start(self):
+        """Start the dispatcher in the running event loop."""
+        self._queue = asyncio.Queue()
+        self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def __call__(self, img):
+        """Inference an image in the next batch.
+
+        Args:
+            img (str | ndarray): Either an image file or a loaded image.
+
+        Returns:
+            The detection result of the image.
+        """
+        if self._dispatcher is None:
+            self._start()
+        future = asyncio.get_event_loop().create_future()
+        self._queue.put_nowait((img, future, time.perf_counter()))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def _dispatch(self):
+        """Collect requests into batches and process them."""
+        loop = asyncio.get_event_loop()
+        in_flight = asyncio.Semaphore(2)
+        batch = []
+        try:
+            while True:
+                await in_flight.acquire()
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self.max_wait_time
+                while len(batch) < self.max_batch_size:
+                    if self._queue.empty():
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        try:
+                            batch.append(await asyncio.wait_for(
+                                self._queue.get(), timeout))
+                        except asyncio.TimeoutError:
+                            break
+                    else:
+                        batch.append(self._queue.get_nowait())
+                task = asyncio.ensure_future(self._process(batch, in_flight))
+                self._batch_tasks.add(task)
+                task.add_done_callback(self._batch_tasks.discard)
+                batch = []
+        except asyncio.CancelledError:
+            # the requests of the partial batch are not served
+            self._reject([future for _, future, _ in batch])
+            raise
+
+    async def _process(self, batch, in_flight):
+        """Preprocess and forward a batch, then resolve its futures."""
+        loop = asyncio.get_event_loop()
+        imgs, futures, enqueue_times = zip(*batch)
+        start = time.perf_counter()
+        try:
+            data = await loop.run_in_executor(self._preprocess_executor,
+                                              self.session.prepare, imgs)
+            preprocessed = time.perf_counter()
+            results = await loop.run_in_executor(self._forward_executor,
+                                                 self._forward, data)
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            in_flight.release()
+        end = time.perf_counter()
+
+        self.batch_sizes[len(batch)] += 1
+        for enqueue_time in enqueue_times:
+            self.latencies['queue'].append(start - enqueue_time)
+            self.latencies['preprocess'].append(preprocessed - start)
+            self.latencies['forward'].append(end - preprocessed)
+            self.latencies['total'].append(end - enqueue_time)
+        for future, result in zip(futures, results):
+            # the caller may have been cancelled
+            if not future.done():
+                future.set_result(result)
+
+    def _forward(self, data):
+        with torch.no_grad():
+            return self.session.model(return_loss=False, rescale=True, **data)
+
+    @property
+    def queue_depth(self):
+        """int: Number of requests waiting for a batch."""
+        return 0 if self._queue is None else self._queue.qsize()
+
+    def get_stats(self):
+        """Get the statistics of the served requests.
+
+        Returns:
+            dict: The current and maximum queue depths, the histogram of
+                batch sizes, and the mean, median, 95th percentile and
+                maximum latencies in seconds of each stage ("queue",
+                "preprocess", "forward" and "total") over the latest
+                requests.
+        """
+        latencies = dict()
+        for stage, records in self.latencies.items():
+            if len(records) == 0:
+                continue
+            records = np.array(records)
+            latencies[stage] = dict(
+                mean=records.mean(),
+                p50=np.percentile(records, 50),
+                p95=np.percentile(records, 95),
+                max=records.max())
+        return dict(
+            queue_depth=self.queue_depth,
+            max_queue_depth=self.max_queue_depth,
+            batch_sizes=dict(sorted(self.batch_sizes.items())),
+            latency=latencies)
+
+    @staticmethod
+    def _reject(futures):
+        """Fail the requests that will not be served."""
+        for future in futures:
+            if not future.done():
+                future.set_exception(
+                    RuntimeError('BatchInferenceServer is closed'))
+
+    async def close(self):
+        """Stop serving after the dispatched batches are done.
+
+        The requests not dispatched yet fail with a RuntimeError.
+        """
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+            if self._batch_tasks:
+                await asyncio.wait(list(self._batch_tasks))
+            futures = []
+            while not self._queue.empty():
+                futures.append(self._queue.get_nowait()[1])
+            self._reject(futures)
+        self._forward_executor.shutdown(wait=False)
+        self._preprocess_executor.shutdown(wait=False)
+
+
 def show_result_pyplot(model,
                        img,
                        result,
@@ -2,7 +2,11 @@ import os.path as osp
 import pickle
 import shutil
 import tempfile
+import threading
 import time
+from collections import deque
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 
 import mmcv
 import torch
@@ -13,41 +17,42 @@ from mmcv.runner import get_dist_info
 from mmdet.core import encode_mask_results
 
 
-def single_gpu_test(model,
-                    data_loader,
-                    show=False,
-                    out_dir=None,
-                    show_score_thr=0.3):
-    model.eval()
-    results = []
-    dataset = data_loader.dataset
-    prog_bar = mmcv.ProgressBar(len(dataset))
-    for i, data in enumerate(data_loader):
-        with torch.no_grad():
-            result = model(return_loss=False, rescale=True, **data)
+def _process_batch_results(model, result, imgs, img_metas, show, out_dir,
+                           show_score_thr, draw_lock):
+    """Visualize the results of a batch and encode their masks.
 
-        batch_size = len(result)
-        if show or out_dir:
-            if batch_size == 1 and isinstance(data['img'][0], torch.Tensor):
-                img_tensor = data['img'][0]
-            else:
-                img_tensor = data['img'][0].data[0]
-            img_metas = data['img_metas'][0].data[0]
-            imgs = tensor2imgs(img_tensor, **img_metas[0]['img_norm_cfg'])
-            assert len(imgs) == len(img_metas)
+    Args:
+        model (nn.Module): The tested model wrapped by a data parallel module.
+        result (list): Results of the batch returned by the model.
+        imgs (Tensor | None): The input images, which are only used if the
+            results are visualized.
+        img_metas (list[dict] | None): Meta information of the images.
+        show (bool): Whether to show the results.
+        out_dir (str | None): Directory to save the visualized results.
+        show_score_thr (float): Score threshold of visualized bboxes.
+        draw_lock (threading.Lock): Lock held while drawing, as the
+            matplotlib state is shared by the threads.
+
+    Returns:
+        list: The results with the masks encoded to RLEs.
+    """
+    if show or out_dir:
+        imgs = tensor2imgs(imgs, **img_metas[0]['img_norm_cfg'])
+        assert len(imgs) == len(img_metas)
 
-            for i, (img, img_meta) in enumerate(zip(imgs, img_metas)):
-                h, w, _ = img_meta['img_shape']
-                img_show = img[:h, :w, :]
+        for i, (img, img_meta) in enumerate(zip(imgs, img_metas)):
+            h, w, _ = img_meta['img_shape']
+            img_show = img[:h, :w, :]
 
-                ori_h, ori_w = img_meta['ori_shape'][:-1]
-                img_show = mmcv.imresize(img_show, (ori_w, ori_h))
+            ori_h, ori_w = img_meta['ori_shape'][:-1]
+            img_show = mmcv.imresize(img_show, (ori_w, ori_h))
 
-                if out_dir:
-                    out_file = osp.join(out_dir, img_meta['ori_filename'])
-                else:
-                    out_file = None
+            if out_dir:
+                out_file = osp.join(out_dir, img_meta['ori_filename'])
+            else:
+                out_file = None
 
+            with draw_lock:
                 model.module.show_result(
                     img_show,
                     result[i],
@@ -55,25 +60,120 @@ def single_gpu_test(model,
                     out_file=out_file,
                     score_thr=show_score_thr)
 
-        # encode mask results
-        if isinstance(result[0], tuple):
-            result = [(bbox_results, encode_mask_results(mask_results))
-                      for bbox_results, mask_results in result]
-        results.extend(result)
+    # encode mask results, which may be RLEs already
+    if isinstance(result[0], tuple):
+        result = [(bbox_results, encode_mask_results(mask_results))
+                  for bbox_results, mask_results in result]
+    return result
+
 
+def single_gpu_test(model,
+                    data_loader,
+                    show=False,
+                    out_dir=None,
+                    show_score_thr=0.3,
+                    evaluator=None,
+                    result_workers=0):
+    """Test model with a single gpu.
+
+    Args:
+        model (nn.Module): Model to be tested.
+        data_loader (nn.Dataloader): Pytorch data loader.
+        show (bool): Whether to show the results. Default: False.
+        out_dir (str, optional): Directory to save the visualized results.
+            Default: None.
+        show_score_thr (float): Score threshold of visualized bboxes.
+            Default: 0.3.
+        evaluator (object, optional): If specified, e.g., the
+            :obj:`IncrementalCocoEvaluator` built by
+            ``dataset.incremental_evaluator()``, results of each batch are
+            fed to ``evaluator.process()`` and then dropped instead of being
+            kept until the end. The data loader must not shuffle the dataset.
+            Default: None.
+        result_workers (int): Number of background threads which encode the
+            masks and draw the results of the batches while the model runs
+            on the next ones. At most ``2 * result_workers`` batches are
+            pending, and the results are still collected in order. 0 processes
+            the results in the main thread, which is also the case if ``show``
+            is True, since the windows are shown by the main thread.
+            Default: 0.
+
+    Returns:
+        list: The prediction results, which is empty if ``evaluator`` is
+            specified.
+    """
+    model.eval()
+    results = []
+    dataset = data_loader.dataset
+    prog_bar = mmcv.ProgressBar(len(dataset))
+    num_done = 0
+
+    def collect(result):
+        nonlocal num_done
+        batch_size = len(result)
+        if evaluator is not None:
+            evaluator.process(result, range(num_done, num_done + batch_size))
+        else:
+            results.extend(result)
+        num_done += batch_size
         for _ in range(batch_size):
             prog_bar.update()
+
+    executor = None
+    if result_workers > 0 and not show:
+        executor = ThreadPoolExecutor(result_workers)
+    pending = deque()
+    draw_lock = threading.Lock()
+    try:
+        for data in data_loader:
+            with torch.no_grad():
+                result = model(return_loss=False, rescale=True, **data)
+
+            imgs = img_metas = None
+            if show or out_dir:
+                if len(result) == 1 and isinstance(data['img'][0],
+                                                   torch.Tensor):
+                    imgs = data['img'][0]
+                else:
+                    imgs = data['img'][0].data[0]
+                img_metas = data['img_metas'][0].data[0]
+
+            args = (model, result, imgs, img_metas, show, out_dir,
+                    show_score_thr, draw_lock)
+            if executor is None:
+                collect(_process_batch_results(*args))
+                continue
+            pending.append(executor.submit(_process_batch_results, *args))
+            while len(pending) > 2 * result_workers:
+                collect(pending.popleft().result())
+
+        # flush the pending batches
+        while pending:
+            collect(pending.popleft().result())
+    finally:
+        if executor is not None:
+            executor.shutdown()
     return results
 
 
-def multi_gpu_test(model, data_loader, tmpdir=None, gpu_collect=False):
+def multi_gpu_test(model,
+                   data_loader,
+                   tmpdir=None,
+                   gpu_collect=False,
+                   evaluator=None,
+                   chunk_size=None):
     """Test model with multiple gpus.
 
     This method tests model with multiple gpus and collects the results
-    under two different modes: gpu and cpu modes. By setting 'gpu_collect=True'
-    it encodes results to gpu tensors and use gpu communication for results
-    collection. On cpu mode it saves the results on different gpus to 'tmpdir'
-    and collects them by the rank 0 worker.
+    under three different modes: gpu, cpu and chunked modes. By setting
+    'gpu_collect=True' it encodes results to gpu tensors and use gpu
+    communication for results collection. On cpu mode it saves the results on
+    different gpus to 'tmpdir' and collects them by the rank 0 worker. By
+    setting 'chunk_size', each rank appends its results to chunk files in
+    'tmpdir' during testing, and the rank 0 worker gets a
+    :obj:`ChunkedResults` which loads them lazily in dataset order. Except
+    for 'gpu_collect=True' with the NCCL backend, the collection only relies
+    on CPU communication, e.g. the gloo backend.
 
     Args:
         model (nn.Module): Model to be tested.
@@ -81,32 +181,71 @@ def multi_gpu_test(model, data_loader, tmpdir=None, gpu_collect=False):
         tmpdir (str): Path of directory to save the temporary results from
             different gpus under cpu mode.
         gpu_collect (bool): Option to use either gpu or cpu to collect results.
+        evaluator (object, optional): If specified, results of each batch are
+            fed to ``evaluator.process()`` of each rank and then dropped. Only
+            the states of evaluators, given by ``evaluator.get_state()``, are
+            collected and merged into the evaluator of rank 0.
+            Default: None.
+        chunk_size (int, optional): Number of results in each chunk file
+            under chunked mode, which bounds the memory held by the results
+            on every rank. Ignored if ``evaluator`` is specified.
+            Default: None.
 
     Returns:
-        list: The prediction results.
+        list | :obj:`ChunkedResults`: The prediction results, which is empty
+            if ``evaluator`` is specified.
     """
     model.eval()
     results = []
     dataset = data_loader.dataset
     rank, world_size = get_dist_info()
+    if chunk_size is not None and evaluator is None:
+        tmpdir = get_tmpdir(tmpdir)
+        results = ChunkedResultWriter(tmpdir, chunk_size)
+    if evaluator is not None:
+        # dataset indices of the samples of this rank in order
+        sample_inds = list(iter(data_loader.sampler))
+        num_done = 0
     if rank == 0:
         prog_bar = mmcv.ProgressBar(len(dataset))
     time.sleep(2)  # This line can prevent deadlock problem in some cases.
     for i, data in enumerate(data_loader):
         with torch.no_grad():
             result = model(return_loss=False, rescale=True, **data)
-            # encode mask results
+            # encode mask results, which may be RLEs already
             if isinstance(result[0], tuple):
                 result = [(bbox_results, encode_mask_results(mask_results))
                           for bbox_results, mask_results in result]
-        results.extend(result)
+        if evaluator is not None:
+            evaluator.process(result,
+                              sample_inds[num_done:num_done + len(result)])
+            num_done += len(result)
+        else:
+            results.extend(result)
 
         if rank == 0:
             batch_size = len(result)
             for _ in range(batch_size * world_size):
                 prog_bar.update()
 
+    if evaluator is not None:
+        # collect states of evaluators from all ranks
+        if gpu_collect:
+            states = collect_results_gpu([evaluator.get_state()], world_size)
+        else:
+            states = collect_results_cpu([evaluator.get_state()], world_size,
+                                         tmpdir)
+        if rank == 0:
+            evaluator.merge_states(states[1:])
+        return results
+
     # collect results from all ranks
+    if isinstance(results, ChunkedResultWriter):
+        results.flush()
+        dist.barrier()
+        if rank != 0:
+            return None
+        return ChunkedResults(tmpdir, len(dataset), chunk_size, world_size)
     if gpu_collect:
         results = collect_results_gpu(results, len(dataset))
     else:
@@ -114,26 +253,148 @@ def multi_gpu_test(model, data_loader, tmpdir=None, gpu_collect=False):
     return results
 
 
-def collect_results_cpu(result_part, size, tmpdir=None):
+def get_collect_device():
+    """Device of the tensors used for collecting results.
+
+    Tensors are put on GPU for the NCCL backend and on CPU otherwise, e.g.
+    for the gloo backend.
+    """
+    if dist.is_initialized() and dist.get_backend() == 'nccl':
+        return 'cuda'
+    return 'cpu'
+
+
+def get_tmpdir(tmpdir=None):
+    """Get a tmp dir shared by all ranks.
+
+    Args:
+        tmpdir (str, optional): The tmp dir. If not specified, a new one is
+            created under ``.dist_test`` by rank 0 and broadcast to the other
+            ranks. Default: None.
+
+    Returns:
+        str: The tmp dir.
+    """
     rank, world_size = get_dist_info()
     # create a tmp dir if it is not specified
     if tmpdir is None:
         MAX_LEN = 512
+        device = get_collect_device()
         # 32 is whitespace
         dir_tensor = torch.full((MAX_LEN, ),
                                 32,
                                 dtype=torch.uint8,
-                                device='cuda')
+                                device=device)
         if rank == 0:
             mmcv.mkdir_or_exist('.dist_test')
             tmpdir = tempfile.mkdtemp(dir='.dist_test')
             tmpdir = torch.tensor(
-                bytearray(tmpdir.encode()), dtype=torch.uint8, device='cuda')
+                bytearray(tmpdir.encode()), dtype=torch.uint8, device=device)
             dir_tensor[:len(tmpdir)] = tmpdir
-        dist.broadcast(dir_tensor, 0)
+        if world_size > 1:
+            dist.broadcast(dir_tensor, 0)
         tmpdir = dir_tensor.cpu().numpy().tobytes().decode().rstrip()
     else:
         mmcv.mkdir_or_exist(tmpdir)
+    return tmpdir
+
+
+class ChunkedResultWriter(object):
+    """Append the results of a rank to chunk files.
+
+    Every ``chunk_size`` results are pickled to ``part_{rank}_{i}.pkl`` under
+    ``tmpdir``, the i-th chunk of the rank, so at most ``chunk_size`` results
+    are held in memory.
+
+    Args:
+        tmpdir (str): Directory of the chunk files.
+        chunk_size (int): Number of results in each chunk file.
+    """
+
+    def __init__(self, tmpdir, chunk_size):
+        assert chunk_size > 0
+        self.tmpdir = tmpdir
+        self.chunk_size = chunk_size
+        self.rank, _ = get_dist_info()
+        self.num_chunks = 0
+        self.buffer = []
+
+    def extend(self, results):
+        """Append results and dump the full chunks."""
+        self.buffer.extend(results)
+        while len(self.buffer) >= self.chunk_size:
+            self._dump(self.buffer[:self.chunk_size])
+            self.buffer = self.buffer[self.chunk_size:]
+
+    def flush(self):
+        """Dump the remaining results as the last chunk."""
+        if len(self.buffer) > 0:
+            self._dump(self.buffer)
+            self.buffer = []
+
+    def _dump(self, results):
+        chunk_file = osp.join(self.tmpdir,
+                              f'part_{self.rank}_{self.num_chunks}.pkl')
+        with open(chunk_file, 'wb') as f:
+            pickle.dump(results, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.num_chunks += 1
+
+
+class ChunkedResults(Sequence):
+    """Results of all ranks dumped by :obj:`ChunkedResultWriter`, in dataset
+    order.
+
+    As the distributed sampler assigns the i-th sample of the dataset to rank
+    ``i % world_size``, the results are loaded lazily from the chunk files of
+    the ranks in turn. Only the last loaded chunk of each rank is kept, so
+    iterating over the results holds at most ``world_size * chunk_size`` of
+    them. Pickling gives a plain list, which is written item by item.
+
+    Args:
+        tmpdir (str): Directory of the chunk files.
+        size (int): Number of samples of the dataset, since the data loader
+            may pad some samples.
+        chunk_size (int): Number of results in each chunk file.
+        world_size (int): Number of ranks.
+    """
+
+    def __init__(self, tmpdir, size, chunk_size, world_size):
+        self.tmpdir = tmpdir
+        self.size = size
+        self.chunk_size = chunk_size
+        self.world_size = world_size
+        self._chunks = dict()
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(self.size))]
+        if idx < 0:
+            idx += self.size
+        if not 0 <= idx < self.size:
+            raise IndexError('result index out of range')
+        rank = idx % self.world_size
+        chunk_idx, offset = divmod(idx // self.world_size, self.chunk_size)
+        if rank not in self._chunks or self._chunks[rank][0] != chunk_idx:
+            chunk_file = osp.join(self.tmpdir, f'part_{rank}_{chunk_idx}.pkl')
+            with open(chunk_file, 'rb') as f:
+                self._chunks[rank] = (chunk_idx, pickle.load(f))
+        return self._chunks[rank][1][offset]
+
+    def __reduce__(self):
+        return list, (), None, iter(self)
+
+    def close(self):
+        """Remove the chunk files."""
+        self._chunks = dict()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+def collect_results_cpu(result_part, size, tmpdir=None):
+    rank, world_size = get_dist_info()
+    tmpdir = get_tmpdir(tmpdir)
     # dump the part result to the dir
     mmcv.dump(result_part, osp.join(tmpdir, f'part_{rank}.pkl'))
     dist.barrier()
@@ -159,16 +420,17 @@ def collect_results_cpu(result_part, size, tmpdir=None):
 
 def collect_results_gpu(result_part, size):
     rank, world_size = get_dist_info()
+    device = get_collect_device()
     # dump result part to tensor with pickle
     part_tensor = torch.tensor(
-        bytearray(pickle.dumps(result_part)), dtype=torch.uint8, device='cuda')
+        bytearray(pickle.dumps(result_part)), dtype=torch.uint8, device=device)
     # gather all result part tensor shape
-    shape_tensor = torch.tensor(part_tensor.shape, device='cuda')
+    shape_tensor = torch.tensor(part_tensor.shape, device=device)
     shape_list = [shape_tensor.clone() for _ in range(world_size)]
     dist.all_gather(shape_list, shape_tensor)
     # padding result part tensor to max length
     shape_max = torch.tensor(shape_list).max()
-    part_send = torch.zeros(shape_max, dtype=torch.uint8, device='cuda')
+    part_send = torch.zeros(shape_max, dtype=torch.uint8, device=device)
     part_send[:shape_tensor[0]] = part_tensor
     part_recv_list = [
         part_tensor.new_zeros(shape_max) for _ in range(world_size)
@@ -4,7 +4,8 @@ import numpy as np
 import torch
 from mmcv.parallel import MMDataParallel, MMDistributedDataParallel
 from mmcv.runner import (HOOKS, DistSamplerSeedHook, EpochBasedRunner,
-                         Fp16OptimizerHook, OptimizerHook, build_optimizer)
+                         Fp16OptimizerHook, OptimizerHook, build_optimizer,
+                         build_runner)
 from mmcv.utils import build_from_cfg
 
 from mmdet.core import DistEvalHook, EvalHook
@@ -57,6 +58,13 @@ def train_detector(model,
                 f'{cfg.data.imgs_per_gpu} in this experiments')
         cfg.data.samples_per_gpu = cfg.data.imgs_per_gpu
 
+    # configs without a `runner` section are trained by epochs
+    if 'runner' not in cfg:
+        cfg.runner = dict(type='EpochBasedRunner', max_epochs=cfg.total_epochs)
+    elif 'total_epochs' in cfg and 'max_epochs' in cfg.runner:
+        assert cfg.total_epochs == cfg.runner.max_epochs
+    persistent_workers = cfg.data.get('persistent_workers', False)
+
     data_loaders = [
         build_dataloader(
             ds,
@@ -65,7 +73,9 @@ def train_detector(model,
             # cfg.gpus will be ignored if distributed
             len(cfg.gpu_ids),
             dist=distributed,
-            seed=cfg.seed) for ds in dataset
+            seed=cfg.seed,
+            runner_type=cfg.runner['type'],
+            persistent_workers=persistent_workers) for ds in dataset
     ]
 
     # put model on gpus
@@ -84,12 +94,14 @@ def train_detector(model,
 
     # build runner
     optimizer = build_optimizer(model, cfg.optimizer)
-    runner = EpochBasedRunner(
-        model,
-        optimizer=optimizer,
-        work_dir=cfg.work_dir,
-        logger=logger,
-        meta=meta)
+    runner = build_runner(
+        cfg.runner,
+        default_args=dict(
+            model=model,
+            optimizer=optimizer,
+            work_dir=cfg.work_dir,
+            logger=logger,
+            meta=meta))
     # an ugly workaround to make .log and .log.json filenames the same
     runner.timestamp = timestamp
 
@@ -107,7 +119,7 @@ def train_detector(model,
     runner.register_training_hooks(cfg.lr_config, optimizer_config,
                                    cfg.checkpoint_config, cfg.log_config,
                                    cfg.get('momentum_config', None))
-    if distributed:
+    if distributed and isinstance(runner, EpochBasedRunner):
         runner.register_hook(DistSamplerSeedHook())
 
     # register eval hooks
@@ -124,8 +136,10 @@ def train_detector(model,
             samples_per_gpu=val_samples_per_gpu,
             workers_per_gpu=cfg.data.workers_per_gpu,
             dist=distributed,
-            shuffle=False)
+            shuffle=False,
+            persistent_workers=persistent_workers)
         eval_cfg = cfg.get('evaluation', {})
+        eval_cfg['by_epoch'] = cfg.runner['type'] != 'IterBasedRunner'
         eval_hook = DistEvalHook if distributed else EvalHook
         runner.register_hook(eval_hook(val_dataloader, **eval_cfg))
 
@@ -145,6 +159,14 @@ def train_detector(model,
 
     if cfg.resume_from:
         runner.resume(cfg.resume_from)
+        if cfg.runner['type'] == 'IterBasedRunner':
+            # continue the infinite stream of batches where it was stopped,
+            # a batch of non-distributed training has one batch per gpu
+            num_gpus = 1 if distributed else len(cfg.gpu_ids)
+            num_batches = runner.iter * num_gpus
+            for data_loader in data_loaders:
+                if hasattr(data_loader.sampler, 'set_start_iter'):
+                    data_loader.sampler.set_start_iter(num_batches)
     elif cfg.load_from:
         runner.load_checkpoint(cfg.load_from)
-    runner.run(data_loaders, cfg.workflow, cfg.total_epochs)
+    runner.run(data_loaders, cfg.workflow)
@@ -4,6 +4,7 @@ import torch
 from torch.nn.modules.utils import _pair
 
 from .builder import ANCHOR_GENERATORS
+from .grid_cache import GridCache, grid_cache_key
 
 
 @ANCHOR_GENERATORS.register_module()
@@ -35,6 +36,10 @@ class AnchorGenerator(object):
             float is given, they will be used to shift the centers of anchors.
         center_offset (float): The offset of center in proportion to anchors'
             width and height. By default it is 0 in V2.0.
+        cache_size (int): Maximum number of per-level anchors and valid flags
+            kept in the LRU :obj:`GridCache`. The hits and misses are exposed
+            by ``self.grid_cache.info()``. Set it to 0 to disable the cache.
+            Defaults to 256.
 
     Examples:
         >>> from mmdet.core import AnchorGenerator
@@ -64,7 +69,8 @@ class AnchorGenerator(object):
                  octave_base_scale=None,
                  scales_per_octave=None,
                  centers=None,
-                 center_offset=0.):
+                 center_offset=0.,
+                 cache_size=256):
         # check center and center_offset
         if center_offset != 0:
             assert centers is None, 'center cannot be set when center_offset' \
@@ -108,6 +114,7 @@ class AnchorGenerator(object):
         self.centers = centers
         self.center_offset = center_offset
         self.base_anchors = self.gen_base_anchors()
+        self.grid_cache = GridCache(cache_size)
 
     @property
     def num_base_anchors(self):
@@ -221,11 +228,21 @@ class AnchorGenerator(object):
         assert self.num_levels == len(featmap_sizes)
         multi_level_anchors = []
         for i in range(self.num_levels):
-            anchors = self.single_level_grid_anchors(
-                self.base_anchors[i].to(device),
+            key = grid_cache_key(
                 featmap_sizes[i],
+                'anchors',
+                i,
                 self.strides[i],
+                self.base_anchors[i].dtype,
                 device=device)
+            # the grid is built right away on a miss, so the loop variable
+            # is safe to be used in the lambda
+            anchors = self.grid_cache.get(
+                key, lambda: self.single_level_grid_anchors(
+                    self.base_anchors[i].to(device),
+                    featmap_sizes[i],
+                    self.strides[i],
+                    device=device))
             multi_level_anchors.append(anchors)
         return multi_level_anchors
 
@@ -290,10 +307,15 @@ class AnchorGenerator(object):
             h, w = pad_shape[:2]
             valid_feat_h = min(int(np.ceil(h / anchor_stride[1])), feat_h)
             valid_feat_w = min(int(np.ceil(w / anchor_stride[0])), feat_w)
-            flags = self.single_level_valid_flags((feat_h, feat_w),
-                                                  (valid_feat_h, valid_feat_w),
-                                                  self.num_base_anchors[i],
-                                                  device=device)
+            key = grid_cache_key((feat_h, feat_w),
+                                 'flags', (valid_feat_h, valid_feat_w),
+                                 self.num_base_anchors[i],
+                                 device=device)
+            flags = self.grid_cache.get(
+                key, lambda: self.single_level_valid_flags(
+                    (feat_h, feat_w), (valid_feat_h, valid_feat_w),
+                    self.num_base_anchors[i],
+                    device=device))
             multi_level_flags.append(flags)
         return multi_level_flags
 
@@ -362,6 +384,8 @@ class SSDAnchorGenerator(AnchorGenerator):
         scale_major (bool): Whether to multiply scales first when generating
             base anchors. If true, the anchors in the same row will have the
             same scales. It is always set to be False in SSD.
+        cache_size (int): Maximum number of cached per-level anchors and
+            valid flags. Defaults to 256.
     """
 
     def __init__(self,
@@ -369,7 +393,8 @@ class SSDAnchorGenerator(AnchorGenerator):
                  ratios,
                  basesize_ratio_range,
                  input_size=300,
-                 scale_major=True):
+                 scale_major=True,
+                 cache_size=256):
         assert len(strides) == len(ratios)
         assert mmcv.is_tuple_of(basesize_ratio_range, float)
 
@@ -432,6 +457,7 @@ class SSDAnchorGenerator(AnchorGenerator):
         self.scale_major = scale_major
         self.center_offset = 0
         self.base_anchors = self.gen_base_anchors()
+        self.grid_cache = GridCache(cache_size)
 
     def gen_base_anchors(self):
         """Generate base anchors.
@@ -583,10 +609,11 @@ class LegacySSDAnchorGenerator(SSDAnchorGenerator, LegacyAnchorGenerator):
                  ratios,
                  basesize_ratio_range,
                  input_size=300,
-                 scale_major=True):
+                 scale_major=True,
+                 cache_size=256):
         super(LegacySSDAnchorGenerator,
               self).__init__(strides, ratios, basesize_ratio_range, input_size,
-                             scale_major)
+                             scale_major, cache_size)
         self.centers = [((stride - 1) / 2., (stride - 1) / 2.)
                         for stride in strides]
         self.base_anchors = self.gen_base_anchors()
@@ -601,9 +628,11 @@ class YOLOAnchorGenerator(AnchorGenerator):
             in multiple feature levels.
         base_sizes (list[list[tuple[int, int]]]): The basic sizes
             of anchors in multiple levels.
+        cache_size (int): Maximum number of cached per-level anchors and
+            valid flags. Defaults to 256.
     """
 
-    def __init__(self, strides, base_sizes):
+    def __init__(self, strides, base_sizes, cache_size=256):
         self.strides = [_pair(stride) for stride in strides]
         self.centers = [(stride[0] / 2., stride[1] / 2.)
                         for stride in self.strides]
@@ -614,6 +643,7 @@ class YOLOAnchorGenerator(AnchorGenerator):
             self.base_sizes.append(
                 [_pair(base_size) for base_size in base_sizes_per_level])
         self.base_anchors = self.gen_base_anchors()
+        self.grid_cache = GridCache(cache_size)
 
     @property
     def num_levels(self):
@@ -0,0 +1,97 @@
+from collections import OrderedDict, namedtuple
+
+import torch
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class GridCache(object):
+    """A bounded LRU cache of anchor and point grids.
+
+    The anchors and valid flags of a feature level only depend on the
+    feature map size, the stride and the device, which repeat constantly
+    under fixed-scale test pipelines and a small set of training scales.
+    The generators look up the grids here before building them again.
+
+    Note:
+        The cached tensors are shared by all the callers with the same key,
+        so they must not be modified in place.
+
+    Args:
+        maxsize (int): Maximum number of cached tensors. The least recently
+            used one is evicted when it is exceeded. The cache is disabled if
+            it is 0. Defaults to 256.
+
+    Examples:
+        >>> import torch
+        >>> from mmdet.core.anchor import GridCache
+        >>> cache = GridCache(maxsize=2)
+        >>> grid = cache.get(('grid', (2, 2)), lambda: torch.zeros(4, 4))
+        >>> grid = cache.get(('grid', (2, 2)), lambda: torch.zeros(4, 4))
+        >>> print(cache.info())
+        CacheInfo(hits=1, misses=1, maxsize=2, currsize=1)
+    """
+
+    def __init__(self, maxsize=256):
+        assert maxsize >= 0
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def get(self, key, build_fn):
+        """Get the tensor of ``key``, building it by ``build_fn`` on a miss.
+
+        Grids are not cached while tracing or exporting to ONNX, where the
+        feature map sizes may be symbolic.
+
+        Args:
+            key (tuple): Hashable key of the tensor.
+            build_fn (callable): Function without arguments that builds the
+                tensor.
+
+        Returns:
+            torch.Tensor: The cached or the newly built tensor.
+        """
+        if self.maxsize == 0 or torch.jit.is_tracing() or \
+                torch.onnx.is_in_onnx_export():
+            return build_fn()
+        try:
+            value = self._cache[key]
+        except KeyError:
+            self.misses += 1
+            value = build_fn()
+            self._cache[key] = value
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+        return value
+
+    def info(self):
+        """CacheInfo: The hits, misses, maxsize and current size."""
+        return CacheInfo(self.hits, self.misses, self.maxsize,
+                         len(self._cache))
+
+    def clear(self):
+        """Clear the cached tensors and reset the counters."""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.info()})'
+
+
+def grid_cache_key(featmap_size, *args, device='cuda'):
+    """Build a hashable cache key of a feature level.
+
+    ``featmap_size`` may be a ``torch.Size`` or hold 0-dim tensors, and the
+    device may be given as a string or a ``torch.device``.
+    """
+    return (tuple(int(s) for s in featmap_size), ) + args + \
+        (torch.device(device), )
@@ -1,10 +1,21 @@
 import torch
 
 from .builder import ANCHOR_GENERATORS
+from .grid_cache import GridCache, grid_cache_key
 
 
 @ANCHOR_GENERATORS.register_module()
 class PointGenerator(object):
+    """Point generator for point-based detectors.
+
+    Args:
+        cache_size (int): Maximum number of grid points and valid flags kept
+            in the LRU :obj:`GridCache`. Set it to 0 to disable the cache.
+            Defaults to 256.
+    """
+
+    def __init__(self, cache_size=256):
+        self.grid_cache = GridCache(cache_size)
 
     def _meshgrid(self, x, y, row_major=True):
         xx = x.repeat(len(y))
@@ -15,6 +26,11 @@ class PointGenerator(object):
             return yy, xx
 
     def grid_points(self, featmap_size, stride=16, device='cuda'):
+        key = grid_cache_key(featmap_size, 'points', stride, device=device)
+        return self.grid_cache.get(
+            key, lambda: self._grid_points(featmap_size, stride, device))
+
+    def _grid_points(self, featmap_size, stride=16, device='cuda'):
         feat_h, feat_w = featmap_size
         shift_x = torch.arange(0., feat_w, device=device) * stride
         shift_y = torch.arange(0., feat_h, device=device) * stride
@@ -25,6 +41,12 @@ class PointGenerator(object):
         return all_points
 
     def valid_flags(self, featmap_size, valid_size, device='cuda'):
+        key = grid_cache_key(
+            featmap_size, 'flags', tuple(valid_size), device=device)
+        return self.grid_cache.get(
+            key, lambda: self._valid_flags(featmap_size, valid_size, device))
+
+    def _valid_flags(self, featmap_size, valid_size, device='cuda'):
         feat_h, feat_w = featmap_size
         valid_h, valid_w = valid_size
         assert valid_h <= feat_h and valid_w <= feat_w
@@ -1,3 +1,5 @@
+import math
+
 import torch
 
 from ..builder import BBOX_ASSIGNERS
@@ -35,6 +37,14 @@ class MaxIoUAssigner(BaseAssigner):
         gpu_assign_thr (int): The upper bound of the number of GT for GPU
             assign. When the number of gt is above this threshold, will assign
             on CPU device. Negative values mean not assign on CPU.
+        gt_chunk_size (int): The number of gts whose overlaps with the bboxes
+            are computed at a time by :meth:`assign_batch`, and by
+            :meth:`assign` when there are more gts than it. It bounds the
+            memory of crowded images so that they can be assigned on device
+            instead of falling back to CPU by ``gpu_assign_thr``. Negative
+            values mean not chunking the gts in :meth:`assign`, and chunks
+            as large as the overlaps of the most crowded image in
+            :meth:`assign_batch`.
     """
 
     def __init__(self,
@@ -46,6 +56,7 @@ class MaxIoUAssigner(BaseAssigner):
                  ignore_wrt_candidates=True,
                  match_low_quality=True,
                  gpu_assign_thr=-1,
+                 gt_chunk_size=-1,
                  iou_calculator=dict(type='BboxOverlaps2D')):
         self.pos_iou_thr = pos_iou_thr
         self.neg_iou_thr = neg_iou_thr
@@ -54,6 +65,7 @@ class MaxIoUAssigner(BaseAssigner):
         self.ignore_iof_thr = ignore_iof_thr
         self.ignore_wrt_candidates = ignore_wrt_candidates
         self.gpu_assign_thr = gpu_assign_thr
+        self.gt_chunk_size = gt_chunk_size
         self.match_low_quality = match_low_quality
         self.iou_calculator = build_iou_calculator(iou_calculator)
 
@@ -90,6 +102,10 @@ class MaxIoUAssigner(BaseAssigner):
             >>> expected_gt_inds = torch.LongTensor([1, 0])
             >>> assert torch.all(assign_result.gt_inds == expected_gt_inds)
         """
+        if 0 < self.gt_chunk_size < gt_bboxes.shape[0]:
+            return self.assign_batch(bboxes, [gt_bboxes], [gt_bboxes_ignore],
+                                     [gt_labels])[0]
+
         assign_on_cpu = True if (self.gpu_assign_thr > 0) and (
             gt_bboxes.shape[0] > self.gpu_assign_thr) else False
         # compute overlap and assign gt on CPU when number of GT is large
@@ -124,6 +140,185 @@ class MaxIoUAssigner(BaseAssigner):
                 assign_result.labels = assign_result.labels.to(device)
         return assign_result
 
+    def assign_batch(self,
+                     bboxes,
+                     gt_bboxes_list,
+                     gt_bboxes_ignore_list=None,
+                     gt_labels_list=None,
+                     valid_flags=None):
+        """Assign gts to the bboxes of a batch of images together.
+
+        The gts of the images are padded to the same number, and the overlaps
+        of shape (num_imgs, num_gts, num_bboxes) are computed for
+        ``gt_chunk_size`` gts at a time, reducing them to the max overlaps of
+        each bbox and gt on the fly. Without ``gt_chunk_size``, the chunks
+        hold ``ceil(max_num_gts / num_imgs)`` gts so that they take no more
+        memory than the overlaps of the most crowded image. The result of
+        each image is the same as :meth:`assign` on its valid bboxes.
+        ``gpu_assign_thr`` is not checked here, callers should assign the
+        images with too many gts by :meth:`assign` instead.
+
+        Args:
+            bboxes (Tensor): Bounding boxes to be assigned, shape (n, 4) if
+                they are shared by all the images, otherwise (B, n, 4).
+            gt_bboxes_list (list[Tensor]): Groundtruth boxes of each image,
+                shape (k, 4).
+            gt_bboxes_ignore_list (list[Tensor], optional): Ground truth
+                bboxes to be ignored of each image.
+            gt_labels_list (list[Tensor], optional): Label of gt_bboxes of
+                each image, shape (k, ).
+            valid_flags (Tensor, optional): The bboxes to be assigned in each
+                image, shape (B, n). Other bboxes are left out of the result.
+
+        Returns:
+            list[:obj:`AssignResult`]: The assign result of each image.
+
+        Example:
+            >>> self = MaxIoUAssigner(0.5, 0.5, gt_chunk_size=1)
+            >>> bboxes = torch.Tensor([[0, 0, 10, 10], [10, 10, 20, 20]])
+            >>> gt_bboxes_list = [
+            >>>     torch.Tensor([[0, 0, 10, 9]]),
+            >>>     torch.Tensor([[0, 0, 10, 9], [10, 10, 20, 20]])]
+            >>> assign_results = self.assign_batch(bboxes, gt_bboxes_list)
+            >>> assert torch.all(
+            >>>     assign_results[1].gt_inds == torch.LongTensor([1, 2]))
+        """
+        num_imgs = len(gt_bboxes_list)
+        if gt_bboxes_ignore_list is None:
+            gt_bboxes_ignore_list = [None] * num_imgs
+        if gt_labels_list is None:
+            gt_labels_list = [None] * num_imgs
+        bboxes = bboxes[..., :4]
+        if bboxes.dim() == 2:
+            bboxes = bboxes[None].expand(num_imgs, -1, -1)
+        num_bboxes = bboxes.size(1)
+        if valid_flags is None:
+            valid_flags = bboxes.new_ones((num_imgs, num_bboxes),
+                                          dtype=torch.bool)
+
+        # the overlaps with invalid and ignored bboxes are set to -1
+        masked_flags = ~valid_flags
+        if self.ignore_iof_thr > 0 and num_bboxes > 0:
+            for i, gt_bboxes_ignore in enumerate(gt_bboxes_ignore_list):
+                if gt_bboxes_ignore is None or gt_bboxes_ignore.numel() == 0:
+                    continue
+                if self.ignore_wrt_candidates:
+                    ignore_overlaps = self.iou_calculator(
+                        bboxes[i], gt_bboxes_ignore, mode='iof')
+                    ignore_max_overlaps, _ = ignore_overlaps.max(dim=1)
+                else:
+                    ignore_overlaps = self.iou_calculator(
+                        gt_bboxes_ignore, bboxes[i], mode='iof')
+                    ignore_max_overlaps, _ = ignore_overlaps.max(dim=0)
+                masked_flags[i] |= ignore_max_overlaps > self.ignore_iof_thr
+
+        # pad the gts of all the images to the same number
+        num_gts = [gt_bboxes.size(0) for gt_bboxes in gt_bboxes_list]
+        max_num_gts = max(num_gts, default=0)
+        padded_gt_bboxes = bboxes.new_zeros((num_imgs, max_num_gts, 4))
+        for i, gt_bboxes in enumerate(gt_bboxes_list):
+            padded_gt_bboxes[i, :num_gts[i]] = gt_bboxes[:, :4]
+        gt_valid_flags = torch.arange(
+            max_num_gts, device=bboxes.device)[None] < bboxes.new_tensor(
+                num_gts, dtype=torch.long)[:, None]
+
+        max_overlaps = bboxes.new_full((num_imgs, num_bboxes), -1)
+        argmax_overlaps = bboxes.new_zeros((num_imgs, num_bboxes),
+                                           dtype=torch.long)
+        # (img, gt, bbox) indices of the low quality matches
+        low_quality_matches = []
+        if self.gt_chunk_size > 0:
+            chunk_size = self.gt_chunk_size
+        else:
+            # keep the overlaps of a chunk no larger than those of the most
+            # crowded image assigned alone
+            chunk_size = max(math.ceil(max_num_gts / max(num_imgs, 1)), 1)
+        for start in range(0, max_num_gts if num_bboxes > 0 else 0,
+                           chunk_size):
+            end = min(start + chunk_size, max_num_gts)
+            # leave out the images whose gts have run out
+            img_inds = [i for i in range(num_imgs) if num_gts[i] > start]
+            if len(img_inds) == num_imgs:
+                img_inds = slice(None)
+            else:
+                img_inds = torch.tensor(img_inds, device=bboxes.device)
+            overlaps = self.iou_calculator(
+                padded_gt_bboxes[img_inds, start:end], bboxes[img_inds])
+            chunk_gt_valid_flags = gt_valid_flags[img_inds, start:end]
+            overlaps.masked_fill_(masked_flags[img_inds][:, None, :], -1)
+            overlaps.masked_fill_(~chunk_gt_valid_flags[..., None], -1)
+
+            # the first gt with the max overlap wins as in ``Tensor.max``
+            chunk_max_overlaps, chunk_argmax_overlaps = overlaps.max(dim=1)
+            img_max_overlaps = max_overlaps[img_inds]
+            better = chunk_max_overlaps > img_max_overlaps
+            max_overlaps[img_inds] = torch.where(better, chunk_max_overlaps,
+                                                 img_max_overlaps)
+            argmax_overlaps[img_inds] = torch.where(
+                better, chunk_argmax_overlaps + start,
+                argmax_overlaps[img_inds])
+
+            if self.match_low_quality:
+                gt_max_overlaps, gt_argmax_overlaps = overlaps.max(dim=2)
+                gt_flags = chunk_gt_valid_flags & (
+                    gt_max_overlaps >= self.min_pos_iou)
+                if self.gt_max_assign_all:
+                    matches = torch.nonzero(
+                        overlaps == gt_max_overlaps[..., None], as_tuple=False)
+                    matches = matches[gt_flags[matches[:, 0], matches[:, 1]]]
+                else:
+                    matched_gts = torch.nonzero(gt_flags, as_tuple=False)
+                    matched_bboxes = gt_argmax_overlaps[gt_flags][:, None]
+                    matches = torch.cat([matched_gts, matched_bboxes], dim=1)
+                if isinstance(img_inds, torch.Tensor):
+                    matches[:, 0] = img_inds[matches[:, 0]]
+                matches[:, 1] += start
+                low_quality_matches.append(matches)
+
+        assigned_gt_inds = torch.full_like(argmax_overlaps, -1)
+        if isinstance(self.neg_iou_thr, float):
+            assigned_gt_inds[(max_overlaps >= 0)
+                             & (max_overlaps < self.neg_iou_thr)] = 0
+        elif isinstance(self.neg_iou_thr, tuple):
+            assert len(self.neg_iou_thr) == 2
+            assigned_gt_inds[(max_overlaps >= self.neg_iou_thr[0])
+                             & (max_overlaps < self.neg_iou_thr[1])] = 0
+        pos_inds = max_overlaps >= self.pos_iou_thr
+        assigned_gt_inds[pos_inds] = argmax_overlaps[pos_inds] + 1
+        if low_quality_matches:
+            matches = torch.cat(low_quality_matches)
+            # the last matched gt of a bbox wins as in ``assign_wrt_overlaps``
+            bbox_keys = matches[:, 0] * num_bboxes + matches[:, 2]
+            _, order = (bbox_keys * max_num_gts + matches[:, 1]).sort()
+            bbox_keys = bbox_keys[order]
+            last_flags = torch.ones_like(bbox_keys, dtype=torch.bool)
+            last_flags[:-1] = bbox_keys[1:] != bbox_keys[:-1]
+            assigned_gt_inds.view(-1)[
+                bbox_keys[last_flags]] = matches[order[last_flags], 1] + 1
+
+        assign_results = []
+        for i, gt_labels in enumerate(gt_labels_list):
+            img_gt_inds = assigned_gt_inds[i][valid_flags[i]]
+            img_max_overlaps = max_overlaps[i][valid_flags[i]]
+            if num_gts[i] == 0:
+                # No truth, assign everything to background
+                img_gt_inds.fill_(0)
+                img_max_overlaps.fill_(0)
+            if gt_labels is None:
+                assigned_labels = None
+            else:
+                assigned_labels = img_gt_inds.new_full(img_gt_inds.shape, -1)
+                pos_flags = img_gt_inds > 0
+                assigned_labels[pos_flags] = gt_labels[img_gt_inds[pos_flags] -
+                                                       1]
+            assign_results.append(
+                AssignResult(
+                    num_gts[i],
+                    img_gt_inds,
+                    img_max_overlaps,
+                    labels=assigned_labels))
+        return assign_results
+
     def assign_wrt_overlaps(self, overlaps, gt_labels=None):
         """Assign w.r.t. the overlaps of bboxes with gts.
 
@@ -168,22 +168,23 @@ def delta2bbox(rois,
                 [0.0000, 0.3161, 4.1945, 0.6839],
                 [5.0000, 5.0000, 5.0000, 5.0000]])
     """
-    means = deltas.new_tensor(means).view(1, -1).repeat(1, deltas.size(1) // 4)
-    stds = deltas.new_tensor(stds).view(1, -1).repeat(1, deltas.size(1) // 4)
+    num_deltas = deltas.size(-1) // 4
+    means = deltas.new_tensor(means).view(1, -1).repeat(1, num_deltas)
+    stds = deltas.new_tensor(stds).view(1, -1).repeat(1, num_deltas)
     denorm_deltas = deltas * stds + means
-    dx = denorm_deltas[:, 0::4]
-    dy = denorm_deltas[:, 1::4]
-    dw = denorm_deltas[:, 2::4]
-    dh = denorm_deltas[:, 3::4]
+    dx = denorm_deltas[..., 0::4]
+    dy = denorm_deltas[..., 1::4]
+    dw = denorm_deltas[..., 2::4]
+    dh = denorm_deltas[..., 3::4]
     max_ratio = np.abs(np.log(wh_ratio_clip))
     dw = dw.clamp(min=-max_ratio, max=max_ratio)
     dh = dh.clamp(min=-max_ratio, max=max_ratio)
     # Compute center of each roi
-    px = ((rois[:, 0] + rois[:, 2]) * 0.5).unsqueeze(1).expand_as(dx)
-    py = ((rois[:, 1] + rois[:, 3]) * 0.5).unsqueeze(1).expand_as(dy)
+    px = ((rois[..., 0] + rois[..., 2]) * 0.5).unsqueeze(-1).expand_as(dx)
+    py = ((rois[..., 1] + rois[..., 3]) * 0.5).unsqueeze(-1).expand_as(dy)
     # Compute width/height of each roi
-    pw = (rois[:, 2] - rois[:, 0]).unsqueeze(1).expand_as(dw)
-    ph = (rois[:, 3] - rois[:, 1]).unsqueeze(1).expand_as(dh)
+    pw = (rois[..., 2] - rois[..., 0]).unsqueeze(-1).expand_as(dw)
+    ph = (rois[..., 3] - rois[..., 1]).unsqueeze(-1).expand_as(dh)
     # Use exp(network energy) to enlarge/shrink each roi
     gw = pw * dw.exp()
     gh = ph * dh.exp()
@@ -196,9 +197,20 @@ def delta2bbox(rois,
     x2 = gx + gw * 0.5
     y2 = gy + gh * 0.5
     if clip_border and max_shape is not None:
-        x1 = x1.clamp(min=0, max=max_shape[1])
-        y1 = y1.clamp(min=0, max=max_shape[0])
-        x2 = x2.clamp(min=0, max=max_shape[1])
-        y2 = y2.clamp(min=0, max=max_shape[0])
+        if isinstance(max_shape[0], (tuple, list)):
+            # bounds of each image in the batch
+            assert rois.dim() == 3 and len(max_shape) == rois.size(0)
+            max_shape = x1.new_tensor([shape[:2] for shape in max_shape])
+            max_h = max_shape[:, 0].view(-1, 1, 1)
+            max_w = max_shape[:, 1].view(-1, 1, 1)
+            x1 = torch.min(x1.clamp(min=0), max_w)
+            y1 = torch.min(y1.clamp(min=0), max_h)
+            x2 = torch.min(x2.clamp(min=0), max_w)
+            y2 = torch.min(y2.clamp(min=0), max_h)
+        else:
+            x1 = x1.clamp(min=0, max=max_shape[1])
+            y1 = y1.clamp(min=0, max=max_shape[0])
+            x2 = x2.clamp(min=0, max=max_shape[1])
+            y2 = y2.clamp(min=0, max=max_shape[0])
     bboxes = torch.stack([x1, y1, x2, y2], dim=-1).view(deltas.size())
     return bboxes
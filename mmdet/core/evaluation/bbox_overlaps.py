@@ -1,17 +1,38 @@
 import numpy as np
 
+# max number of bbox pairs whose ious are computed at once, which bounds the
+# memory of the intermediate arrays to a few tens of MB
+MAX_CHUNK_PAIRS = 2**20
+# blocks of more pairs are computed one by one by batched_bbox_overlaps
+MAX_BATCHED_BLOCK_PAIRS = 1024
 
-def bbox_overlaps(bboxes1, bboxes2, mode='iou', eps=1e-6):
+
+def bbox_overlaps(bboxes1,
+                  bboxes2,
+                  mode='iou',
+                  eps=1e-6,
+                  is_aligned=False,
+                  chunk_size=None):
     """Calculate the ious between each bbox of bboxes1 and bboxes2.
 
+    The ious of all pairs are computed with broadcasting, in chunks of rows of
+    bboxes1 so that the intermediate arrays do not exceed ``chunk_size``
+    pairs.
+
     Args:
         bboxes1(ndarray): shape (n, 4)
-        bboxes2(ndarray): shape (k, 4)
+        bboxes2(ndarray): shape (k, 4), or (n, 4) if ``is_aligned``
         mode(str): iou (intersection over union) or iof (intersection
             over foreground)
+        eps(float): A value added to the denominator for numerical
+            stability. Default: 1e-6.
+        is_aligned(bool): If True, only the ious of the aligned pairs
+            (bboxes1[i], bboxes2[i]) are computed. Default: False.
+        chunk_size(int | None): Max number of pairs computed at once.
+            Default: None, which means :data:`MAX_CHUNK_PAIRS`.
 
     Returns:
-        ious(ndarray): shape (n, k)
+        ious(ndarray): shape (n, k), or (n, ) if ``is_aligned``
     """
 
     assert mode in ['iou', 'iof']
@@ -20,29 +41,143 @@ def bbox_overlaps(bboxes1, bboxes2, mode='iou', eps=1e-6):
     bboxes2 = bboxes2.astype(np.float32)
     rows = bboxes1.shape[0]
     cols = bboxes2.shape[0]
+    if is_aligned:
+        assert rows == cols
+        return _aligned_overlaps(bboxes1, bboxes2, mode, eps)
+
     ious = np.zeros((rows, cols), dtype=np.float32)
     if rows * cols == 0:
         return ious
-    exchange = False
-    if bboxes1.shape[0] > bboxes2.shape[0]:
-        bboxes1, bboxes2 = bboxes2, bboxes1
-        ious = np.zeros((cols, rows), dtype=np.float32)
-        exchange = True
+    if chunk_size is None:
+        chunk_size = MAX_CHUNK_PAIRS
     area1 = (bboxes1[:, 2] - bboxes1[:, 0]) * (bboxes1[:, 3] - bboxes1[:, 1])
     area2 = (bboxes2[:, 2] - bboxes2[:, 0]) * (bboxes2[:, 3] - bboxes2[:, 1])
-    for i in range(bboxes1.shape[0]):
-        x_start = np.maximum(bboxes1[i, 0], bboxes2[:, 0])
-        y_start = np.maximum(bboxes1[i, 1], bboxes2[:, 1])
-        x_end = np.minimum(bboxes1[i, 2], bboxes2[:, 2])
-        y_end = np.minimum(bboxes1[i, 3], bboxes2[:, 3])
+    chunk_rows = max(chunk_size // cols, 1)
+    for start in range(0, rows, chunk_rows):
+        end = min(start + chunk_rows, rows)
+        b1 = bboxes1[start:end, None]
+        x_start = np.maximum(b1[..., 0], bboxes2[:, 0])
+        y_start = np.maximum(b1[..., 1], bboxes2[:, 1])
+        x_end = np.minimum(b1[..., 2], bboxes2[:, 2])
+        y_end = np.minimum(b1[..., 3], bboxes2[:, 3])
         overlap = np.maximum(x_end - x_start, 0) * np.maximum(
             y_end - y_start, 0)
         if mode == 'iou':
-            union = area1[i] + area2 - overlap
+            union = area1[start:end, None] + area2 - overlap
         else:
-            union = area1[i] if not exchange else area2
+            union = area1[start:end, None]
         union = np.maximum(union, eps)
-        ious[i, :] = overlap / union
-    if exchange:
-        ious = ious.T
+        ious[start:end] = overlap / union
     return ious
+
+
+def batched_bbox_overlaps(bboxes1_list,
+                          bboxes2_list,
+                          mode='iou',
+                          eps=1e-6,
+                          chunk_size=None):
+    """Calculate the ious between the bboxes of each pair of arrays.
+
+    This is equivalent to ``[bbox_overlaps(b1, b2) for b1, b2 in
+    zip(bboxes1_list, bboxes2_list)]``, i.e. the diagonal blocks of the ious
+    of the concatenated bboxes, but the pairs of all small blocks (up to
+    :data:`MAX_BATCHED_BLOCK_PAIRS` pairs) are gathered and computed in a few
+    vectorized chunks instead of a loop, which is faster for many small
+    arrays such as the boxes of a class in each image of a dataset. Larger
+    blocks are computed one by one, where the loop overhead is negligible.
+
+    Args:
+        bboxes1_list (list[ndarray]): Arrays of shape (n_i, 4).
+        bboxes2_list (list[ndarray]): Arrays of shape (k_i, 4).
+        mode (str): iou (intersection over union) or iof (intersection
+            over foreground)
+        eps (float): A value added to the denominator for numerical
+            stability. Default: 1e-6.
+        chunk_size (int | None): Max number of pairs computed at once.
+            Default: None, which means :data:`MAX_CHUNK_PAIRS`.
+
+    Returns:
+        list[ndarray]: The ious of shape (n_i, k_i) of each pair of arrays.
+            They are views of a single flat array.
+
+    Example:
+        >>> bboxes1 = [np.array([[0, 0, 10, 10]]), np.zeros((0, 4))]
+        >>> bboxes2 = [np.array([[0, 0, 10, 20], [5, 5, 15, 15]]),
+        ...            np.array([[0, 0, 1, 1]])]
+        >>> [ious.shape for ious in batched_bbox_overlaps(bboxes1, bboxes2)]
+        [(1, 2), (0, 1)]
+    """
+    assert mode in ['iou', 'iof']
+    assert len(bboxes1_list) == len(bboxes2_list)
+    if len(bboxes1_list) == 0:
+        return []
+    if chunk_size is None:
+        chunk_size = MAX_CHUNK_PAIRS
+    rows = np.array([len(bboxes) for bboxes in bboxes1_list], dtype=np.int64)
+    cols = np.array([len(bboxes) for bboxes in bboxes2_list], dtype=np.int64)
+    bboxes1 = np.concatenate([
+        np.asarray(bboxes, dtype=np.float32).reshape(-1, 4)
+        for bboxes in bboxes1_list
+    ])
+    bboxes2 = np.concatenate([
+        np.asarray(bboxes, dtype=np.float32).reshape(-1, 4)
+        for bboxes in bboxes2_list
+    ])
+    row_offsets = np.cumsum(rows) - rows
+    col_offsets = np.cumsum(cols) - cols
+
+    # the pairs of each block are enumerated in row-major order
+    pair_counts = rows * cols
+    pair_ends = np.cumsum(pair_counts)
+    pair_starts = pair_ends - pair_counts
+    ious = np.zeros(int(pair_ends[-1]), dtype=np.float32)
+    is_small = pair_counts <= MAX_BATCHED_BLOCK_PAIRS
+    for i in np.nonzero(~is_small)[0]:
+        ious[pair_starts[i]:pair_ends[i]] = bbox_overlaps(
+            bboxes1[row_offsets[i]:row_offsets[i] + rows[i]],
+            bboxes2[col_offsets[i]:col_offsets[i] + cols[i]],
+            mode,
+            eps,
+            chunk_size=chunk_size).ravel()
+
+    # the pairs of the small blocks, skipping the empty ones
+    blocks = np.nonzero(is_small & (pair_counts > 0))[0]
+    block_ends = np.cumsum(pair_counts[blocks])
+    num_pairs = int(block_ends[-1]) if len(blocks) else 0
+    for start in range(0, num_pairs, chunk_size):
+        end = min(start + chunk_size, num_pairs)
+        inds = np.arange(start, end)
+        block_inds = np.searchsorted(block_ends, inds, side='right')
+        pair_blocks = blocks[block_inds]
+        local_inds = inds - block_ends[block_inds] + pair_counts[pair_blocks]
+        block_cols = cols[pair_blocks]
+        inds1 = row_offsets[pair_blocks] + local_inds // block_cols
+        inds2 = col_offsets[pair_blocks] + local_inds % block_cols
+        ious[pair_starts[pair_blocks] + local_inds] = _aligned_overlaps(
+            bboxes1[inds1], bboxes2[inds2], mode, eps)
+    return [
+        block.reshape(n, k)
+        for block, n, k in zip(np.split(ious, pair_ends[:-1]), rows, cols)
+    ]
+
+
+def _aligned_overlaps(bboxes1, bboxes2, mode='iou', eps=1e-6):
+    """Calculate the ious between aligned pairs of float32 bboxes.
+
+    The arithmetic is the same as :func:`bbox_overlaps`, so the results are
+    identical to the corresponding elements of its output.
+    """
+    area1 = (bboxes1[:, 2] - bboxes1[:, 0]) * (bboxes1[:, 3] - bboxes1[:, 1])
+    x_start = np.maximum(bboxes1[:, 0], bboxes2[:, 0])
+    y_start = np.maximum(bboxes1[:, 1], bboxes2[:, 1])
+    x_end = np.minimum(bboxes1[:, 2], bboxes2[:, 2])
+    y_end = np.minimum(bboxes1[:, 3], bboxes2[:, 3])
+    overlap = np.maximum(x_end - x_start, 0) * np.maximum(y_end - y_start, 0)
+    if mode == 'iou':
+        area2 = (bboxes2[:, 2] - bboxes2[:, 0]) * (
+            bboxes2[:, 3] - bboxes2[:, 1])
+        union = area1 + area2 - overlap
+    else:
+        union = area1
+    union = np.maximum(union, eps)
+    return overlap / union
@@ -18,11 +18,15 @@ class EvalHook(Hook):
 
     Attributes:
         dataloader (DataLoader): A PyTorch dataloader.
-        start (int, optional): Evaluation starting epoch. It enables evaluation
-            before the training starts if ``start`` <= the resuming epoch.
+        start (int, optional): Evaluation starting epoch (or iteration if
+            ``by_epoch`` is False). It enables evaluation before the training
+            starts if ``start`` <= the resuming epoch (or iteration).
             If None, whether to evaluate is merely decided by ``interval``.
             Default: None.
-        interval (int): Evaluation interval (by epochs). Default: 1.
+        interval (int): Evaluation interval (by epochs or iterations).
+            Default: 1.
+        by_epoch (bool): Whether to evaluate by epochs, or by iterations
+            for iteration-based training. Default: True.
         save_best (str, optional): If a metric is specified, it would measure
             the best checkpoint during evaluation. The information about best
             checkpoint would be save in best.json.
@@ -35,6 +39,11 @@ class EvalHook(Hook):
             it will infer a reasonable rule. Keys such as 'mAP' or 'AR' will
             be inferred by 'greater' rule. Keys contain 'loss' will be inferred
              by 'less' rule. Options are 'greater', 'less'. Default: None.
+        incremental (bool): If True, results are evaluated batch by batch
+            with the evaluator built by ``incremental_evaluator()`` of the
+            dataset, e.g., :obj:`IncrementalCocoEvaluator`, instead of being
+            kept until all images are tested. The evaluator is built with
+            ``eval_kwargs``. Default: False.
         **eval_kwargs: Evaluation arguments fed into the evaluate function of
             the dataset.
     """
@@ -48,8 +57,10 @@ class EvalHook(Hook):
                  dataloader,
                  start=None,
                  interval=1,
+                 by_epoch=True,
                  save_best=None,
                  rule=None,
+                 incremental=False,
                  **eval_kwargs):
         if not isinstance(dataloader, DataLoader):
             raise TypeError('dataloader must be a pytorch DataLoader, but got'
@@ -63,9 +74,16 @@ class EvalHook(Hook):
             start = 0
         self.dataloader = dataloader
         self.interval = interval
+        self.by_epoch = by_epoch
         self.start = start
         assert isinstance(save_best, str) or save_best is None
         self.save_best = save_best
+        if incremental and not hasattr(dataloader.dataset,
+                                       'incremental_evaluator'):
+            raise TypeError(
+                f'{type(dataloader.dataset).__name__} does not support '
+                'incremental evaluation')
+        self.incremental = incremental
         self.eval_kwargs = eval_kwargs
         self.initial_epoch_flag = True
 
@@ -110,37 +128,63 @@ class EvalHook(Hook):
 
     def before_train_epoch(self, runner):
         """Evaluate the model only at the start of training."""
-        if not self.initial_epoch_flag:
+        if not self.by_epoch or not self.initial_epoch_flag:
             return
         if self.start is not None and runner.epoch >= self.start:
             self.after_train_epoch(runner)
         self.initial_epoch_flag = False
 
+    def before_train_iter(self, runner):
+        """Evaluate the model only at the start of iteration-based
+        training."""
+        if self.by_epoch or not self.initial_epoch_flag:
+            return
+        if self.start is not None and runner.iter >= self.start:
+            self.after_train_iter(runner)
+        self.initial_epoch_flag = False
+
     def evaluation_flag(self, runner):
-        """Judge whether to perform_evaluation after this epoch.
+        """Judge whether to perform_evaluation after this epoch (or
+        iteration).
 
         Returns:
             bool: The flag indicating whether to perform evaluation.
         """
+        if self.by_epoch:
+            current = runner.epoch
+            check_time = self.every_n_epochs
+        else:
+            current = runner.iter
+            check_time = self.every_n_iters
         if self.start is None:
-            if not self.every_n_epochs(runner, self.interval):
+            if not check_time(runner, self.interval):
                 # No evaluation during the interval epochs.
                 return False
-        elif (runner.epoch + 1) < self.start:
+        elif (current + 1) < self.start:
             # No evaluation if start is larger than the current epoch.
             return False
         else:
             # Evaluation only at epochs 3, 5, 7... if start==3 and interval==2
-            if (runner.epoch + 1 - self.start) % self.interval:
+            if (current + 1 - self.start) % self.interval:
                 return False
         return True
 
     def after_train_epoch(self, runner):
+        if self.by_epoch:
+            self._do_evaluate(runner)
+
+    def after_train_iter(self, runner):
+        if not self.by_epoch:
+            self._do_evaluate(runner)
+
+    def _do_evaluate(self, runner):
         if not self.evaluation_flag(runner):
             return
         from mmdet.apis import single_gpu_test
-        results = single_gpu_test(runner.model, self.dataloader, show=False)
-        key_score = self.evaluate(runner, results)
+        evaluator = self.build_evaluator()
+        results = single_gpu_test(
+            runner.model, self.dataloader, show=False, evaluator=evaluator)
+        key_score = self.evaluate(runner, results, evaluator)
         if self.save_best:
             best_score = runner.meta['hook_msgs'].get(
                 'best_score', self.init_value_map[self.rule])
@@ -154,12 +198,22 @@ class EvalHook(Hook):
                     osp.join(runner.work_dir,
                              f'best_{self.key_indicator}.pth'))
                 self.logger.info(
-                    f'Now best checkpoint is epoch_{runner.epoch + 1}.pth.'
+                    f'Now best checkpoint is {osp.basename(last_ckpt)}.'
                     f'Best {self.key_indicator} is {best_score:0.4f}')
 
-    def evaluate(self, runner, results):
-        eval_res = self.dataloader.dataset.evaluate(
-            results, logger=runner.logger, **self.eval_kwargs)
+    def build_evaluator(self):
+        """Build the evaluator of incremental evaluation if enabled."""
+        if not self.incremental:
+            return None
+        return self.dataloader.dataset.incremental_evaluator(
+            **self.eval_kwargs)
+
+    def evaluate(self, runner, results, evaluator=None):
+        if evaluator is not None:
+            eval_res = evaluator.evaluate(logger=runner.logger)
+        else:
+            eval_res = self.dataloader.dataset.evaluate(
+                results, logger=runner.logger, **self.eval_kwargs)
         for name, val in eval_res.items():
             runner.log_buffer.output[name] = val
         runner.log_buffer.ready = True
@@ -185,6 +239,8 @@ class DistEvalHook(EvalHook):
             If None, whether to evaluate is merely decided by ``interval``.
             Default: None.
         interval (int): Evaluation interval (by epochs). Default: 1.
+        by_epoch (bool): Whether to evaluate by epochs or by iterations.
+            Default: True.
         tmpdir (str | None): Temporary directory to save the results of all
             processes. Default: None.
         gpu_collect (bool): Whether to use gpu or cpu to collect results.
@@ -199,6 +255,8 @@ class DistEvalHook(EvalHook):
             ``CheckpointHook`` should device EvalHook. Default: None.
         rule (str | None): Comparison rule for best score. If set to None,
             it will infer a reasonable rule. Default: 'None'.
+        incremental (bool): Whether to evaluate results batch by batch on
+            each rank, see :class:`EvalHook`. Default: False.
         **eval_kwargs: Evaluation arguments fed into the evaluate function of
             the dataset.
     """
@@ -207,22 +265,26 @@ class DistEvalHook(EvalHook):
                  dataloader,
                  start=None,
                  interval=1,
+                 by_epoch=True,
                  tmpdir=None,
                  gpu_collect=False,
                  save_best=None,
                  rule=None,
+                 incremental=False,
                  **eval_kwargs):
         super().__init__(
             dataloader,
             start=start,
             interval=interval,
+            by_epoch=by_epoch,
             save_best=save_best,
             rule=rule,
+            incremental=incremental,
             **eval_kwargs)
         self.tmpdir = tmpdir
         self.gpu_collect = gpu_collect
 
-    def after_train_epoch(self, runner):
+    def _do_evaluate(self, runner):
         if not self.evaluation_flag(runner):
             return
 
@@ -230,14 +292,16 @@ class DistEvalHook(EvalHook):
         tmpdir = self.tmpdir
         if tmpdir is None:
             tmpdir = osp.join(runner.work_dir, '.eval_hook')
+        evaluator = self.build_evaluator()
         results = multi_gpu_test(
             runner.model,
             self.dataloader,
             tmpdir=tmpdir,
-            gpu_collect=self.gpu_collect)
+            gpu_collect=self.gpu_collect,
+            evaluator=evaluator)
         if runner.rank == 0:
             print('\n')
-            key_score = self.evaluate(runner, results)
+            key_score = self.evaluate(runner, results, evaluator)
             if self.save_best:
                 best_score = runner.meta['hook_msgs'].get(
                     'best_score', self.init_value_map[self.rule])
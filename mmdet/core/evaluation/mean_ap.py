@@ -1,3 +1,4 @@
+from itertools import starmap
 from multiprocessing import Pool
 
 import mmcv
@@ -237,6 +238,111 @@ def tpfp_default(det_bboxes,
     return tp, fp
 
 
+def tpfp_vectorized(det_bboxes,
+                    det_img_inds,
+                    gt_bboxes,
+                    gt_img_inds,
+                    gt_ignore_inds=None,
+                    iou_thr=0.5,
+                    area_ranges=None):
+    """Check if detected bboxes of a class in all images are tp or fp.
+
+    This is a vectorized equivalent of :func:`tpfp_default`. Instead of being
+    called once per image, it takes the detections and gts of all images
+    flattened into single arrays together with the image index of each box,
+    computes the IoUs of all (det, gt) pairs that belong to the same image in
+    one shot and performs the greedy matching with array operations.
+
+    Args:
+        det_bboxes (ndarray): Detected bboxes of all images, of shape (m, 5).
+        det_img_inds (ndarray): Image index of each detected bbox, of
+            shape (m, ).
+        gt_bboxes (ndarray): GT bboxes (including ignored ones) of all
+            images, of shape (n, 4).
+        gt_img_inds (ndarray): Image index of each gt bbox, of shape (n, ).
+            It must be sorted in ascending order.
+        gt_ignore_inds (ndarray | None): Indicator of ignored gts, of
+            shape (n, ). Default: None.
+        iou_thr (float): IoU threshold to be considered as matched.
+            Default: 0.5.
+        area_ranges (list[tuple] | None): Range of bbox areas to be evaluated,
+            in the format [(min1, max1), (min2, max2), ...]. Default: None.
+
+    Returns:
+        tuple[np.ndarray]: (tp, fp) whose elements are 0 and 1. The shape of
+            each array is (num_scales, m).
+    """
+    det_img_inds = np.asarray(det_img_inds, dtype=np.int64)
+    gt_img_inds = np.asarray(gt_img_inds, dtype=np.int64)
+    if gt_ignore_inds is None:
+        gt_ignore_inds = np.zeros(gt_bboxes.shape[0], dtype=bool)
+
+    num_dets = det_bboxes.shape[0]
+    if area_ranges is None:
+        area_ranges = [(None, None)]
+    num_scales = len(area_ranges)
+    tp = np.zeros((num_scales, num_dets), dtype=np.float32)
+    fp = np.zeros((num_scales, num_dets), dtype=np.float32)
+    if num_dets == 0:
+        return tp, fp
+
+    # gts of each image occupy a contiguous slice [gt_start, gt_end)
+    gt_start = np.searchsorted(gt_img_inds, det_img_inds, side='left')
+    gt_end = np.searchsorted(gt_img_inds, det_img_inds, side='right')
+    pair_counts = gt_end - gt_start
+    has_gt = pair_counts > 0
+
+    # for each det, the max iou with all gts of the same image and which gt
+    # overlaps most with it (the first one in case of a tie, as np.argmax)
+    ious_max = np.full(num_dets, -1, dtype=np.float32)
+    ious_argmax = np.zeros(num_dets, dtype=np.int64)
+    num_pairs = int(pair_counts.sum())
+    if num_pairs > 0:
+        pair_start = np.cumsum(pair_counts) - pair_counts
+        pair_dets = np.repeat(np.arange(num_dets), pair_counts)
+        pair_gts = np.arange(num_pairs) - np.repeat(pair_start - gt_start,
+                                                    pair_counts)
+        ious = bbox_overlaps(
+            det_bboxes[pair_dets, :4], gt_bboxes[pair_gts], is_aligned=True)
+        seg_start = pair_start[has_gt]
+        ious_max[has_gt] = np.maximum.reduceat(ious, seg_start)
+        is_max = ious == ious_max[pair_dets]
+        first_max = np.minimum.reduceat(
+            np.where(is_max, np.arange(num_pairs), num_pairs), seg_start)
+        ious_argmax[has_gt] = pair_gts[first_max]
+
+    det_areas = (det_bboxes[:, 2] - det_bboxes[:, 0]) * (
+        det_bboxes[:, 3] - det_bboxes[:, 1])
+    gt_areas = (gt_bboxes[:, 2] - gt_bboxes[:, 0]) * (
+        gt_bboxes[:, 3] - gt_bboxes[:, 1])
+    # gts are exclusive to an image, so sorting all dets by score keeps the
+    # per-image order in which they compete for gts
+    sort_inds = np.argsort(-det_bboxes[:, -1], kind='stable')
+    matched = has_gt & (ious_max >= iou_thr)
+    for k, (min_area, max_area) in enumerate(area_ranges):
+        # if no area range is specified, gt_area_ignore is all False
+        if min_area is None:
+            gt_area_ignore = np.zeros_like(gt_ignore_inds, dtype=bool)
+            det_in_range = np.ones(num_dets, dtype=bool)
+        else:
+            gt_area_ignore = (gt_areas < min_area) | (gt_areas >= max_area)
+            det_in_range = (det_areas >= min_area) & (det_areas < max_area)
+        matched_gts = ious_argmax[matched]
+        # dets matched with an ignored gt are neither tp nor fp
+        valid = matched.copy()
+        valid[matched] = ~(
+            gt_ignore_inds[matched_gts] | gt_area_ignore[matched_gts])
+        fp[k, valid] = 1
+        # the highest scored det of each covered gt is a tp, others are fp
+        valid_inds = sort_inds[valid[sort_inds]]
+        _, first_inds = np.unique(ious_argmax[valid_inds], return_index=True)
+        tp_inds = valid_inds[first_inds]
+        tp[k, tp_inds] = 1
+        fp[k, tp_inds] = 0
+        fp[k, ~matched & det_in_range] = 1
+    return tp, fp
+
+
 def get_cls_results(det_results, annotations, class_id):
     """Get det results and gt information of a certain class.
 
@@ -264,6 +370,49 @@ def get_cls_results(det_results, annotations, class_id):
     return cls_dets, cls_gts, cls_gts_ignore
 
 
+def get_flat_annotations(annotations):
+    """Flatten gt information of all images into arrays sorted by class.
+
+    Args:
+        annotations (list[dict]): Same as `eval_map()`.
+
+    Returns:
+        dict: Flattened annotations with the following keys, all of which
+            are sorted by (label, image index). Normal gts come before
+            ignored ones of the same image, as in :func:`tpfp_default`.
+
+            - `bboxes`: ndarray of shape (n, 4)
+            - `labels`: ndarray of shape (n, )
+            - `img_inds`: ndarray of shape (n, )
+            - `ignore`: bool ndarray of shape (n, )
+    """
+    bboxes, labels, img_inds, ignore = [], [], [], []
+    for key_suffix, is_ignore in (('', False), ('_ignore', True)):
+        for i, ann in enumerate(annotations):
+            if ann.get('labels' + key_suffix, None) is None:
+                continue
+            num_gts = ann['labels' + key_suffix].shape[0]
+            bboxes.append(ann['bboxes' + key_suffix].reshape(-1, 4))
+            labels.append(ann['labels' + key_suffix].reshape(-1))
+            img_inds.append(np.full(num_gts, i, dtype=np.int64))
+            ignore.append(np.full(num_gts, is_ignore, dtype=bool))
+    if len(bboxes) == 0:
+        return dict(
+            bboxes=np.zeros((0, 4), dtype=np.float32),
+            labels=np.zeros((0, ), dtype=np.int64),
+            img_inds=np.zeros((0, ), dtype=np.int64),
+            ignore=np.zeros((0, ), dtype=bool))
+    labels = np.concatenate(labels).astype(np.int64)
+    img_inds = np.concatenate(img_inds)
+    # lexsort is stable, which keeps normal gts before ignored ones
+    order = np.lexsort((img_inds, labels))
+    return dict(
+        bboxes=np.vstack(bboxes)[order],
+        labels=labels[order],
+        img_inds=img_inds[order],
+        ignore=np.concatenate(ignore)[order])
+
+
 def eval_map(det_results,
              annotations,
              scale_ranges=None,
@@ -271,7 +420,8 @@ def eval_map(det_results,
              dataset=None,
              logger=None,
              tpfp_fn=None,
-             nproc=4):
+             nproc=4,
+             vectorized=False):
     """Evaluate mAP of a dataset.
 
     Args:
@@ -303,6 +453,12 @@ def eval_map(det_results,
             to evaluate tp & fp. Default None.
         nproc (int): Processes used for computing TP and FP.
             Default: 4.
+        vectorized (bool): Whether to compute TP and FP in a single process
+            with :func:`tpfp_vectorized`, which handles all images of a class
+            at once instead of spawning a process pool and evaluating images
+            one by one. It only replaces :func:`tpfp_default`; other tpfp
+            functions are called image by image in the current process.
+            ``nproc`` is ignored in this case. Default: False.
 
     Returns:
         tuple: (mAP, [dict, dict, ...])
@@ -315,47 +471,82 @@ def eval_map(det_results,
     area_ranges = ([(rg[0]**2, rg[1]**2) for rg in scale_ranges]
                    if scale_ranges is not None else None)
 
-    pool = Pool(nproc)
+    # choose proper function according to datasets to compute tp and fp
+    if tpfp_fn is None:
+        if dataset in ['det', 'vid']:
+            tpfp_fn = tpfp_imagenet
+        else:
+            tpfp_fn = tpfp_default
+    if not callable(tpfp_fn):
+        raise ValueError(
+            f'tpfp_fn has to be a function or None, but got {tpfp_fn}')
+
+    if not vectorized:
+        pool = Pool(nproc)
+    elif tpfp_fn is tpfp_default:
+        flat_anns = get_flat_annotations(annotations)
+        cls_ranges = np.searchsorted(
+            flat_anns['labels'], np.arange(num_classes + 1), side='left')
     eval_results = []
     for i in range(num_classes):
-        # get gt and det bboxes of this class
-        cls_dets, cls_gts, cls_gts_ignore = get_cls_results(
-            det_results, annotations, i)
-        # choose proper function according to datasets to compute tp and fp
-        if tpfp_fn is None:
-            if dataset in ['det', 'vid']:
-                tpfp_fn = tpfp_imagenet
-            else:
-                tpfp_fn = tpfp_default
-        if not callable(tpfp_fn):
-            raise ValueError(
-                f'tpfp_fn has to be a function or None, but got {tpfp_fn}')
-
-        # compute tp and fp for each image with multiple processes
-        tpfp = pool.starmap(
-            tpfp_fn,
-            zip(cls_dets, cls_gts, cls_gts_ignore,
-                [iou_thr for _ in range(num_imgs)],
-                [area_ranges for _ in range(num_imgs)]))
-        tp, fp = tuple(zip(*tpfp))
-        # calculate gt number of each scale
-        # ignored gts or gts beyond the specific scale are not counted
-        num_gts = np.zeros(num_scales, dtype=int)
-        for j, bbox in enumerate(cls_gts):
+        if vectorized and tpfp_fn is tpfp_default:
+            cls_dets = [img_res[i] for img_res in det_results]
+            det_img_inds = np.repeat(
+                np.arange(num_imgs), [dets.shape[0] for dets in cls_dets])
+            cls_dets = np.vstack(cls_dets)
+            cls_slice = slice(cls_ranges[i], cls_ranges[i + 1])
+            cls_gts = flat_anns['bboxes'][cls_slice]
+            cls_gts_ignore = flat_anns['ignore'][cls_slice]
+            # compute tp and fp for all images of this class at once
+            tp, fp = tpfp_vectorized(cls_dets, det_img_inds, cls_gts,
+                                     flat_anns['img_inds'][cls_slice],
+                                     cls_gts_ignore, iou_thr, area_ranges)
+            # calculate gt number of each scale
+            # ignored gts or gts beyond the specific scale are not counted
+            cls_gts = cls_gts[~cls_gts_ignore]
+            num_gts = np.zeros(num_scales, dtype=int)
             if area_ranges is None:
-                num_gts[0] += bbox.shape[0]
+                num_gts[0] = cls_gts.shape[0]
             else:
-                gt_areas = (bbox[:, 2] - bbox[:, 0]) * (
-                    bbox[:, 3] - bbox[:, 1])
+                gt_areas = (cls_gts[:, 2] - cls_gts[:, 0]) * (
+                    cls_gts[:, 3] - cls_gts[:, 1])
                 for k, (min_area, max_area) in enumerate(area_ranges):
-                    num_gts[k] += np.sum((gt_areas >= min_area)
-                                         & (gt_areas < max_area))
+                    num_gts[k] = np.sum((gt_areas >= min_area)
+                                        & (gt_areas < max_area))
+        else:
+            # get gt and det bboxes of this class
+            cls_dets, cls_gts, cls_gts_ignore = get_cls_results(
+                det_results, annotations, i)
+            # compute tp and fp for each image, with multiple processes
+            # unless the vectorized engine is chosen
+            args = zip(cls_dets, cls_gts, cls_gts_ignore,
+                       [iou_thr for _ in range(num_imgs)],
+                       [area_ranges for _ in range(num_imgs)])
+            if vectorized:
+                tpfp = list(starmap(tpfp_fn, args))
+            else:
+                tpfp = pool.starmap(tpfp_fn, args)
+            tp, fp = tuple(zip(*tpfp))
+            tp = np.hstack(tp)
+            fp = np.hstack(fp)
+            # calculate gt number of each scale
+            # ignored gts or gts beyond the specific scale are not counted
+            num_gts = np.zeros(num_scales, dtype=int)
+            for j, bbox in enumerate(cls_gts):
+                if area_ranges is None:
+                    num_gts[0] += bbox.shape[0]
+                else:
+                    gt_areas = (bbox[:, 2] - bbox[:, 0]) * (
+                        bbox[:, 3] - bbox[:, 1])
+                    for k, (min_area, max_area) in enumerate(area_ranges):
+                        num_gts[k] += np.sum((gt_areas >= min_area)
+                                             & (gt_areas < max_area))
+            cls_dets = np.vstack(cls_dets)
         # sort all det bboxes by score, also sort tp and fp
-        cls_dets = np.vstack(cls_dets)
         num_dets = cls_dets.shape[0]
         sort_inds = np.argsort(-cls_dets[:, -1])
-        tp = np.hstack(tp)[:, sort_inds]
-        fp = np.hstack(fp)[:, sort_inds]
+        tp = tp[:, sort_inds]
+        fp = fp[:, sort_inds]
         # calculate recall and precision with tp and fp
         tp = np.cumsum(tp, axis=1)
         fp = np.cumsum(fp, axis=1)
@@ -376,7 +567,8 @@ def eval_map(det_results,
             'precision': precisions,
             'ap': ap
         })
-    pool.close()
+    if not vectorized:
+        pool.close()
     if scale_ranges is not None:
         # shape (num_classes, num_scales)
         all_ap = np.vstack([cls_result['ap'] for cls_result in eval_results])
@@ -4,40 +4,96 @@ import numpy as np
 from mmcv.utils import print_log
 from terminaltables import AsciiTable
 
-from .bbox_overlaps import bbox_overlaps
+from .bbox_overlaps import batched_bbox_overlaps
 
+# max number of elements of the padded iou rows processed at once
+MAX_ROWS_CHUNK = 2**22
 
-def _recalls(all_ious, proposal_nums, thrs):
 
-    img_num = all_ious.shape[0]
-    total_gt_num = sum([ious.shape[0] for ious in all_ious])
+def _matched_ious(all_ious, proposal_nums):
+    """Greedily match the gts with the proposals of each image.
 
-    _ious = np.zeros((proposal_nums.size, total_gt_num), dtype=np.float32)
-    for k, proposal_num in enumerate(proposal_nums):
-        tmp_ious = np.zeros(0)
-        for i in range(img_num):
-            ious = all_ious[i][:, :proposal_num].copy()
-            gt_ious = np.zeros((ious.shape[0]))
-            if ious.size == 0:
-                tmp_ious = np.hstack((tmp_ious, gt_ious))
-                continue
-            for j in range(ious.shape[0]):
-                gt_max_overlaps = ious.argmax(axis=1)
-                max_ious = ious[np.arange(0, ious.shape[0]), gt_max_overlaps]
-                gt_idx = max_ious.argmax()
-                gt_ious[j] = max_ious[gt_idx]
-                box_idx = gt_max_overlaps[gt_idx]
-                ious[gt_idx, :] = -1
-                ious[:, box_idx] = -1
-            tmp_ious = np.hstack((tmp_ious, gt_ious))
-        _ious[k, :] = tmp_ious
-
-    _ious = np.fliplr(np.sort(_ious, axis=1))
-    recalls = np.zeros((proposal_nums.size, thrs.size))
-    for i, thr in enumerate(thrs):
-        recalls[:, i] = (_ious >= thr).sum(axis=1) / float(total_gt_num)
+    In each round, the (gt, proposal) pair with the max iou of each image is
+    matched, then both are removed, until all gts are matched. The best
+    proposal of each gt is kept up to date and only recomputed when it is
+    taken by another gt, so that all images are matched together with a few
+    vectorized operations per round.
 
-    return recalls
+    Args:
+        all_ious (list[ndarray]): The ious between the gts and the proposals
+            of each image, of shape (n_i, p_i).
+        proposal_nums (ndarray): Numbers of top proposals.
+
+    Returns:
+        ndarray: The ious of the pairs matched in each round for each image
+            and each proposal num, of shape (num_proposal_nums, total_gts).
+            They are -1 once all proposals are taken, or 0 if the image has no
+            proposal.
+    """
+    gt_counts = np.array([ious.shape[0] for ious in all_ious], dtype=np.int64)
+    prop_counts = np.array([ious.shape[1] for ious in all_ious],
+                           dtype=np.int64)
+    gt_offsets = np.cumsum(gt_counts) - gt_counts
+    matched_ious = np.zeros((proposal_nums.size, int(gt_counts.sum())),
+                            dtype=np.float32)
+
+    img_inds = np.nonzero((gt_counts > 0) & (prop_counts > 0))[0]
+    # the gt rows of several images are padded and matched at once
+    max_props = int(prop_counts.max(initial=1))
+    chunk_gts = max(MAX_ROWS_CHUNK // max_props, 1)
+    chunk_ends = np.searchsorted(
+        np.cumsum(gt_counts[img_inds]),
+        np.arange(chunk_gts, gt_counts[img_inds].sum(), chunk_gts))
+    for chunk_img_inds in np.split(img_inds, chunk_ends):
+        if chunk_img_inds.size == 0:
+            continue
+        counts = gt_counts[chunk_img_inds]
+        num_rows = int(counts.sum())
+        row_starts = np.cumsum(counts) - counts
+        row_imgs = np.repeat(np.arange(chunk_img_inds.size), counts)
+        row_inds = np.arange(num_rows)
+        padded = np.full((num_rows, int(prop_counts[chunk_img_inds].max())),
+                         -np.inf,
+                         dtype=np.float32)
+        for i, start in zip(chunk_img_inds, row_starts):
+            ious = all_ious[i]
+            padded[start:start + ious.shape[0], :ious.shape[1]] = ious
+
+        for k, proposal_num in enumerate(proposal_nums):
+            ious = padded[:, :proposal_num]
+            used = np.zeros((chunk_img_inds.size, ious.shape[1]), dtype=bool)
+            row_arg = ious.argmax(axis=1)
+            row_max = ious[row_inds, row_arg]
+            for j in range(int(counts.max())):
+                # the gt with the max iou of each image, the first one in case
+                # of a tie, and its best proposal
+                img_max = np.maximum.reduceat(row_max, row_starts)
+                is_max = row_max == img_max[row_imgs]
+                best_rows = np.minimum.reduceat(
+                    np.where(is_max, row_inds, num_rows), row_starts)
+                active = counts > j
+                best_rows = best_rows[active]
+                matched_ious[k, gt_offsets[chunk_img_inds[active]] + j] = \
+                    row_max[best_rows]
+                used[active, row_arg[best_rows]] = True
+                row_max[best_rows] = -np.inf
+                # the gts whose best proposal has been taken, whose ious with
+                # taken proposals are -1
+                stale = used[row_imgs, row_arg] & (row_max > -np.inf)
+                if stale.any():
+                    stale_ious = np.where(used[row_imgs[stale]], -1,
+                                          ious[stale])
+                    row_arg[stale] = stale_ious.argmax(axis=1)
+                    row_max[stale] = stale_ious.max(axis=1)
+    return matched_ious
+
+
+def _recalls(all_ious, proposal_nums, thrs):
+    total_gt_num = sum([ious.shape[0] for ious in all_ious])
+    matched_ious = _matched_ious(all_ious, proposal_nums)
+    # all iou thresholds are evaluated at once
+    recalls = (matched_ious[:, None, :] >= thrs[:, None]).sum(axis=2)
+    return recalls / float(total_gt_num)
 
 
 def set_recall_param(proposal_nums, iou_thrs):
@@ -85,7 +141,8 @@ def eval_recalls(gts,
 
     proposal_nums, iou_thrs = set_recall_param(proposal_nums, iou_thrs)
 
-    all_ious = []
+    img_gts = []
+    img_proposals = []
     for i in range(img_num):
         if proposals[i].ndim == 2 and proposals[i].shape[1] == 5:
             scores = proposals[i][:, 4]
@@ -95,11 +152,13 @@ def eval_recalls(gts,
             img_proposal = proposals[i]
         prop_num = min(img_proposal.shape[0], proposal_nums[-1])
         if gts[i] is None or gts[i].shape[0] == 0:
-            ious = np.zeros((0, img_proposal.shape[0]), dtype=np.float32)
+            img_gts.append(np.zeros((0, 4), dtype=np.float32))
+            img_proposals.append(img_proposal[:, :4])
         else:
-            ious = bbox_overlaps(gts[i], img_proposal[:prop_num, :4])
-        all_ious.append(ious)
-    all_ious = np.array(all_ious)
+            img_gts.append(gts[i])
+            img_proposals.append(img_proposal[:prop_num, :4])
+    # the ious of all images are computed at once
+    all_ious = batched_bbox_overlaps(img_gts, img_proposals)
     recalls = _recalls(all_ious, proposal_nums, iou_thrs)
 
     print_recall_summary(recalls, proposal_nums, iou_thrs, logger=logger)
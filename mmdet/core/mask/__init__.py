@@ -1,8 +1,9 @@
 from .mask_target import mask_target
-from .structures import BaseInstanceMasks, BitmapMasks, PolygonMasks
-from .utils import encode_mask_results, split_combined_polys
+from .structures import BaseInstanceMasks, BitmapMasks, PolygonMasks, RLEMasks
+from .utils import (encode_mask_region, encode_mask_results,
+                    split_combined_polys)
 
 __all__ = [
     'split_combined_polys', 'mask_target', 'BaseInstanceMasks', 'BitmapMasks',
-    'PolygonMasks', 'encode_mask_results'
+    'PolygonMasks', 'RLEMasks', 'encode_mask_results', 'encode_mask_region'
 ]
@@ -633,11 +633,52 @@ class PolygonMasks(BaseInstanceMasks):
                         inds,
                         device='cpu',
                         interpolation='bilinear'):
-        """see :func:`BaseInstanceMasks.crop_and_resize`"""
+        """see :func:`BaseInstanceMasks.crop_and_resize`
+
+        The polygons of all the bboxes are flattened into one coordinate
+        buffer and transformed together, which gives the same coordinates as
+        transforming the float64 polygons one by one.
+        """
         out_h, out_w = out_shape
         if len(self.masks) == 0:
             return PolygonMasks([], out_h, out_w)
 
+        masks = [self.masks[inds[i]] for i in range(len(bboxes))]
+        polys = [p for mask in masks for p in mask]
+        poly_lens = np.fromiter(map(len, polys), dtype=np.int64)
+        if len(polys) == 0 or (poly_lens % 2).any() or any(
+                p.dtype != np.float64 for p in polys):
+            return self._crop_and_resize_per_polygon(bboxes, out_shape, inds)
+
+        w = np.maximum(bboxes[:, 2] - bboxes[:, 0], 1)
+        h = np.maximum(bboxes[:, 3] - bboxes[:, 1], 1)
+        # keep the scalar arithmetic of the per polygon path
+        w_scales = np.array([out_w / max(w_, 0.1) for w_ in w])
+        h_scales = np.array([out_h / max(h_, 0.1) for h_ in h])
+
+        # the bbox index of each x (or y) coordinate
+        bbox_inds = np.repeat(
+            np.repeat(np.arange(len(masks)), list(map(len, masks))),
+            poly_lens // 2)
+        coords = np.concatenate(polys)
+        # crop, pycocotools will clip the boundary
+        coords[0::2] -= bboxes[bbox_inds, 0]
+        coords[1::2] -= bboxes[bbox_inds, 1]
+        # resize
+        coords[0::2] *= w_scales[bbox_inds]
+        coords[1::2] *= h_scales[bbox_inds]
+
+        resized_polys = np.split(coords, np.cumsum(poly_lens)[:-1])
+        resized_masks = []
+        start = 0
+        for mask in masks:
+            resized_masks.append(resized_polys[start:start + len(mask)])
+            start += len(mask)
+        return PolygonMasks(resized_masks, *out_shape)
+
+    def _crop_and_resize_per_polygon(self, bboxes, out_shape, inds):
+        """Crop and resize the polygons one by one."""
+        out_h, out_w = out_shape
         resized_masks = []
         for i in range(len(bboxes)):
             mask = self.masks[inds[i]]
@@ -791,9 +832,31 @@ class PolygonMasks(BaseInstanceMasks):
             np.dot(x, np.roll(y, 1)) - np.dot(y, np.roll(x, 1)))
 
     def to_ndarray(self):
-        """Convert masks to the format of ndarray."""
+        """Convert masks to the format of ndarray.
+
+        The polygons of all the objects are rasterized by pycocotools in one
+        call, and only the objects with multiple polygons are merged one by
+        one.
+        """
         if len(self.masks) == 0:
             return np.empty((0, self.height, self.width), dtype=np.uint8)
+        polys = [p for poly_per_obj in self.masks for p in poly_per_obj]
+        # pycocotools takes a list whose first item has 4 coordinates as
+        # bboxes, so such polygons are left to the per object path
+        if all(len(poly_per_obj) > 0 for poly_per_obj in self.masks) and all(
+                len(p) > 4 for p in polys):
+            rles = maskUtils.frPyObjects(polys, self.height, self.width)
+            merged_rles = []
+            start = 0
+            for poly_per_obj in self.masks:
+                end = start + len(poly_per_obj)
+                if len(poly_per_obj) == 1:
+                    merged_rles.append(rles[start])
+                else:
+                    merged_rles.append(maskUtils.merge(rles[start:end]))
+                start = end
+            bitmap_masks = maskUtils.decode(merged_rles).transpose(2, 0, 1)
+            return np.ascontiguousarray(bitmap_masks, dtype=bool)
         bitmap_masks = []
         for poly_per_obj in self.masks:
             bitmap_masks.append(
@@ -825,3 +888,429 @@ def polygon_to_bitmap(polygons, height, width):
     rle = maskUtils.merge(rles)
     bitmap_mask = maskUtils.decode(rle).astype(np.bool)
     return bitmap_mask
+
+
+class RLEMasks(BaseInstanceMasks):
+    """This class represents masks in the form of run-length encoding.
+
+    Each mask is kept as the uncompressed counts of the column-major
+    run-length encoding used by pycocotools, i.e. the lengths of alternating
+    runs of background and foreground pixels, starting with background.
+    Flipping, cropping, padding, expanding, nearest resizing and integer
+    translation operate on the runs directly, so a crowded image never holds
+    the dense (N, H, W) stack of its masks. The other transforms decode the
+    masks one at a time.
+
+    Args:
+        masks (list[ndarray] | list[dict] | ndarray): Uncompressed counts of
+            each mask, COCO style RLE dicts, or bitmaps in shape (N, H, W).
+        height (int): height of masks
+        width (int): width of masks
+
+    Example:
+        >>> bitmaps = np.zeros((2, 4, 5), dtype=np.uint8)
+        >>> bitmaps[0, 1:3, 1:4] = 1
+        >>> rle_masks = RLEMasks(bitmaps, 4, 5)
+        >>> rle_masks.masks[0]
+        array([5, 2, 2, 2, 2, 2, 5], dtype=uint32)
+        >>> (rle_masks.flip().to_ndarray() == bitmaps[:, :, ::-1]).all()
+        True
+    """
+
+    def __init__(self, masks, height, width):
+        self.height = height
+        self.width = width
+        if isinstance(masks, np.ndarray) and masks.ndim == 3:
+            assert masks.shape[1:] == (height, width)
+        self.masks = [self._to_counts(mask) for mask in masks]
+
+    def _to_counts(self, mask):
+        """Convert a mask to its uncompressed counts."""
+        if isinstance(mask, dict):
+            assert tuple(mask['size']) == (self.height, self.width)
+            counts = mask['counts']
+            if isinstance(counts, (str, bytes)):
+                return rle_string_to_counts(counts)
+            return np.asarray(counts, dtype=np.uint32)
+        assert isinstance(mask, np.ndarray)
+        if mask.ndim == 2:
+            assert mask.shape == (self.height, self.width)
+            return bitmap_to_counts(mask)
+        assert mask.ndim == 1
+        return mask.astype(np.uint32, copy=False)
+
+    def __getitem__(self, index):
+        """Index the RLE masks.
+
+        Args:
+            index (int | ndarray | list | slice): Indices in the format of
+                integer, indices or boolean mask.
+
+        Returns:
+            :obj:`RLEMasks`: Indexed RLE masks.
+        """
+        inds = np.arange(len(self.masks))[index].reshape(-1)
+        masks = [self.masks[i] for i in inds]
+        return RLEMasks(masks, self.height, self.width)
+
+    def __iter__(self):
+        return iter(self.masks)
+
+    def __repr__(self):
+        s = self.__class__.__name__ + '('
+        s += f'num_masks={len(self.masks)}, '
+        s += f'height={self.height}, '
+        s += f'width={self.width})'
+        return s
+
+    def __len__(self):
+        """Number of masks."""
+        return len(self.masks)
+
+    def _map_segments(self, func, out_shape):
+        """Apply ``func`` to the column segments of each mask.
+
+        ``func`` takes the columns, top rows and bottom rows (exclusive) of
+        the foreground segments of a mask and returns those of the output
+        mask in shape ``out_shape``. Empty segments are dropped when the
+        output is encoded.
+        """
+        out_h, out_w = out_shape
+        masks = []
+        for counts in self.masks:
+            cols, tops, bottoms = func(
+                *_counts_to_segments(counts, self.height))
+            masks.append(
+                _segments_to_counts(cols, tops, bottoms, out_h, out_w))
+        return RLEMasks(masks, out_h, out_w)
+
+    def _map_bitmaps(self, func, out_shape):
+        """Decode the masks one by one, apply ``func`` and encode them."""
+        masks = [
+            bitmap_to_counts(
+                func(counts_to_bitmap(counts, self.height, self.width)))
+            for counts in self.masks
+        ]
+        return RLEMasks(masks, *out_shape)
+
+    def rescale(self, scale, interpolation='nearest'):
+        """See :func:`BaseInstanceMasks.rescale`."""
+        new_w, new_h = mmcv.rescale_size((self.width, self.height), scale)
+        return self.resize((new_h, new_w), interpolation=interpolation)
+
+    def resize(self, out_shape, interpolation='nearest'):
+        """See :func:`BaseInstanceMasks.resize`.
+
+        Nearest resizing maps the runs through the same source indices as
+        :func:`mmcv.imresize`, other interpolations decode the masks.
+        """
+        out_h, out_w = out_shape
+        if interpolation != 'nearest':
+            return self._map_bitmaps(
+                lambda mask: mmcv.imresize(
+                    mask, (out_w, out_h), interpolation=interpolation),
+                out_shape)
+        src_rows = _nearest_src_inds(self.height, out_h)
+        src_cols = _nearest_src_inds(self.width, out_w)
+
+        def resize_segments(cols, tops, bottoms):
+            # the output rows whose source row is in [top, bottom)
+            tops = np.searchsorted(src_rows, tops)
+            bottoms = np.searchsorted(src_rows, bottoms)
+            # the output columns whose source column is col
+            first_cols = np.searchsorted(src_cols, cols)
+            num_cols = np.searchsorted(src_cols, cols, side='right') - \
+                first_cols
+            seg_inds = np.repeat(np.arange(len(cols)), num_cols)
+            offsets = np.arange(len(seg_inds)) - np.repeat(
+                np.cumsum(num_cols) - num_cols, num_cols)
+            return (first_cols[seg_inds] + offsets, tops[seg_inds],
+                    bottoms[seg_inds])
+
+        return self._map_segments(resize_segments, out_shape)
+
+    def flip(self, flip_direction='horizontal'):
+        """See :func:`BaseInstanceMasks.flip`."""
+        assert flip_direction in ('horizontal', 'vertical', 'diagonal')
+        height, width = self.height, self.width
+
+        def flip_segments(cols, tops, bottoms):
+            if flip_direction in ('horizontal', 'diagonal'):
+                cols = width - 1 - cols
+            if flip_direction in ('vertical', 'diagonal'):
+                tops, bottoms = height - bottoms, height - tops
+            return cols, tops, bottoms
+
+        return self._map_segments(flip_segments, (height, width))
+
+    def pad(self, out_shape, pad_val=0):
+        """See :func:`BaseInstanceMasks.pad`.
+
+        The masks are binary, so any non-zero ``pad_val`` pads foreground.
+        """
+        if pad_val:
+            return self._map_bitmaps(
+                lambda mask: mmcv.impad(
+                    mask, shape=out_shape, pad_val=pad_val), out_shape)
+        return self._map_segments(lambda *segments: segments, out_shape)
+
+    def crop(self, bbox):
+        """See :func:`BaseInstanceMasks.crop`."""
+        assert isinstance(bbox, np.ndarray)
+        assert bbox.ndim == 1
+
+        # clip the boundary
+        bbox = bbox.copy()
+        bbox[0::2] = np.clip(bbox[0::2], 0, self.width)
+        bbox[1::2] = np.clip(bbox[1::2], 0, self.height)
+        x1, y1, x2, y2 = bbox.astype(np.int64)
+        w = np.maximum(x2 - x1, 1)
+        h = np.maximum(y2 - y1, 1)
+
+        def crop_segments(cols, tops, bottoms):
+            keep = (cols >= x1) & (cols < x1 + w)
+            return (cols[keep] - x1, np.clip(tops[keep] - y1, 0, h),
+                    np.clip(bottoms[keep] - y1, 0, h))
+
+        return self._map_segments(crop_segments, (h, w))
+
+    def crop_and_resize(self,
+                        bboxes,
+                        out_shape,
+                        inds,
+                        device='cpu',
+                        interpolation='bilinear'):
+        """See :func:`BaseInstanceMasks.crop_and_resize`.
+
+        Only the masks assigned to the bboxes are decoded, and the cropping
+        is done by :func:`BitmapMasks.crop_and_resize`.
+        """
+        if isinstance(inds, torch.Tensor):
+            inds = inds.cpu().numpy()
+        assigned_inds, inds = np.unique(inds, return_inverse=True)
+        return self[assigned_inds].to_bitmap().crop_and_resize(
+            bboxes, out_shape, inds, device, interpolation=interpolation)
+
+    def expand(self, expanded_h, expanded_w, top, left):
+        """See :func:`BaseInstanceMasks.expand`."""
+        return self._map_segments(
+            lambda cols, tops, bottoms:
+            (cols + left, tops + top, bottoms + top), (expanded_h, expanded_w))
+
+    def translate(self,
+                  out_shape,
+                  offset,
+                  direction='horizontal',
+                  fill_val=0,
+                  interpolation='bilinear'):
+        """Translate the RLEMasks.
+
+        Integer offsets shift the runs, fractional offsets and non-zero
+        ``fill_val`` decode the masks.
+
+        Args:
+            out_shape (tuple[int]): Shape for output mask, format (h, w).
+            offset (int | float): The offset for translate.
+            direction (str): The translate direction, either "horizontal"
+                or "vertical".
+            fill_val (int | float): Border value. Default 0 for masks.
+            interpolation (str): Same as :func:`mmcv.imtranslate`.
+
+        Returns:
+            RLEMasks: Translated RLEMasks.
+        """
+        if fill_val or offset != int(offset):
+            return self._map_bitmaps(
+                lambda mask: mmcv.imtranslate(
+                    mask,
+                    offset,
+                    direction,
+                    border_value=fill_val,
+                    interpolation=interpolation), out_shape)
+        offset = int(offset)
+        out_h, out_w = out_shape
+
+        def translate_segments(cols, tops, bottoms):
+            if direction == 'horizontal':
+                cols = cols + offset
+            else:
+                tops = tops + offset
+                bottoms = bottoms + offset
+            keep = (cols >= 0) & (cols < out_w)
+            return (cols[keep], np.clip(tops[keep], 0, out_h),
+                    np.clip(bottoms[keep], 0, out_h))
+
+        return self._map_segments(translate_segments, out_shape)
+
+    def shear(self,
+              out_shape,
+              magnitude,
+              direction='horizontal',
+              border_value=0,
+              interpolation='bilinear'):
+        """Shear the RLEMasks, see :func:`BitmapMasks.shear`."""
+        return self._map_bitmaps(
+            lambda mask: mmcv.imshear(
+                mask,
+                magnitude,
+                direction,
+                border_value=border_value,
+                interpolation=interpolation), out_shape)
+
+    def rotate(self, out_shape, angle, center=None, scale=1.0, fill_val=0):
+        """Rotate the RLEMasks, see :func:`BitmapMasks.rotate`."""
+        return self._map_bitmaps(
+            lambda mask: mmcv.imrotate(
+                mask, angle, center=center, scale=scale, border_value=fill_val
+            ), out_shape)
+
+    def to_bitmap(self):
+        """Convert RLE masks to bitmap masks."""
+        return BitmapMasks(self.to_ndarray(), self.height, self.width)
+
+    @property
+    def areas(self):
+        """See :py:attr:`BaseInstanceMasks.areas`."""
+        return np.array([counts[1::2].sum() for counts in self.masks],
+                        dtype=np.int64)
+
+    def to_ndarray(self):
+        """See :func:`BaseInstanceMasks.to_ndarray`."""
+        if len(self.masks) == 0:
+            return np.empty((0, self.height, self.width), dtype=np.uint8)
+        values = np.concatenate(
+            [np.arange(len(counts)) % 2 for counts in self.masks])
+        masks = np.repeat(values.astype(np.uint8), np.concatenate(self.masks))
+        masks = masks.reshape(len(self.masks), self.width, self.height)
+        return np.ascontiguousarray(masks.transpose(0, 2, 1))
+
+    def to_tensor(self, dtype, device):
+        """See :func:`BaseInstanceMasks.to_tensor`."""
+        if len(self.masks) == 0:
+            return torch.empty((0, self.height, self.width),
+                               dtype=dtype,
+                               device=device)
+        return torch.tensor(self.to_ndarray(), dtype=dtype, device=device)
+
+
+def bitmap_to_counts(bitmap):
+    """Encode a bitmap to the uncompressed counts of pycocotools.
+
+    Args:
+        bitmap (ndarray): mask in shape (H, W), non-zero pixels are
+            foreground.
+
+    Return:
+        ndarray: lengths of the alternating background and foreground runs
+            in column-major order, starting with background.
+    """
+    pixels = bitmap.ravel(order='F') != 0
+    changes = np.flatnonzero(pixels[1:] != pixels[:-1]) + 1
+    counts = np.diff(np.concatenate(([0], changes, [pixels.size])))
+    if pixels.size and pixels[0]:
+        counts = np.concatenate(([0], counts))
+    return counts.astype(np.uint32)
+
+
+def counts_to_bitmap(counts, height, width):
+    """Decode the uncompressed counts of pycocotools to a bitmap.
+
+    Args:
+        counts (ndarray): run lengths in column-major order, starting with
+            background.
+        height (int): mask height
+        width (int): mask width
+
+    Return:
+        ndarray: the decoded uint8 mask in shape (height, width)
+    """
+    values = (np.arange(len(counts)) % 2).astype(np.uint8)
+    bitmap = np.repeat(values, counts).reshape(width, height)
+    return np.ascontiguousarray(bitmap.T)
+
+
+def rle_string_to_counts(string):
+    """Decode the compressed counts string of pycocotools.
+
+    This is the vectorized counterpart of ``rleFrString`` in pycocotools:
+    every count is stored as 5-bit groups, little end first, in characters
+    offset by 48 whose 0x20 bit marks a following group, and counts after
+    the third one are stored as the difference to the count two before.
+
+    Args:
+        string (str | bytes): the ``counts`` of a compressed RLE.
+
+    Return:
+        ndarray: the uncompressed counts.
+    """
+    if isinstance(string, str):
+        string = string.encode()
+    chars = np.frombuffer(string, dtype=np.uint8).astype(np.int64) - 48
+    if len(chars) == 0:
+        return np.zeros(0, dtype=np.uint32)
+    lasts = np.flatnonzero((chars & 0x20) == 0)
+    firsts = np.concatenate(([0], lasts[:-1] + 1))
+    shifts = 5 * (
+        np.arange(len(chars)) - np.repeat(firsts, lasts - firsts + 1))
+    values = np.bitwise_or.reduceat((chars & 0x1f) << shifts, firsts)
+    # the 0x10 bit of the last group is the sign bit
+    negative = (chars[lasts] & 0x10) != 0
+    values[negative] |= np.left_shift(-1, shifts[lasts[negative]] + 5)
+    counts = values.copy()
+    counts[1::2] = np.cumsum(values[1::2])
+    counts[2::2] = np.cumsum(values[2::2])
+    return counts.astype(np.uint32)
+
+
+def _counts_to_segments(counts, height):
+    """Split the foreground runs of a mask at the column boundaries.
+
+    Returns:
+        tuple[ndarray]: the column, top row and bottom row (exclusive) of
+            each foreground segment.
+    """
+    ends = np.cumsum(counts, dtype=np.int64)
+    starts, ends = ends[0:len(ends) - 1:2], ends[1::2]
+    keep = ends > starts
+    starts, ends = starts[keep], ends[keep]
+    first_cols = starts // height
+    num_cols = (ends - 1) // height - first_cols + 1
+    run_inds = np.repeat(np.arange(len(starts)), num_cols)
+    cols = first_cols[run_inds] + np.arange(len(run_inds)) - np.repeat(
+        np.cumsum(num_cols) - num_cols, num_cols)
+    tops = np.maximum(starts[run_inds] - cols * height, 0)
+    bottoms = np.minimum(ends[run_inds] - cols * height, height)
+    return cols, tops, bottoms
+
+
+def _segments_to_counts(cols, tops, bottoms, height, width):
+    """Encode the foreground segments of a mask to uncompressed counts."""
+    keep = bottoms > tops
+    starts = cols[keep] * height + tops[keep]
+    ends = cols[keep] * height + bottoms[keep]
+    order = np.argsort(starts, kind='stable')
+    starts, ends = starts[order], ends[order]
+    # merge the runs that touch each other
+    if len(starts) > 1:
+        gaps = np.flatnonzero(starts[1:] != ends[:-1])
+        starts = np.concatenate((starts[:1], starts[gaps + 1]))
+        ends = np.concatenate((ends[gaps], ends[-1:]))
+    bounds = np.empty(2 * len(starts) + 2, dtype=np.int64)
+    bounds[0] = 0
+    bounds[1:-1:2] = starts
+    bounds[2:-1:2] = ends
+    bounds[-1] = height * width
+    counts = np.diff(bounds)
+    if len(counts) > 1 and counts[-1] == 0:
+        counts = counts[:-1]
+    return counts.astype(np.uint32)
+
+
+def _nearest_src_inds(src_size, dst_size):
+    """Source indices of the nearest resizing done by :func:`mmcv.imresize`.
+
+    The indices are obtained by resizing an index image with OpenCV, which
+    keeps them consistent with the resizing of bitmaps.
+    """
+    inds = np.arange(src_size, dtype=np.int32)[None]
+    return cv2.resize(inds, (dst_size, 1), interpolation=cv2.INTER_NEAREST)[0]
@@ -32,6 +32,52 @@ def split_combined_polys(polys, poly_lens, polys_per_mask):
     return mask_polys_list
 
 
+def encode_mask_region(mask, x0, y0, img_h, img_w):
+    """Encode a mask of an image region to the RLE of the whole image.
+
+    The result is the same as ``mask_util.encode`` of an image sized mask
+    which is ``mask`` in the region and 0 elsewhere, but only the columns of
+    the region are materialized to count the runs.
+
+    Args:
+        mask (ndarray): Binary mask of the region of shape (h, w).
+        x0 (int): Left of the region in the image.
+        y0 (int): Top of the region in the image.
+        img_h (int): Height of the image.
+        img_w (int): Width of the image.
+
+    Returns:
+        dict: RLE of the image mask with compressed counts.
+
+    Example:
+        >>> mask = np.ones((2, 3), dtype=bool)
+        >>> rle = encode_mask_region(mask, 1, 2, 5, 6)
+        >>> full_mask = np.zeros((5, 6), dtype=np.uint8, order='F')
+        >>> full_mask[2:4, 1:4] = 1
+        >>> assert rle == mask_util.encode(full_mask[..., None])[0]
+    """
+    h, w = mask.shape
+    # the RLE counts the runs in column-major order, so the columns of the
+    # region are padded to the image height and the other columns are zeros
+    columns = np.zeros((w, img_h), dtype=bool)
+    columns[:, y0:y0 + h] = mask.T
+    pixels = columns.ravel()
+    changes = np.flatnonzero(pixels[1:] != pixels[:-1]) + 1
+    counts = np.diff(np.concatenate(([0], changes, [pixels.size])))
+    # the runs start with zeros
+    if pixels.size > 0 and pixels[0]:
+        counts = np.concatenate(([0], counts))
+    counts = counts.tolist()
+    counts[0] += x0 * img_h
+    trailing_zeros = (img_w - x0 - w) * img_h
+    if len(counts) % 2 == 1:
+        counts[-1] += trailing_zeros
+    elif trailing_zeros > 0:
+        counts.append(trailing_zeros)
+    return mask_util.frPyObjects(
+        dict(counts=counts, size=[img_h, img_w]), img_h, img_w)
+
+
 # TODO: move this function to more proper place
 def encode_mask_results(mask_results):
     """Encode bitmap mask to RLE code.
@@ -39,7 +85,7 @@ def encode_mask_results(mask_results):
     Args:
         mask_results (list | tuple[list]): bitmap mask results.
             In mask scoring rcnn, mask_results is a tuple of (segm_results,
-            segm_cls_score).
+            segm_cls_score). Masks already encoded as RLEs are kept.
 
     Returns:
         list | tuple: RLE encoded mask.
@@ -52,6 +98,9 @@ def encode_mask_results(mask_results):
     encoded_mask_results = [[] for _ in range(num_classes)]
     for i in range(len(cls_segms)):
         for cls_segm in cls_segms[i]:
+            if isinstance(cls_segm, dict):
+                encoded_mask_results[i].append(cls_segm)
+                continue
             encoded_mask_results[i].append(
                 mask_util.encode(
                     np.array(
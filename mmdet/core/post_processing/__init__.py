@@ -1,8 +1,8 @@
-from .bbox_nms import fast_nms, multiclass_nms
+from .bbox_nms import batched_multiclass_nms, fast_nms, multiclass_nms
 from .merge_augs import (merge_aug_bboxes, merge_aug_masks,
                          merge_aug_proposals, merge_aug_scores)
 
 __all__ = [
     'multiclass_nms', 'merge_aug_proposals', 'merge_aug_bboxes',
-    'merge_aug_scores', 'merge_aug_masks', 'fast_nms'
+    'merge_aug_scores', 'merge_aug_masks', 'fast_nms', 'batched_multiclass_nms'
 ]
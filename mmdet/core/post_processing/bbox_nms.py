@@ -76,6 +76,85 @@ def multiclass_nms(multi_bboxes,
         return dets, labels[keep]
 
 
+def batched_multiclass_nms(multi_bboxes,
+                           multi_scores,
+                           score_thr,
+                           nms_cfg,
+                           max_num=-1):
+    """NMS for multi-class bboxes of a batch of images.
+
+    This gives the same results as calling :func:`multiclass_nms` for each
+    image. The score thresholding is done for the whole batch at once, and
+    then the boxes of each image are suppressed by ``batched_nms``.
+
+    Args:
+        multi_bboxes (Tensor): shape (B, n, 4)
+        multi_scores (Tensor): shape (B, n, #class), where the last column
+            contains scores of the background class, but this will be ignored.
+        score_thr (float): bbox threshold, bboxes with scores lower than it
+            will not be considered.
+        nms_cfg (dict): NMS config of ``batched_nms``.
+        max_num (int, optional): if there are more than max_num bboxes of an
+            image after NMS, only top max_num will be kept. Default to -1.
+
+    Returns:
+        list[tuple[Tensor, Tensor]]: (bboxes, labels) of each image, tensors
+            of shape (k, 5) and (k). Labels are 0-based.
+    """
+    batch_size, num_bboxes = multi_scores.shape[:2]
+    num_classes = multi_scores.size(2) - 1
+    # exclude background category
+    scores = multi_scores[..., :-1]
+    bboxes = multi_bboxes[:, :, None].expand(batch_size, num_bboxes,
+                                             num_classes, 4)
+    labels = torch.arange(num_classes, device=scores.device)
+    labels = labels.view(1, 1, -1).expand_as(scores)
+    img_inds = torch.arange(batch_size, device=scores.device)
+    img_inds = img_inds.view(-1, 1, 1).expand_as(scores)
+
+    bboxes = bboxes.reshape(-1, 4)
+    scores = scores.reshape(-1)
+    labels = labels.reshape(-1)
+    img_inds = img_inds.reshape(-1)
+
+    # remove low scoring boxes
+    valid_mask = scores > score_thr
+    inds = valid_mask.nonzero(as_tuple=False).squeeze(1)
+    bboxes, scores = bboxes[inds], scores[inds]
+    labels, img_inds = labels[inds], img_inds[inds]
+    if inds.numel() == 0:
+        return [(bboxes, labels) for _ in range(batch_size)]
+
+    # the boxes of each image are suppressed separately, since the coordinate
+    # offsets of ``batched_nms`` for all (image, class) clusters at once are
+    # too large to keep the precision of float32 boxes; the boxes are ordered
+    # by images so that they can be split without masking the whole batch
+    num_valid = torch.bincount(img_inds, minlength=batch_size).tolist()
+    det_list, label_list = [], []
+    for img_bboxes, img_scores, img_labels in zip(
+            bboxes.split(num_valid), scores.split(num_valid),
+            labels.split(num_valid)):
+        if img_labels.numel() == 0:
+            det_list.append(None)
+            label_list.append(img_labels)
+            continue
+        dets, keep = batched_nms(img_bboxes, img_scores, img_labels, nms_cfg)
+        det_list.append(dets)
+        label_list.append(img_labels[keep])
+
+    result_list = []
+    for dets, labels, num in zip(det_list, label_list, num_valid):
+        if num == 0:
+            # the same as multiclass_nms for images without valid boxes
+            result_list.append((bboxes.new_zeros((0, 4)), labels[:0]))
+            continue
+        if max_num > 0:
+            dets = dets[:max_num]
+            labels = labels[:max_num]
+        result_list.append((dets, labels))
+    return result_list
+
+
 def fast_nms(multi_bboxes,
              multi_scores,
              multi_coeffs,
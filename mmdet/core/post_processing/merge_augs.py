@@ -88,7 +88,8 @@ def merge_aug_masks(aug_masks, img_metas, rcnn_test_cfg, weights=None):
     """Merge augmented mask prediction.
 
     Args:
-        aug_masks (list[ndarray]): shape (n, #class, h, w)
+        aug_masks (list[ndarray] | list[Tensor]): shape (n, #class, h, w).
+            Tensors are merged on their device.
         img_shapes (list[ndarray]): shape (3, ).
         rcnn_test_cfg (dict): rcnn test config.
 
@@ -101,15 +102,24 @@ def merge_aug_masks(aug_masks, img_metas, rcnn_test_cfg, weights=None):
         flip_direction = img_info[0]['flip_direction']
         if flip:
             if flip_direction == 'horizontal':
-                mask = mask[:, :, :, ::-1]
+                mask = mask.flip(3) if isinstance(
+                    mask, torch.Tensor) else mask[:, :, :, ::-1]
             elif flip_direction == 'vertical':
-                mask = mask[:, :, ::-1, :]
+                mask = mask.flip(2) if isinstance(
+                    mask, torch.Tensor) else mask[:, :, ::-1, :]
             else:
                 raise ValueError(
                     f"Invalid flipping direction '{flip_direction}'")
         recovered_masks.append(mask)
 
-    if weights is None:
+    if isinstance(recovered_masks[0], torch.Tensor):
+        recovered_masks = torch.stack(recovered_masks)
+        if weights is None:
+            merged_masks = recovered_masks.mean(dim=0)
+        else:
+            weights = recovered_masks.new_tensor(weights).view(-1, 1, 1, 1, 1)
+            merged_masks = (recovered_masks * weights).sum(0) / weights.sum()
+    elif weights is None:
         merged_masks = np.mean(recovered_masks, axis=0)
     else:
         merged_masks = np.average(
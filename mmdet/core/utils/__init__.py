@@ -1,7 +1,8 @@
 from .dist_utils import DistOptimizerHook, allreduce_grads, reduce_mean
 from .misc import mask2ndarray, multi_apply, unmap
+from .pipeline_profile_hook import PipelineProfileHook, get_pipeline_profilers
 
 __all__ = [
     'allreduce_grads', 'DistOptimizerHook', 'reduce_mean', 'multi_apply',
-    'unmap', 'mask2ndarray'
+    'unmap', 'mask2ndarray', 'PipelineProfileHook', 'get_pipeline_profilers'
 ]
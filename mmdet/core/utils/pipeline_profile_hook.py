@@ -0,0 +1,71 @@
+from mmcv.runner import HOOKS, Hook
+
+
+def get_pipeline_profilers(dataset):
+    """Find the pipeline profilers of a dataset and the wrapped datasets.
+
+    Args:
+        dataset (Dataset): A dataset, which may wrap other datasets like
+            :class:`ConcatDataset` and :class:`RepeatDataset`.
+
+    Returns:
+        list[:obj:`PipelineProfiler`]: The profilers of the pipelines with
+            ``profile_pipeline=True``.
+    """
+    profilers = []
+    pipeline = getattr(dataset, 'pipeline', None)
+    if getattr(pipeline, 'profiler', None) is not None:
+        profilers.append(pipeline.profiler)
+    if hasattr(dataset, 'dataset'):
+        profilers.extend(get_pipeline_profilers(dataset.dataset))
+    for sub_dataset in getattr(dataset, 'datasets', []):
+        profilers.extend(get_pipeline_profilers(sub_dataset))
+    return profilers
+
+
+@HOOKS.register_module()
+class PipelineProfileHook(Hook):
+    """Log the stats of the profiled pipelines of the training dataset.
+
+    The pipeline of the dataset must be profiled with
+    ``profile_pipeline=True`` in the dataset config, and the stats of all
+    dataloader workers are summarized in a table of the runner logger.
+
+    Example:
+        >>> data = dict(train=dict(profile_pipeline=True))
+        >>> custom_hooks = [dict(type='PipelineProfileHook', interval=500)]
+
+    Args:
+        interval (int): Logging interval (by iterations). Default: 500.
+        by_epoch (bool): Whether to log the stats at the end of each epoch as
+            well. Default: True.
+        reset (bool): Whether to clear the stats after logging them, so that
+            each table only covers the samples since the last one.
+            Default: False.
+        sort_by (str, optional): Sort the transforms by 'time', or keep the
+            order of the pipeline if None. Default: None.
+    """
+
+    def __init__(self, interval=500, by_epoch=True, reset=False, sort_by=None):
+        self.interval = interval
+        self.by_epoch = by_epoch
+        self.reset = reset
+        self.sort_by = sort_by
+
+    def log_stats(self, runner):
+        # IterBasedRunner wraps the dataloader by an IterLoader
+        data_loader = getattr(runner.data_loader, '_dataloader',
+                              runner.data_loader)
+        for profiler in get_pipeline_profilers(data_loader.dataset):
+            runner.logger.info('Pipeline profile:\n' +
+                               profiler.summary(self.sort_by))
+            if self.reset:
+                profiler.reset()
+
+    def after_train_iter(self, runner):
+        if self.every_n_iters(runner, self.interval):
+            self.log_stats(runner)
+
+    def after_train_epoch(self, runner):
+        if self.by_epoch:
+            self.log_stats(runner)
@@ -1,15 +1,17 @@
 import copy
 import platform
 import random
+import warnings
 from functools import partial
 
 import numpy as np
 from mmcv.parallel import collate
 from mmcv.runner import get_dist_info
-from mmcv.utils import Registry, build_from_cfg
+from mmcv.utils import TORCH_VERSION, Registry, build_from_cfg, digit_version
 from torch.utils.data import DataLoader
 
-from .samplers import DistributedGroupSampler, DistributedSampler, GroupSampler
+from .samplers import (DistributedGroupSampler, DistributedSampler,
+                       GroupSampler, InfiniteGroupSampler)
 
 if platform.system() != 'Windows':
     # https://github.com/pytorch/pytorch/issues/973
@@ -80,6 +82,8 @@ def build_dataloader(dataset,
                      dist=True,
                      shuffle=True,
                      seed=None,
+                     runner_type='EpochBasedRunner',
+                     persistent_workers=False,
                      **kwargs):
     """Build PyTorch DataLoader.
 
@@ -96,13 +100,36 @@ def build_dataloader(dataset,
         dist (bool): Distributed training/test or not. Default: True.
         shuffle (bool): Whether to shuffle the data at every epoch.
             Default: True.
+        seed (int, optional): Seed of the workers and of the shuffle of
+            :class:`InfiniteGroupSampler`. Default: None.
+        runner_type (str): Type of the runner. If it is ``IterBasedRunner``
+            and ``shuffle`` is True, an :class:`InfiniteGroupSampler` is used
+            so that the batches of all epochs are loaded by a single iterator
+            of the dataloader. Default: 'EpochBasedRunner'.
+        persistent_workers (bool): If True, the worker processes are kept
+            alive after the dataset has been consumed once, instead of being
+            shut down and re-forked for each epoch. Only works with PyTorch
+            >= 1.7.0. Default: False.
         kwargs: any keyword argument to be used to initialize DataLoader
 
     Returns:
         DataLoader: A PyTorch dataloader.
     """
     rank, world_size = get_dist_info()
-    if dist:
+    if runner_type == 'IterBasedRunner' and shuffle:
+        # the infinite sampler never stops the iterator of the dataloader,
+        # so the workers are not re-forked at the end of each epoch
+        if dist:
+            sampler = InfiniteGroupSampler(
+                dataset, samples_per_gpu, world_size, rank, seed=seed)
+            batch_size = samples_per_gpu
+            num_workers = workers_per_gpu
+        else:
+            sampler = InfiniteGroupSampler(
+                dataset, samples_per_gpu, 1, 0, seed=seed)
+            batch_size = num_gpus * samples_per_gpu
+            num_workers = num_gpus * workers_per_gpu
+    elif dist:
         # DistributedGroupSampler will definitely shuffle the data to satisfy
         # that images on each GPU are in the same group
         if shuffle:
@@ -122,6 +149,14 @@ def build_dataloader(dataset,
         worker_init_fn, num_workers=num_workers, rank=rank,
         seed=seed) if seed is not None else None
 
+    if persistent_workers and num_workers > 0:
+        if (TORCH_VERSION != 'parrots'
+                and digit_version(TORCH_VERSION) >= digit_version('1.7.0')):
+            kwargs['persistent_workers'] = True
+        else:
+            warnings.warn('persistent_workers is invalid because your '
+                          'pytorch version is lower than 1.7.0')
+
     data_loader = DataLoader(
         dataset,
         batch_size=batch_size,
@@ -1,5 +1,8 @@
+import hashlib
 import itertools
+import json
 import logging
+import os
 import os.path as osp
 import tempfile
 from collections import OrderedDict
@@ -13,7 +16,9 @@ from terminaltables import AsciiTable
 
 from mmdet.core import eval_recalls
 from .builder import DATASETS
+from .compact_coco import CompactCocoAnnotations
 from .custom import CustomDataset
+from .incremental_coco_eval import IncrementalCocoEvaluator
 
 try:
     import pycocotools
@@ -25,9 +30,40 @@ except AssertionError:
                          'install mmpycocotools to install open-mmlab forked '
                          'pycocotools.')
 
+# mapping of cocoEval.stats
+COCO_METRIC_NAMES = {
+    'mAP': 0,
+    'mAP_50': 1,
+    'mAP_75': 2,
+    'mAP_s': 3,
+    'mAP_m': 4,
+    'mAP_l': 5,
+    'AR@100': 6,
+    'AR@300': 7,
+    'AR@1000': 8,
+    'AR_s@1000': 9,
+    'AR_m@1000': 10,
+    'AR_l@1000': 11
+}
+
 
 @DATASETS.register_module()
 class CocoDataset(CustomDataset):
+    """COCO dataset for detection.
+
+    Args:
+        compact_ann (bool): If True, annotations of the images in the dataset
+            are converted to :obj:`CompactCocoAnnotations` after
+            initialization and the COCO api is released, which keeps the
+            memory of dataloader workers shared with the main process. The
+            api is reloaded from ``ann_file`` when it is accessed again,
+            e.g., in evaluation. Default: False.
+        compact_ann_dir (str, optional): If specified, the compact
+            annotations are dumped to this directory and memory-mapped, so
+            that all processes on the node share a single copy. Implies
+            ``compact_ann=True``. Default: None.
+        **kwargs: Arguments of :obj:`CustomDataset`.
+    """
 
     CLASSES = ('person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus',
                'train', 'truck', 'boat', 'traffic light', 'fire hydrant',
@@ -44,6 +80,59 @@ class CocoDataset(CustomDataset):
                'oven', 'toaster', 'sink', 'refrigerator', 'book', 'clock',
                'vase', 'scissors', 'teddy bear', 'hair drier', 'toothbrush')
 
+    def __init__(self,
+                 *args,
+                 compact_ann=False,
+                 compact_ann_dir=None,
+                 **kwargs):
+        self._coco = None
+        self._coco_cls = None
+        self.compact_anns = None
+        self._recall_gt_bboxes = None
+        super(CocoDataset, self).__init__(*args, **kwargs)
+        if compact_ann or compact_ann_dir is not None:
+            self._build_compact_anns(compact_ann_dir)
+
+    @property
+    def coco(self):
+        """COCO api of the annotations, which is reloaded lazily if it has
+        been released by ``compact_ann``."""
+        if self._coco is None and self._coco_cls is not None:
+            self._coco = self._coco_cls(self.ann_file)
+        return self._coco
+
+    @coco.setter
+    def coco(self, coco):
+        self._coco = coco
+
+    def _build_compact_anns(self, compact_ann_dir=None):
+        """Convert annotations to compact arrays and release the COCO api.
+
+        Args:
+            compact_ann_dir (str, optional): Directory to dump and memory-map
+                the compact annotations. Default: None.
+        """
+        if compact_ann_dir is None:
+            self.compact_anns = CompactCocoAnnotations.from_api(
+                self.coco, self.img_ids)
+        else:
+            # key the dumped arrays by the annotation file, the images and
+            # the layout of the arrays
+            hash_obj = hashlib.md5()
+            hash_obj.update(str(CompactCocoAnnotations.VERSION).encode())
+            hash_obj.update(osp.abspath(self.ann_file).encode())
+            hash_obj.update(str(os.stat(self.ann_file).st_mtime_ns).encode())
+            hash_obj.update(np.array(self.img_ids, dtype=np.int64).tobytes())
+            dirname = osp.join(
+                compact_ann_dir,
+                f'{osp.basename(self.ann_file)}.{hash_obj.hexdigest()}')
+            if not osp.isdir(dirname):
+                CompactCocoAnnotations.from_api(self.coco,
+                                                self.img_ids).dump(dirname)
+            self.compact_anns = CompactCocoAnnotations.load(dirname)
+        self._coco_cls = type(self._coco)
+        self._coco = None
+
     def load_annotations(self, ann_file):
         """Load annotation from COCO style annotation file.
 
@@ -76,8 +165,11 @@ class CocoDataset(CustomDataset):
         """
 
         img_id = self.data_infos[idx]['id']
-        ann_ids = self.coco.get_ann_ids(img_ids=[img_id])
-        ann_info = self.coco.load_anns(ann_ids)
+        if self.compact_anns is not None:
+            ann_info = self.compact_anns.load_anns(img_id)
+        else:
+            ann_ids = self.coco.get_ann_ids(img_ids=[img_id])
+            ann_info = self.coco.load_anns(ann_ids)
         return self._parse_ann_info(self.data_infos[idx], ann_info)
 
     def get_cat_ids(self, idx):
@@ -91,10 +183,48 @@ class CocoDataset(CustomDataset):
         """
 
         img_id = self.data_infos[idx]['id']
+        if self.compact_anns is not None:
+            return self.compact_anns.get_cat_ids(img_id)
         ann_ids = self.coco.get_ann_ids(img_ids=[img_id])
         ann_info = self.coco.load_anns(ann_ids)
         return [ann['category_id'] for ann in ann_info]
 
+    def _build_cat_index(self):
+        """Build the category index from all annotations at once instead of
+        querying the annotations of each image."""
+
+        img_ids = np.array([info['id'] for info in self.data_infos],
+                           dtype=np.int64)
+        if self.compact_anns is not None:
+            anns = self.compact_anns
+            inds = np.searchsorted(anns.img_ids, img_ids)
+            return self._gather_cat_index(anns.category_ids,
+                                          anns.ann_offsets[inds],
+                                          anns.ann_offsets[inds + 1])
+
+        anns = self.coco.anns.values()
+        ann_img_ids = np.fromiter((ann['image_id'] for ann in anns),
+                                  dtype=np.int64,
+                                  count=len(anns))
+        ann_cat_ids = np.fromiter((ann['category_id'] for ann in anns),
+                                  dtype=np.int64,
+                                  count=len(anns))
+        # map the annotations to the indices of their images, dropping those
+        # of the images not in the dataset
+        order = np.argsort(img_ids)
+        sorted_img_ids = img_ids[order]
+        pos = np.searchsorted(sorted_img_ids, ann_img_ids)
+        pos[pos == len(img_ids)] = 0
+        valid = sorted_img_ids[pos] == ann_img_ids
+        ann_img_inds = order[pos[valid]]
+        # a stable sort keeps the annotations of each image in the order of
+        # `get_ann_ids`
+        ann_order = np.argsort(ann_img_inds, kind='stable')
+        counts = np.bincount(ann_img_inds, minlength=len(img_ids))
+        offsets = np.zeros(len(img_ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return offsets, ann_cat_ids[valid][ann_order]
+
     def _filter_imgs(self, min_size=32):
         """Filter images too small or without ground truths."""
         valid_inds = []
@@ -198,75 +328,179 @@ class CocoDataset(CustomDataset):
             _bbox[3] - _bbox[1],
         ]
 
-    def _proposal2json(self, results):
-        """Convert proposal results to COCO json style."""
+    def _proposal2array(self, results):
+        """Convert proposal results to a columnar array.
+
+        Returns:
+            np.ndarray: Proposals of all images, shape (N, 7), each row of
+                which is (image_id, x, y, w, h, score, category_id).
+        """
+        counts = np.fromiter(
+            map(len, results), dtype=np.int64, count=len(results))
+        img_ids = np.repeat(np.array(self.img_ids), counts)
+        return self._bboxes2array(results, counts, img_ids, 1)
+
+    def _det2array(self, results):
+        """Convert detection results to a columnar array.
+
+        The per class arrays of all images are concatenated at once instead
+        of being converted box by box.
+
+        Returns:
+            np.ndarray: Detections of all images, shape (N, 7), each row of
+                which is (image_id, x, y, w, h, score, category_id).
+        """
+        num_classes = np.fromiter(
+            map(len, results), dtype=np.int64, count=len(results))
+        flat_bboxes = list(itertools.chain.from_iterable(results))
+        counts = np.fromiter(
+            map(len, flat_bboxes), dtype=np.int64, count=len(flat_bboxes))
+        img_inds = np.repeat(np.arange(len(results)), num_classes)
+        labels = np.arange(len(flat_bboxes)) - np.repeat(
+            np.cumsum(num_classes) - num_classes, num_classes)
+        img_ids = np.array(self.img_ids)[np.repeat(img_inds, counts)]
+        cat_ids = np.array(self.cat_ids)[np.repeat(labels, counts)]
+        return self._bboxes2array(flat_bboxes, counts, img_ids, cat_ids)
+
+    def _bboxes2array(self, bboxes, counts, img_ids, cat_ids):
+        """Concatenate bboxes and convert them to ``xywh`` style."""
+        dets = np.zeros((counts.sum(), 7))
+        if len(dets) > 0:
+            # cast to float64 before subtracting as xyxy2xywh does
+            bboxes = np.concatenate(list(itertools.compress(
+                bboxes, counts))).astype(np.float64)
+            dets[:, 1:3] = bboxes[:, :2]
+            dets[:, 3:5] = bboxes[:, 2:4] - bboxes[:, :2]
+            dets[:, 5] = bboxes[:, 4]
+        dets[:, 0] = img_ids
+        dets[:, 6] = cat_ids
+        return dets
+
+    def _segm2array(self, results):
+        """Convert instance segmentation results to columnar arrays.
+
+        Returns:
+            tuple: Detections and masks of all images. The detections are in
+                the format of :meth:`_det2array`, the masks are (bbox, mask
+                score) rows in the same format and a list of the RLEs.
+        """
+        dets = self._det2array([det for det, _ in results])
+        segms, mask_scores = [], []
+        for det, seg in results:
+            # some detectors use different scores for bbox and mask
+            if isinstance(seg, tuple):
+                segms.extend(seg[0])
+                mask_scores.extend(seg[1])
+            else:
+                segms.extend(seg)
+                mask_scores.extend(bboxes[:, 4] for bboxes in det)
+        segms = list(itertools.chain.from_iterable(segms))
+        segm_dets = dets.copy()
+        if len(segms) > 0:
+            segm_dets[:, 5] = np.concatenate([
+                np.asarray(scores, dtype=np.float64).reshape(-1)
+                for scores in mask_scores
+            ])
+        for segm in segms:
+            if isinstance(segm['counts'], bytes):
+                segm['counts'] = segm['counts'].decode()
+        return dets, segm_dets, segms
+
+    def _array2json(self, dets, segms=None):
+        """Convert the rows of a columnar array to COCO json style."""
         json_results = []
-        for idx in range(len(self)):
-            img_id = self.img_ids[idx]
-            bboxes = results[idx]
-            for i in range(bboxes.shape[0]):
-                data = dict()
-                data['image_id'] = img_id
-                data['bbox'] = self.xyxy2xywh(bboxes[i])
-                data['score'] = float(bboxes[i][4])
-                data['category_id'] = 1
-                json_results.append(data)
+        for i, (img_id, x, y, w, h, score, cat_id) in enumerate(dets.tolist()):
+            data = dict(
+                image_id=int(img_id),
+                bbox=[x, y, w, h],
+                score=score,
+                category_id=int(cat_id))
+            if segms is not None:
+                data['segmentation'] = segms[i]
+            json_results.append(data)
         return json_results
 
+    def _proposal2json(self, results):
+        """Convert proposal results to COCO json style."""
+        return self._array2json(self._proposal2array(results))
+
     def _det2json(self, results):
         """Convert detection results to COCO json style."""
-        json_results = []
-        for idx in range(len(self)):
-            img_id = self.img_ids[idx]
-            result = results[idx]
-            for label in range(len(result)):
-                bboxes = result[label]
-                for i in range(bboxes.shape[0]):
-                    data = dict()
-                    data['image_id'] = img_id
-                    data['bbox'] = self.xyxy2xywh(bboxes[i])
-                    data['score'] = float(bboxes[i][4])
-                    data['category_id'] = self.cat_ids[label]
-                    json_results.append(data)
-        return json_results
+        return self._array2json(self._det2array(results))
 
     def _segm2json(self, results):
         """Convert instance segmentation results to COCO json style."""
-        bbox_json_results = []
-        segm_json_results = []
-        for idx in range(len(self)):
-            img_id = self.img_ids[idx]
-            det, seg = results[idx]
-            for label in range(len(det)):
-                # bbox results
-                bboxes = det[label]
-                for i in range(bboxes.shape[0]):
-                    data = dict()
-                    data['image_id'] = img_id
-                    data['bbox'] = self.xyxy2xywh(bboxes[i])
-                    data['score'] = float(bboxes[i][4])
-                    data['category_id'] = self.cat_ids[label]
-                    bbox_json_results.append(data)
-
-                # segm results
-                # some detectors use different scores for bbox and mask
-                if isinstance(seg, tuple):
-                    segms = seg[0][label]
-                    mask_score = seg[1][label]
+        dets, segm_dets, segms = self._segm2array(results)
+        return self._array2json(dets), self._array2json(segm_dets, segms)
+
+    def results2array(self, results):
+        """Convert the results to columnar arrays.
+
+        Args:
+            results (list[list | tuple | ndarray]): Testing results of the
+                dataset.
+
+        Returns:
+            dict[str: tuple]: Possible keys are "bbox", "segm" and
+                "proposal". Values are tuples of an (N, 7) array, whose rows
+                are (image_id, x, y, w, h, score, category_id), and the list
+                of N RLEs for "segm" or None for the others.
+        """
+        result_arrays = dict()
+        if isinstance(results[0], list):
+            dets = self._det2array(results)
+            result_arrays['bbox'] = (dets, None)
+            result_arrays['proposal'] = (dets, None)
+        elif isinstance(results[0], tuple):
+            dets, segm_dets, segms = self._segm2array(results)
+            result_arrays['bbox'] = (dets, None)
+            result_arrays['proposal'] = (dets, None)
+            result_arrays['segm'] = (segm_dets, segms)
+        elif isinstance(results[0], np.ndarray):
+            result_arrays['proposal'] = (self._proposal2array(results), None)
+        else:
+            raise TypeError('invalid type of results')
+        return result_arrays
+
+    def dump_result_array(self, dets, filename, segms=None, chunk_size=65536):
+        """Dump a columnar array of results to a COCO style json file.
+
+        Rows are formatted with a fixed template and written chunk by chunk,
+        which gives the same file as dumping the output of
+        :meth:`_array2json` with ``mmcv.dump`` without building a dict for
+        each of the boxes.
+
+        Args:
+            dets (np.ndarray): Results of shape (N, 7) returned by
+                :meth:`results2array`.
+            filename (str): Filename of the json file.
+            segms (list[dict], optional): RLEs of the rows. Default: None.
+            chunk_size (int): Number of rows formatted at a time.
+                Default: 65536.
+        """
+        if not np.isfinite(dets).all():
+            # json writes NaN and Infinity which do not fit in the template
+            mmcv.dump(self._array2json(dets, segms), filename)
+            return
+        template = ('{"image_id": %d, "bbox": [%r, %r, %r, %r], '
+                    '"score": %r, "category_id": %d')
+        with open(filename, 'w') as f:
+            f.write('[')
+            for start in range(0, len(dets), chunk_size):
+                rows = dets[start:start + chunk_size].tolist()
+                if segms is None:
+                    lines = [template % tuple(row) + '}' for row in rows]
                 else:
-                    segms = seg[label]
-                    mask_score = [bbox[4] for bbox in bboxes]
-                for i in range(bboxes.shape[0]):
-                    data = dict()
-                    data['image_id'] = img_id
-                    data['bbox'] = self.xyxy2xywh(bboxes[i])
-                    data['score'] = float(mask_score[i])
-                    data['category_id'] = self.cat_ids[label]
-                    if isinstance(segms[i]['counts'], bytes):
-                        segms[i]['counts'] = segms[i]['counts'].decode()
-                    data['segmentation'] = segms[i]
-                    segm_json_results.append(data)
-        return bbox_json_results, segm_json_results
+                    lines = [
+                        template % tuple(row) + ', "segmentation": ' +
+                        json.dumps(segm) + '}'
+                        for row, segm in zip(rows, segms[start:start +
+                                                         chunk_size])
+                    ]
+                if start > 0:
+                    f.write(', ')
+                f.write(', '.join(lines))
+            f.write(']')
 
     def results2json(self, results, outfile_prefix):
         """Dump the detection results to a COCO style json file.
@@ -283,50 +517,95 @@ class CocoDataset(CustomDataset):
                 "somepath/xxx.bbox.json", "somepath/xxx.segm.json",
                 "somepath/xxx.proposal.json".
 
+        Returns:
+            dict[str: str]: Possible keys are "bbox", "segm", "proposal", and \
+                values are corresponding filenames.
+        """
+        return self.dump_result_arrays(
+            self.results2array(results), outfile_prefix)
+
+    def dump_result_arrays(self, result_arrays, outfile_prefix):
+        """Dump the columnar arrays of results to COCO style json files.
+
+        Args:
+            result_arrays (dict[str: tuple]): Columnar arrays returned by
+                :meth:`results2array`.
+            outfile_prefix (str): The filename prefix of the json files, see
+                :meth:`results2json`.
+
         Returns:
             dict[str: str]: Possible keys are "bbox", "segm", "proposal", and \
                 values are corresponding filenames.
         """
         result_files = dict()
-        if isinstance(results[0], list):
-            json_results = self._det2json(results)
-            result_files['bbox'] = f'{outfile_prefix}.bbox.json'
-            result_files['proposal'] = f'{outfile_prefix}.bbox.json'
-            mmcv.dump(json_results, result_files['bbox'])
-        elif isinstance(results[0], tuple):
-            json_results = self._segm2json(results)
+        if 'bbox' in result_arrays:
             result_files['bbox'] = f'{outfile_prefix}.bbox.json'
             result_files['proposal'] = f'{outfile_prefix}.bbox.json'
-            result_files['segm'] = f'{outfile_prefix}.segm.json'
-            mmcv.dump(json_results[0], result_files['bbox'])
-            mmcv.dump(json_results[1], result_files['segm'])
-        elif isinstance(results[0], np.ndarray):
-            json_results = self._proposal2json(results)
-            result_files['proposal'] = f'{outfile_prefix}.proposal.json'
-            mmcv.dump(json_results, result_files['proposal'])
+            self.dump_result_array(result_arrays['bbox'][0],
+                                   result_files['bbox'])
         else:
-            raise TypeError('invalid type of results')
+            result_files['proposal'] = f'{outfile_prefix}.proposal.json'
+            self.dump_result_array(result_arrays['proposal'][0],
+                                   result_files['proposal'])
+        if 'segm' in result_arrays:
+            result_files['segm'] = f'{outfile_prefix}.segm.json'
+            segm_dets, segms = result_arrays['segm']
+            self.dump_result_array(
+                segm_dets, result_files['segm'], segms=segms)
         return result_files
 
-    def fast_eval_recall(self, results, proposal_nums, iou_thrs, logger=None):
-        gt_bboxes = []
-        for i in range(len(self.img_ids)):
-            ann_ids = self.coco.get_ann_ids(img_ids=self.img_ids[i])
-            ann_info = self.coco.load_anns(ann_ids)
-            if len(ann_info) == 0:
-                gt_bboxes.append(np.zeros((0, 4)))
-                continue
-            bboxes = []
-            for ann in ann_info:
-                if ann.get('ignore', False) or ann['iscrowd']:
-                    continue
-                x1, y1, w, h = ann['bbox']
-                bboxes.append([x1, y1, x1 + w, y1 + h])
-            bboxes = np.array(bboxes, dtype=np.float32)
-            if bboxes.shape[0] == 0:
-                bboxes = np.zeros((0, 4))
-            gt_bboxes.append(bboxes)
+    def get_recall_gt_bboxes(self):
+        """Get the gt bboxes of each image for :meth:`fast_eval_recall`.
 
+        The valid (neither ignored nor crowd) gt bboxes of all images are
+        gathered into a single array in one pass over the annotations, which
+        is cached so that evaluating the proposals every epoch does not query
+        the COCO api image by image.
+
+        Returns:
+            list[np.ndarray]: The gt bboxes of shape (n, 4) in (x1, y1, x2,
+                y2) format of each image, which are views of a single array.
+        """
+        if self._recall_gt_bboxes is not None:
+            return self._recall_gt_bboxes
+        num_imgs = len(self.img_ids)
+        if self.compact_anns is not None:
+            anns = self.compact_anns
+            img_inds = np.searchsorted(anns.img_ids, self.img_ids)
+            starts = anns.ann_offsets[img_inds]
+            counts = anns.ann_offsets[img_inds + 1] - starts
+            ann_img_inds = np.repeat(np.arange(num_imgs), counts)
+            # the annotations of each image are contiguous
+            ann_inds = starts[ann_img_inds] + np.arange(
+                counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            # the compact boxes are float32 (x1, y1, x2, y2) already
+            bboxes = anns.bboxes[ann_inds]
+            invalid = anns.ignore[ann_inds] | (anns.iscrowd[ann_inds] > 0)
+        else:
+            img_id2ind = {img_id: i for i, img_id in enumerate(self.img_ids)}
+            anns = self.coco.dataset['annotations']
+            ann_img_inds = np.array(
+                [img_id2ind.get(ann['image_id'], -1) for ann in anns],
+                dtype=np.int64)
+            bboxes = np.array([ann['bbox'] for ann in anns],
+                              dtype=np.float64).reshape(-1, 4)
+            bboxes[:, 2:] += bboxes[:, :2]
+            bboxes = bboxes.astype(np.float32)
+            invalid = np.array(
+                [ann.get('ignore', False) or ann['iscrowd'] for ann in anns],
+                dtype=bool)
+            # annotations of the images filtered out
+            invalid |= ann_img_inds < 0
+        # stable sort keeps the order of the annotations of each image
+        inds = np.nonzero(~invalid)[0]
+        inds = inds[np.argsort(ann_img_inds[inds], kind='stable')]
+        bboxes = bboxes[inds]
+        counts = np.bincount(ann_img_inds[inds], minlength=num_imgs)
+        self._recall_gt_bboxes = np.split(bboxes, np.cumsum(counts)[:-1])
+        return self._recall_gt_bboxes
+
+    def fast_eval_recall(self, results, proposal_nums, iou_thrs, logger=None):
+        gt_bboxes = self.get_recall_gt_bboxes()
         recalls = eval_recalls(
             gt_bboxes, results, proposal_nums, iou_thrs, logger=logger)
         ar = recalls.mean(axis=1)
@@ -379,7 +658,7 @@ class CocoDataset(CustomDataset):
                 related information during evaluation. Default: None.
             jsonfile_prefix (str | None): The prefix of json files. It includes
                 the file path and the prefix of filename, e.g., "a/b/prefix".
-                If not specified, a temp file will be created. Default: None.
+                If not specified, the results are not dumped. Default: None.
             classwise (bool): Whether to evaluating the AP for each class.
             proposal_nums (Sequence[int]): Proposal number used for evaluating
                 recalls, such as recall@100, recall@1000.
@@ -412,7 +691,15 @@ class CocoDataset(CustomDataset):
             if not isinstance(metric_items, list):
                 metric_items = [metric_items]
 
-        result_files, tmp_dir = self.format_results(results, jsonfile_prefix)
+        assert isinstance(results, list), 'results must be a list'
+        assert len(results) == len(self), (
+            'The length of results is not equal to the dataset len: {} != {}'.
+            format(len(results), len(self)))
+        # the results are fed to COCO api directly without the round trip of
+        # json files, which are only dumped if jsonfile_prefix is specified
+        result_arrays = self.results2array(results)
+        if jsonfile_prefix is not None:
+            self.dump_result_arrays(result_arrays, jsonfile_prefix)
 
         eval_results = OrderedDict()
         cocoGt = self.coco
@@ -433,10 +720,11 @@ class CocoDataset(CustomDataset):
                 print_log(log_msg, logger=logger)
                 continue
 
-            if metric not in result_files:
+            if metric not in result_arrays:
                 raise KeyError(f'{metric} is not in results')
             try:
-                cocoDt = cocoGt.loadRes(result_files[metric])
+                cocoDt = cocoGt.loadRes(
+                    self._array2json(*result_arrays[metric]))
             except IndexError:
                 print_log(
                     'The testing results of the whole dataset is empty.',
@@ -450,21 +738,7 @@ class CocoDataset(CustomDataset):
             cocoEval.params.imgIds = self.img_ids
             cocoEval.params.maxDets = list(proposal_nums)
             cocoEval.params.iouThrs = iou_thrs
-            # mapping of cocoEval.stats
-            coco_metric_names = {
-                'mAP': 0,
-                'mAP_50': 1,
-                'mAP_75': 2,
-                'mAP_s': 3,
-                'mAP_m': 4,
-                'mAP_l': 5,
-                'AR@100': 6,
-                'AR@300': 7,
-                'AR@1000': 8,
-                'AR_s@1000': 9,
-                'AR_m@1000': 10,
-                'AR_l@1000': 11
-            }
+            coco_metric_names = COCO_METRIC_NAMES
             if metric_items is not None:
                 for metric_item in metric_items:
                     if metric_item not in coco_metric_names:
@@ -488,57 +762,94 @@ class CocoDataset(CustomDataset):
                     eval_results[item] = val
             else:
                 cocoEval.evaluate()
-                cocoEval.accumulate()
-                cocoEval.summarize()
-                if classwise:  # Compute per-category AP
-                    # Compute per-category AP
-                    # from https://github.com/facebookresearch/detectron2/
-                    precisions = cocoEval.eval['precision']
-                    # precision: (iou, recall, cls, area range, max dets)
-                    assert len(self.cat_ids) == precisions.shape[2]
-
-                    results_per_category = []
-                    for idx, catId in enumerate(self.cat_ids):
-                        # area range index 0: all area ranges
-                        # max dets index -1: typically 100 per image
-                        nm = self.coco.loadCats(catId)[0]
-                        precision = precisions[:, :, idx, 0, -1]
-                        precision = precision[precision > -1]
-                        if precision.size:
-                            ap = np.mean(precision)
-                        else:
-                            ap = float('nan')
-                        results_per_category.append(
-                            (f'{nm["name"]}', f'{float(ap):0.3f}'))
-
-                    num_columns = min(6, len(results_per_category) * 2)
-                    results_flatten = list(
-                        itertools.chain(*results_per_category))
-                    headers = ['category', 'AP'] * (num_columns // 2)
-                    results_2d = itertools.zip_longest(*[
-                        results_flatten[i::num_columns]
-                        for i in range(num_columns)
-                    ])
-                    table_data = [headers]
-                    table_data += [result for result in results_2d]
-                    table = AsciiTable(table_data)
-                    print_log('\n' + table.table, logger=logger)
+                eval_results.update(
+                    self.summarize_coco_eval(
+                        cocoEval,
+                        metric,
+                        classwise=classwise,
+                        metric_items=metric_items,
+                        logger=logger))
+        return eval_results
 
-                if metric_items is None:
-                    metric_items = [
-                        'mAP', 'mAP_50', 'mAP_75', 'mAP_s', 'mAP_m', 'mAP_l'
-                    ]
+    def summarize_coco_eval(self,
+                            cocoEval,
+                            metric,
+                            classwise=False,
+                            metric_items=None,
+                            logger=None):
+        """Accumulate and summarize a ``COCOeval`` whose per image evaluation
+        is done.
 
-                for metric_item in metric_items:
-                    key = f'{metric}_{metric_item}'
-                    val = float(
-                        f'{cocoEval.stats[coco_metric_names[metric_item]]:.3f}'
-                    )
-                    eval_results[key] = val
-                ap = cocoEval.stats[:6]
-                eval_results[f'{metric}_mAP_copypaste'] = (
-                    f'{ap[0]:.3f} {ap[1]:.3f} {ap[2]:.3f} {ap[3]:.3f} '
-                    f'{ap[4]:.3f} {ap[5]:.3f}')
-        if tmp_dir is not None:
-            tmp_dir.cleanup()
+        Args:
+            cocoEval (COCOeval): COCOeval with ``evalImgs`` computed.
+            metric (str): 'bbox' or 'segm'.
+            classwise (bool): Whether to evaluating the AP for each class.
+            metric_items (list[str], optional): Metric items that will be
+                returned. Default: None.
+            logger (logging.Logger | str | None): Logger used for printing
+                related information during evaluation. Default: None.
+
+        Returns:
+            dict[str, float]: COCO style evaluation metric.
+        """
+        eval_results = OrderedDict()
+        coco_metric_names = COCO_METRIC_NAMES
+        cocoEval.accumulate()
+        cocoEval.summarize()
+        if classwise:  # Compute per-category AP
+            # Compute per-category AP
+            # from https://github.com/facebookresearch/detectron2/
+            precisions = cocoEval.eval['precision']
+            # precision: (iou, recall, cls, area range, max dets)
+            assert len(self.cat_ids) == precisions.shape[2]
+
+            results_per_category = []
+            for idx, catId in enumerate(self.cat_ids):
+                # area range index 0: all area ranges
+                # max dets index -1: typically 100 per image
+                nm = self.coco.loadCats(catId)[0]
+                precision = precisions[:, :, idx, 0, -1]
+                precision = precision[precision > -1]
+                if precision.size:
+                    ap = np.mean(precision)
+                else:
+                    ap = float('nan')
+                results_per_category.append(
+                    (f'{nm["name"]}', f'{float(ap):0.3f}'))
+
+            num_columns = min(6, len(results_per_category) * 2)
+            results_flatten = list(itertools.chain(*results_per_category))
+            headers = ['category', 'AP'] * (num_columns // 2)
+            results_2d = itertools.zip_longest(
+                *[results_flatten[i::num_columns] for i in range(num_columns)])
+            table_data = [headers]
+            table_data += [result for result in results_2d]
+            table = AsciiTable(table_data)
+            print_log('\n' + table.table, logger=logger)
+
+        if metric_items is None:
+            metric_items = [
+                'mAP', 'mAP_50', 'mAP_75', 'mAP_s', 'mAP_m', 'mAP_l'
+            ]
+
+        for metric_item in metric_items:
+            key = f'{metric}_{metric_item}'
+            val = float(
+                f'{cocoEval.stats[coco_metric_names[metric_item]]:.3f}')
+            eval_results[key] = val
+        ap = cocoEval.stats[:6]
+        eval_results[f'{metric}_mAP_copypaste'] = (
+            f'{ap[0]:.3f} {ap[1]:.3f} {ap[2]:.3f} {ap[3]:.3f} '
+            f'{ap[4]:.3f} {ap[5]:.3f}')
         return eval_results
+
+    def incremental_evaluator(self, **kwargs):
+        """Build an evaluator consuming results batch by batch.
+
+        Args:
+            **kwargs: Arguments of :obj:`IncrementalCocoEvaluator`.
+
+        Returns:
+            IncrementalCocoEvaluator: The evaluator.
+        """
+        return IncrementalCocoEvaluator(self, **kwargs)
@@ -0,0 +1,243 @@
+import os
+import os.path as osp
+import shutil
+
+import mmcv
+import numpy as np
+
+# types of the `segmentation` field of annotations
+SEG_NONE = 0
+SEG_POLYGON = 1
+SEG_RLE = 2  # compressed RLE whose counts is a str
+SEG_RAW_RLE = 3  # uncompressed RLE whose counts is a list of int
+
+
+class CompactCocoAnnotations(object):
+    """Columnar storage of COCO style annotations.
+
+    The annotations of all images are kept in a few flat NumPy arrays instead
+    of a dict of Python dicts as the COCO api does. Annotations of the i-th
+    image are at ``[ann_offsets[i], ann_offsets[i + 1])`` of the per
+    annotation arrays. Boxes are kept as float32 (x1, y1, x2, y2), whose
+    corners are computed in float64 from the (x, y, w, h) of the annotations,
+    so they are the same as the float32 gt bboxes parsed from the COCO api.
+    Polygons are flattened into a float64 coordinate buffer and RLE counts
+    into a byte buffer, both indexed by offsets.
+
+    Since there are only a handful of Python objects, forked dataloader
+    workers never write to the pages holding the annotations, so they stay
+    shared with the main process. The arrays can also be dumped to a
+    directory and memory-mapped, in which case the page cache is shared by
+    all processes on the node.
+
+    Args:
+        arrays (dict[str, np.ndarray]): The arrays listed in ``ARRAY_NAMES``.
+    """
+
+    # bumped when the layout of the dumped arrays changes
+    VERSION = 2
+
+    ARRAY_NAMES = ('img_ids', 'ann_offsets', 'ann_ids', 'bboxes', 'areas',
+                   'category_ids', 'iscrowd', 'ignore', 'seg_types',
+                   'part_offsets', 'coord_offsets', 'coords', 'rle_sizes',
+                   'byte_offsets', 'seg_bytes')
+
+    def __init__(self, arrays):
+        for name in self.ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        # img_ids are sorted at construction to support binary search
+        assert np.all(self.img_ids[1:] > self.img_ids[:-1])
+
+    @classmethod
+    def from_api(cls, api, img_ids):
+        """Build compact annotations from a COCO style api.
+
+        Args:
+            api (COCO | LVIS): COCO style api with ``get_ann_ids`` and
+                ``load_anns``.
+            img_ids (list[int]): Ids of images whose annotations are kept.
+
+        Returns:
+            CompactCocoAnnotations: The compact annotations.
+        """
+        img_ids = np.unique(np.array(img_ids, dtype=np.int64))
+        ann_offsets = [0]
+        ann_ids, bboxes, areas, category_ids = [], [], [], []
+        iscrowd, ignore, seg_types = [], [], []
+        part_offsets, coord_offsets, coords = [0], [0], []
+        rle_sizes, byte_offsets, seg_bytes = [], [0], []
+        num_parts = num_coords = num_bytes = 0
+        for img_id in img_ids.tolist():
+            ann_info = api.load_anns(api.get_ann_ids(img_ids=[img_id]))
+            for ann in ann_info:
+                ann_ids.append(ann['id'])
+                bboxes.append(ann['bbox'])
+                areas.append(ann['area'])
+                category_ids.append(ann['category_id'])
+                iscrowd.append(ann.get('iscrowd', 0))
+                ignore.append(ann.get('ignore', False))
+                rle_size = (0, 0)
+                segm = ann.get('segmentation', None)
+                if segm is None:
+                    seg_types.append(SEG_NONE)
+                elif isinstance(segm, list):
+                    seg_types.append(SEG_POLYGON)
+                    for part in segm:
+                        coords.append(np.array(part, dtype=np.float64))
+                        num_coords += len(part)
+                        coord_offsets.append(num_coords)
+                    num_parts += len(segm)
+                else:
+                    rle_size = segm['size']
+                    counts = segm['counts']
+                    if isinstance(counts, list):
+                        seg_types.append(SEG_RAW_RLE)
+                        counts = np.array(counts, dtype='<u4').tobytes()
+                    else:
+                        seg_types.append(SEG_RLE)
+                        if isinstance(counts, str):
+                            counts = counts.encode()
+                    seg_bytes.append(np.frombuffer(counts, dtype=np.uint8))
+                    num_bytes += len(counts)
+                part_offsets.append(num_parts)
+                byte_offsets.append(num_bytes)
+                rle_sizes.append(rle_size)
+            ann_offsets.append(len(ann_ids))
+        bboxes = np.array(bboxes, dtype=np.float64).reshape(-1, 4)
+        bboxes[:, 2:] += bboxes[:, :2]
+
+        def _concat(arrays, dtype):
+            if len(arrays) == 0:
+                return np.zeros(0, dtype=dtype)
+            return np.concatenate(arrays).astype(dtype)
+
+        return cls(
+            dict(
+                img_ids=img_ids,
+                ann_offsets=np.array(ann_offsets, dtype=np.int64),
+                ann_ids=np.array(ann_ids, dtype=np.int64),
+                bboxes=bboxes.astype(np.float32),
+                areas=np.array(areas, dtype=np.float32),
+                category_ids=np.array(category_ids, dtype=np.int32),
+                iscrowd=np.array(iscrowd, dtype=np.uint8),
+                ignore=np.array(ignore, dtype=bool),
+                seg_types=np.array(seg_types, dtype=np.uint8),
+                part_offsets=np.array(part_offsets, dtype=np.int64),
+                coord_offsets=np.array(coord_offsets, dtype=np.int64),
+                coords=_concat(coords, np.float64),
+                rle_sizes=np.array(rle_sizes, dtype=np.int32).reshape(-1, 2),
+                byte_offsets=np.array(byte_offsets, dtype=np.int64),
+                seg_bytes=_concat(seg_bytes, np.uint8)))
+
+    def dump(self, dirname):
+        """Dump the arrays to ``dirname`` as .npy files.
+
+        The arrays are written to a temporary directory first which is then
+        renamed, so that concurrent processes never see partial results.
+        """
+        tmp_dirname = f'{dirname}.{os.getpid()}.tmp'
+        mmcv.mkdir_or_exist(tmp_dirname)
+        for name in self.ARRAY_NAMES:
+            np.save(osp.join(tmp_dirname, f'{name}.npy'), getattr(self, name))
+        try:
+            os.rename(tmp_dirname, dirname)
+        except OSError:
+            # another process has dumped the same annotations
+            shutil.rmtree(tmp_dirname, ignore_errors=True)
+
+    @classmethod
+    def load(cls, dirname, mmap=True):
+        """Load arrays dumped by :meth:`dump`.
+
+        Args:
+            dirname (str): Directory of the dumped arrays.
+            mmap (bool): Whether to memory-map the arrays instead of reading
+                them into memory. Default: True.
+
+        Returns:
+            CompactCocoAnnotations: The compact annotations.
+        """
+        mmap_mode = 'r' if mmap else None
+        return cls({
+            name:
+            np.load(osp.join(dirname, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in cls.ARRAY_NAMES
+        })
+
+    def __len__(self):
+        """Number of images."""
+        return len(self.img_ids)
+
+    @property
+    def nbytes(self):
+        """int: Total bytes of all arrays."""
+        return sum(getattr(self, name).nbytes for name in self.ARRAY_NAMES)
+
+    def _ann_range(self, img_id):
+        """Get the range of annotations of an image in per annotation arrays.
+        """
+        idx = np.searchsorted(self.img_ids, img_id)
+        assert idx < len(self.img_ids) and self.img_ids[idx] == img_id, \
+            f'image {img_id} is not in the compact annotations'
+        return int(self.ann_offsets[idx]), int(self.ann_offsets[idx + 1])
+
+    def get_cat_ids(self, img_id):
+        """Get category ids of all annotations of an image.
+
+        Args:
+            img_id (int): Id of the image.
+
+        Returns:
+            list[int]: Category ids of the annotations.
+        """
+        start, end = self._ann_range(img_id)
+        return self.category_ids[start:end].tolist()
+
+    def _segmentation(self, i):
+        """Restore the `segmentation` field of the i-th annotation."""
+        seg_type = self.seg_types[i]
+        if seg_type == SEG_POLYGON:
+            part_start, part_end = self.part_offsets[i:i + 2]
+            return [
+                self.coords[self.coord_offsets[j]:self.coord_offsets[j + 1]].
+                tolist() for j in range(part_start, part_end)
+            ]
+        counts = self.seg_bytes[self.byte_offsets[i]:self.byte_offsets[i + 1]]
+        if seg_type == SEG_RLE:
+            counts = counts.tobytes().decode()
+        else:
+            counts = np.frombuffer(counts.tobytes(), dtype='<u4').tolist()
+        return dict(size=self.rle_sizes[i].tolist(), counts=counts)
+
+    def load_anns(self, img_id):
+        """Load all annotations of an image in COCO api format.
+
+        Args:
+            img_id (int): Id of the image.
+
+        Returns:
+            list[dict]: Annotations of the image, which are the same as those
+                returned by the ``load_anns`` of the COCO api except that
+                ``bbox`` and ``area`` are rounded to float32. ``x + w`` and
+                ``y + h`` of ``bbox`` are exactly the float32 box corners.
+        """
+        start, end = self._ann_range(img_id)
+        # the float64 differences of float32 coordinates are exact, so that
+        # x1 + w gives back x2
+        bboxes = self.bboxes[start:end].astype(np.float64)
+        bboxes[:, 2:] -= bboxes[:, :2]
+        ann_info = []
+        for i in range(start, end):
+            ann = dict(
+                id=int(self.ann_ids[i]),
+                image_id=img_id,
+                bbox=bboxes[i - start].tolist(),
+                area=float(self.areas[i]),
+                category_id=int(self.category_ids[i]),
+                iscrowd=int(self.iscrowd[i]))
+            if self.ignore[i]:
+                ann['ignore'] = True
+            if self.seg_types[i] != SEG_NONE:
+                ann['segmentation'] = self._segmentation(i)
+            ann_info.append(ann)
+        return ann_info
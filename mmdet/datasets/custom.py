@@ -48,6 +48,10 @@ class CustomDataset(Dataset):
             boxes of the dataset's classes will be filtered out. This option
             only works when `test_mode=False`, i.e., we never filter images
             during tests.
+        profile_pipeline (bool, optional): If set True, the latency and
+            memory stats of each transform of the pipeline are recorded by
+            ``self.pipeline.profiler``, see :class:`PipelineProfiler`.
+            Default: False.
     """
 
     CLASSES = None
@@ -61,7 +65,8 @@ class CustomDataset(Dataset):
                  seg_prefix=None,
                  proposal_file=None,
                  test_mode=False,
-                 filter_empty_gt=True):
+                 filter_empty_gt=True,
+                 profile_pipeline=False):
         self.ann_file = ann_file
         self.data_root = data_root
         self.img_prefix = img_prefix
@@ -70,6 +75,7 @@ class CustomDataset(Dataset):
         self.test_mode = test_mode
         self.filter_empty_gt = filter_empty_gt
         self.CLASSES = self.get_classes(classes)
+        self._cat_index = None
 
         # join paths if data_root is specified
         if self.data_root is not None:
@@ -101,7 +107,7 @@ class CustomDataset(Dataset):
             self._set_group_flag()
 
         # processing pipeline
-        self.pipeline = Compose(pipeline)
+        self.pipeline = Compose(pipeline, profile=profile_pipeline)
 
     def __len__(self):
         """Total number of samples of data."""
@@ -139,6 +145,55 @@ class CustomDataset(Dataset):
 
         return self.data_infos[idx]['ann']['labels'].astype(np.int).tolist()
 
+    def get_cat_index(self):
+        """Get category ids of all images as flat arrays.
+
+        The index is built once by :meth:`_build_cat_index` and cached, so
+        that dataset wrappers like :obj:`ClassBalancedDataset` do not need to
+        call :meth:`get_cat_ids` for each image.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: ``offsets`` of shape
+                (num_images + 1, ) and ``cat_ids``. Category ids of the i-th
+                image are ``cat_ids[offsets[i]:offsets[i + 1]]``.
+        """
+
+        if self._cat_index is None:
+            self._cat_index = self._build_cat_index()
+        return self._cat_index
+
+    def _build_cat_index(self):
+        """Build the category index by calling :meth:`get_cat_ids` for each
+        image, which subclasses override with vectorized versions."""
+
+        cat_ids = [self.get_cat_ids(idx) for idx in range(len(self))]
+        offsets = np.zeros(len(cat_ids) + 1, dtype=np.int64)
+        np.cumsum([len(ids) for ids in cat_ids], out=offsets[1:])
+        cat_ids = np.array([cat_id for ids in cat_ids for cat_id in ids],
+                           dtype=np.int64)
+        return offsets, cat_ids
+
+    @staticmethod
+    def _gather_cat_index(all_cat_ids, starts, ends):
+        """Build the category index from the ranges of the category ids of
+        each image in a flat array.
+
+        Args:
+            all_cat_ids (np.ndarray): Category ids of all annotations.
+            starts (np.ndarray): Start of the range of each image.
+            ends (np.ndarray): End of the range of each image.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: See :meth:`get_cat_index`.
+        """
+
+        counts = np.asarray(ends, dtype=np.int64) - starts
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        inds = np.arange(offsets[-1]) + np.repeat(starts - offsets[:-1],
+                                                  counts)
+        return offsets, np.asarray(all_cat_ids, dtype=np.int64)[inds]
+
     def pre_pipeline(self, results):
         """Prepare results dict for pipeline."""
         results['img_prefix'] = self.img_prefix
@@ -270,7 +325,8 @@ class CustomDataset(Dataset):
                  logger=None,
                  proposal_nums=(100, 300, 1000),
                  iou_thr=0.5,
-                 scale_ranges=None):
+                 scale_ranges=None,
+                 vectorized=False):
         """Evaluate the dataset.
 
         Args:
@@ -284,6 +340,8 @@ class CustomDataset(Dataset):
             iou_thr (float | list[float]): IoU threshold. Default: 0.5.
             scale_ranges (list[tuple] | None): Scale ranges for evaluating mAP.
                 Default: None.
+            vectorized (bool): Whether to compute mAP with the single-process
+                vectorized engine. See :func:`eval_map`. Default: False.
         """
 
         if not isinstance(metric, str):
@@ -306,7 +364,8 @@ class CustomDataset(Dataset):
                     scale_ranges=scale_ranges,
                     iou_thr=iou_thr,
                     dataset=self.CLASSES,
-                    logger=logger)
+                    logger=logger,
+                    vectorized=vectorized)
                 mean_aps.append(mean_ap)
                 eval_results[f'AP{int(iou_thr * 100):02d}'] = round(mean_ap, 3)
             eval_results['mAP'] = sum(mean_aps) / len(mean_aps)
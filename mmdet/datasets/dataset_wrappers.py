@@ -1,13 +1,57 @@
 import bisect
-import math
-from collections import defaultdict
+import hashlib
+import os
+import os.path as osp
 
+import mmcv
 import numpy as np
 from mmcv.utils import print_log
 from torch.utils.data.dataset import ConcatDataset as _ConcatDataset
 
 from .builder import DATASETS
 from .coco import CocoDataset
+from .custom import CustomDataset
+
+
+def _get_cat_index(dataset):
+    """Get the category index of a dataset as
+    :meth:`CustomDataset.get_cat_index` does, for any dataset with
+    ``get_cat_ids``."""
+    if hasattr(dataset, 'get_cat_index'):
+        return dataset.get_cat_index()
+    return CustomDataset._build_cat_index(dataset)
+
+
+def _get_fingerprint(dataset):
+    """Get a string identifying the images and annotations of a dataset.
+
+    Returns:
+        str | None: The fingerprint, or None if the dataset is not loaded
+            from an annotation file.
+    """
+    if isinstance(dataset, _ConcatDataset):
+        fingerprints = [_get_fingerprint(ds) for ds in dataset.datasets]
+        if None in fingerprints:
+            return None
+        return f'Concat({",".join(fingerprints)})'
+    if isinstance(dataset, RepeatDataset):
+        fingerprint = _get_fingerprint(dataset.dataset)
+        if fingerprint is None:
+            return None
+        return f'Repeat({fingerprint},{dataset.times})'
+    ann_file = getattr(dataset, 'ann_file', None)
+    if not isinstance(ann_file, str) or not osp.isfile(ann_file):
+        return None
+    img_keys = [
+        info.get('id', info.get('filename')) for info in dataset.data_infos
+    ]
+    return '|'.join([
+        type(dataset).__name__,
+        osp.abspath(ann_file),
+        str(os.stat(ann_file).st_mtime_ns),
+        repr(tuple(dataset.CLASSES)),
+        hashlib.md5(repr(img_keys).encode('utf-8')).hexdigest(),
+    ])
 
 
 @DATASETS.register_module()
@@ -65,6 +109,21 @@ class ConcatDataset(_ConcatDataset):
             sample_idx = idx - self.cumulative_sizes[dataset_idx - 1]
         return self.datasets[dataset_idx].get_cat_ids(sample_idx)
 
+    def get_cat_index(self):
+        """Get category ids of all images of concatenated dataset.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: ``offsets`` and ``cat_ids``, see
+                :meth:`CustomDataset.get_cat_index`.
+        """
+
+        all_offsets, all_cat_ids = [np.zeros(1, dtype=np.int64)], []
+        for dataset in self.datasets:
+            offsets, cat_ids = _get_cat_index(dataset)
+            all_offsets.append(offsets[1:] + all_offsets[-1][-1])
+            all_cat_ids.append(cat_ids)
+        return np.concatenate(all_offsets), np.concatenate(all_cat_ids)
+
     def evaluate(self, results, logger=None, **kwargs):
         """Evaluate the results.
 
@@ -162,6 +221,22 @@ class RepeatDataset(object):
 
         return self.dataset.get_cat_ids(idx % self._ori_len)
 
+    def get_cat_index(self):
+        """Get category ids of all images of repeat dataset.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: ``offsets`` and ``cat_ids``, see
+                :meth:`CustomDataset.get_cat_index`.
+        """
+
+        offsets, cat_ids = _get_cat_index(self.dataset)
+        repeat_offsets = np.arange(self.times) * offsets[-1]
+        offsets = np.concatenate([
+            (offsets[:-1] + repeat_offsets[:, None]).ravel(),
+            [offsets[-1] * self.times]
+        ])
+        return offsets, np.tile(cat_ids, self.times)
+
     def __len__(self):
         """Length after repetition."""
         return self.times * self._ori_len
@@ -203,30 +278,80 @@ class ClassBalancedDataset(object):
             boxes will not be oversampled. Otherwise, they will be categorized
             as the pure background class and involved into the oversampling.
             Default: True.
+        cache_dir (str, optional): If specified, the repeat factors are saved
+            to a cache file in this directory and loaded by later
+            constructions. The cache is keyed by ``oversample_thr``,
+            ``filter_empty_gt``, and the class, the path and mtime of the
+            annotation file, ``CLASSES`` and the images of the dataset.
+            Datasets not loaded from an annotation file are not cached.
+            Default: None.
     """
 
-    def __init__(self, dataset, oversample_thr, filter_empty_gt=True):
+    def __init__(self,
+                 dataset,
+                 oversample_thr,
+                 filter_empty_gt=True,
+                 cache_dir=None):
         self.dataset = dataset
         self.oversample_thr = oversample_thr
         self.filter_empty_gt = filter_empty_gt
+        self.cache_dir = cache_dir
         self.CLASSES = dataset.CLASSES
 
-        repeat_factors = self._get_repeat_factors(dataset, oversample_thr)
-        repeat_indices = []
-        for dataset_idx, repeat_factor in enumerate(repeat_factors):
-            repeat_indices.extend([dataset_idx] * math.ceil(repeat_factor))
-        self.repeat_indices = repeat_indices
+        repeat_factors = self._load_repeat_factors(dataset, oversample_thr)
+        repeat_times = np.ceil(repeat_factors).astype(np.int64)
+        self.repeat_indices = np.repeat(np.arange(len(dataset)),
+                                        repeat_times).tolist()
 
-        flags = []
+        flags = np.zeros(0, dtype=np.uint8)
         if hasattr(self.dataset, 'flag'):
-            for flag, repeat_factor in zip(self.dataset.flag, repeat_factors):
-                flags.extend([flag] * int(math.ceil(repeat_factor)))
-            assert len(flags) == len(repeat_indices)
+            flags = np.repeat(self.dataset.flag, repeat_times)
+            assert len(flags) == len(self.repeat_indices)
         self.flag = np.asarray(flags, dtype=np.uint8)
 
+    def _load_repeat_factors(self, dataset, repeat_thr):
+        """Load the repeat factors from the cache, computing them if needed.
+
+        Args:
+            dataset (:obj:`CustomDataset`): The dataset
+            repeat_thr (float): The threshold of frequency.
+
+        Returns:
+            np.ndarray: The repeat factors for each images in the dataset.
+        """
+
+        fingerprint = None
+        if self.cache_dir is not None:
+            fingerprint = _get_fingerprint(dataset)
+        if fingerprint is None:
+            return self._get_repeat_factors(dataset, repeat_thr)
+
+        key = '|'.join([
+            type(self).__name__, fingerprint,
+            repr(float(repeat_thr)),
+            str(self.filter_empty_gt)
+        ])
+        digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+        cache_file = osp.join(self.cache_dir, f'repeat_factors.{digest}.npy')
+        if osp.isfile(cache_file):
+            return np.load(cache_file, allow_pickle=False)
+        repeat_factors = self._get_repeat_factors(dataset, repeat_thr)
+        mmcv.mkdir_or_exist(self.cache_dir)
+        # write to a temporary file first so that concurrent ranks
+        # never read a partially written cache
+        tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+        with open(tmp_file, 'wb') as f:
+            np.save(f, repeat_factors)
+        os.replace(tmp_file, cache_file)
+        return repeat_factors
+
     def _get_repeat_factors(self, dataset, repeat_thr):
         """Get repeat factor for each images in the dataset.
 
+        The categories of all images are taken as a sparse image x category
+        incidence matrix in coordinate format, from which the frequencies and
+        repeat factors are computed at once.
+
         Args:
             dataset (:obj:`CustomDataset`): The dataset
             repeat_thr (float): The threshold of frequency. If an image
@@ -234,43 +359,37 @@ class ClassBalancedDataset(object):
                 it would be repeated.
 
         Returns:
-            list[float]: The repeat factors for each images in the dataset.
+            np.ndarray: The repeat factors for each images in the dataset.
         """
 
+        num_images = len(dataset)
+        offsets, cat_ids = _get_cat_index(dataset)
+        img_inds = np.repeat(np.arange(num_images), np.diff(offsets))
+        if not self.filter_empty_gt:
+            empty_inds = np.flatnonzero(offsets[1:] == offsets[:-1])
+            img_inds = np.concatenate([img_inds, empty_inds])
+            cat_ids = np.concatenate(
+                [cat_ids, np.full(len(empty_inds), len(self.CLASSES))])
+        repeat_factors = np.ones(num_images)
+        if len(cat_ids) == 0:
+            return repeat_factors
+        # (image, category) pairs without the duplicated categories of an
+        # image
+        cats, cat_inds = np.unique(cat_ids, return_inverse=True)
+        pairs = np.unique(img_inds * len(cats) + cat_inds)
+        img_inds, cat_inds = pairs // len(cats), pairs % len(cats)
+
         # 1. For each category c, compute the fraction # of images
         #   that contain it: f(c)
-        category_freq = defaultdict(int)
-        num_images = len(dataset)
-        for idx in range(num_images):
-            cat_ids = set(self.dataset.get_cat_ids(idx))
-            if len(cat_ids) == 0 and not self.filter_empty_gt:
-                cat_ids = set([len(self.CLASSES)])
-            for cat_id in cat_ids:
-                category_freq[cat_id] += 1
-        for k, v in category_freq.items():
-            category_freq[k] = v / num_images
+        category_freq = np.bincount(cat_inds, minlength=len(cats)) / num_images
 
         # 2. For each category c, compute the category-level repeat factor:
         #    r(c) = max(1, sqrt(t/f(c)))
-        category_repeat = {
-            cat_id: max(1.0, math.sqrt(repeat_thr / cat_freq))
-            for cat_id, cat_freq in category_freq.items()
-        }
+        category_repeat = np.maximum(1.0, np.sqrt(repeat_thr / category_freq))
 
         # 3. For each image I, compute the image-level repeat factor:
         #    r(I) = max_{c in I} r(c)
-        repeat_factors = []
-        for idx in range(num_images):
-            cat_ids = set(self.dataset.get_cat_ids(idx))
-            if len(cat_ids) == 0 and not self.filter_empty_gt:
-                cat_ids = set([len(self.CLASSES)])
-            repeat_factor = 1
-            if len(cat_ids) > 0:
-                repeat_factor = max(
-                    {category_repeat[cat_id]
-                     for cat_id in cat_ids})
-            repeat_factors.append(repeat_factor)
-
+        np.maximum.at(repeat_factors, img_inds, category_repeat[cat_inds])
         return repeat_factors
 
     def __getitem__(self, idx):
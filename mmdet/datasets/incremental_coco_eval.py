@@ -0,0 +1,276 @@
+import copy
+from collections import OrderedDict
+
+import numpy as np
+import pycocotools.mask as maskUtils
+from mmcv.utils import print_log
+from pycocotools.cocoeval import COCOeval
+
+
+class IncrementalCocoEvaluator(object):
+    """Evaluate detection results in COCO protocol as they come out.
+
+    Instead of dumping the results of the whole dataset to json files and
+    loading them back with ``COCO.loadRes`` before running ``COCOeval``,
+    results are fed to the evaluator batch by batch via :meth:`process`. The
+    boxes/masks of each image are converted to arrays and matched to the gts
+    right away, producing the same per image evaluation records as
+    ``COCOeval.evaluateImg``, and the results themselves are dropped. Only
+    the records are kept until :meth:`evaluate`, which accumulates them with
+    ``COCOeval`` and reports the same metrics as :meth:`CocoDataset.evaluate`.
+
+    Args:
+        dataset (CocoDataset): The dataset to be evaluated.
+        metric (str | list[str]): Metrics to be evaluated. Options are
+            'bbox' and 'segm'. Default: 'bbox'.
+        classwise (bool): Whether to evaluating the AP for each class.
+            Default: False.
+        proposal_nums (Sequence[int]): Max numbers of detections per image.
+            Default: (100, 300, 1000).
+        iou_thrs (Sequence[float], optional): IoU thresholds. Default: None.
+        metric_items (list[str] | str, optional): Metric items that will
+            be returned. Default: None.
+    """
+
+    def __init__(self,
+                 dataset,
+                 metric='bbox',
+                 classwise=False,
+                 proposal_nums=(100, 300, 1000),
+                 iou_thrs=None,
+                 metric_items=None):
+        metrics = metric if isinstance(metric, list) else [metric]
+        for metric in metrics:
+            if metric not in ['bbox', 'segm']:
+                raise KeyError(
+                    f'metric {metric} is not supported by incremental '
+                    'evaluation')
+        if iou_thrs is None:
+            iou_thrs = np.linspace(
+                .5, 0.95, int(np.round((0.95 - .5) / .05)) + 1, endpoint=True)
+        if metric_items is not None and not isinstance(metric_items, list):
+            metric_items = [metric_items]
+        self.dataset = dataset
+        self.metrics = metrics
+        self.classwise = classwise
+        self.proposal_nums = proposal_nums
+        self.iou_thrs = np.array(iou_thrs)
+        self.metric_items = metric_items
+        # the same area ranges as COCOeval
+        self.area_rngs = [[0**2, 1e5**2], [0**2, 32**2], [32**2, 96**2],
+                          [96**2, 1e5**2]]
+        self.max_det = max(proposal_nums)
+        self.cat2label = {
+            cat_id: i
+            for i, cat_id in enumerate(dataset.cat_ids)
+        }
+        # per image evaluation records of each metric, keyed by
+        # (label, area range index, image id)
+        self.eval_imgs = {metric: dict() for metric in self.metrics}
+        self.processed_img_ids = set()
+
+    def process(self, results, indices):
+        """Match the results of some images to gts.
+
+        Args:
+            results (list[list | tuple]): Testing results of the images,
+                in the format of the outputs of ``single_gpu_test``.
+            indices (list[int]): Indices of the images in the dataset.
+        """
+        for idx, result in zip(indices, results):
+            img_id = self.dataset.img_ids[idx]
+            # the distributed sampler may pad duplicated samples
+            if img_id in self.processed_img_ids:
+                continue
+            self.processed_img_ids.add(img_id)
+            gts = self._load_gts(img_id)
+            for metric in self.metrics:
+                dts = self._result2arrays(result, metric)
+                self._evaluate_img(img_id, gts, dts, metric)
+
+    def _load_gts(self, img_id):
+        """Load gts of an image grouped by labels."""
+        coco = self.dataset.coco
+        ann_info = coco.load_anns(coco.get_ann_ids(img_ids=[img_id]))
+        gts = dict()
+        for ann in ann_info:
+            label = self.cat2label.get(ann['category_id'], None)
+            if label is None:
+                continue
+            gts.setdefault(label, []).append(ann)
+        return gts
+
+    def _result2arrays(self, result, metric):
+        """Convert the result of an image to arrays grouped by labels.
+
+        Returns:
+            dict[int, tuple]: Detections (in xywh format or RLEs), scores and
+                areas of each label with at least one detection.
+        """
+        if isinstance(result, tuple):
+            det, seg = result
+        else:
+            det, seg = result, None
+        dts = dict()
+        for label, bboxes in enumerate(det):
+            if bboxes.shape[0] == 0:
+                continue
+            xywh = bboxes[:, :4].astype(np.float64)
+            xywh[:, 2:] -= xywh[:, :2]
+            # ``COCO.loadRes`` takes the areas of the dets from their bboxes
+            # if any, which the segm results of ``results2json`` also have
+            areas = xywh[:, 2] * xywh[:, 3]
+            if metric == 'bbox':
+                scores = bboxes[:, 4].astype(np.float64)
+                dts[label] = (xywh, scores, areas)
+            else:
+                # some detectors use different scores for bbox and mask
+                if isinstance(seg, tuple):
+                    segms = seg[0][label]
+                    scores = np.array(seg[1][label], dtype=np.float64)
+                else:
+                    segms = seg[label]
+                    scores = bboxes[:, 4].astype(np.float64)
+                dts[label] = (segms, scores, areas)
+        return dts
+
+    def _evaluate_img(self, img_id, gts, dts, metric):
+        """Run ``COCOeval.evaluateImg`` for each label and area range."""
+        eval_imgs = self.eval_imgs[metric]
+        for label in set(gts) | set(dts):
+            gt = gts.get(label, [])
+            if metric == 'segm':
+                g = [self.dataset.coco.annToRLE(ann) for ann in gt]
+            else:
+                g = np.array([ann['bbox'] for ann in gt],
+                             dtype=np.float64).reshape(-1, 4)
+            gt_iscrowd = np.array([int(ann.get('iscrowd', 0)) for ann in gt],
+                                  dtype=np.uint8)
+            gt_areas = np.array([ann['area'] for ann in gt], dtype=np.float64)
+
+            if label in dts:
+                d, scores, dt_areas = dts[label]
+                dt_inds = np.argsort(-scores, kind='mergesort')[:self.max_det]
+                scores = scores[dt_inds]
+                dt_areas = dt_areas[dt_inds]
+                if metric == 'segm':
+                    d = [d[i] for i in dt_inds]
+                else:
+                    d = d[dt_inds]
+            else:
+                d = [] if metric == 'segm' else np.zeros((0, 4))
+                scores = np.zeros(0)
+                dt_areas = np.zeros(0)
+
+            if len(gt) > 0 and len(scores) > 0:
+                ious = maskUtils.iou(d, g, gt_iscrowd.tolist())
+            else:
+                ious = np.zeros((len(scores), len(gt)))
+            for area_idx, area_rng in enumerate(self.area_rngs):
+                eval_imgs[label, area_idx,
+                          img_id] = self._match(ious, gt_iscrowd, gt_areas,
+                                                scores, dt_areas, area_rng)
+
+    def _match(self, ious, gt_iscrowd, gt_areas, scores, dt_areas, area_rng):
+        """Greedily match dets to gts at all IoU thresholds.
+
+        This is equivalent to ``COCOeval.evaluateImg``, and returns the part
+        of its records used by ``COCOeval.accumulate``. Dets and gts are
+        represented by their indices plus one in the matches.
+        """
+        gt_ignore = gt_iscrowd.astype(bool) | (gt_areas < area_rng[0]) | (
+            gt_areas > area_rng[1])
+        # sort gts with ignored ones last
+        gt_inds = np.argsort(gt_ignore, kind='mergesort')
+        gt_ignore = gt_ignore[gt_inds]
+        gt_iscrowd = gt_iscrowd[gt_inds].astype(bool)
+        ious = ious[:, gt_inds]
+
+        num_thrs = len(self.iou_thrs)
+        num_gts = len(gt_inds)
+        num_dets = len(scores)
+        gt_matches = np.zeros((num_thrs, num_gts))
+        dt_matches = np.zeros((num_thrs, num_dets))
+        dt_ignore = np.zeros((num_thrs, num_dets), dtype=bool)
+        if num_gts > 0:
+            for t, thr in enumerate(self.iou_thrs):
+                for i in range(num_dets):
+                    # gts can be matched by the current det
+                    available = (gt_matches[t] == 0) | gt_iscrowd
+                    available &= ious[i] >= min(thr, 1 - 1e-10)
+                    # prefer non-ignored gts; among them, the last one with
+                    # the max iou wins, as in COCOeval.evaluateImg
+                    candidates = available & ~gt_ignore
+                    if not candidates.any():
+                        candidates = available & gt_ignore
+                        if not candidates.any():
+                            continue
+                    cand_ious = np.where(candidates, ious[i], -1)
+                    m = num_gts - 1 - np.argmax(cand_ious[::-1])
+                    dt_ignore[t, i] = gt_ignore[m]
+                    dt_matches[t, i] = m + 1
+                    gt_matches[t, m] = i + 1
+        # unmatched dets outside the area range are ignored
+        dt_out_of_rng = (dt_areas < area_rng[0]) | (dt_areas > area_rng[1])
+        dt_ignore |= (dt_matches == 0) & dt_out_of_rng[None, :]
+        return dict(
+            dtMatches=dt_matches,
+            dtScores=scores,
+            gtIgnore=gt_ignore.astype(np.uint8),
+            dtIgnore=dt_ignore)
+
+    def get_state(self):
+        """Get the states to be merged by the evaluator of another rank."""
+        return dict(
+            eval_imgs=self.eval_imgs, processed_img_ids=self.processed_img_ids)
+
+    def merge_states(self, states):
+        """Merge states of evaluators of other ranks.
+
+        Args:
+            states (list[dict]): States returned by :meth:`get_state`.
+        """
+        for state in states:
+            for metric in self.metrics:
+                self.eval_imgs[metric].update(state['eval_imgs'][metric])
+            self.processed_img_ids |= state['processed_img_ids']
+
+    def evaluate(self, logger=None):
+        """Accumulate per image records and compute the metrics.
+
+        Args:
+            logger (logging.Logger | str | None): Logger used for printing
+                related information during evaluation. Default: None.
+
+        Returns:
+            dict[str, float]: COCO style evaluation metric.
+        """
+        eval_results = OrderedDict()
+        for metric in self.metrics:
+            msg = f'Evaluating {metric}...'
+            if logger is None:
+                msg = '\n' + msg
+            print_log(msg, logger=logger)
+
+            cocoEval = COCOeval(self.dataset.coco, iouType=metric)
+            p = cocoEval.params
+            p.catIds = list(np.unique(self.dataset.cat_ids))
+            p.imgIds = list(np.unique(self.dataset.img_ids))
+            p.maxDets = sorted(self.proposal_nums)
+            p.iouThrs = self.iou_thrs
+            p.areaRng = self.area_rngs
+            eval_imgs = self.eval_imgs[metric]
+            cocoEval.evalImgs = [
+                eval_imgs.get((self.cat2label[cat_id], area_idx, img_id))
+                for cat_id in p.catIds for area_idx in range(len(p.areaRng))
+                for img_id in p.imgIds
+            ]
+            cocoEval._paramsEval = copy.deepcopy(p)
+            eval_results.update(
+                self.dataset.summarize_coco_eval(
+                    cocoEval,
+                    metric,
+                    classwise=self.classwise,
+                    metric_items=self.metric_items,
+                    logger=logger))
+        return eval_results
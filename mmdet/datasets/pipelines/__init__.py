@@ -9,7 +9,8 @@ from .loading import (LoadAnnotations, LoadImageFromFile, LoadImageFromWebcam,
                       LoadMultiChannelImageFromFiles, LoadProposals)
 from .test_time_aug import MultiScaleFlipAug
 from .transforms import (Albu, CutOut, Expand, MinIoURandomCrop, Normalize,
-                         Pad, PhotoMetricDistortion, RandomCenterCropPad,
+                         Pad, PhotoMetricDistortion,
+                         PhotoMetricDistortionNormalize, RandomCenterCropPad,
                          RandomCrop, RandomFlip, Resize, SegRescale)
 
 __all__ = [
@@ -18,8 +19,9 @@ __all__ = [
     'LoadImageFromFile', 'LoadImageFromWebcam',
     'LoadMultiChannelImageFromFiles', 'LoadProposals', 'MultiScaleFlipAug',
     'Resize', 'RandomFlip', 'Pad', 'RandomCrop', 'Normalize', 'SegRescale',
-    'MinIoURandomCrop', 'Expand', 'PhotoMetricDistortion', 'Albu',
-    'InstaBoost', 'RandomCenterCropPad', 'AutoAugment', 'CutOut', 'Shear',
-    'Rotate', 'ColorTransform', 'EqualizeTransform', 'BrightnessTransform',
+    'MinIoURandomCrop', 'Expand', 'PhotoMetricDistortion',
+    'PhotoMetricDistortionNormalize', 'Albu', 'InstaBoost',
+    'RandomCenterCropPad', 'AutoAugment', 'CutOut', 'Shear', 'Rotate',
+    'ColorTransform', 'EqualizeTransform', 'BrightnessTransform',
     'ContrastTransform', 'Translate'
 ]
@@ -1,6 +1,12 @@
 import collections
+import multiprocessing as mp
+import time
+from multiprocessing.context import get_spawning_popen
 
+import numpy as np
+import torch
 from mmcv.utils import build_from_cfg
+from terminaltables import AsciiTable
 
 from ..builder import PIPELINES
 
@@ -12,9 +18,12 @@ class Compose(object):
     Args:
         transforms (Sequence[dict | callable]): Sequence of transform object or
             config dict to be composed.
+        profile (bool): Whether to record the latency and memory stats of
+            each transform with a :class:`PipelineProfiler`, which is
+            available as ``self.profiler``. Default: False.
     """
 
-    def __init__(self, transforms):
+    def __init__(self, transforms, profile=False):
         assert isinstance(transforms, collections.abc.Sequence)
         self.transforms = []
         for transform in transforms:
@@ -25,6 +34,15 @@ class Compose(object):
                 self.transforms.append(transform)
             else:
                 raise TypeError('transform must be callable or a dict')
+        for i, transform in enumerate(self.transforms):
+            if getattr(transform, 'target_scale', None) == 'auto':
+                transform.target_scale = _following_max_scale(
+                    self.transforms[i + 1:])
+        if profile:
+            self.profiler = PipelineProfiler(
+                [type(t).__name__ for t in self.transforms])
+        else:
+            self.profiler = None
 
     def __call__(self, data):
         """Call function to apply transforms sequentially.
@@ -35,6 +53,8 @@ class Compose(object):
         Returns:
            dict: Transformed data.
         """
+        if self.profiler is not None:
+            return self.profiler(self.transforms, data)
 
         for t in self.transforms:
             data = t(data)
@@ -49,3 +69,177 @@ class Compose(object):
             format_string += f'    {t}'
         format_string += '\n)'
         return format_string
+
+
+def _following_max_scale(transforms):
+    """Get the max scale of the resize following the loading transforms.
+
+    Args:
+        transforms (list[callable]): The transforms after an image loading
+            transform.
+
+    Returns:
+        tuple[int] | None: The ``max_scale`` of the first transform if it is
+            a :obj:`Resize` only preceded by loading transforms, else None.
+    """
+    for transform in transforms:
+        if hasattr(transform, 'max_scale'):
+            return transform.max_scale
+        if not type(transform).__name__.startswith('Load'):
+            return None
+    return None
+
+
+def _collect_buffers(obj, buffers, depth=0):
+    """Collect the memory buffers of the arrays and tensors in a result.
+
+    Views are resolved to the array owning the memory, so that a view or a
+    tensor sharing the memory of an array is not counted again.
+
+    Args:
+        obj: A value of the result dict, which is searched for arrays in
+            sequences, dicts, masks and data containers.
+        buffers (dict): Sizes in bytes of the buffers keyed by address.
+        depth (int): Current depth of the search.
+    """
+    if isinstance(obj, np.ndarray):
+        while isinstance(obj.base, np.ndarray):
+            obj = obj.base
+        buffers[obj.__array_interface__['data'][0]] = obj.nbytes
+    elif isinstance(obj, torch.Tensor):
+        buffers[obj.data_ptr()] = obj.element_size() * obj.nelement()
+    elif depth >= 3:
+        return
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            _collect_buffers(item, buffers, depth + 1)
+    elif isinstance(obj, dict):
+        for item in obj.values():
+            _collect_buffers(item, buffers, depth + 1)
+    elif hasattr(obj, 'masks'):
+        # BitmapMasks and PolygonMasks
+        _collect_buffers(obj.masks, buffers, depth + 1)
+    elif type(obj).__name__ == 'DataContainer':
+        _collect_buffers(obj.data, buffers, depth + 1)
+
+
+class PipelineProfiler(object):
+    """Record the latency and memory stats of the transforms of a pipeline.
+
+    For each transform, the number of calls, the total and max wall time, the
+    bytes of the arrays and tensors allocated by the transform (those not in
+    its input) and the bytes of all arrays and tensors of its output are
+    accumulated. The stats are kept in shared memory, so the calls in all
+    dataloader workers are aggregated into the stats of the main process,
+    whether the workers are forked or spawned. A profiler pickled or copied
+    otherwise gets a copy of the stats.
+
+    Args:
+        names (list[str]): Names of the transforms.
+    """
+
+    fields = ('count', 'time', 'max_time', 'new_bytes', 'out_bytes')
+
+    def __init__(self, names):
+        self.names = list(names)
+        self._stats = self._new_stats(
+            np.zeros(len(self.names) * len(self.fields)))
+
+    @staticmethod
+    def _new_stats(stats):
+        """Put the stats in a synchronized shared array."""
+        # the lock of the spawn context can also be inherited by forked
+        # processes, while that of the fork context cannot be passed to
+        # spawned ones
+        shared = mp.get_context('spawn').Array('d', len(stats))
+        np.frombuffer(shared.get_obj())[:] = stats
+        return shared
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if get_spawning_popen() is None:
+            # the shared array can only be passed to a starting process
+            state['_stats'] = self.stats.ravel()
+        return state
+
+    def __setstate__(self, state):
+        if isinstance(state['_stats'], np.ndarray):
+            state['_stats'] = self._new_stats(state['_stats'])
+        self.__dict__.update(state)
+
+    @property
+    def stats(self):
+        """np.ndarray: A copy of the stats of shape (num_transforms,
+        num_fields)."""
+        with self._stats.get_lock():
+            stats = np.frombuffer(self._stats.get_obj()).copy()
+        return stats.reshape(len(self.names), len(self.fields))
+
+    def reset(self):
+        """Clear the stats."""
+        with self._stats.get_lock():
+            np.frombuffer(self._stats.get_obj())[:] = 0
+
+    def __call__(self, transforms, data):
+        """Apply the transforms sequentially and record their stats."""
+        stats = np.zeros((len(self.names), len(self.fields)))
+        buffers = {}
+        _collect_buffers(data, buffers)
+        for i, t in enumerate(transforms):
+            start = time.perf_counter()
+            data = t(data)
+            elapsed = time.perf_counter() - start
+            in_buffers, buffers = buffers, {}
+            _collect_buffers(data, buffers)
+            stats[i] = (1, elapsed, elapsed,
+                        sum(size for ptr, size in buffers.items()
+                            if ptr not in in_buffers), sum(buffers.values()))
+            if data is None:
+                break
+        with self._stats.get_lock():
+            shared = np.frombuffer(self._stats.get_obj()).reshape(stats.shape)
+            shared[:, 2] = np.maximum(shared[:, 2], stats[:, 2])
+            stats[:, 2] = 0
+            shared += stats
+        return data
+
+    def summary(self, sort_by=None):
+        """Summarize the stats in a table.
+
+        Args:
+            sort_by (str, optional): Sort the transforms by 'time' in
+                descending order. Default: None, which keeps the order of the
+                pipeline.
+
+        Returns:
+            str: The table of the mean and max time, the share of the time
+                of the whole pipeline and the mean allocated and output MB
+                of each transform.
+        """
+        stats = self.stats
+        count = np.maximum(stats[:, 0], 1)
+        total_time = max(stats[:, 1].sum(), 1e-12)
+        order = np.arange(len(self.names))
+        if sort_by == 'time':
+            order = np.argsort(-stats[:, 1], kind='stable')
+        table_data = [[
+            'transform', 'calls', 'mean (ms)', 'max (ms)', 'time (%)',
+            'new (MB)', 'output (MB)'
+        ]]
+        for i in order:
+            table_data.append([
+                self.names[i], f'{int(stats[i, 0])}',
+                f'{stats[i, 1] / count[i] * 1000:.2f}',
+                f'{stats[i, 2] * 1000:.2f}',
+                f'{stats[i, 1] / total_time * 100:.1f}',
+                f'{stats[i, 3] / count[i] / 2**20:.2f}',
+                f'{stats[i, 4] / count[i] / 2**20:.2f}'
+            ])
+        num_samples = int(stats[0, 0]) if len(stats) else 0
+        mean_time = total_time / max(num_samples, 1) * 1000
+        table_data.append([
+            'total', f'{num_samples}', f'{mean_time:.2f}', '', '100.0', '', ''
+        ])
+        table = AsciiTable(table_data)
+        table.inner_footing_row_border = True
+        return table.table
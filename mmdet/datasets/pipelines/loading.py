@@ -1,12 +1,60 @@
 import os.path as osp
 
+import cv2
 import mmcv
 import numpy as np
 import pycocotools.mask as maskUtils
 
-from mmdet.core import BitmapMasks, PolygonMasks
+from mmdet.core import BitmapMasks, PolygonMasks, RLEMasks
 from ..builder import PIPELINES
 
+_REDUCED_FLAGS = {
+    'color': {
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8
+    },
+    'grayscale': {
+        2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+        4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+        8: cv2.IMREAD_REDUCED_GRAYSCALE_8
+    }
+}
+
+
+def _jpeg_size(img_bytes):
+    """Read the (h, w) of a JPEG image from the frame header.
+
+    Args:
+        img_bytes (bytes): The encoded image.
+
+    Returns:
+        tuple[int] | None: The (h, w) of the image, or None if it is not a
+            JPEG image.
+    """
+    if bytes(img_bytes[:2]) != b'\xff\xd8':
+        return None
+    pos, size = 2, len(img_bytes)
+    while pos + 4 <= size:
+        if img_bytes[pos] != 0xFF:
+            return None
+        marker = img_bytes[pos + 1]
+        if marker == 0xFF:
+            # fill byte
+            pos += 1
+        elif marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # markers without a segment
+            pos += 2
+        elif 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            # start of frame, followed by length, precision, height, width
+            if pos + 9 > size:
+                return None
+            return (int.from_bytes(img_bytes[pos + 5:pos + 7], 'big'),
+                    int.from_bytes(img_bytes[pos + 7:pos + 9], 'big'))
+        else:
+            pos += 2 + int.from_bytes(img_bytes[pos + 2:pos + 4], 'big')
+    return None
+
 
 @PIPELINES.register_module()
 class LoadImageFromFile(object):
@@ -17,6 +65,16 @@ class LoadImageFromFile(object):
     "ori_shape" (same as `img_shape`), "pad_shape" (same as `img_shape`),
     "scale_factor" (1.0) and "img_norm_cfg" (means=0 and stds=1).
 
+    If ``target_scale`` is set, a JPEG image larger than it is decoded at a
+    reduced resolution of 1/2, 1/4 or 1/8 by the cv2 decoder, which skips most
+    of the decoding work. The largest reduction that still gives an image not
+    smaller than the one rescaled to ``target_scale`` is used, so a following
+    :obj:`Resize` only downsamples. In this case "ori_shape" is the shape of
+    the full resolution image and the ratio of the decoded and the full
+    resolution is added as "decode_scale_factor", which :obj:`Resize` merges
+    into "scale_factor" so that boxes and predictions keep using the full
+    resolution coordinates.
+
     Args:
         to_float32 (bool): Whether to convert the loaded image to a float32
             numpy array. If set to False, the loaded image is an uint8 array.
@@ -26,16 +84,82 @@ class LoadImageFromFile(object):
         file_client_args (dict): Arguments to instantiate a FileClient.
             See :class:`mmcv.fileio.FileClient` for details.
             Defaults to ``dict(backend='disk')``.
+        target_scale (tuple[int] | str, optional): The (long edge, short edge)
+            the image is rescaled to with its aspect ratio kept, as the
+            ``img_scale`` of :obj:`Resize`. If 'auto', it is set by
+            :obj:`Compose` to the largest scale of the :obj:`Resize` directly
+            following the loading transforms. Defaults to None, which always
+            decodes the full resolution.
     """
 
     def __init__(self,
                  to_float32=False,
                  color_type='color',
-                 file_client_args=dict(backend='disk')):
+                 file_client_args=dict(backend='disk'),
+                 target_scale=None):
         self.to_float32 = to_float32
         self.color_type = color_type
         self.file_client_args = file_client_args.copy()
         self.file_client = None
+        self.target_scale = target_scale
+
+    def _decode_reduction(self, ori_hw):
+        """Get the reduction of the decoded resolution of an image.
+
+        Args:
+            ori_hw (tuple[int]): The full resolution (h, w) of the image.
+
+        Returns:
+            int: The largest of 8, 4 and 2 with which the reduced image is
+                still not smaller than the image rescaled to
+                ``self.target_scale``, or 1 if there is none.
+        """
+        if self.target_scale is None or self.target_scale == 'auto':
+            return 1
+        long_edge, short_edge = max(ori_hw), min(ori_hw)
+        target_long, target_short = max(self.target_scale), min(
+            self.target_scale)
+        for reduction in (8, 4, 2):
+            # the rescale ratio of the reduced image is the smaller one of
+            # the ratios of the edges, so one edge covering the target is
+            # enough to not upsample it
+            if (-(-long_edge // reduction) >= target_long
+                    or -(-short_edge // reduction) >= target_short):
+                return reduction
+        return 1
+
+    def _imfrombytes(self, img_bytes, results):
+        """Decode an image, at a reduced resolution if possible.
+
+        Args:
+            img_bytes (bytes): The encoded image.
+            results (dict): Result dict, to which "decode_scale_factor" is
+                added if the image is decoded at a reduced resolution.
+
+        Returns:
+            tuple[np.ndarray, tuple[int]]: The decoded image and the (h, w) of
+                its full resolution.
+        """
+        ori_hw = None
+        if (self.color_type in _REDUCED_FLAGS
+                and mmcv.image.io.imread_backend == 'cv2'):
+            ori_hw = _jpeg_size(img_bytes)
+        reduction = 1 if ori_hw is None else self._decode_reduction(ori_hw)
+        if reduction == 1:
+            img = mmcv.imfrombytes(img_bytes, flag=self.color_type)
+            return img, img.shape[:2]
+
+        img = cv2.imdecode(
+            np.frombuffer(img_bytes, np.uint8),
+            _REDUCED_FLAGS[self.color_type][reduction])
+        h, w = img.shape[:2]
+        ori_h, ori_w = ori_hw
+        if (h, w) != (-(-ori_h // reduction), -(-ori_w // reduction)):
+            # the image is rotated by its EXIF orientation
+            ori_h, ori_w = ori_w, ori_h
+        results['decode_scale_factor'] = np.array(
+            [w / ori_w, h / ori_h, w / ori_w, h / ori_h], dtype=np.float32)
+        return img, (ori_h, ori_w)
 
     def __call__(self, results):
         """Call functions to load image and get image meta information.
@@ -57,7 +181,7 @@ class LoadImageFromFile(object):
             filename = results['img_info']['filename']
 
         img_bytes = self.file_client.get(filename)
-        img = mmcv.imfrombytes(img_bytes, flag=self.color_type)
+        img, ori_hw = self._imfrombytes(img_bytes, results)
         if self.to_float32:
             img = img.astype(np.float32)
 
@@ -65,7 +189,7 @@ class LoadImageFromFile(object):
         results['ori_filename'] = results['img_info']['filename']
         results['img'] = img
         results['img_shape'] = img.shape
-        results['ori_shape'] = img.shape
+        results['ori_shape'] = tuple(ori_hw) + img.shape[2:]
         results['img_fields'] = ['img']
         return results
 
@@ -73,7 +197,8 @@ class LoadImageFromFile(object):
         repr_str = (f'{self.__class__.__name__}('
                     f'to_float32={self.to_float32}, '
                     f"color_type='{self.color_type}', "
-                    f'file_client_args={self.file_client_args})')
+                    f'file_client_args={self.file_client_args}, '
+                    f'target_scale={self.target_scale})')
         return repr_str
 
 
@@ -207,6 +332,10 @@ class LoadAnnotations(object):
             annotation. Default: False.
         poly2mask (bool): Whether to convert the instance masks from polygons
             to bitmaps. Default: True.
+        rle_masks (bool): Whether to keep the converted instance masks
+            run-length encoded as :obj:`RLEMasks` instead of dense
+            :obj:`BitmapMasks`, which saves memory on images with many
+            instances. Only used when ``poly2mask`` is True. Default: False.
         file_client_args (dict): Arguments to instantiate a FileClient.
             See :class:`mmcv.fileio.FileClient` for details.
             Defaults to ``dict(backend='disk')``.
@@ -218,12 +347,14 @@ class LoadAnnotations(object):
                  with_mask=False,
                  with_seg=False,
                  poly2mask=True,
+                 rle_masks=False,
                  file_client_args=dict(backend='disk')):
         self.with_bbox = with_bbox
         self.with_label = with_label
         self.with_mask = with_mask
         self.with_seg = with_seg
         self.poly2mask = poly2mask
+        self.rle_masks = rle_masks
         self.file_client_args = file_client_args.copy()
         self.file_client = None
 
@@ -260,9 +391,9 @@ class LoadAnnotations(object):
         results['gt_labels'] = results['ann_info']['labels'].copy()
         return results
 
-    def _poly2mask(self, mask_ann, img_h, img_w):
+    def _poly2rle(self, mask_ann, img_h, img_w):
         """Private function to convert masks represented with polygon to
-        bitmaps.
+        compressed RLE.
 
         Args:
             mask_ann (list | dict): Polygon mask annotation input.
@@ -270,7 +401,7 @@ class LoadAnnotations(object):
             img_w (int): The width of output mask.
 
         Returns:
-            numpy.ndarray: The decode bitmap mask of shape (img_h, img_w).
+            dict: The compressed RLE of the mask.
         """
 
         if isinstance(mask_ann, list):
@@ -284,7 +415,22 @@ class LoadAnnotations(object):
         else:
             # rle
             rle = mask_ann
-        mask = maskUtils.decode(rle)
+        return rle
+
+    def _poly2mask(self, mask_ann, img_h, img_w):
+        """Private function to convert masks represented with polygon to
+        bitmaps.
+
+        Args:
+            mask_ann (list | dict): Polygon mask annotation input.
+            img_h (int): The height of output mask.
+            img_w (int): The width of output mask.
+
+        Returns:
+            numpy.ndarray: The decode bitmap mask of shape (img_h, img_w).
+        """
+
+        mask = maskUtils.decode(self._poly2rle(mask_ann, img_h, img_w))
         return mask
 
     def process_polygons(self, polygons):
@@ -313,12 +459,16 @@ class LoadAnnotations(object):
         Returns:
             dict: The dict contains loaded mask annotations.
                 If ``self.poly2mask`` is set ``True``, `gt_mask` will contain
-                :obj:`PolygonMasks`. Otherwise, :obj:`BitmapMasks` is used.
+                :obj:`PolygonMasks`. Otherwise, :obj:`BitmapMasks` is used,
+                or :obj:`RLEMasks` if ``self.rle_masks`` is set ``True``.
         """
 
         h, w = results['img_info']['height'], results['img_info']['width']
         gt_masks = results['ann_info']['masks']
-        if self.poly2mask:
+        if self.poly2mask and self.rle_masks:
+            gt_masks = RLEMasks(
+                [self._poly2rle(mask, h, w) for mask in gt_masks], h, w)
+        elif self.poly2mask:
             gt_masks = BitmapMasks(
                 [self._poly2mask(mask, h, w) for mask in gt_masks], h, w)
         else:
@@ -380,6 +530,7 @@ class LoadAnnotations(object):
         repr_str += f'with_mask={self.with_mask}, '
         repr_str += f'with_seg={self.with_seg}, '
         repr_str += f'poly2mask={self.poly2mask}, '
+        repr_str += f'rle_masks={self.rle_masks}, '
         repr_str += f'poly2mask={self.file_client_args})'
         return repr_str
 
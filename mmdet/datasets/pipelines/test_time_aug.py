@@ -1,9 +1,30 @@
 import warnings
 
 import mmcv
+import numpy as np
 
 from ..builder import PIPELINES
 from .compose import Compose
+from .transforms import Normalize, RandomFlip
+
+# pixel-wise transforms, which give the same result before and after flipping
+PIXELWISE_TRANSFORMS = (Normalize, )
+
+
+class _ContiguousImages(object):
+    """Copy the flipped views of the images into contiguous arrays.
+
+    ``RandomFlip`` returns negatively strided views, which are copied by the
+    pixel-wise transforms after it unless they are shared across flips.
+    """
+
+    def __call__(self, results):
+        for key in results.get('img_fields', ['img']):
+            results[key] = np.ascontiguousarray(results[key])
+        return results
+
+    def __repr__(self):
+        return self.__class__.__name__
 
 
 @PIPELINES.register_module()
@@ -47,6 +68,12 @@ class MultiScaleFlipAug(object):
             options are "horizontal" and "vertical". If flip_direction is list,
             multiple flip augmentations will be applied.
             It has no effect when flip == False. Default: "horizontal".
+        share_preprocess (bool): Whether to run the transforms before
+            ``RandomFlip`` and the ``Normalize`` right after it only once for
+            each scale, and then flip the normalized image and run the rest
+            of the transforms for each flip. The results are the same as
+            running all the transforms for each flip, as normalizing is
+            pixel-wise. Default: False.
     """
 
     def __init__(self,
@@ -54,7 +81,8 @@ class MultiScaleFlipAug(object):
                  img_scale=None,
                  scale_factor=None,
                  flip=False,
-                 flip_direction='horizontal'):
+                 flip_direction='horizontal',
+                 share_preprocess=False):
         self.transforms = Compose(transforms)
         assert (img_scale is None) ^ (scale_factor is None), (
             'Must have but only one variable can be setted')
@@ -80,6 +108,24 @@ class MultiScaleFlipAug(object):
             warnings.warn(
                 'flip has no effect when RandomFlip is not in transforms')
 
+        self.share_preprocess = share_preprocess
+        self.shared_transforms = None
+        self.flip_transforms = None
+        transforms = self.transforms.transforms
+        flip_inds = [
+            i for i, t in enumerate(transforms) if isinstance(t, RandomFlip)
+        ]
+        if share_preprocess and flip_inds:
+            flip_ind = end = flip_inds[0]
+            while (end + 1 < len(transforms)
+                   and isinstance(transforms[end + 1], PIXELWISE_TRANSFORMS)):
+                end += 1
+            self.shared_transforms = Compose(transforms[:flip_ind] +
+                                             transforms[flip_ind + 1:end + 1])
+            self.flip_transforms = Compose(
+                [transforms[flip_ind],
+                 _ContiguousImages()] + transforms[end + 1:])
+
     def __call__(self, results):
         """Call function to apply test time augment transforms on results.
 
@@ -97,6 +143,16 @@ class MultiScaleFlipAug(object):
             flip_args += [(True, direction)
                           for direction in self.flip_direction]
         for scale in self.img_scale:
+            if self.shared_transforms is not None:
+                _results = results.copy()
+                _results[self.scale_key] = scale
+                scale_results = self.shared_transforms(_results)
+                for flip, direction in flip_args:
+                    _results = scale_results.copy()
+                    _results['flip'] = flip
+                    _results['flip_direction'] = direction
+                    aug_data.append(self.flip_transforms(_results))
+                continue
             for flip, direction in flip_args:
                 _results = results.copy()
                 _results[self.scale_key] = scale
@@ -115,5 +171,6 @@ class MultiScaleFlipAug(object):
         repr_str = self.__class__.__name__
         repr_str += f'(transforms={self.transforms}, '
         repr_str += f'img_scale={self.img_scale}, flip={self.flip}, '
-        repr_str += f'flip_direction={self.flip_direction})'
+        repr_str += f'flip_direction={self.flip_direction}, '
+        repr_str += f'share_preprocess={self.share_preprocess})'
         return repr_str
@@ -1,5 +1,6 @@
 import inspect
 
+import cv2
 import mmcv
 import numpy as np
 from numpy import random
@@ -31,7 +32,10 @@ class Resize(object):
     scale in the init method is used. If the input dict contains the key
     "scale_factor" (if MultiScaleFlipAug does not give img_scale but
     scale_factor), the actual scale will be computed by image shape and
-    scale_factor.
+    scale_factor. If the image was decoded at a reduced resolution (the input
+    dict contains the key "decode_scale_factor"), that ratio is merged into
+    "scale_factor" and the masks and segmentation maps, which are still at the
+    full resolution, are resized to the shape of the resized image.
 
     `img_scale` can either be a tuple (single-scale) or a list of tuple
     (multi-scale). There are 3 multiscale modes:
@@ -94,6 +98,20 @@ class Resize(object):
         self.override = override
         self.bbox_clip_border = bbox_clip_border
 
+    @property
+    def max_scale(self):
+        """tuple[int] | None: The (long edge, short edge) bounding all the
+        scales the images are rescaled to, or None if the scale is not fixed
+        by the init method or the aspect ratio is not kept."""
+        if self.img_scale is None or not self.keep_ratio or self.override:
+            return None
+        long_edge = max(max(scale) for scale in self.img_scale)
+        short_edge = max(min(scale) for scale in self.img_scale)
+        if self.ratio_range is not None:
+            long_edge = int(long_edge * self.ratio_range[1])
+            short_edge = int(short_edge * self.ratio_range[1])
+        return long_edge, short_edge
+
     @staticmethod
     def random_select(img_scales):
         """Randomly select an img_scale from given candidates.
@@ -224,6 +242,8 @@ class Resize(object):
 
             scale_factor = np.array([w_scale, h_scale, w_scale, h_scale],
                                     dtype=np.float32)
+            if 'decode_scale_factor' in results:
+                scale_factor *= results['decode_scale_factor']
             results['img_shape'] = img.shape
             # in case that there is no padding
             results['pad_shape'] = img.shape
@@ -245,7 +265,7 @@ class Resize(object):
         for key in results.get('mask_fields', []):
             if results[key] is None:
                 continue
-            if self.keep_ratio:
+            if self.keep_ratio and 'decode_scale_factor' not in results:
                 results[key] = results[key].rescale(results['scale'])
             else:
                 results[key] = results[key].resize(results['img_shape'][:2])
@@ -253,7 +273,13 @@ class Resize(object):
     def _resize_seg(self, results):
         """Resize semantic segmentation map with ``results['scale']``."""
         for key in results.get('seg_fields', []):
-            if self.keep_ratio:
+            if 'decode_scale_factor' in results:
+                h, w = results['img_shape'][:2]
+                gt_seg = mmcv.imresize(
+                    results[key], (w, h),
+                    interpolation='nearest',
+                    backend=self.backend)
+            elif self.keep_ratio:
                 gt_seg = mmcv.imrescale(
                     results[key],
                     results['scale'],
@@ -302,6 +328,8 @@ class Resize(object):
         self._resize_bboxes(results)
         self._resize_masks(results)
         self._resize_seg(results)
+        # the annotations are all at the resized resolution now
+        results.pop('decode_scale_factor', None)
         return results
 
     def __repr__(self):
@@ -911,6 +939,143 @@ class PhotoMetricDistortion(object):
         return repr_str
 
 
+@PIPELINES.register_module()
+class PhotoMetricDistortionNormalize(PhotoMetricDistortion):
+    """Apply photometric distortion and normalization to an uint8 image.
+
+    This is equivalent to :class:`PhotoMetricDistortion` followed by
+    :class:`Normalize`, with the distortions sampled in the same way, but the
+    image is kept uint8 until this transform and processed in a few fused
+    passes instead of a full float image for each step:
+
+    1. The brightness and the contrast of mode 1 are applied by a lookup
+       table of the 256 uint8 values, which also converts the image to
+       float32.
+    2. The image is converted to HSV and back only if the saturation or the
+       hue is changed. The conversion is skipped otherwise since it does not
+       change the pixels with a positive value.
+    3. The contrast of mode 0, the channel swap, the conversion to RGB and
+       the normalization are merged into one affine transform of the
+       channels.
+
+    So ``to_float32=True`` is not needed in ``LoadImageFromFile``, and the
+    transform can be placed where :class:`Normalize` is in the pipeline,
+    e.g. after :class:`Resize` where the image is smaller. Added key is
+    "img_norm_cfg".
+
+    Args:
+        mean (sequence): Mean values of 3 channels.
+        std (sequence): Std values of 3 channels.
+        to_rgb (bool): Whether to convert the image from BGR to RGB,
+            default is true.
+        brightness_delta (int): delta of brightness.
+        contrast_range (tuple): range of contrast.
+        saturation_range (tuple): range of saturation.
+        hue_delta (int): delta of hue.
+    """
+
+    def __init__(self,
+                 mean,
+                 std,
+                 to_rgb=True,
+                 brightness_delta=32,
+                 contrast_range=(0.5, 1.5),
+                 saturation_range=(0.5, 1.5),
+                 hue_delta=18):
+        super().__init__(brightness_delta, contrast_range, saturation_range,
+                         hue_delta)
+        self.mean = np.array(mean, dtype=np.float32)
+        self.std = np.array(std, dtype=np.float32)
+        self.to_rgb = to_rgb
+
+    def __call__(self, results):
+        """Call function to perform photometric distortion and normalization
+        on images.
+
+        Args:
+            results (dict): Result dict from loading pipeline.
+
+        Returns:
+            dict: Result dict with images distorted and normalized,
+                'img_norm_cfg' key is added into result dict.
+        """
+
+        if 'img_fields' in results:
+            assert results['img_fields'] == ['img'], \
+                'Only single img_fields is allowed'
+        img = results['img']
+        assert img.dtype == np.uint8, \
+            'PhotoMetricDistortionNormalize needs the input image of dtype ' \
+            'np.uint8, please set "to_float32=False" in "LoadImageFromFile" ' \
+            'pipeline'
+
+        # sample the distortions in the order of PhotoMetricDistortion
+        delta = 0
+        if random.randint(2):
+            delta = random.uniform(-self.brightness_delta,
+                                   self.brightness_delta)
+        mode = random.randint(2)
+        alpha_first = 1
+        if mode == 1:
+            if random.randint(2):
+                alpha_first = random.uniform(self.contrast_lower,
+                                             self.contrast_upper)
+        saturation = None
+        if random.randint(2):
+            saturation = random.uniform(self.saturation_lower,
+                                        self.saturation_upper)
+        hue = None
+        if random.randint(2):
+            hue = random.uniform(-self.hue_delta, self.hue_delta)
+        alpha_last = 1
+        if mode == 0:
+            if random.randint(2):
+                alpha_last = random.uniform(self.contrast_lower,
+                                            self.contrast_upper)
+        order = np.arange(3)
+        if random.randint(2):
+            order = random.permutation(3)
+        if self.to_rgb:
+            order = order[::-1]
+
+        # random brightness and contrast (mode 1)
+        lut = (np.arange(256) + delta) * alpha_first
+        img = cv2.LUT(img, lut.astype(np.float32))
+
+        if saturation is not None or hue is not None:
+            cv2.cvtColor(img, cv2.COLOR_BGR2HSV, dst=img)
+            if saturation is not None:
+                img[..., 1] *= saturation
+            if hue is not None:
+                # the conversion to BGR wraps the hues in [360, 720)
+                img[..., 0] += hue % 360
+            cv2.cvtColor(img, cv2.COLOR_HSV2BGR, dst=img)
+
+        # random contrast (mode 0), channel swap and normalization, i.e.,
+        # (img[..., order[i]] * alpha_last - mean[i]) / std[i] of channel i
+        stdinv = 1 / self.std.astype(np.float64)
+        matrix = np.zeros((3, 4))
+        matrix[np.arange(3), order] = alpha_last * stdinv
+        matrix[:, 3] = -self.mean * stdinv
+        results['img'] = cv2.transform(img, matrix, dst=img)
+        results['img_norm_cfg'] = dict(
+            mean=self.mean, std=self.std, to_rgb=self.to_rgb)
+        return results
+
+    def __repr__(self):
+        repr_str = self.__class__.__name__
+        repr_str += f'(\nmean={self.mean},\n'
+        repr_str += f'std={self.std},\n'
+        repr_str += f'to_rgb={self.to_rgb},\n'
+        repr_str += f'brightness_delta={self.brightness_delta},\n'
+        repr_str += 'contrast_range='
+        repr_str += f'{(self.contrast_lower, self.contrast_upper)},\n'
+        repr_str += 'saturation_range='
+        repr_str += f'{(self.saturation_lower, self.saturation_upper)},\n'
+        repr_str += f'hue_delta={self.hue_delta})'
+        return repr_str
+
+
 @PIPELINES.register_module()
 class Expand(object):
     """Random expand the image & bboxes.
@@ -1337,9 +1502,11 @@ class Albu(object):
                     'Albu only supports BitMap masks now')
             ori_masks = results['masks']
             if albumentations.__version__ < '0.5':
-                results['masks'] = results['masks'].masks
+                results['masks'] = results['masks'].to_ndarray()
             else:
-                results['masks'] = [mask for mask in results['masks'].masks]
+                results['masks'] = [
+                    mask for mask in results['masks'].to_ndarray()
+                ]
 
         results = self.aug(**results)
 
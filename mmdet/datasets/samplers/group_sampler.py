@@ -7,7 +7,44 @@ from mmcv.runner import get_dist_info
 from torch.utils.data import Sampler
 
 
+def _group_indices(flag, group_sizes):
+    """Get the indices of the samples of each group with a stable argsort,
+    which gives the same orders as ``np.where(flag == i)[0]``."""
+    inds = np.argsort(flag, kind='stable')
+    return np.split(inds, np.cumsum(group_sizes)[:-1])
+
+
+def _iter_batches(batches, batch_order, start_iter=0, chunk_size=1024):
+    """Lazily yield the sample indices of the batches in a given order.
+
+    Args:
+        batches (np.ndarray): Sample indices of each batch, of shape
+            (num_batches, samples_per_gpu).
+        batch_order (np.ndarray): Indices of the batches to yield.
+        start_iter (int): Number of batches to skip. Default: 0.
+        chunk_size (int): Number of batches converted to Python ints at once.
+            Default: 1024.
+
+    Yields:
+        int: Index of a sample.
+    """
+    for start in range(start_iter, len(batch_order), chunk_size):
+        chunk = batches[batch_order[start:start + chunk_size]]
+        yield from chunk.ravel().tolist()
+
+
 class GroupSampler(Sampler):
+    """Sampler that yields batches of samples from the same group.
+
+    The indices are generated with vectorized NumPy operations and yielded
+    lazily, and the first batches of an epoch can be skipped by
+    :meth:`set_start_iter` to resume training in the middle of an epoch.
+
+    Args:
+        dataset: Dataset with a ``flag`` attribute of the group of each
+            sample.
+        samples_per_gpu (int): Number of samples of each batch. Default: 1.
+    """
 
     def __init__(self, dataset, samples_per_gpu=1):
         assert hasattr(dataset, 'flag')
@@ -19,14 +56,26 @@ class GroupSampler(Sampler):
         for i, size in enumerate(self.group_sizes):
             self.num_samples += int(np.ceil(
                 size / self.samples_per_gpu)) * self.samples_per_gpu
+        self.start_iter = 0
+
+    def set_start_iter(self, start_iter):
+        """Skip the first ``start_iter`` batches of the next epoch.
+
+        The indices of the skipped batches are still drawn from the random
+        generator, so the remaining batches are the same as those of an epoch
+        that is not interrupted.
+
+        Args:
+            start_iter (int): Number of batches to skip.
+        """
+        self.start_iter = start_iter
 
     def __iter__(self):
         indices = []
-        for i, size in enumerate(self.group_sizes):
+        for size, indice in zip(self.group_sizes,
+                                _group_indices(self.flag, self.group_sizes)):
             if size == 0:
                 continue
-            indice = np.where(self.flag == i)[0]
-            assert len(indice) == size
             np.random.shuffle(indice)
             num_extra = int(np.ceil(size / self.samples_per_gpu)
                             ) * self.samples_per_gpu - len(indice)
@@ -34,15 +83,11 @@ class GroupSampler(Sampler):
                 [indice, np.random.choice(indice, num_extra)])
             indices.append(indice)
         indices = np.concatenate(indices)
-        indices = [
-            indices[i * self.samples_per_gpu:(i + 1) * self.samples_per_gpu]
-            for i in np.random.permutation(
-                range(len(indices) // self.samples_per_gpu))
-        ]
-        indices = np.concatenate(indices)
-        indices = indices.astype(np.int64).tolist()
         assert len(indices) == self.num_samples
-        return iter(indices)
+        batches = indices.reshape(-1, self.samples_per_gpu)
+        batch_order = np.random.permutation(len(batches))
+        start_iter, self.start_iter = self.start_iter, 0
+        return _iter_batches(batches, batch_order, start_iter)
 
     def __len__(self):
         return self.num_samples
@@ -56,6 +101,10 @@ class DistributedGroupSampler(Sampler):
     process can pass a DistributedSampler instance as a DataLoader sampler,
     and load a subset of the original dataset that is exclusive to it.
 
+    The indices are generated with vectorized NumPy operations and yielded
+    lazily, and the first batches of an epoch can be skipped by
+    :meth:`set_start_iter` to resume training in the middle of an epoch.
+
     .. note::
         Dataset is assumed to be of constant size.
 
@@ -81,6 +130,7 @@ class DistributedGroupSampler(Sampler):
         self.num_replicas = num_replicas
         self.rank = rank
         self.epoch = 0
+        self.start_iter = 0
 
         assert hasattr(self.dataset, 'flag')
         self.flag = self.dataset.flag
@@ -94,50 +144,60 @@ class DistributedGroupSampler(Sampler):
         self.total_size = self.num_samples * self.num_replicas
 
     def __iter__(self):
+        batches, batch_order = self._get_batches(self.epoch)
+        start_iter, self.start_iter = self.start_iter, 0
+        return _iter_batches(batches, batch_order, start_iter)
+
+    def _get_batches(self, seed):
+        """Get the batches of this rank in an epoch.
+
+        Args:
+            seed (int): Seed of the shuffle, which is the epoch.
+
+        Returns:
+            tuple[np.ndarray]: Sample indices of all batches of shape
+                (num_batches, samples_per_gpu), and the indices of the
+                batches of this rank in order.
+        """
         # deterministically shuffle based on epoch
         g = torch.Generator()
-        g.manual_seed(self.epoch)
+        g.manual_seed(seed)
 
         indices = []
-        for i, size in enumerate(self.group_sizes):
+        for size, indice in zip(self.group_sizes,
+                                _group_indices(self.flag, self.group_sizes)):
             if size > 0:
-                indice = np.where(self.flag == i)[0]
-                assert len(indice) == size
                 # add .numpy() to avoid bug when selecting indice in parrots.
                 # TODO: check whether torch.randperm() can be replaced by
                 # numpy.random.permutation().
-                indice = indice[list(
-                    torch.randperm(int(size), generator=g).numpy())].tolist()
-                extra = int(
+                indice = indice[torch.randperm(int(size), generator=g).numpy()]
+                num_padded = int(
                     math.ceil(
                         size * 1.0 / self.samples_per_gpu / self.num_replicas)
-                ) * self.samples_per_gpu * self.num_replicas - len(indice)
-                # pad indice
-                tmp = indice.copy()
-                for _ in range(extra // size):
-                    indice.extend(tmp)
-                indice.extend(tmp[:extra % size])
-                indices.extend(indice)
-
+                ) * self.samples_per_gpu * self.num_replicas
+                # pad indice by repeating it
+                indices.append(np.resize(indice, num_padded))
+        indices = np.concatenate(indices)
         assert len(indices) == self.total_size
 
-        indices = [
-            indices[j] for i in list(
-                torch.randperm(
-                    len(indices) // self.samples_per_gpu, generator=g))
-            for j in range(i * self.samples_per_gpu, (i + 1) *
-                           self.samples_per_gpu)
-        ]
+        batches = indices.reshape(-1, self.samples_per_gpu)
+        batch_order = torch.randperm(len(batches), generator=g).numpy()
 
         # subsample
-        offset = self.num_samples * self.rank
-        indices = indices[offset:offset + self.num_samples]
-        assert len(indices) == self.num_samples
-
-        return iter(indices)
+        num_batches = self.num_samples // self.samples_per_gpu
+        offset = num_batches * self.rank
+        return batches, batch_order[offset:offset + num_batches]
 
     def __len__(self):
         return self.num_samples
 
     def set_epoch(self, epoch):
         self.epoch = epoch
+
+    def set_start_iter(self, start_iter):
+        """Skip the first ``start_iter`` batches of the next epoch.
+
+        Args:
+            start_iter (int): Number of batches of this rank to skip.
+        """
+        self.start_iter = start_iter
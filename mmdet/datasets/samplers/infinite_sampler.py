@@ -0,0 +1,62 @@
+import itertools
+
+from .group_sampler import DistributedGroupSampler, _iter_batches
+
+
+class InfiniteGroupSampler(DistributedGroupSampler):
+    """Sampler that yields batches of samples from the same group endlessly.
+
+    The batches of successive epochs are chained into a single iterator, so
+    the :class:`DataLoader` never runs out of data and its worker processes
+    are never shut down and re-forked between epochs. It is used for
+    iteration-based training with :class:`IterBasedRunner`. The batches of
+    each epoch are shuffled in the same way as
+    :class:`DistributedGroupSampler`, with ``seed + epoch`` as the seed.
+
+    Args:
+        dataset: Dataset with a ``flag`` attribute of the group of each
+            sample.
+        samples_per_gpu (int): Number of samples of each batch. Default: 1.
+        num_replicas (int, optional): Number of processes participating in
+            distributed training. Default: None.
+        rank (int, optional): Rank of the current process within
+            num_replicas. Default: None.
+        seed (int): Seed of the shuffle of the first epoch. Default: 0.
+    """
+
+    def __init__(self,
+                 dataset,
+                 samples_per_gpu=1,
+                 num_replicas=None,
+                 rank=None,
+                 seed=0):
+        super().__init__(
+            dataset,
+            samples_per_gpu=samples_per_gpu,
+            num_replicas=num_replicas,
+            rank=rank)
+        self.seed = seed if seed is not None else 0
+        self.num_batches = self.num_samples // self.samples_per_gpu
+
+    def __iter__(self):
+        first_epoch, start_iter = divmod(self.start_iter, self.num_batches)
+        self.start_iter = 0
+        return self._infinite_indices(first_epoch, start_iter)
+
+    def _infinite_indices(self, first_epoch, start_iter):
+        for epoch in itertools.count(first_epoch):
+            batches, batch_order = self._get_batches(self.seed + epoch)
+            yield from _iter_batches(batches, batch_order, start_iter)
+            start_iter = 0
+
+    def set_start_iter(self, start_iter):
+        """Skip the first ``start_iter`` batches of the infinite stream.
+
+        The epoch to start from is derived from ``start_iter``, so resuming
+        an iteration-based training gives the same batches as an
+        uninterrupted one.
+
+        Args:
+            start_iter (int): Number of batches of this rank to skip.
+        """
+        self.start_iter = start_iter
@@ -30,7 +30,8 @@ class VOCDataset(XMLDataset):
                  logger=None,
                  proposal_nums=(100, 300, 1000),
                  iou_thr=0.5,
-                 scale_ranges=None):
+                 scale_ranges=None,
+                 vectorized=False):
         """Evaluate in VOC protocol.
 
         Args:
@@ -46,6 +47,8 @@ class VOCDataset(XMLDataset):
             scale_ranges (list[tuple], optional): Scale ranges for evaluating
                 mAP. If not specified, all bounding boxes would be included in
                 evaluation. Default: None.
+            vectorized (bool): Whether to compute mAP with the single-process
+                vectorized engine. See :func:`eval_map`. Default: False.
 
         Returns:
             dict[str, float]: AP/recall metrics.
@@ -75,7 +78,8 @@ class VOCDataset(XMLDataset):
                     scale_ranges=None,
                     iou_thr=iou_thr,
                     dataset=ds_name,
-                    logger=logger)
+                    logger=logger,
+                    vectorized=vectorized)
                 mean_aps.append(mean_ap)
                 eval_results[f'AP{int(iou_thr * 100):02d}'] = round(mean_ap, 3)
             eval_results['mAP'] = sum(mean_aps) / len(mean_aps)
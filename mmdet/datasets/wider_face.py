@@ -1,7 +1,4 @@
 import os.path as osp
-import xml.etree.ElementTree as ET
-
-import mmcv
 
 from .builder import DATASETS
 from .xml_style import XMLDataset
@@ -19,33 +16,24 @@ class WIDERFaceDataset(XMLDataset):
     def __init__(self, **kwargs):
         super(WIDERFaceDataset, self).__init__(**kwargs)
 
-    def load_annotations(self, ann_file):
-        """Load annotation from WIDERFace XML style annotation file.
+    def _get_img_info(self, img_id, root):
+        """Get image info from the root of the parsed WIDERFace XML file.
 
         Args:
-            ann_file (str): Path of XML file.
+            img_id (str): Id of the image.
+            root (xml.etree.ElementTree.Element): Root of the XML file.
 
         Returns:
-            list[dict]: Annotation info from XML file.
+            dict: Image info with keys `id`, `filename`, `width` and `height`.
         """
 
-        data_infos = []
-        img_ids = mmcv.list_from_file(ann_file)
-        for img_id in img_ids:
-            filename = f'{img_id}.jpg'
-            xml_path = osp.join(self.img_prefix, 'Annotations',
-                                f'{img_id}.xml')
-            tree = ET.parse(xml_path)
-            root = tree.getroot()
-            size = root.find('size')
-            width = int(size.find('width').text)
-            height = int(size.find('height').text)
-            folder = root.find('folder').text
-            data_infos.append(
-                dict(
-                    id=img_id,
-                    filename=osp.join(folder, filename),
-                    width=width,
-                    height=height))
-
-        return data_infos
+        filename = f'{img_id}.jpg'
+        size = root.find('size')
+        width = int(size.find('width').text)
+        height = int(size.find('height').text)
+        folder = root.find('folder').text
+        return dict(
+            id=img_id,
+            filename=osp.join(folder, filename),
+            width=width,
+            height=height)
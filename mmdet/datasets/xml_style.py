@@ -1,3 +1,5 @@
+import hashlib
+import os
 import os.path as osp
 import xml.etree.ElementTree as ET
 
@@ -17,9 +19,20 @@ class XMLDataset(CustomDataset):
         min_size (int | float, optional): The minimum size of bounding
             boxes in the images. If the size of a bounding box is less than
             ``min_size``, it would be add to ignored field.
+        ann_cache_dir (str, optional): If specified, all XML files are parsed
+            once into compact arrays which are saved to a cache file in this
+            directory, and image infos and annotations are served from the
+            cache afterwards without touching the XML files. The cache is
+            keyed by the path and mtime of ``ann_file``, ``img_prefix`` and
+            ``CLASSES``, so it has to be removed manually if XML files are
+            modified in place. Default: None.
     """
 
-    def __init__(self, min_size=None, **kwargs):
+    def __init__(self, min_size=None, ann_cache_dir=None, **kwargs):
+        # the cache is loaded in `load_annotations`, which is called during
+        # the initialization of `CustomDataset`
+        self.ann_cache_dir = ann_cache_dir
+        self.ann_cache = None
         super(XMLDataset, self).__init__(**kwargs)
         self.cat2label = {cat: i for i, cat in enumerate(self.CLASSES)}
         self.min_size = min_size
@@ -34,28 +47,150 @@ class XMLDataset(CustomDataset):
             list[dict]: Annotation info from XML file.
         """
 
+        if self.ann_cache_dir is not None:
+            return self._load_ann_cache(ann_file)
+
         data_infos = []
         img_ids = mmcv.list_from_file(ann_file)
         for img_id in img_ids:
-            filename = f'JPEGImages/{img_id}.jpg'
             xml_path = osp.join(self.img_prefix, 'Annotations',
                                 f'{img_id}.xml')
             tree = ET.parse(xml_path)
             root = tree.getroot()
-            size = root.find('size')
-            width = 0
-            height = 0
-            if size is not None:
-                width = int(size.find('width').text)
-                height = int(size.find('height').text)
-            else:
-                img_path = osp.join(self.img_prefix, 'JPEGImages',
-                                    '{}.jpg'.format(img_id))
-                img = Image.open(img_path)
-                width, height = img.size
-            data_infos.append(
-                dict(id=img_id, filename=filename, width=width, height=height))
+            data_infos.append(self._get_img_info(img_id, root))
+
+        return data_infos
+
+    def _get_img_info(self, img_id, root):
+        """Get image info from the root of the parsed XML file.
+
+        Args:
+            img_id (str): Id of the image.
+            root (xml.etree.ElementTree.Element): Root of the XML file.
+
+        Returns:
+            dict: Image info with keys `id`, `filename`, `width` and `height`.
+        """
+
+        filename = f'JPEGImages/{img_id}.jpg'
+        size = root.find('size')
+        width = 0
+        height = 0
+        if size is not None:
+            width = int(size.find('width').text)
+            height = int(size.find('height').text)
+        else:
+            img_path = osp.join(self.img_prefix, 'JPEGImages',
+                                '{}.jpg'.format(img_id))
+            img = Image.open(img_path)
+            width, height = img.size
+        return dict(id=img_id, filename=filename, width=width, height=height)
+
+    def _get_ann_cache_file(self, ann_file):
+        """Get the path of the annotation cache file of ``ann_file``."""
+        stat = os.stat(ann_file)
+        key = '|'.join([
+            type(self).__name__,
+            osp.abspath(ann_file),
+            str(stat.st_mtime_ns),
+            osp.abspath(self.img_prefix),
+            repr(tuple(self.CLASSES)),
+        ])
+        digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+        return osp.join(self.ann_cache_dir,
+                        f'{osp.basename(ann_file)}.{digest}.npz')
+
+    def _build_ann_cache(self, ann_file):
+        """Parse all XML files of ``ann_file`` into compact arrays.
+
+        Objects of each image are stored contiguously, and those of the i-th
+        image are in ``[offsets[i], offsets[i + 1])``. Objects whose names are
+        not in ``CLASSES`` are dropped.
+
+        Args:
+            ann_file (str): Path of XML file.
+
+        Returns:
+            dict[str, np.ndarray]: The annotation cache.
+        """
+
+        cat2label = {cat: i for i, cat in enumerate(self.CLASSES)}
+        img_infos = []
+        bboxes = []
+        labels = []
+        difficult = []
+        offsets = [0]
+        img_ids = mmcv.list_from_file(ann_file)
+        for img_id in img_ids:
+            xml_path = osp.join(self.img_prefix, 'Annotations',
+                                f'{img_id}.xml')
+            tree = ET.parse(xml_path)
+            root = tree.getroot()
+            img_infos.append(self._get_img_info(img_id, root))
+            for obj in root.findall('object'):
+                name = obj.find('name').text
+                if name not in self.CLASSES:
+                    continue
+                labels.append(cat2label[name])
+                difficult_node = obj.find('difficult')
+                difficult.append(
+                    difficult_node is not None
+                    and int(difficult_node.text) > 0)
+                bnd_box = obj.find('bndbox')
+                bboxes.append([
+                    int(float(bnd_box.find('xmin').text)),
+                    int(float(bnd_box.find('ymin').text)),
+                    int(float(bnd_box.find('xmax').text)),
+                    int(float(bnd_box.find('ymax').text))
+                ])
+            offsets.append(len(labels))
+        return dict(
+            ids=np.array([info['id'] for info in img_infos], dtype=np.str_),
+            filenames=np.array([info['filename'] for info in img_infos],
+                               dtype=np.str_),
+            widths=np.array([info['width'] for info in img_infos],
+                            dtype=np.int64),
+            heights=np.array([info['height'] for info in img_infos],
+                             dtype=np.int64),
+            bboxes=np.array(bboxes, dtype=np.float32).reshape(-1, 4),
+            labels=np.array(labels, dtype=np.int64),
+            difficult=np.array(difficult, dtype=bool),
+            offsets=np.array(offsets, dtype=np.int64))
+
+    def _load_ann_cache(self, ann_file):
+        """Load image infos from the annotation cache, building it if needed.
+
+        Args:
+            ann_file (str): Path of XML file.
 
+        Returns:
+            list[dict]: Annotation info from XML file.
+        """
+
+        cache_file = self._get_ann_cache_file(ann_file)
+        if osp.isfile(cache_file):
+            with np.load(cache_file, allow_pickle=False) as cache:
+                ann_cache = {key: cache[key] for key in cache.files}
+        else:
+            ann_cache = self._build_ann_cache(ann_file)
+            mmcv.mkdir_or_exist(self.ann_cache_dir)
+            # write to a temporary file first so that concurrent processes
+            # never read a partially written cache
+            tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+            with open(tmp_file, 'wb') as f:
+                np.savez(f, **ann_cache)
+            os.replace(tmp_file, cache_file)
+
+        data_infos = []
+        for i, img_id in enumerate(ann_cache['ids'].tolist()):
+            data_infos.append(
+                dict(
+                    id=img_id,
+                    filename=str(ann_cache['filenames'][i]),
+                    width=int(ann_cache['widths'][i]),
+                    height=int(ann_cache['heights'][i]),
+                    ann_cache_idx=i))
+        self.ann_cache = ann_cache
         return data_infos
 
     def _filter_imgs(self, min_size=32):
@@ -64,7 +199,12 @@ class XMLDataset(CustomDataset):
         for i, img_info in enumerate(self.data_infos):
             if min(img_info['width'], img_info['height']) < min_size:
                 continue
-            if self.filter_empty_gt:
+            if self.filter_empty_gt and self.ann_cache is not None:
+                cache_idx = img_info['ann_cache_idx']
+                offsets = self.ann_cache['offsets']
+                if offsets[cache_idx + 1] > offsets[cache_idx]:
+                    valid_inds.append(i)
+            elif self.filter_empty_gt:
                 img_id = img_info['id']
                 xml_path = osp.join(self.img_prefix, 'Annotations',
                                     f'{img_id}.xml')
@@ -89,6 +229,9 @@ class XMLDataset(CustomDataset):
             dict: Annotation info of specified index.
         """
 
+        if self.ann_cache is not None:
+            return self._get_ann_info_from_cache(idx)
+
         img_id = self.data_infos[idx]['id']
         xml_path = osp.join(self.img_prefix, 'Annotations', f'{img_id}.xml')
         tree = ET.parse(xml_path)
@@ -144,6 +287,33 @@ class XMLDataset(CustomDataset):
             labels_ignore=labels_ignore.astype(np.int64))
         return ann
 
+    def _get_ann_info_from_cache(self, idx):
+        """Get annotation from the annotation cache by index.
+
+        Args:
+            idx (int): Index of data.
+
+        Returns:
+            dict: Annotation info of specified index.
+        """
+
+        cache_idx = self.data_infos[idx]['ann_cache_idx']
+        start, end = self.ann_cache['offsets'][cache_idx:cache_idx + 2]
+        bboxes = self.ann_cache['bboxes'][start:end]
+        labels = self.ann_cache['labels'][start:end]
+        ignore = self.ann_cache['difficult'][start:end]
+        if self.min_size:
+            assert not self.test_mode
+            w = bboxes[:, 2] - bboxes[:, 0]
+            h = bboxes[:, 3] - bboxes[:, 1]
+            ignore = ignore | (w < self.min_size) | (h < self.min_size)
+        ann = dict(
+            bboxes=bboxes[~ignore] - 1,
+            labels=labels[~ignore],
+            bboxes_ignore=bboxes[ignore] - 1,
+            labels_ignore=labels[ignore])
+        return ann
+
     def get_cat_ids(self, idx):
         """Get category ids in XML file by index.
 
@@ -154,6 +324,11 @@ class XMLDataset(CustomDataset):
             list[int]: All categories in the image of specified index.
         """
 
+        if self.ann_cache is not None:
+            cache_idx = self.data_infos[idx]['ann_cache_idx']
+            start, end = self.ann_cache['offsets'][cache_idx:cache_idx + 2]
+            return self.ann_cache['labels'][start:end].tolist()
+
         cat_ids = []
         img_id = self.data_infos[idx]['id']
         xml_path = osp.join(self.img_prefix, 'Annotations', f'{img_id}.xml')
@@ -167,3 +342,17 @@ class XMLDataset(CustomDataset):
             cat_ids.append(label)
 
         return cat_ids
+
+    def _build_cat_index(self):
+        """Build the category index from the annotation cache if it is
+        loaded, otherwise by parsing the XML file of each image."""
+
+        if self.ann_cache is None:
+            return super(XMLDataset, self)._build_cat_index()
+        cache_inds = np.array(
+            [info['ann_cache_idx'] for info in self.data_infos],
+            dtype=np.int64)
+        offsets = self.ann_cache['offsets']
+        return self._gather_cat_index(self.ann_cache['labels'],
+                                      offsets[cache_inds],
+                                      offsets[cache_inds + 1])
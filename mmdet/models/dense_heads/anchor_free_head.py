@@ -321,7 +321,7 @@ class AnchorFreeHead(BaseDenseHead, BBoxTestMixin):
                                         dtype, device, flatten))
         return mlvl_points
 
-    def aug_test(self, feats, img_metas, rescale=False):
+    def aug_test(self, feats, img_metas, rescale=False, aug_groups=None):
         """Test function with test time augmentation.
 
         Args:
@@ -333,8 +333,12 @@ class AnchorFreeHead(BaseDenseHead, BBoxTestMixin):
                 images in a batch. each dict has image information.
             rescale (bool, optional): Whether to rescale the results.
                 Defaults to False.
+            aug_groups (list[list[int]], optional): Indices of the
+                augmentations in each group of ``feats`` if the features of
+                the augmentations are batched by groups. Defaults to None.
 
         Returns:
             list[ndarray]: bbox results of each class
         """
-        return self.aug_test_bboxes(feats, img_metas, rescale=rescale)
+        return self.aug_test_bboxes(
+            feats, img_metas, rescale=rescale, aug_groups=aug_groups)
@@ -1,11 +1,14 @@
+import numpy as np
 import torch
 import torch.nn as nn
 from mmcv.cnn import normal_init
 from mmcv.runner import force_fp32
 
-from mmdet.core import (anchor_inside_flags, build_anchor_generator,
-                        build_assigner, build_bbox_coder, build_sampler,
-                        images_to_levels, multi_apply, multiclass_nms, unmap)
+from mmdet.core import (DeltaXYWHBBoxCoder, MaxIoUAssigner,
+                        anchor_inside_flags, batched_multiclass_nms,
+                        build_anchor_generator, build_assigner,
+                        build_bbox_coder, build_sampler, images_to_levels,
+                        multi_apply, multiclass_nms, unmap)
 from ..builder import HEADS, build_loss
 from .base_dense_head import BaseDenseHead
 from .dense_test_mixins import BBoxTestMixin
@@ -180,7 +183,8 @@ class AnchorHead(BaseDenseHead, BBoxTestMixin):
                             gt_labels,
                             img_meta,
                             label_channels=1,
-                            unmap_outputs=True):
+                            unmap_outputs=True,
+                            assign_result=None):
         """Compute regression and classification targets for anchors in a
         single image.
 
@@ -201,6 +205,9 @@ class AnchorHead(BaseDenseHead, BBoxTestMixin):
             label_channels (int): Channel of label.
             unmap_outputs (bool): Whether to map outputs back to the original
                 set of anchors.
+            assign_result (:obj:`AssignResult`, optional): The assign result
+                of the anchors inside the image if they have been assigned
+                together with other images.
 
         Returns:
             tuple:
@@ -219,9 +226,10 @@ class AnchorHead(BaseDenseHead, BBoxTestMixin):
         # assign gt and sample anchors
         anchors = flat_anchors[inside_flags, :]
 
-        assign_result = self.assigner.assign(
-            anchors, gt_bboxes, gt_bboxes_ignore,
-            None if self.sampling else gt_labels)
+        if assign_result is None:
+            assign_result = self.assigner.assign(
+                anchors, gt_bboxes, gt_bboxes_ignore,
+                None if self.sampling else gt_labels)
         sampling_result = self.sampler.sample(assign_result, anchors,
                                               gt_bboxes)
 
@@ -337,16 +345,38 @@ class AnchorHead(BaseDenseHead, BBoxTestMixin):
             gt_bboxes_ignore_list = [None for _ in range(num_imgs)]
         if gt_labels_list is None:
             gt_labels_list = [None for _ in range(num_imgs)]
-        results = multi_apply(
-            self._get_targets_single,
-            concat_anchor_list,
-            concat_valid_flag_list,
-            gt_bboxes_list,
-            gt_bboxes_ignore_list,
-            gt_labels_list,
-            img_metas,
-            label_channels=label_channels,
-            unmap_outputs=unmap_outputs)
+        if self._batched_assign(gt_bboxes_list):
+            assign_results = self._assign_batch(anchor_list,
+                                                concat_anchor_list,
+                                                concat_valid_flag_list,
+                                                gt_bboxes_list, img_metas,
+                                                gt_bboxes_ignore_list,
+                                                gt_labels_list)
+            results = []
+            for i in range(num_imgs):
+                results.append(
+                    self._get_targets_single(
+                        concat_anchor_list[i],
+                        concat_valid_flag_list[i],
+                        gt_bboxes_list[i],
+                        gt_bboxes_ignore_list[i],
+                        gt_labels_list[i],
+                        img_metas[i],
+                        label_channels=label_channels,
+                        unmap_outputs=unmap_outputs,
+                        assign_result=assign_results[i]))
+            results = tuple(map(list, zip(*results)))
+        else:
+            results = multi_apply(
+                self._get_targets_single,
+                concat_anchor_list,
+                concat_valid_flag_list,
+                gt_bboxes_list,
+                gt_bboxes_ignore_list,
+                gt_labels_list,
+                img_metas,
+                label_channels=label_channels,
+                unmap_outputs=unmap_outputs)
         (all_labels, all_label_weights, all_bbox_targets, all_bbox_weights,
          pos_inds_list, neg_inds_list, sampling_results_list) = results[:7]
         rest_results = list(results[7:])  # user-added return values
@@ -373,6 +403,50 @@ class AnchorHead(BaseDenseHead, BBoxTestMixin):
 
         return res + tuple(rest_results)
 
+    def _batched_assign(self, gt_bboxes_list):
+        """Whether to assign the anchors of a batch of images together."""
+        # heads customizing _get_targets_single and assigners customizing
+        # assign, e.g. ApproxMaxIoUAssigner, need the per image path
+        if not (self.train_cfg.get('batched_assign', True)
+                and type(self)._get_targets_single
+                is AnchorHead._get_targets_single
+                and type(self.assigner).assign is MaxIoUAssigner.assign):
+            return False
+        # crowded images are assigned on CPU by the per image path
+        gpu_assign_thr = self.assigner.gpu_assign_thr
+        return gpu_assign_thr <= 0 or all(
+            gt_bboxes.size(0) <= gpu_assign_thr
+            for gt_bboxes in gt_bboxes_list)
+
+    def _assign_batch(self, anchor_list, concat_anchor_list,
+                      concat_valid_flag_list, gt_bboxes_list, img_metas,
+                      gt_bboxes_ignore_list, gt_labels_list):
+        """Assign the anchors inside each image by
+        :meth:`MaxIoUAssigner.assign_batch`.
+
+        Returns:
+            list[:obj:`AssignResult`]: The assign result of the anchors
+                inside each image.
+        """
+        inside_flags = torch.stack([
+            anchor_inside_flags(flat_anchors, valid_flags,
+                                img_meta['img_shape'][:2],
+                                self.train_cfg.allowed_border)
+            for flat_anchors, valid_flags, img_meta in zip(
+                concat_anchor_list, concat_valid_flag_list, img_metas)
+        ])
+        # the images share the same anchors when they come from get_anchors
+        if all(anchors is anchor_list[0] for anchors in anchor_list):
+            bboxes = concat_anchor_list[0]
+        else:
+            bboxes = torch.stack(concat_anchor_list)
+        return self.assigner.assign_batch(
+            bboxes,
+            gt_bboxes_list,
+            gt_bboxes_ignore_list,
+            None if self.sampling else gt_labels_list,
+            valid_flags=inside_flags)
+
     def loss_single(self, cls_score, bbox_pred, anchors, labels, label_weights,
                     bbox_targets, bbox_weights, num_total_samples):
         """Compute loss of a single scale level.
@@ -511,7 +585,10 @@ class AnchorHead(BaseDenseHead, BBoxTestMixin):
             img_metas (list[dict]): Meta information of each image, e.g.,
                 image size, scaling factor, etc.
             cfg (mmcv.Config | None): Test / postprocessing configuration,
-                if None, test_cfg would be used
+                if None, test_cfg would be used. The images are processed
+                together by :meth:`_get_bboxes` unless
+                ``cfg.batched_postprocess`` is False, in which case they are
+                processed one by one by :meth:`_get_bboxes_single`.
             rescale (bool): If True, return boxes in original image space.
                 Default: False.
             with_nms (bool): If True, do nms before return boxes.
@@ -559,6 +636,21 @@ class AnchorHead(BaseDenseHead, BBoxTestMixin):
         mlvl_anchors = self.anchor_generator.grid_anchors(
             featmap_sizes, device=device)
 
+        if self._batched_postprocess(cfg):
+            mlvl_cls_scores = [
+                cls_scores[i].detach() for i in range(num_levels)
+            ]
+            mlvl_bbox_preds = [
+                bbox_preds[i].detach() for i in range(num_levels)
+            ]
+            img_shapes = [img_meta['img_shape'] for img_meta in img_metas]
+            scale_factors = [
+                img_meta['scale_factor'] for img_meta in img_metas
+            ]
+            return self._get_bboxes(mlvl_cls_scores, mlvl_bbox_preds,
+                                    mlvl_anchors, img_shapes, scale_factors,
+                                    cfg, rescale, with_nms)
+
         result_list = []
         for img_id in range(len(img_metas)):
             cls_score_list = [
@@ -584,6 +676,120 @@ class AnchorHead(BaseDenseHead, BBoxTestMixin):
             result_list.append(proposals)
         return result_list
 
+    def _batched_postprocess(self, cfg):
+        """Whether to post-process the images of a batch together."""
+        cfg = self.test_cfg if cfg is None else cfg
+        # heads customizing _get_bboxes_single need the per image path
+        return (cfg.get('batched_postprocess', True) and
+                type(self)._get_bboxes_single is AnchorHead._get_bboxes_single
+                and not torch.onnx.is_in_onnx_export())
+
+    def _get_bboxes(self,
+                    mlvl_cls_scores,
+                    mlvl_bbox_preds,
+                    mlvl_anchors,
+                    img_shapes,
+                    scale_factors,
+                    cfg,
+                    rescale=False,
+                    with_nms=True):
+        """Transform outputs for a batch of images into bbox predictions.
+
+        It gives the same results as calling :meth:`_get_bboxes_single` for
+        each image, but score activation, top-k selection, box decoding,
+        rescaling and NMS are done for the whole batch at once.
+
+        Args:
+            mlvl_cls_scores (list[Tensor]): Box scores for each scale level
+                with shape (N, num_anchors * num_classes, H, W).
+            mlvl_bbox_preds (list[Tensor]): Box energies / deltas for each
+                scale level with shape (N, num_anchors * 4, H, W).
+            mlvl_anchors (list[Tensor]): Box reference for each scale level
+                with shape (num_total_anchors, 4).
+            img_shapes (list[tuple[int]]): Shape of each input image,
+                (height, width, 3).
+            scale_factors (list[ndarray]): Scale factor of each image arange
+                as (w_scale, h_scale, w_scale, h_scale).
+            cfg (mmcv.Config): Test / postprocessing configuration,
+                if None, test_cfg would be used.
+            rescale (bool): If True, return boxes in original image space.
+                Default: False.
+            with_nms (bool): If True, do nms before return boxes.
+                Default: True.
+
+        Returns:
+            list[tuple[Tensor, Tensor]]: The same as those returned by
+                :meth:`_get_bboxes_single` for each image.
+        """
+        cfg = self.test_cfg if cfg is None else cfg
+        assert len(mlvl_cls_scores) == len(mlvl_bbox_preds) == len(
+            mlvl_anchors)
+        batch_size = mlvl_cls_scores[0].size(0)
+        nms_pre = cfg.get('nms_pre', -1)
+        mlvl_bboxes = []
+        mlvl_scores = []
+        for cls_score, bbox_pred, anchors in zip(mlvl_cls_scores,
+                                                 mlvl_bbox_preds,
+                                                 mlvl_anchors):
+            assert cls_score.size()[-2:] == bbox_pred.size()[-2:]
+            cls_score = cls_score.permute(0, 2, 3,
+                                          1).reshape(batch_size, -1,
+                                                     self.cls_out_channels)
+            if self.use_sigmoid_cls:
+                scores = cls_score.sigmoid()
+            else:
+                scores = cls_score.softmax(-1)
+            bbox_pred = bbox_pred.permute(0, 2, 3,
+                                          1).reshape(batch_size, -1, 4)
+            anchors = anchors.expand_as(bbox_pred)
+            if nms_pre > 0 and scores.shape[1] > nms_pre:
+                # Get maximum scores for foreground classes.
+                if self.use_sigmoid_cls:
+                    max_scores, _ = scores.max(dim=-1)
+                else:
+                    # remind that we set FG labels to [0, num_class-1]
+                    # since mmdet v2.0
+                    # BG cat_id: num_class
+                    max_scores, _ = scores[..., :-1].max(dim=-1)
+                _, topk_inds = max_scores.topk(nms_pre)
+                batch_inds = torch.arange(
+                    batch_size,
+                    device=topk_inds.device).view(-1, 1).expand_as(topk_inds)
+                anchors = anchors[batch_inds, topk_inds, :]
+                bbox_pred = bbox_pred[batch_inds, topk_inds, :]
+                scores = scores[batch_inds, topk_inds, :]
+            if isinstance(self.bbox_coder, DeltaXYWHBBoxCoder):
+                bboxes = self.bbox_coder.decode(
+                    anchors, bbox_pred, max_shape=img_shapes)
+            else:
+                # other coders decode the boxes of one image at a time
+                bboxes = torch.stack([
+                    self.bbox_coder.decode(
+                        anchors[i], bbox_pred[i], max_shape=img_shapes[i])
+                    for i in range(batch_size)
+                ])
+            mlvl_bboxes.append(bboxes)
+            mlvl_scores.append(scores)
+        mlvl_bboxes = torch.cat(mlvl_bboxes, dim=1)
+        if rescale:
+            mlvl_bboxes /= mlvl_bboxes.new_tensor(
+                np.array(scale_factors)).view(batch_size, 1, -1)
+        mlvl_scores = torch.cat(mlvl_scores, dim=1)
+        if self.use_sigmoid_cls:
+            # Add a dummy background class to the backend when using sigmoid
+            # remind that we set FG labels to [0, num_class-1] since mmdet v2.0
+            # BG cat_id: num_class
+            padding = mlvl_scores.new_zeros(batch_size, mlvl_scores.size(1), 1)
+            mlvl_scores = torch.cat([mlvl_scores, padding], dim=-1)
+
+        if with_nms:
+            return batched_multiclass_nms(mlvl_bboxes, mlvl_scores,
+                                          cfg.score_thr, cfg.nms,
+                                          cfg.max_per_img)
+        else:
+            return [(mlvl_bboxes[i], mlvl_scores[i])
+                    for i in range(batch_size)]
+
     def _get_bboxes_single(self,
                            cls_score_list,
                            bbox_pred_list,
@@ -669,7 +875,7 @@ class AnchorHead(BaseDenseHead, BBoxTestMixin):
         else:
             return mlvl_bboxes, mlvl_scores
 
-    def aug_test(self, feats, img_metas, rescale=False):
+    def aug_test(self, feats, img_metas, rescale=False, aug_groups=None):
         """Test function with test time augmentation.
 
         Args:
@@ -681,8 +887,12 @@ class AnchorHead(BaseDenseHead, BBoxTestMixin):
                 images in a batch. each dict has image information.
             rescale (bool, optional): Whether to rescale the results.
                 Defaults to False.
+            aug_groups (list[list[int]], optional): Indices of the
+                augmentations in each group of ``feats`` if the features of
+                the augmentations are batched by groups. Defaults to None.
 
         Returns:
             list[ndarray]: bbox results of each class
         """
-        return self.aug_test_bboxes(feats, img_metas, rescale=rescale)
+        return self.aug_test_bboxes(
+            feats, img_metas, rescale=rescale, aug_groups=aug_groups)
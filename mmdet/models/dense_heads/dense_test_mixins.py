@@ -35,7 +35,11 @@ class BBoxTestMixin(object):
             scores = torch.cat(aug_scores, dim=0)
             return bboxes, scores
 
-    def aug_test_bboxes(self, feats, img_metas, rescale=False):
+    def aug_test_bboxes(self,
+                        feats,
+                        img_metas,
+                        rescale=False,
+                        aug_groups=None):
         """Test det bboxes with test time augmentation.
 
         Args:
@@ -47,6 +51,10 @@ class BBoxTestMixin(object):
                 images in a batch. each dict has image information.
             rescale (bool, optional): Whether to rescale the results.
                 Defaults to False.
+            aug_groups (list[list[int]], optional): Indices of the
+                augmentations in each group of ``feats`` if the features of
+                the augmentations are batched by groups, in which case each
+                group is forwarded at once. Defaults to None.
 
         Returns:
             list[ndarray]: bbox results of each class
@@ -60,20 +68,25 @@ class BBoxTestMixin(object):
             f'{self.__class__.__name__}' \
             ' does not support test-time augmentation'
 
-        aug_bboxes = []
-        aug_scores = []
-        aug_factors = []  # score_factors for NMS
-        for x, img_meta in zip(feats, img_metas):
+        if aug_groups is None:
+            aug_groups = [[j] for j in range(len(feats))]
+        aug_outputs = [None] * len(img_metas)
+        for x, aug_group in zip(feats, aug_groups):
             # only one image in the batch
+            group_img_metas = [img_metas[j][0] for j in aug_group]
             outs = self.forward(x)
-            bbox_inputs = outs + (img_meta, self.test_cfg, False, False)
-            bbox_outputs = self.get_bboxes(*bbox_inputs)[0]
-            aug_bboxes.append(bbox_outputs[0])
-            aug_scores.append(bbox_outputs[1])
-            # bbox_outputs of some detectors (e.g., ATSS, FCOS, YOLOv3)
-            # contains additional element to adjust scores before NMS
-            if len(bbox_outputs) >= 3:
-                aug_factors.append(bbox_outputs[2])
+            bbox_inputs = outs + (group_img_metas, self.test_cfg, False, False)
+            for j, bbox_outputs in zip(aug_group,
+                                       self.get_bboxes(*bbox_inputs)):
+                aug_outputs[j] = bbox_outputs
+        aug_bboxes = [bbox_outputs[0] for bbox_outputs in aug_outputs]
+        aug_scores = [bbox_outputs[1] for bbox_outputs in aug_outputs]
+        # bbox_outputs of some detectors (e.g., ATSS, FCOS, YOLOv3)
+        # contains additional element to adjust scores before NMS
+        aug_factors = [
+            bbox_outputs[2] for bbox_outputs in aug_outputs
+            if len(bbox_outputs) >= 3
+        ]
 
         # after merging, bboxes will be rescaled to the original image size
         merged_bboxes, merged_scores = self.merge_aug_bboxes(
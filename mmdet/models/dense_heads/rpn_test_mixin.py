@@ -36,13 +36,35 @@ class RPNTestMixin(object):
         proposal_list = self.get_bboxes(*rpn_outs, img_metas)
         return proposal_list
 
-    def aug_test_rpn(self, feats, img_metas):
+    def aug_test_rpn(self, feats, img_metas, aug_groups=None):
+        """Test with augmentation.
+
+        Args:
+            feats (list[tuple[Tensor]]): Features of each augmentation, or of
+                each group of augmentations concatenated along the batch
+                dimension if ``aug_groups`` is given.
+            img_metas (list[list[dict]]): Meta info of each augmentation and
+                each image.
+            aug_groups (list[list[int]], optional): Indices of the
+                augmentations in each group of ``feats``. Defaults to None.
+
+        Returns:
+            list[Tensor]: Proposals of each image merged from all the
+                augmentations, rescaled to the original image size.
+        """
+        if aug_groups is None:
+            aug_groups = [[j] for j in range(len(feats))]
         samples_per_gpu = len(img_metas[0])
-        aug_proposals = [[] for _ in range(samples_per_gpu)]
-        for x, img_meta in zip(feats, img_metas):
-            proposal_list = self.simple_test_rpn(x, img_meta)
-            for i, proposals in enumerate(proposal_list):
-                aug_proposals[i].append(proposals)
+        aug_proposals = [[None] * len(img_metas)
+                         for _ in range(samples_per_gpu)]
+        for x, aug_group in zip(feats, aug_groups):
+            group_img_metas = [
+                img_meta for j in aug_group for img_meta in img_metas[j]
+            ]
+            proposal_list = self.simple_test_rpn(x, group_img_metas)
+            for k, proposals in enumerate(proposal_list):
+                j, i = aug_group[k // samples_per_gpu], k % samples_per_gpu
+                aug_proposals[i][j] = proposals
         # reorganize the order of 'img_metas' to match the dimensions
         # of 'aug_proposals'
         aug_img_metas = []
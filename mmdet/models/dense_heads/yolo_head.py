@@ -517,7 +517,7 @@ class YOLOV3Head(BaseDenseHead, BBoxTestMixin):
 
         return target_map, neg_map
 
-    def aug_test(self, feats, img_metas, rescale=False):
+    def aug_test(self, feats, img_metas, rescale=False, aug_groups=None):
         """Test function with test time augmentation.
 
         Args:
@@ -529,8 +529,12 @@ class YOLOV3Head(BaseDenseHead, BBoxTestMixin):
                 images in a batch. each dict has image information.
             rescale (bool, optional): Whether to rescale the results.
                 Defaults to False.
+            aug_groups (list[list[int]], optional): Indices of the
+                augmentations in each group of ``feats`` if the features of
+                the augmentations are batched by groups. Defaults to None.
 
         Returns:
             list[ndarray]: bbox results of each class
         """
-        return self.aug_test_bboxes(feats, img_metas, rescale=rescale)
+        return self.aug_test_bboxes(
+            feats, img_metas, rescale=rescale, aug_groups=aug_groups)
@@ -3,6 +3,7 @@ from collections import OrderedDict
 
 import mmcv
 import numpy as np
+import pycocotools.mask as mask_util
 import torch
 import torch.distributed as dist
 import torch.nn as nn
@@ -62,6 +63,31 @@ class BaseDetector(nn.Module, metaclass=ABCMeta):
         assert isinstance(imgs, list)
         return [self.extract_feat(img) for img in imgs]
 
+    def extract_grouped_feats(self, imgs):
+        """Extract features from multiple images, batching the images of the
+        same shape into a single forward.
+
+        Args:
+            imgs (list[torch.Tensor]): A list of images. The images are
+                augmented from the same image but in different ways.
+
+        Returns:
+            tuple[list, list[list[int]]]: Features of each group of images
+                of the same shape, concatenated along the batch dimension,
+                and the indices of the images in each group. E.g. the flip
+                pair of every scale of MultiScaleFlipAug forms a group.
+        """
+        assert isinstance(imgs, list)
+        aug_groups = OrderedDict()
+        for i, img in enumerate(imgs):
+            aug_groups.setdefault(img.shape, []).append(i)
+        aug_groups = list(aug_groups.values())
+        feats = [
+            self.extract_feat(torch.cat([imgs[i] for i in aug_group]))
+            for aug_group in aug_groups
+        ]
+        return feats, aug_groups
+
     def forward_train(self, imgs, img_metas, **kwargs):
         """
         Args:
@@ -333,6 +359,9 @@ class BaseDetector(nn.Module, metaclass=ABCMeta):
             segms = mmcv.concat_list(segm_result)
             if isinstance(segms[0], torch.Tensor):
                 segms = torch.stack(segms, dim=0).detach().cpu().numpy()
+            elif isinstance(segms[0], dict):
+                # RLEs given by mask_format='rle' of the test config
+                segms = mask_util.decode(segms).transpose(2, 0, 1).astype(bool)
             else:
                 segms = np.stack(segms, axis=0)
         # if out_file specified, do not show image in window
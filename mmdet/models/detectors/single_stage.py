@@ -145,5 +145,12 @@ class SingleStageDetector(BaseDetector):
             f'{self.bbox_head.__class__.__name__}' \
             ' does not support test-time augmentation'
 
+        if self.test_cfg.get('batched_aug_test', False):
+            feats, aug_groups = self.extract_grouped_feats(imgs)
+            return [
+                self.bbox_head.aug_test(
+                    feats, img_metas, rescale=rescale, aug_groups=aug_groups)
+            ]
+
         feats = self.extract_feats(imgs)
         return [self.bbox_head.aug_test(feats, img_metas, rescale=rescale)]
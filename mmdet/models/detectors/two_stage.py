@@ -1,3 +1,5 @@
+import inspect
+
 import torch
 import torch.nn as nn
 
@@ -204,6 +206,23 @@ class TwoStageDetector(BaseDetector):
         If rescale is False, then returned bboxes and masks will fit the scale
         of imgs[0].
         """
+        if self.test_cfg.get('batched_aug_test', False):
+            for head, method in [(self.rpn_head, 'aug_test_rpn'),
+                                 (self.roi_head, 'aug_test')]:
+                assert 'aug_groups' in inspect.signature(
+                    getattr(head, method)).parameters, \
+                    f'{head.__class__.__name__} does not support batched ' \
+                    'test-time augmentation'
+            x, aug_groups = self.extract_grouped_feats(imgs)
+            proposal_list = self.rpn_head.aug_test_rpn(
+                x, img_metas, aug_groups=aug_groups)
+            return self.roi_head.aug_test(
+                x,
+                proposal_list,
+                img_metas,
+                rescale=rescale,
+                aug_groups=aug_groups)
+
         x = self.extract_feats(imgs)
         proposal_list = self.rpn_head.aug_test_rpn(x, img_metas)
         return self.roi_head.aug_test(
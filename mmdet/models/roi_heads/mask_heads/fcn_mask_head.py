@@ -7,7 +7,7 @@ from mmcv.ops.carafe import CARAFEPack
 from mmcv.runner import auto_fp16, force_fp32
 from torch.nn.modules.utils import _pair
 
-from mmdet.core import mask_target
+from mmdet.core import encode_mask_region, mask_target
 from mmdet.models.builder import HEADS, build_loss
 
 BYTES_PER_FLOAT = 4
@@ -160,7 +160,11 @@ class FCNMaskHead(nn.Module):
             det_bboxes (Tensor): shape (n, 4/5)
             det_labels (Tensor): shape (n, )
             img_shape (Tensor): shape (3, )
-            rcnn_test_cfg (dict): rcnn testing config
+            rcnn_test_cfg (dict): rcnn testing config. If its
+                ``mask_format`` is 'rle' and ``mask_thr_binary`` is not
+                negative, each mask is only pasted into the region of its box
+                and encoded to the RLE of the image, instead of being an
+                image sized bitmap.
             ori_shape: original image size
 
         Returns:
@@ -206,6 +210,26 @@ class FCNMaskHead(nn.Module):
             return masks
 
         N = len(mask_pred)
+        threshold = rcnn_test_cfg.mask_thr_binary
+        if not self.class_agnostic:
+            mask_pred = mask_pred[range(N), labels][:, None]
+
+        if rcnn_test_cfg.get('mask_format', 'bitmap') == 'rle' \
+                and threshold >= 0:
+            img_h, img_w = int(img_h), int(img_w)
+            for i in range(N):
+                mask, (y_slice, x_slice) = _do_paste_mask(
+                    mask_pred[i:i + 1],
+                    bboxes[i:i + 1],
+                    img_h,
+                    img_w,
+                    skip_empty=True)
+                mask = (mask[0] >= threshold).cpu().numpy()
+                cls_segms[labels[i]].append(
+                    encode_mask_region(mask, int(x_slice.start),
+                                       int(y_slice.start), img_h, img_w))
+            return cls_segms
+
         # The actual implementation split the input into chunks,
         # and paste them chunk by chunk.
         if device.type == 'cpu':
@@ -222,7 +246,6 @@ class FCNMaskHead(nn.Module):
                     N), 'Default GPU_MEM_LIMIT is too small; try increasing it'
         chunks = torch.chunk(torch.arange(N, device=device), num_chunks)
 
-        threshold = rcnn_test_cfg.mask_thr_binary
         im_mask = torch.zeros(
             N,
             img_h,
@@ -230,9 +253,6 @@ class FCNMaskHead(nn.Module):
             device=device,
             dtype=torch.bool if threshold >= 0 else torch.uint8)
 
-        if not self.class_agnostic:
-            mask_pred = mask_pred[range(N), labels][:, None]
-
         for inds in chunks:
             masks_chunk, spatial_inds = _do_paste_mask(
                 mask_pred[inds],
@@ -184,8 +184,15 @@ class PointRendRoIHead(StandardRoIHead):
                     segm_results.append(segm_result)
         return segm_results
 
-    def aug_test_mask(self, feats, img_metas, det_bboxes, det_labels):
+    def aug_test_mask(self,
+                      feats,
+                      img_metas,
+                      det_bboxes,
+                      det_labels,
+                      aug_groups=None):
         """Test for mask head with test time augmentation."""
+        assert aug_groups is None, \
+            'batched test-time augmentation is not supported'
         if det_bboxes.shape[0] == 0:
             segm_result = [[] for _ in range(self.mask_head.num_classes)]
         else:
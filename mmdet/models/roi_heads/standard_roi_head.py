@@ -267,15 +267,20 @@ class StandardRoIHead(BaseRoIHead, BBoxTestMixin, MaskTestMixin):
                 x, img_metas, det_bboxes, det_labels, rescale=rescale)
             return list(zip(bbox_results, segm_results))
 
-    def aug_test(self, x, proposal_list, img_metas, rescale=False):
+    def aug_test(self,
+                 x,
+                 proposal_list,
+                 img_metas,
+                 rescale=False,
+                 aug_groups=None):
         """Test with augmentations.
 
         If rescale is False, then returned bboxes and masks will fit the scale
-        of imgs[0].
+        of imgs[0]. If aug_groups is given, x are the features of each group
+        of augmentations concatenated along the batch dimension.
         """
-        det_bboxes, det_labels = self.aug_test_bboxes(x, img_metas,
-                                                      proposal_list,
-                                                      self.test_cfg)
+        det_bboxes, det_labels = self.aug_test_bboxes(
+            x, img_metas, proposal_list, self.test_cfg, aug_groups=aug_groups)
 
         if rescale:
             _det_bboxes = det_bboxes
@@ -288,8 +293,8 @@ class StandardRoIHead(BaseRoIHead, BBoxTestMixin, MaskTestMixin):
 
         # det_bboxes always keep the original scale
         if self.with_mask:
-            segm_results = self.aug_test_mask(x, img_metas, det_bboxes,
-                                              det_labels)
+            segm_results = self.aug_test_mask(
+                x, img_metas, det_bboxes, det_labels, aug_groups=aug_groups)
             return [(bbox_results, segm_results)]
         else:
             return [bbox_results]
@@ -95,31 +95,41 @@ class BBoxTestMixin(object):
             det_labels.append(det_label)
         return det_bboxes, det_labels
 
-    def aug_test_bboxes(self, feats, img_metas, proposal_list, rcnn_test_cfg):
-        """Test det bboxes with test time augmentation."""
-        aug_bboxes = []
-        aug_scores = []
-        for x, img_meta in zip(feats, img_metas):
+    def aug_test_bboxes(self,
+                        feats,
+                        img_metas,
+                        proposal_list,
+                        rcnn_test_cfg,
+                        aug_groups=None):
+        """Test det bboxes with test time augmentation.
+
+        If ``aug_groups`` is given, ``feats`` are the features of each group
+        of augmentations concatenated along the batch dimension and the RoIs
+        of all the augmentations in a group are pooled in a single batch.
+        """
+        if aug_groups is None:
+            aug_groups = [[j] for j in range(len(feats))]
+        aug_bboxes = [None] * len(img_metas)
+        aug_scores = [None] * len(img_metas)
+        for x, aug_group in zip(feats, aug_groups):
             # only one image in the batch
-            img_shape = img_meta[0]['img_shape']
-            scale_factor = img_meta[0]['scale_factor']
-            flip = img_meta[0]['flip']
-            flip_direction = img_meta[0]['flip_direction']
+            group_img_metas = [img_metas[j][0] for j in aug_group]
             # TODO more flexible
-            proposals = bbox_mapping(proposal_list[0][:, :4], img_shape,
-                                     scale_factor, flip, flip_direction)
-            rois = bbox2roi([proposals])
-            bbox_results = self._bbox_forward(x, rois)
-            bboxes, scores = self.bbox_head.get_bboxes(
-                rois,
-                bbox_results['cls_score'],
-                bbox_results['bbox_pred'],
-                img_shape,
-                scale_factor,
-                rescale=False,
-                cfg=None)
-            aug_bboxes.append(bboxes)
-            aug_scores.append(scores)
+            aug_proposals = [
+                bbox_mapping(proposal_list[0][:, :4], img_meta['img_shape'],
+                             img_meta['scale_factor'], img_meta['flip'],
+                             img_meta['flip_direction'])
+                for img_meta in group_img_metas
+            ]
+            bboxes, scores = self.simple_test_bboxes(
+                x,
+                group_img_metas,
+                aug_proposals,
+                rcnn_test_cfg=None,
+                rescale=False)
+            for k, j in enumerate(aug_group):
+                aug_bboxes[j] = bboxes[k]
+                aug_scores[j] = scores[k]
         # after merging, bboxes will be rescaled to the original image size
         merged_bboxes, merged_scores = merge_aug_bboxes(
             aug_bboxes, aug_scores, img_metas, rcnn_test_cfg)
@@ -239,25 +249,50 @@ class MaskTestMixin(object):
                     segm_results.append(segm_result)
         return segm_results
 
-    def aug_test_mask(self, feats, img_metas, det_bboxes, det_labels):
-        """Test for mask head with test time augmentation."""
+    def aug_test_mask(self,
+                      feats,
+                      img_metas,
+                      det_bboxes,
+                      det_labels,
+                      aug_groups=None):
+        """Test for mask head with test time augmentation.
+
+        If ``aug_groups`` is given, ``feats`` are the features of each group
+        of augmentations concatenated along the batch dimension, the RoIs of
+        all the augmentations in a group are pooled in a single batch and
+        the masks are merged on the device of the features.
+        """
         if det_bboxes.shape[0] == 0:
             segm_result = [[] for _ in range(self.mask_head.num_classes)]
         else:
-            aug_masks = []
-            for x, img_meta in zip(feats, img_metas):
-                img_shape = img_meta[0]['img_shape']
-                scale_factor = img_meta[0]['scale_factor']
-                flip = img_meta[0]['flip']
-                flip_direction = img_meta[0]['flip_direction']
-                _bboxes = bbox_mapping(det_bboxes[:, :4], img_shape,
-                                       scale_factor, flip, flip_direction)
-                mask_rois = bbox2roi([_bboxes])
+            batched = aug_groups is not None
+            if not batched:
+                aug_groups = [[j] for j in range(len(feats))]
+            aug_masks = [None] * len(img_metas)
+            for x, aug_group in zip(feats, aug_groups):
+                _bboxes = []
+                for j in aug_group:
+                    img_shape = img_metas[j][0]['img_shape']
+                    scale_factor = img_metas[j][0]['scale_factor']
+                    flip = img_metas[j][0]['flip']
+                    flip_direction = img_metas[j][0]['flip_direction']
+                    _bboxes.append(
+                        bbox_mapping(det_bboxes[:, :4], img_shape,
+                                     scale_factor, flip, flip_direction))
+                mask_rois = bbox2roi(_bboxes)
                 mask_results = self._mask_forward(x, mask_rois)
-                # convert to numpy array to save memory
-                aug_masks.append(
-                    mask_results['mask_pred'].sigmoid().cpu().numpy())
+                mask_preds = mask_results['mask_pred'].sigmoid().split(
+                    det_bboxes.shape[0], 0)
+                for k, j in enumerate(aug_group):
+                    if batched:
+                        aug_masks[j] = mask_preds[k]
+                    else:
+                        # convert to numpy array to save memory
+                        aug_masks[j] = mask_preds[k].cpu().numpy()
             merged_masks = merge_aug_masks(aug_masks, img_metas, self.test_cfg)
+            if isinstance(merged_masks, torch.Tensor):
+                # get_seg_masks takes the mask logits if given a Tensor
+                merged_masks = merged_masks.cpu().numpy()
 
             ori_shape = img_metas[0][0]['ori_shape']
             segm_result = self.mask_head.get_seg_masks(
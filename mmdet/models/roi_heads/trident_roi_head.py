@@ -71,8 +71,15 @@ class TridentRoIHead(StandardRoIHead):
 
         return bbox_results
 
-    def aug_test_bboxes(self, feats, img_metas, proposal_list, rcnn_test_cfg):
+    def aug_test_bboxes(self,
+                        feats,
+                        img_metas,
+                        proposal_list,
+                        rcnn_test_cfg,
+                        aug_groups=None):
         """Test det bboxes with test time augmentation."""
+        assert aug_groups is None, \
+            'batched test-time augmentation is not supported'
         aug_bboxes = []
         aug_scores = []
         for x, img_meta in zip(feats, img_metas):
@@ -188,6 +188,85 @@ def test_yolo_anchor_generator():
     assert len(anchors) == 3
 
 
+def test_anchor_grid_cache():
+    from mmdet.core.anchor import build_anchor_generator
+    anchor_generator_cfgs = [
+        dict(
+            type='AnchorGenerator',
+            octave_base_scale=4,
+            scales_per_octave=3,
+            ratios=[0.5, 1.0, 2.0],
+            strides=[8, 16, 32]),
+        dict(
+            type='SSDAnchorGenerator',
+            scale_major=False,
+            input_size=300,
+            basesize_ratio_range=(0.15, 0.9),
+            strides=[8, 16, 32],
+            ratios=[[2], [2, 3], [2, 3]]),
+        dict(
+            type='YOLOAnchorGenerator',
+            strides=[32, 16, 8],
+            base_sizes=[
+                [(116, 90), (156, 198), (373, 326)],
+                [(30, 61), (62, 45), (59, 119)],
+                [(10, 13), (16, 30), (33, 23)],
+            ])
+    ]
+    featmap_sizes = [(38, 50), (19, 25), (10, 13)]
+    for cfg in anchor_generator_cfgs:
+        anchor_generator = build_anchor_generator(cfg)
+        uncached_generator = build_anchor_generator(dict(cfg, cache_size=0))
+        anchors = anchor_generator.grid_anchors(featmap_sizes, 'cpu')
+        assert anchor_generator.grid_cache.info() == (0, 3, 256, 3)
+        cached_anchors = anchor_generator.grid_anchors(featmap_sizes, 'cpu')
+        assert anchor_generator.grid_cache.info() == (3, 3, 256, 3)
+        expected_anchors = uncached_generator.grid_anchors(
+            featmap_sizes, 'cpu')
+        assert len(uncached_generator.grid_cache) == 0
+        for anchor, cached_anchor, expected_anchor in zip(
+                anchors, cached_anchors, expected_anchors):
+            assert cached_anchor is anchor
+            assert torch.equal(cached_anchor, expected_anchor)
+
+        # the valid flags only depend on the valid size of each level
+        flags = anchor_generator.valid_flags(featmap_sizes, (300, 400), 'cpu')
+        anchor_generator.valid_flags(featmap_sizes, (300, 400), 'cpu')
+        assert anchor_generator.grid_cache.info() == (6, 6, 256, 6)
+        expected_flags = uncached_generator.valid_flags(
+            featmap_sizes, (300, 400), 'cpu')
+        for flag, expected_flag in zip(flags, expected_flags):
+            assert torch.equal(flag, expected_flag)
+
+    # the least recently used grids are evicted
+    anchor_generator = build_anchor_generator(
+        dict(anchor_generator_cfgs[0], cache_size=4))
+    anchor_generator.grid_anchors(featmap_sizes, 'cpu')
+    anchor_generator.grid_anchors([(20, 20), (10, 10), (5, 5)], 'cpu')
+    assert anchor_generator.grid_cache.info() == (0, 6, 4, 4)
+    anchor_generator.grid_anchors([(20, 20), (10, 10), (5, 5)], 'cpu')
+    assert anchor_generator.grid_cache.info() == (3, 6, 4, 4)
+    anchor_generator.grid_cache.clear()
+    assert anchor_generator.grid_cache.info() == (0, 0, 4, 0)
+
+
+def test_point_grid_cache():
+    from mmdet.core.anchor import PointGenerator
+    point_generator = PointGenerator()
+    uncached_generator = PointGenerator(cache_size=0)
+    points = point_generator.grid_points((7, 9), 16, 'cpu')
+    assert point_generator.grid_points((7, 9), 16, 'cpu') is points
+    assert point_generator.grid_points(
+        torch.Size([7, 9]), 16, torch.device('cpu')) is points
+    assert torch.equal(points, uncached_generator.grid_points((7, 9), 16,
+                                                              'cpu'))
+    point_generator.grid_points((7, 9), 32, 'cpu')
+    flags = point_generator.valid_flags((7, 9), (5, 9), 'cpu')
+    assert torch.equal(flags,
+                       uncached_generator.valid_flags((7, 9), (5, 9), 'cpu'))
+    assert point_generator.grid_cache.info() == (2, 3, 256, 3)
+
+
 def test_retina_anchor():
     from mmdet.models import build_head
     if torch.cuda.is_available():
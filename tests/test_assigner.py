@@ -151,6 +151,85 @@ def test_max_iou_assigner_with_empty_boxes_and_gt():
     assert len(assign_result.gt_inds) == 0
 
 
+def test_max_iou_assigner_batch():
+    """Test batched and chunked assignment against the per image one."""
+    rng = torch.Generator().manual_seed(0)
+
+    def random_boxes(num, scale=100):
+        xy = torch.rand(num, 2, generator=rng) * scale
+        wh = torch.rand(num, 2, generator=rng) * scale / 2 + 1
+        # integer coordinates produce ties of overlaps
+        return torch.cat([xy, xy + wh], dim=1).round()
+
+    num_imgs = 3
+    bboxes = random_boxes(200)
+    gt_bboxes_list = [random_boxes(num) for num in (25, 0, 7)]
+    gt_labels_list = [
+        torch.randint(0, 5, (len(gt_bboxes), ), generator=rng)
+        for gt_bboxes in gt_bboxes_list
+    ]
+    gt_bboxes_ignore_list = [random_boxes(2) for _ in range(num_imgs)]
+    valid_flags = torch.rand(num_imgs, 200, generator=rng) > 0.2
+    for cfg in [
+            dict(pos_iou_thr=0.5, neg_iou_thr=0.4),
+            dict(pos_iou_thr=0.5, neg_iou_thr=(0.1, 0.4), min_pos_iou=0.2),
+            dict(pos_iou_thr=0.5, neg_iou_thr=0.5, gt_max_assign_all=False),
+            dict(pos_iou_thr=0.5, neg_iou_thr=0.5, match_low_quality=False),
+            dict(pos_iou_thr=0.5, neg_iou_thr=0.5, ignore_iof_thr=0.5),
+            dict(
+                pos_iou_thr=0.5,
+                neg_iou_thr=0.5,
+                ignore_iof_thr=0.5,
+                ignore_wrt_candidates=False)
+    ]:
+        self = MaxIoUAssigner(**cfg)
+        expected_results = [
+            self.assign(bboxes[valid_flags[i]], gt_bboxes_list[i],
+                        gt_bboxes_ignore_list[i], gt_labels_list[i])
+            for i in range(num_imgs)
+        ]
+        for gt_chunk_size in [-1, 1, 4]:
+            self.gt_chunk_size = gt_chunk_size
+            assign_results = self.assign_batch(
+                bboxes,
+                gt_bboxes_list,
+                gt_bboxes_ignore_list,
+                gt_labels_list,
+                valid_flags=valid_flags)
+            for assign_result, expected_result in zip(assign_results,
+                                                      expected_results):
+                assert assign_result.num_gts == expected_result.num_gts
+                assert torch.equal(assign_result.gt_inds,
+                                   expected_result.gt_inds)
+                assert torch.equal(assign_result.max_overlaps,
+                                   expected_result.max_overlaps)
+                assert torch.equal(assign_result.labels,
+                                   expected_result.labels)
+            # the chunked assignment of a single image
+            assign_result = self.assign(bboxes[valid_flags[0]],
+                                        gt_bboxes_list[0],
+                                        gt_bboxes_ignore_list[0],
+                                        gt_labels_list[0])
+            assert torch.equal(assign_result.gt_inds,
+                               expected_results[0].gt_inds)
+
+    # per image bboxes without labels
+    self = MaxIoUAssigner(pos_iou_thr=0.5, neg_iou_thr=0.5, gt_chunk_size=2)
+    batch_bboxes = torch.stack([random_boxes(50) for _ in range(num_imgs)])
+    assign_results = self.assign_batch(batch_bboxes, gt_bboxes_list)
+    for i, assign_result in enumerate(assign_results):
+        expected_result = self.assign(batch_bboxes[i], gt_bboxes_list[i])
+        assert torch.equal(assign_result.gt_inds, expected_result.gt_inds)
+        assert assign_result.labels is None
+
+    # no bboxes to assign
+    assign_results = self.assign_batch(
+        torch.empty((0, 4)), gt_bboxes_list, gt_labels_list=gt_labels_list)
+    for assign_result in assign_results:
+        assert len(assign_result.gt_inds) == 0
+        assert tuple(assign_result.labels.shape) == (0, )
+
+
 def test_point_assigner():
     self = PointAssigner()
     points = torch.FloatTensor([  # [x, y, stride]
@@ -1,6 +1,6 @@
 import torch
 
-from mmdet.core.bbox.coder import YOLOBBoxCoder
+from mmdet.core.bbox.coder import DeltaXYWHBBoxCoder, YOLOBBoxCoder
 
 
 def test_yolo_bbox_coder():
@@ -19,3 +19,16 @@ def test_yolo_bbox_coder():
          [41.2068, -8.9232, 181.4236, 48.5840]])
     assert expected_decode_bboxes.allclose(
         coder.decode(bboxes, pred_bboxes, grid_size))
+
+
+def test_delta_bbox_coder_batched_decode():
+    coder = DeltaXYWHBBoxCoder(target_stds=(0.1, 0.1, 0.2, 0.2))
+    rois = torch.rand(3, 10, 4) * 50
+    rois[..., 2:] += rois[..., :2]
+    deltas = torch.randn(3, 10, 4)
+    max_shapes = [(40, 60, 3), (60, 40, 3), (50, 50, 3)]
+    decoded_bboxes = coder.decode(rois, deltas, max_shape=max_shapes)
+    assert decoded_bboxes.shape == (3, 10, 4)
+    for i, max_shape in enumerate(max_shapes):
+        assert torch.equal(decoded_bboxes[i],
+                           coder.decode(rois[i], deltas[i], max_shape))
@@ -0,0 +1,171 @@
+import os.path as osp
+import pickle
+import tempfile
+from functools import partial
+from unittest.mock import patch
+
+import mmcv
+import numpy as np
+import pycocotools.mask as mask_util
+import pytest
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+import torch.nn as nn
+from mmcv.parallel import DataContainer, MMDataParallel, collate
+from torch.utils.data import DataLoader, Dataset, DistributedSampler
+
+from mmdet.apis import ChunkedResults, multi_gpu_test, single_gpu_test
+from mmdet.apis.test import ChunkedResultWriter
+
+
+class ExampleDataset(Dataset):
+
+    def __init__(self, size):
+        self.size = size
+
+    def __getitem__(self, idx):
+        return dict(img=torch.tensor([idx]))
+
+    def __len__(self):
+        return self.size
+
+
+class ExampleModel(nn.Module):
+
+    def __init__(self):
+        super().__init__()
+        self.conv = nn.Conv2d(3, 3, 3)
+
+    def forward(self, img, return_loss=False, rescale=True):
+        return [[np.full((1, 5), i, dtype=np.float32)] for i in img[:, 0]]
+
+
+class ExampleImageDataset(Dataset):
+
+    def __init__(self, size):
+        self.size = size
+
+    def __getitem__(self, idx):
+        img_meta = dict(
+            img_shape=(4, 6, 3),
+            ori_shape=(8, 12, 3),
+            ori_filename=f'{idx}.png',
+            img_norm_cfg=dict(mean=[0] * 3, std=[1] * 3, to_rgb=False))
+        return dict(
+            img=[torch.full((3, 4, 6), idx, dtype=torch.float32)],
+            img_metas=[DataContainer(img_meta, cpu_only=True)])
+
+    def __len__(self):
+        return self.size
+
+
+class ExampleMaskModel(nn.Module):
+
+    def __init__(self):
+        super().__init__()
+        self.conv = nn.Conv2d(3, 3, 3)
+
+    def forward(self, img, img_metas, return_loss=False, rescale=True):
+        results = []
+        for i in img[0][:, 0, 0, 0].int().tolist():
+            mask = np.zeros((8, 12), dtype=bool)
+            mask[:i + 1, :i + 1] = True
+            bboxes = np.full((1, 5), i, dtype=np.float32)
+            results.append(([bboxes], [[mask]]))
+        return results
+
+    def show_result(self, img, result, out_file=None, **kwargs):
+        mmcv.imwrite(img, out_file)
+
+
+@pytest.mark.parametrize('result_workers', [0, 2])
+def test_single_gpu_test(result_workers):
+    size = 7
+    data_loader = DataLoader(
+        ExampleImageDataset(size),
+        batch_size=1,
+        collate_fn=partial(collate, samples_per_gpu=1))
+    model = MMDataParallel(ExampleMaskModel())
+    with tempfile.TemporaryDirectory() as tmpdir:
+        results = single_gpu_test(
+            model, data_loader, out_dir=tmpdir, result_workers=result_workers)
+        assert len(results) == size
+        for i, (bbox_results, segm_results) in enumerate(results):
+            # results are in order and masks are encoded
+            assert bbox_results[0][0, 0] == i
+            assert mask_util.area(segm_results[0][0]) == (i + 1)**2
+            img = mmcv.imread(osp.join(tmpdir, f'{i}.png'))
+            assert img.shape == (8, 12, 3)
+            assert (img == i).all()
+
+
+def test_chunked_results():
+    size, chunk_size, world_size = 7, 2, 2
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for rank in range(world_size):
+            # the distributed sampler pads the samples of the last rank
+            inds = list(range(rank, size + 1, world_size))
+            with patch(
+                    'mmdet.apis.test.get_dist_info',
+                    return_value=(rank, world_size)):
+                writer = ChunkedResultWriter(tmpdir, chunk_size)
+            writer.extend(inds[:1])
+            writer.extend(inds[1:])
+            assert len(writer.buffer) == len(inds) % chunk_size
+            writer.flush()
+            assert writer.num_chunks == 2
+            assert osp.exists(osp.join(tmpdir, f'part_{rank}_1.pkl'))
+
+        results = ChunkedResults(tmpdir, size, chunk_size, world_size)
+        assert len(results) == size
+        assert list(results) == list(range(size))
+        assert results[-1] == size - 1
+        assert results[2:5] == [2, 3, 4]
+        with pytest.raises(IndexError):
+            results[size]
+        # only the last loaded chunk of each rank is kept
+        assert len(results._chunks) == world_size
+        # pickled as a plain list
+        assert pickle.loads(pickle.dumps(results)) == list(range(size))
+        results.close()
+        assert not osp.exists(tmpdir)
+
+
+def _run_multi_gpu_test(rank, world_size, tmpdir, size):
+    dist.init_process_group(
+        'gloo',
+        init_method=f'file://{osp.join(tmpdir, "init")}',
+        rank=rank,
+        world_size=world_size)
+    dataset = ExampleDataset(size)
+    data_loader = DataLoader(
+        dataset,
+        batch_size=2,
+        sampler=DistributedSampler(dataset, shuffle=False))
+    model = ExampleModel()
+    for kwargs in [
+            dict(),
+            dict(gpu_collect=True),
+            dict(tmpdir=osp.join(tmpdir, 'chunks'), chunk_size=2)
+    ]:
+        results = multi_gpu_test(model, data_loader, **kwargs)
+        if rank == 0:
+            assert len(results) == size
+            for i, result in enumerate(results):
+                assert (result[0] == i).all()
+            if isinstance(results, ChunkedResults):
+                results.close()
+        else:
+            assert results is None
+        dist.barrier()
+    dist.destroy_process_group()
+
+
+def test_multi_gpu_test_gloo():
+    world_size = 2
+    with tempfile.TemporaryDirectory() as tmpdir:
+        mp.spawn(
+            _run_multi_gpu_test,
+            args=(world_size, tmpdir, 7),
+            nprocs=world_size)
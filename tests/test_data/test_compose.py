@@ -0,0 +1,146 @@
+import copy
+import pickle
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from torch.utils.data import DataLoader, Dataset
+
+from mmdet.core.utils import PipelineProfileHook, get_pipeline_profilers
+from mmdet.datasets import RepeatDataset
+from mmdet.datasets.pipelines import Compose
+
+
+class AddImage(object):
+
+    def __call__(self, results):
+        results['img'] = np.zeros((10, 10, 3), dtype=np.float32)
+        return results
+
+
+class ScaleImage(object):
+
+    def __call__(self, results):
+        results['img'] *= 2
+        return results
+
+
+class CropImage(object):
+
+    def __call__(self, results):
+        results['img'] = results['img'][:5]
+        return results
+
+
+class DropSample(object):
+
+    def __call__(self, results):
+        if results['idx'] % 2:
+            return None
+        return results
+
+
+class ExampleDataset(Dataset):
+
+    CLASSES = None
+
+    def __init__(self, profile=False):
+        transforms = [
+            AddImage(),
+            ScaleImage(),
+            CropImage(),
+            DropSample(),
+            ScaleImage()
+        ]
+        self.pipeline = Compose(transforms, profile=profile)
+
+    def __getitem__(self, idx):
+        return self.pipeline(dict(idx=idx))
+
+    def __len__(self):
+        return 8
+
+
+def test_compose():
+    with pytest.raises(TypeError):
+        Compose([1])
+
+    dataset = ExampleDataset()
+    assert dataset.pipeline.profiler is None
+    assert dataset[0]['img'].shape == (5, 10, 3)
+    assert dataset[1] is None
+
+
+def collate_first(batch):
+    return batch[0]
+
+
+@pytest.mark.parametrize('num_workers,mp_context', [(0, None), (2, None),
+                                                    (2, 'spawn')])
+def test_compose_profile(num_workers, mp_context):
+    dataset = ExampleDataset(profile=True)
+    data_loader = DataLoader(
+        dataset,
+        batch_size=1,
+        num_workers=num_workers,
+        collate_fn=collate_first,
+        multiprocessing_context=mp_context)
+    results = list(data_loader)
+    assert results[0]['img'].shape == (5, 10, 3)
+    assert results[1] is None
+
+    # the stats of all workers are aggregated
+    profiler = dataset.pipeline.profiler
+    stats = profiler.stats
+    assert profiler.names == [
+        'AddImage', 'ScaleImage', 'CropImage', 'DropSample', 'ScaleImage'
+    ]
+    # the last transform is skipped for the dropped samples
+    assert stats[:, 0].tolist() == [8, 8, 8, 8, 4]
+    assert (stats[:, 1] >= stats[:, 2]).all()
+    # only the first transform allocates an array, the crop is a view
+    img_bytes = 10 * 10 * 3 * 4
+    assert stats[:, 3].tolist() == [8 * img_bytes, 0, 0, 0, 0]
+    assert stats[:, 4].tolist() == [8 * img_bytes] * 3 + [4 * img_bytes] * 2
+
+    table = profiler.summary(sort_by='time')
+    for name in profiler.names + ['total']:
+        assert name in table
+    profiler.reset()
+    assert not profiler.stats.any()
+
+
+def test_compose_profile_copy():
+    dataset = ExampleDataset(profile=True)
+    dataset[0]
+    # pickled and copied profilers get a copy of the stats
+    for copied in [
+            pickle.loads(pickle.dumps(dataset)),
+            copy.deepcopy(dataset)
+    ]:
+        profiler = copied.pipeline.profiler
+        assert np.array_equal(profiler.stats, dataset.pipeline.profiler.stats)
+        copied[0]
+        assert profiler.stats[0, 0] == 2
+        assert dataset.pipeline.profiler.stats[0, 0] == 1
+
+
+def test_pipeline_profile_hook():
+    dataset = RepeatDataset(ExampleDataset(profile=True), 2)
+    profilers = get_pipeline_profilers(dataset)
+    assert profilers == [dataset.dataset.pipeline.profiler]
+    assert get_pipeline_profilers(ExampleDataset()) == []
+    for i in range(len(dataset)):
+        dataset[i]
+
+    hook = PipelineProfileHook(interval=2, reset=True)
+    runner = MagicMock()
+    runner.data_loader = DataLoader(dataset)
+    runner.iter = 0
+    hook.after_train_iter(runner)
+    runner.logger.info.assert_not_called()
+    runner.iter = 1
+    hook.after_train_iter(runner)
+    runner.logger.info.assert_called_once()
+    assert 'AddImage' in runner.logger.info.call_args[0][0]
+    assert not profilers[0].stats.any()
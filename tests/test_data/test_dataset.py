@@ -14,6 +14,7 @@ import torch.nn as nn
 from mmcv.runner import EpochBasedRunner
 from torch.utils.data import DataLoader
 
+from mmdet.core import encode_mask_results
 from mmdet.core.evaluation import DistEvalHook, EvalHook
 from mmdet.datasets import (DATASETS, ClassBalancedDataset, CocoDataset,
                             ConcatDataset, CustomDataset, RepeatDataset,
@@ -491,3 +492,450 @@ def test_allow_empty_images(classes, expected_length):
     assert len(full_dataset.img_ids) == 3
     assert filtered_dataset.CLASSES == classes
     assert full_dataset.CLASSES == classes
+
+
+def _create_dummy_voc_data(root):
+    objects = [
+        [('bus', 0, (10, 10, 50, 60)), ('car', 1, (20, 30, 40, 50)),
+         ('dog', 0, (1, 1, 5, 5))],
+        [('dog', 0, (1.5, 2.5, 30, 40))],
+        [('car', 0, (0, 0, 3, 100)), ('car', 0, (5, 5, 90, 80))],
+    ]
+    mmcv.mkdir_or_exist(osp.join(root, 'Annotations'))
+    img_ids = []
+    for i, objs in enumerate(objects):
+        img_id = f'{i:06d}'
+        img_ids.append(img_id)
+        obj_xml = ''.join(
+            f'<object><name>{name}</name><difficult>{difficult}</difficult>'
+            f'<bndbox><xmin>{x1}</xmin><ymin>{y1}</ymin><xmax>{x2}</xmax>'
+            f'<ymax>{y2}</ymax></bndbox></object>'
+            for name, difficult, (x1, y1, x2, y2) in objs)
+        with open(osp.join(root, 'Annotations', f'{img_id}.xml'), 'w') as f:
+            f.write('<annotation><size><width>100</width><height>120'
+                    f'</height></size>{obj_xml}</annotation>')
+    ann_file = osp.join(root, 'test.txt')
+    with open(ann_file, 'w') as f:
+        f.write('\n'.join(img_ids))
+    return ann_file
+
+
+@pytest.mark.parametrize('min_size', [None, 10])
+def test_xml_dataset_ann_cache(min_size):
+    tmp_dir = tempfile.TemporaryDirectory()
+    ann_file = _create_dummy_voc_data(tmp_dir.name)
+    cache_dir = osp.join(tmp_dir.name, 'cache')
+    dataset_class = DATASETS.get('XMLDataset')
+    kwargs = dict(
+        ann_file=ann_file,
+        img_prefix=tmp_dir.name,
+        pipeline=[],
+        classes=('bus', 'car'),
+        min_size=min_size)
+
+    dataset = dataset_class(**kwargs)
+    # the first construction builds the cache and the second one loads it
+    cached_datasets = [
+        dataset_class(ann_cache_dir=cache_dir, **kwargs) for _ in range(2)
+    ]
+    assert len(list(mmcv.scandir(cache_dir, suffix='.npz'))) == 1
+    for cached_dataset in cached_datasets:
+        assert len(cached_dataset) == len(dataset) == 2
+        for i in range(len(dataset)):
+            for key in ['id', 'filename', 'width', 'height']:
+                assert dataset.data_infos[i][key] == \
+                    cached_dataset.data_infos[i][key]
+            ann = dataset.get_ann_info(i)
+            cached_ann = cached_dataset.get_ann_info(i)
+            for key in ann:
+                assert ann[key].dtype == cached_ann[key].dtype
+                assert ann[key].shape == cached_ann[key].shape
+                assert np.allclose(ann[key], cached_ann[key])
+            assert dataset.get_cat_ids(i) == cached_dataset.get_cat_ids(i)
+
+    # the cache is keyed by classes
+    dataset_class(
+        ann_cache_dir=cache_dir, **dict(kwargs, classes=('bus', 'car', 'dog')))
+    assert len(list(mmcv.scandir(cache_dir, suffix='.npz'))) == 2
+    tmp_dir.cleanup()
+
+
+def _create_dummy_coco_json_with_masks(json_name):
+    images = [
+        dict(id=i, width=64, height=48, file_name=f'fake_{i}.jpg')
+        for i in range(3)
+    ]
+    annotations = [
+        dict(
+            id=1,
+            image_id=0,
+            category_id=1,
+            area=100.5,
+            bbox=[1.5, 2.5, 10, 10],
+            iscrowd=0,
+            segmentation=[[1.5, 2.5, 11.5, 2.5, 11.5, 12.5],
+                          [3, 3, 4, 4, 3, 5, 2, 4]]),
+        dict(
+            id=2,
+            image_id=0,
+            category_id=2,
+            area=50,
+            bbox=[20, 20, 5, 10],
+            iscrowd=1,
+            segmentation=dict(size=[48, 64], counts=[960, 10, 38, 10, 2054])),
+        dict(
+            id=3,
+            image_id=2,
+            category_id=1,
+            area=30,
+            bbox=[5, 5, 6, 5],
+            iscrowd=0,
+            ignore=True,
+            segmentation=[[5, 5, 11, 5, 11, 10]]),
+        dict(
+            id=4,
+            image_id=2,
+            category_id=2,
+            area=40,
+            bbox=[30, 30, 8, 5],
+            iscrowd=0,
+            segmentation=dict(size=[48, 64], counts='n]15[10000000000000RV1')),
+    ]
+    categories = [
+        dict(id=1, name='car', supercategory='car'),
+        dict(id=2, name='bus', supercategory='bus')
+    ]
+    mmcv.dump(
+        dict(images=images, annotations=annotations, categories=categories),
+        json_name)
+
+
+@pytest.mark.parametrize('test_mode', [True, False])
+def test_coco_compact_ann(test_mode):
+    tmp_dir = tempfile.TemporaryDirectory()
+    ann_file = osp.join(tmp_dir.name, 'fake_data.json')
+    _create_dummy_coco_json_with_masks(ann_file)
+    kwargs = dict(
+        ann_file=ann_file,
+        pipeline=[],
+        classes=('car', 'bus'),
+        test_mode=test_mode)
+
+    dataset = CocoDataset(**kwargs)
+    compact_datasets = [
+        CocoDataset(compact_ann=True, **kwargs),
+        CocoDataset(compact_ann_dir=tmp_dir.name, **kwargs),
+        # load the arrays dumped by the previous one
+        CocoDataset(compact_ann_dir=tmp_dir.name, **kwargs)
+    ]
+    for compact_dataset in compact_datasets:
+        assert compact_dataset.compact_anns is not None
+        assert compact_dataset._coco is None
+        assert len(compact_dataset) == len(dataset)
+        for i in range(len(dataset)):
+            ann = dataset.get_ann_info(i)
+            compact_ann = compact_dataset.get_ann_info(i)
+            assert ann.keys() == compact_ann.keys()
+            for key in ['bboxes', 'labels', 'bboxes_ignore']:
+                assert ann[key].dtype == compact_ann[key].dtype
+                assert np.array_equal(ann[key], compact_ann[key])
+            assert ann['masks'] == compact_ann['masks']
+            assert ann['seg_map'] == compact_ann['seg_map']
+            assert dataset.get_cat_ids(i) == compact_dataset.get_cat_ids(i)
+            img_id = dataset.img_ids[i]
+            anns = dataset.coco.load_anns(
+                dataset.coco.get_ann_ids(img_ids=[img_id]))
+            compact_anns = compact_dataset.compact_anns.load_anns(img_id)
+            assert len(anns) == len(compact_anns)
+            for ann, compact_ann in zip(anns, compact_anns):
+                # bbox and area are rounded to float32
+                assert np.allclose(ann['bbox'], compact_ann['bbox'])
+                assert np.float32(ann['area']) == compact_ann['area']
+                assert ann.keys() == compact_ann.keys()
+                for key in ann.keys() - {'bbox', 'area'}:
+                    assert ann[key] == compact_ann[key]
+    assert isinstance(compact_datasets[1].compact_anns.bboxes, np.memmap)
+
+    # the COCO api is reloaded when needed
+    assert compact_datasets[0].coco.get_cat_ids() == [1, 2]
+    tmp_dir.cleanup()
+
+
+@pytest.mark.parametrize('filter_empty_gt', [True, False])
+def test_class_balanced_dataset(filter_empty_gt):
+    CustomDataset.load_annotations = MagicMock()
+    dataset = CustomDataset(
+        ann_file=MagicMock(),
+        pipeline=[],
+        classes=[f'class_{i}' for i in range(80)],
+        test_mode=True,
+        img_prefix='')
+    # some images have no annotations
+    cat_ids_list = [
+        np.random.randint(0, 80, num).tolist()
+        for num in np.random.randint(0, 20, 50)
+    ]
+    dataset.data_infos = MagicMock()
+    dataset.data_infos.__len__.return_value = len(cat_ids_list)
+    dataset.get_cat_ids = MagicMock(side_effect=lambda idx: cat_ids_list[idx])
+    dataset.flag = np.random.randint(0, 2, len(cat_ids_list)).astype(np.uint8)
+
+    # compute the repeat factors image by image
+    repeat_thr = 0.2
+    img_cat_ids = []
+    for cat_ids in cat_ids_list:
+        cat_ids = set(cat_ids)
+        if len(cat_ids) == 0 and not filter_empty_gt:
+            cat_ids = {len(dataset.CLASSES)}
+        img_cat_ids.append(cat_ids)
+    category_freq = defaultdict(int)
+    for cat_ids in img_cat_ids:
+        for cat_id in cat_ids:
+            category_freq[cat_id] += 1
+    category_repeat = {
+        cat_id: max(1.0, math.sqrt(repeat_thr / (freq / len(cat_ids_list))))
+        for cat_id, freq in category_freq.items()
+    }
+    repeat_times = [
+        math.ceil(max([category_repeat[cat_id] for cat_id in cat_ids] + [1]))
+        for cat_ids in img_cat_ids
+    ]
+
+    repeat_factor_dataset = ClassBalancedDataset(
+        dataset, repeat_thr, filter_empty_gt=filter_empty_gt)
+    expected_indices = np.repeat(np.arange(len(cat_ids_list)), repeat_times)
+    assert repeat_factor_dataset.repeat_indices == expected_indices.tolist()
+    assert np.array_equal(repeat_factor_dataset.flag,
+                          dataset.flag[expected_indices])
+    # the category index is built once
+    assert dataset.get_cat_ids.call_count == len(cat_ids_list)
+
+    concat_dataset = ConcatDataset([dataset, RepeatDataset(dataset, 2)])
+    offsets, cat_ids = concat_dataset.get_cat_index()
+    assert len(offsets) == 3 * len(cat_ids_list) + 1
+    for i in range(len(offsets) - 1):
+        assert cat_ids[offsets[i]:offsets[i + 1]].tolist() == \
+            cat_ids_list[i % len(cat_ids_list)]
+
+
+@pytest.mark.parametrize('compact_ann', [True, False])
+def test_class_balanced_dataset_cache(compact_ann):
+    tmp_dir = tempfile.TemporaryDirectory()
+    ann_file = osp.join(tmp_dir.name, 'fake_data.json')
+    _create_dummy_coco_json_with_masks(ann_file)
+    cache_dir = osp.join(tmp_dir.name, 'cache')
+    dataset = CocoDataset(
+        ann_file=ann_file,
+        pipeline=[],
+        classes=('car', 'bus'),
+        test_mode=True,
+        compact_ann=compact_ann)
+    offsets, cat_ids = dataset.get_cat_index()
+    for i in range(len(dataset)):
+        assert cat_ids[offsets[i]:offsets[i + 1]].tolist() == \
+            dataset.get_cat_ids(i)
+
+    repeat_factor_dataset = ClassBalancedDataset(
+        dataset, 1.0, filter_empty_gt=False)
+    # the first construction builds the cache and the second one loads it
+    cached_datasets = [
+        ClassBalancedDataset(
+            dataset, 1.0, filter_empty_gt=False, cache_dir=cache_dir)
+        for _ in range(2)
+    ]
+    assert len(list(mmcv.scandir(cache_dir, suffix='.npy'))) == 1
+    for cached_dataset in cached_datasets:
+        assert cached_dataset.repeat_indices == \
+            repeat_factor_dataset.repeat_indices
+
+    # the cache is keyed by oversample_thr
+    ClassBalancedDataset(dataset, 0.5, cache_dir=cache_dir)
+    assert len(list(mmcv.scandir(cache_dir, suffix='.npy'))) == 2
+    tmp_dir.cleanup()
+
+
+def test_coco_fast_eval_recall():
+    tmp_dir = tempfile.TemporaryDirectory()
+    ann_file = osp.join(tmp_dir.name, 'fake_data.json')
+    _create_dummy_coco_json_with_masks(ann_file)
+    kwargs = dict(
+        ann_file=ann_file, pipeline=[], classes=('car', 'bus'), test_mode=True)
+    # neither crowd nor ignored gts are counted
+    expected_gt_bboxes = [
+        np.array([[1.5, 2.5, 11.5, 12.5]]),
+        np.zeros((0, 4)),
+        np.array([[30, 30, 38, 35]])
+    ]
+    for dataset in [
+            CocoDataset(**kwargs),
+            CocoDataset(compact_ann=True, **kwargs)
+    ]:
+        gt_bboxes = dataset.get_recall_gt_bboxes()
+        assert len(gt_bboxes) == len(expected_gt_bboxes)
+        for bboxes, expected_bboxes in zip(gt_bboxes, expected_gt_bboxes):
+            assert bboxes.dtype == np.float32
+            assert np.array_equal(bboxes, expected_bboxes)
+        # the gt bboxes are cached
+        assert dataset.get_recall_gt_bboxes() is gt_bboxes
+
+        proposals = [
+            np.array([[0, 0, 5, 5, 0.9], [1.5, 2.5, 11.5, 12.5, 0.5]]),
+            np.zeros((0, 5)),
+            np.array([[30, 30, 38, 36, 0.8]])
+        ]
+        ar = dataset.fast_eval_recall(
+            proposals, (1, 2), np.array([0.5, 0.9]), logger='silent')
+        assert np.allclose(ar, [0.25, 0.75])
+    tmp_dir.cleanup()
+
+
+def _create_dummy_results_with_masks(dataset, h, w, mixed_sizes=False):
+    """Dets around the gts, with small rectangular masks, or masks of
+    rectangles and L shapes of both small and medium areas if
+    ``mixed_sizes``."""
+    rng = np.random.RandomState(0)
+    results = []
+    for i in range(len(dataset)):
+        ann = dataset.get_ann_info(i)
+        gt_bboxes = np.vstack([ann['bboxes'], ann['bboxes_ignore']])
+        gt_labels = np.concatenate(
+            [ann['labels'], -np.ones(len(ann['bboxes_ignore']))])
+        bbox_results, mask_results = [], []
+        for label in range(len(dataset.CLASSES)):
+            num_dets = rng.randint(0, 5)
+            x1y1 = rng.uniform(0, 30, size=(num_dets, 2))
+            wh = rng.uniform(3, 40 if mixed_sizes else 15, size=(num_dets, 2))
+            bboxes = np.hstack([x1y1, x1y1 + wh])
+            # jittered gts so that some of the dets are matched
+            bboxes = np.vstack([
+                bboxes, gt_bboxes[gt_labels == label] +
+                rng.uniform(-1, 1, size=((gt_labels == label).sum(), 4))
+            ])
+            scores = rng.uniform(size=(len(bboxes), 1))
+            bbox_results.append(np.hstack([bboxes, scores]).astype(np.float32))
+            masks = []
+            for j, (x1, y1, x2, y2) in enumerate(np.round(bboxes)):
+                mask = np.zeros((h, w), dtype=bool)
+                x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+                if mixed_sizes and j % 2 == 1:
+                    # L shaped masks whose areas are far below the bboxes'
+                    mask[y1:y2, x1:x1 + max((x2 - x1) // 4, 1)] = True
+                    mask[y2 - max((y2 - y1) // 4, 1):y2, x1:x2] = True
+                else:
+                    mask[y1:y2, x1:x2] = True
+                masks.append(mask)
+            mask_results.append(masks)
+        results.append((bbox_results, encode_mask_results(mask_results)))
+    return results
+
+
+@pytest.mark.parametrize('num_ranks', [1, 2])
+def test_coco_incremental_evaluation(num_ranks):
+    tmp_dir = tempfile.TemporaryDirectory()
+    ann_file = osp.join(tmp_dir.name, 'fake_data.json')
+    _create_dummy_coco_json_with_masks(ann_file)
+    # medium gts, a rectangle and an L shape of a small area
+    data = mmcv.load(ann_file)
+    data['annotations'] += [
+        dict(
+            id=5,
+            image_id=1,
+            category_id=1,
+            area=1200,
+            bbox=[10, 10, 40, 30],
+            iscrowd=0,
+            segmentation=[[10, 10, 50, 10, 50, 40, 10, 40]]),
+        dict(
+            id=6,
+            image_id=1,
+            category_id=2,
+            area=816,
+            bbox=[5, 5, 40, 40],
+            iscrowd=0,
+            segmentation=[[5, 5, 17, 5, 17, 33, 45, 33, 45, 45, 5, 45]])
+    ]
+    mmcv.dump(data, ann_file)
+    dataset = CocoDataset(
+        ann_file=ann_file, pipeline=[], classes=('car', 'bus'), test_mode=True)
+    results = _create_dummy_results_with_masks(
+        dataset, 48, 64, mixed_sizes=True)
+    # an unmatched det of a medium bbox but a small mask over a matched one,
+    # the dets are counted in the area ranges by their bboxes
+    masks = np.zeros((2, 48, 64), dtype=bool)
+    masks[0, 0:40, 20:24] = True
+    masks[0, 36:40, 20:60] = True
+    masks[1, 10:40, 10:50] = True
+    bbox_results, mask_results = results[1]
+    bbox_results[0] = np.array([[20, 0, 60, 40, 0.9], [10, 10, 50, 40, 0.5]],
+                               dtype=np.float32)
+    mask_results[0] = encode_mask_results([list(masks)])[0]
+    eval_kwargs = dict(metric=['bbox', 'segm'], classwise=True)
+    expected = dataset.evaluate(results, **eval_kwargs)
+
+    # results are split to ranks as the DistributedSampler does, with the
+    # last sample of the first rank duplicated as padding
+    evaluators = [
+        dataset.incremental_evaluator(**eval_kwargs) for _ in range(num_ranks)
+    ]
+    for rank, evaluator in enumerate(evaluators):
+        indices = list(range(rank, len(dataset), num_ranks))
+        indices += [indices[-1]]
+        # feed results batch by batch
+        for i in range(0, len(indices), 2):
+            evaluator.process([results[idx] for idx in indices[i:i + 2]],
+                              indices[i:i + 2])
+    evaluators[0].merge_states(
+        [evaluator.get_state() for evaluator in evaluators[1:]])
+    eval_results = evaluators[0].evaluate()
+    assert eval_results == expected
+
+    with pytest.raises(KeyError):
+        dataset.incremental_evaluator(metric='proposal')
+
+
+def test_coco_results2json():
+    tmp_dir = tempfile.TemporaryDirectory()
+    ann_file = osp.join(tmp_dir.name, 'fake_data.json')
+    _create_dummy_coco_json_with_masks(ann_file)
+    dataset = CocoDataset(
+        ann_file=ann_file, pipeline=[], classes=('car', 'bus'), test_mode=True)
+    results = _create_dummy_results_with_masks(dataset, 48, 64)
+    # the same json as converting the results box by box
+    bbox_json, segm_json = [], []
+    for img_id, (det, seg) in zip(dataset.img_ids, results):
+        for label, bboxes in enumerate(det):
+            for bbox, segm in zip(bboxes, seg[label]):
+                data = dict(
+                    image_id=img_id,
+                    bbox=dataset.xyxy2xywh(bbox),
+                    score=float(bbox[4]),
+                    category_id=dataset.cat_ids[label])
+                bbox_json.append(data)
+                segm_json.append(
+                    dict(data, segmentation=dict(segm, counts=segm['counts'])))
+    for data in segm_json:
+        data['segmentation']['counts'] = data['segmentation']['counts'].decode(
+        )
+
+    result_files = dataset.results2json(results,
+                                        osp.join(tmp_dir.name, 'results'))
+    assert result_files['proposal'] == result_files['bbox']
+    for metric, expected in [('bbox', bbox_json), ('segm', segm_json)]:
+        expected_file = osp.join(tmp_dir.name, f'expected.{metric}.json')
+        mmcv.dump(expected, expected_file)
+        with open(result_files[metric]) as f1, open(expected_file) as f2:
+            assert f1.read() == f2.read()
+
+    proposals = [det[0] for det, _ in results]
+    result_files = dataset.results2json(proposals,
+                                        osp.join(tmp_dir.name, 'results'))
+    assert mmcv.load(result_files['proposal']) == [
+        dict(
+            image_id=img_id,
+            bbox=dataset.xyxy2xywh(bbox),
+            score=float(bbox[4]),
+            category_id=1)
+        for img_id, bboxes in zip(dataset.img_ids, proposals)
+        for bbox in bboxes
+    ]
+    assert dataset._det2json([[np.zeros((0, 5))] * 2] * 3) == []
@@ -0,0 +1,106 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from mmdet.datasets.samplers import (DistributedGroupSampler, GroupSampler,
+                                     InfiniteGroupSampler)
+
+
+class ExampleDataset(object):
+
+    def __init__(self, flag):
+        self.flag = np.array(flag, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.flag)
+
+
+def _check_batches(indices, flag, samples_per_gpu):
+    assert all(isinstance(idx, int) for idx in indices)
+    batches = np.array(indices).reshape(-1, samples_per_gpu)
+    # all samples of a batch are from the same group
+    assert (flag[batches] == flag[batches[:, :1]]).all()
+
+
+@pytest.mark.parametrize('samples_per_gpu', [1, 2, 3])
+def test_group_sampler(samples_per_gpu):
+    flag = np.array([0, 1, 1, 0, 1, 1, 1, 0, 0, 1, 1])
+    sampler = GroupSampler(ExampleDataset(flag), samples_per_gpu)
+    np.random.seed(0)
+    indices = list(sampler)
+    assert len(indices) == len(sampler)
+    _check_batches(indices, flag, samples_per_gpu)
+    # every sample is drawn
+    assert set(indices) == set(range(len(flag)))
+
+    # resume from the 2nd batch of the same epoch
+    np.random.seed(0)
+    sampler.set_start_iter(2)
+    assert list(sampler) == indices[2 * samples_per_gpu:]
+    # the offset only applies to one epoch
+    np.random.seed(0)
+    assert list(sampler) == indices
+
+
+@pytest.mark.parametrize('samples_per_gpu', [1, 2, 3])
+def test_distributed_group_sampler(samples_per_gpu):
+    flag = np.array([0, 1, 1, 0, 1, 1, 1, 0, 0, 1, 1])
+    num_replicas = 2
+    samplers = [
+        DistributedGroupSampler(
+            ExampleDataset(flag),
+            samples_per_gpu,
+            num_replicas=num_replicas,
+            rank=rank) for rank in range(num_replicas)
+    ]
+    all_indices = []
+    for sampler in samplers:
+        sampler.set_epoch(1)
+        indices = list(sampler)
+        assert len(indices) == len(sampler)
+        _check_batches(indices, flag, samples_per_gpu)
+        all_indices.extend(indices)
+        # the same epoch gives the same indices
+        assert list(sampler) == indices
+
+        sampler.set_start_iter(1)
+        assert list(sampler) == indices[samples_per_gpu:]
+    assert set(all_indices) == set(range(len(flag)))
+
+    samplers[0].set_epoch(2)
+    assert list(samplers[0]) != all_indices[:len(samplers[0])]
+
+
+@pytest.mark.parametrize('num_replicas', [1, 2])
+def test_infinite_group_sampler(num_replicas):
+    flag = np.array([0, 1, 1, 0, 1, 1, 1, 0, 0, 1, 1])
+    samples_per_gpu = 2
+    sampler = InfiniteGroupSampler(
+        ExampleDataset(flag),
+        samples_per_gpu,
+        num_replicas=num_replicas,
+        rank=num_replicas - 1,
+        seed=3)
+    epoch_sampler = DistributedGroupSampler(
+        ExampleDataset(flag),
+        samples_per_gpu,
+        num_replicas=num_replicas,
+        rank=num_replicas - 1)
+    expected = []
+    for epoch in range(3, 6):
+        epoch_sampler.set_epoch(epoch)
+        expected.extend(epoch_sampler)
+
+    # the epochs are chained in a single iterator
+    indices = list(itertools.islice(sampler, len(expected)))
+    assert indices == expected
+    _check_batches(indices, flag, samples_per_gpu)
+
+    # resume from an iteration in the 2nd epoch
+    start_iter = sampler.num_batches + 1
+    sampler.set_start_iter(start_iter)
+    indices = list(
+        itertools.islice(sampler,
+                         len(expected) - start_iter * samples_per_gpu))
+    assert indices == expected[start_iter * samples_per_gpu:]
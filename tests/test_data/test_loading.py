@@ -4,8 +4,10 @@ import os.path as osp
 import mmcv
 import numpy as np
 
-from mmdet.datasets.pipelines import (LoadImageFromFile, LoadImageFromWebcam,
-                                      LoadMultiChannelImageFromFiles)
+from mmdet.core import BitmapMasks
+from mmdet.datasets.pipelines import (Compose, LoadImageFromFile,
+                                      LoadImageFromWebcam,
+                                      LoadMultiChannelImageFromFiles, Resize)
 
 
 class TestLoading(object):
@@ -27,7 +29,7 @@ class TestLoading(object):
         assert results['ori_shape'] == (288, 512, 3)
         assert repr(transform) == transform.__class__.__name__ + \
             "(to_float32=False, color_type='color', " + \
-            "file_client_args={'backend': 'disk'})"
+            "file_client_args={'backend': 'disk'}, target_scale=None)"
 
         # no img_prefix
         results = dict(
@@ -56,6 +58,64 @@ class TestLoading(object):
         assert results['img'].shape == (288, 512)
         assert results['img'].dtype == np.uint8
 
+    def test_load_img_reduced(self):
+        results = dict(
+            img_prefix=self.data_prefix, img_info=dict(filename='color.jpg'))
+        bboxes = np.array([[10, 20, 300, 280]], dtype=np.float32)
+        masks = BitmapMasks(
+            np.ones((1, 288, 512), dtype=np.uint8), height=288, width=512)
+        resize = Resize(img_scale=(100, 60), keep_ratio=True)
+
+        def load_and_resize(transform):
+            data = transform(copy.deepcopy(results))
+            data['gt_bboxes'] = bboxes.copy()
+            data['bbox_fields'] = ['gt_bboxes']
+            data['gt_masks'] = masks
+            data['mask_fields'] = ['gt_masks']
+            return data, resize(copy.deepcopy(data))
+
+        # 1/4 is the largest reduction not smaller than the target scale
+        transform = LoadImageFromFile(target_scale=(100, 60))
+        loaded, resized = load_and_resize(transform)
+        assert loaded['img'].shape == (72, 128, 3)
+        assert loaded['ori_shape'] == (288, 512, 3)
+        assert np.allclose(loaded['decode_scale_factor'], 0.25)
+
+        # same boxes and shapes as resizing the full resolution image
+        full_loaded, full_resized = load_and_resize(LoadImageFromFile())
+        assert 'decode_scale_factor' not in full_loaded
+        assert 'decode_scale_factor' not in resized
+        assert resized['img_shape'] == full_resized['img_shape']
+        assert resized['gt_masks'].masks.shape[1:] == \
+            resized['img_shape'][:2]
+        assert np.allclose(resized['scale_factor'],
+                           full_resized['scale_factor'])
+        assert np.allclose(resized['gt_bboxes'], full_resized['gt_bboxes'])
+
+        # a target not covered by half of the image is decoded in full
+        transform = LoadImageFromFile(target_scale=(300, 150))
+        loaded = transform(copy.deepcopy(results))
+        assert loaded['img'].shape == (288, 512, 3)
+        assert 'decode_scale_factor' not in loaded
+
+        # the target scale is resolved from the following resize
+        pipeline = Compose([
+            dict(type='LoadImageFromFile', target_scale='auto'),
+            dict(type='LoadAnnotations', with_bbox=True),
+            dict(
+                type='Resize',
+                img_scale=[(100, 40), (80, 60)],
+                multiscale_mode='value',
+                keep_ratio=True)
+        ])
+        assert pipeline.transforms[0].target_scale == (100, 60)
+        pipeline = Compose([
+            dict(type='LoadImageFromFile', target_scale='auto'),
+            dict(type='RandomFlip', flip_ratio=0.5),
+            dict(type='Resize', img_scale=(100, 60), keep_ratio=True)
+        ])
+        assert pipeline.transforms[0].target_scale is None
+
     def test_load_multi_channel_img(self):
         results = dict(
             img_prefix=self.data_prefix,
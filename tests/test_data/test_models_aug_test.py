@@ -1,6 +1,8 @@
 import os.path as osp
 
 import mmcv
+import numpy as np
+import pytest
 import torch
 from mmcv.parallel import collate
 from mmcv.utils import build_from_cfg
@@ -9,9 +11,11 @@ from mmdet.datasets.builder import PIPELINES
 from mmdet.models import build_detector
 
 
-def model_aug_test_template(cfg_file):
+def model_aug_test_template(cfg_file, cfg_options=None):
     # get config
     cfg = mmcv.Config.fromfile(cfg_file)
+    if cfg_options is not None:
+        cfg.merge_from_dict(cfg_options)
     # init model
     cfg.model.pretrained = None
     cfg.model.train_cfg = None
@@ -71,6 +75,12 @@ def test_cascade_rcnn_aug_test():
         'configs/cascade_rcnn/cascade_rcnn_r50_fpn_1x_coco.py')
     assert len(aug_result[0]) == 80
 
+    # the cascade RoI head does not support batched test-time augmentation
+    with pytest.raises(AssertionError):
+        model_aug_test_template(
+            'configs/cascade_rcnn/cascade_rcnn_r50_fpn_1x_coco.py',
+            {'model.test_cfg.batched_aug_test': True})
+
 
 def test_mask_rcnn_aug_test():
     aug_result = model_aug_test_template(
@@ -80,6 +90,55 @@ def test_mask_rcnn_aug_test():
     assert len(aug_result[0][1]) == 80
 
 
+def test_mask_rcnn_batched_aug_test():
+    cfg_file = 'configs/mask_rcnn/mask_rcnn_r50_fpn_1x_coco.py'
+    # keep all the detections of the random weights
+    cfg_options = {'model.test_cfg.rcnn.score_thr': 0.}
+    torch.manual_seed(0)
+    aug_result = model_aug_test_template(cfg_file, cfg_options)
+    cfg_options['model.test_cfg.batched_aug_test'] = True
+    torch.manual_seed(0)
+    batched_aug_result = model_aug_test_template(cfg_file, cfg_options)
+    assert len(batched_aug_result[0]) == 2
+    assert len(batched_aug_result[0][0]) == 80
+    assert len(batched_aug_result[0][1]) == 80
+
+    # the scores of the random weights are close to each other, so that
+    # the rounding errors of the batched forward may swap the detections
+    scores = np.concatenate([bboxes[:, 4] for bboxes in aug_result[0][0]])
+    batched_scores = np.concatenate(
+        [bboxes[:, 4] for bboxes in batched_aug_result[0][0]])
+    assert len(scores) > 0
+    assert np.allclose(np.sort(scores), np.sort(batched_scores), atol=1e-5)
+
+
+def test_retinanet_batched_aug_test():
+    cfg_file = 'configs/retinanet/retinanet_r50_fpn_1x_coco.py'
+    aug_result = model_aug_test_template(
+        cfg_file, {'model.test_cfg.batched_aug_test': True})
+    assert len(aug_result[0]) == 80
+
+
+def test_extract_grouped_feats():
+    cfg = mmcv.Config.fromfile(
+        'configs/retinanet/retinanet_r50_fpn_1x_coco.py')
+    cfg.model.pretrained = None
+    cfg.model.train_cfg = None
+    model = build_detector(cfg.model)
+    model.eval()
+
+    imgs = [torch.rand(1, 3, 64, 96), torch.rand(1, 3, 96, 64)]
+    imgs.insert(1, imgs[0].flip(3))
+    with torch.no_grad():
+        feats = model.extract_feats(imgs)
+        grouped_feats, aug_groups = model.extract_grouped_feats(imgs)
+    assert aug_groups == [[0, 1], [2]]
+    for x, aug_group in zip(grouped_feats, aug_groups):
+        for k, j in enumerate(aug_group):
+            for level_x, level_feat in zip(x, feats[j]):
+                assert torch.allclose(level_x[k:k + 1], level_feat, atol=1e-5)
+
+
 def test_htc_aug_test():
     aug_result = model_aug_test_template('configs/htc/htc_r50_fpn_1x_coco.py')
     assert len(aug_result[0]) == 2
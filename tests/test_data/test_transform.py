@@ -422,6 +422,39 @@ def test_normalize():
     assert np.allclose(results['img'], converted_img)
 
 
+def test_photo_metric_distortion_normalize():
+    img_norm_cfg = dict(
+        mean=[123.675, 116.28, 103.53],
+        std=[58.395, 57.12, 57.375],
+        to_rgb=True)
+    transform = dict(type='PhotoMetricDistortionNormalize', **img_norm_cfg)
+    transform = build_from_cfg(transform, PIPELINES)
+    distortion = build_from_cfg(dict(type='PhotoMetricDistortion'), PIPELINES)
+    normalize = build_from_cfg(
+        dict(type='Normalize', **img_norm_cfg), PIPELINES)
+    img = mmcv.imread(
+        osp.join(osp.dirname(__file__), '../data/color.jpg'), 'color')
+    # the HSV conversions of PhotoMetricDistortion are lossy for the pixels
+    # darkened below 0
+    img = np.clip(img, 40, 255)
+
+    with pytest.raises(AssertionError):
+        # the input image must be uint8
+        transform(dict(img=img.astype(np.float32)))
+
+    for seed in range(20):
+        np.random.seed(seed)
+        results = transform(dict(img=img.copy(), img_fields=['img']))
+        np.random.seed(seed)
+        expected = normalize(
+            distortion(dict(img=img.astype(np.float32), img_fields=['img'])))
+        assert results['img'].dtype == np.float32
+        assert np.allclose(results['img'], expected['img'], atol=1e-3)
+        for key in ['mean', 'std', 'to_rgb']:
+            assert np.all(
+                results['img_norm_cfg'][key] == expected['img_norm_cfg'][key])
+
+
 def test_albu_transform():
     results = dict(
         img_prefix=osp.join(osp.dirname(__file__), '../data'),
@@ -686,6 +719,74 @@ def test_multi_scale_flip_aug():
     ]
 
 
+def test_multi_scale_flip_aug_share_preprocess():
+    img_norm_cfg = dict(
+        mean=[123.675, 116.28, 103.53],
+        std=[58.395, 57.12, 57.375],
+        to_rgb=True)
+    transform = dict(
+        type='MultiScaleFlipAug',
+        img_scale=[(1333, 800), (1000, 600), (666, 400)],
+        flip=True,
+        flip_direction=['horizontal', 'vertical'],
+        transforms=[
+            dict(type='Resize', keep_ratio=True),
+            dict(type='RandomFlip'),
+            dict(type='Normalize', **img_norm_cfg),
+            dict(type='Pad', size_divisor=32),
+            dict(type='ImageToTensor', keys=['img']),
+            dict(type='Collect', keys=['img']),
+        ])
+    separate = build_from_cfg(transform, PIPELINES)
+    shared = build_from_cfg(dict(transform, share_preprocess=True), PIPELINES)
+    # Resize and Normalize are run once for each scale
+    assert [type(t).__name__ for t in shared.shared_transforms.transforms
+            ] == ['Resize', 'Normalize']
+    assert [type(t).__name__ for t in shared.flip_transforms.transforms] == [
+        'RandomFlip', '_ContiguousImages', 'Pad', 'ImageToTensor', 'Collect'
+    ]
+
+    img = mmcv.imread(
+        osp.join(osp.dirname(__file__), '../data/color.jpg'), 'color')
+    results = dict(
+        img=img,
+        img_shape=img.shape,
+        ori_shape=img.shape,
+        pad_shape=img.shape,
+        img_fields=['img'],
+        filename=None,
+        ori_filename=None)
+    expected = separate(copy.deepcopy(results))
+    shared_results = shared(copy.deepcopy(results))
+    assert len(shared_results['img']) == 9
+    for img, expected_img in zip(shared_results['img'], expected['img']):
+        assert torch.equal(img, expected_img)
+    for img_meta, expected_meta in zip(shared_results['img_metas'],
+                                       expected['img_metas']):
+        img_meta, expected_meta = img_meta.data, expected_meta.data
+        assert img_meta.keys() == expected_meta.keys()
+        for key, value in img_meta.items():
+            if isinstance(value, (np.ndarray, dict)):
+                assert str(value) == str(expected_meta[key])
+            else:
+                assert value == expected_meta[key]
+
+    # the flipped images are contiguous without a copying transform after
+    # the flip, as in the multi-scale test of CornerNet
+    transform['transforms'].pop(3)
+    separate = build_from_cfg(transform, PIPELINES)
+    shared = build_from_cfg(dict(transform, share_preprocess=True), PIPELINES)
+    expected = separate(copy.deepcopy(results))
+    shared_results = shared(copy.deepcopy(results))
+    for img, expected_img in zip(shared_results['img'], expected['img']):
+        assert torch.equal(img, expected_img)
+
+    # no effect without RandomFlip
+    transform['transforms'].pop(1)
+    shared = build_from_cfg(dict(transform, share_preprocess=True), PIPELINES)
+    assert shared.shared_transforms is None
+
+
 def test_cutout():
     # test n_holes
     with pytest.raises(AssertionError):
@@ -7,7 +7,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 import torch
 import torch.nn as nn
-from mmcv.runner import EpochBasedRunner, build_optimizer
+from mmcv.runner import EpochBasedRunner, IterBasedRunner, build_optimizer
 from mmcv.utils import get_logger
 from torch.utils.data import DataLoader, Dataset
 
@@ -261,3 +261,38 @@ def test_eval_hook(EvalHookCls):
         assert runner.meta['hook_msgs']['best_ckpt'] == osp.realpath(real_path)
         assert osp.exists(link_path)
         assert runner.meta['hook_msgs']['best_score'] == 0.7
+
+
+@patch('mmdet.apis.single_gpu_test', MagicMock)
+@patch('mmdet.apis.multi_gpu_test', MagicMock)
+@pytest.mark.parametrize('EvalHookCls', (EvalHook, DistEvalHook))
+def test_eval_hook_by_iter(EvalHookCls):
+    optimizer_cfg = dict(
+        type='SGD', lr=0.01, momentum=0.9, weight_decay=0.0001)
+    loader = DataLoader(EvalDataset(), batch_size=1)
+    model = ExampleModel()
+    optimizer = build_optimizer(model, optimizer_cfg)
+    data_loader = DataLoader(EvalDataset(), batch_size=1)
+    eval_hook = EvalHookCls(
+        data_loader, interval=2, by_epoch=False, save_best='auto')
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        logger = get_logger('test_eval')
+        runner = IterBasedRunner(
+            model=model,
+            optimizer=optimizer,
+            work_dir=tmpdir,
+            logger=logger,
+            max_iters=16)
+        runner.register_checkpoint_hook(dict(interval=2, by_epoch=False))
+        runner.register_hook(eval_hook)
+        runner.run([loader], [('train', 1)])
+
+        # evaluated at iterations 2, 4, ..., 16 with the results of
+        # EvalDataset in turn
+        assert data_loader.dataset.index == 8
+        real_path = osp.join(tmpdir, 'iter_8.pth')
+        link_path = osp.join(tmpdir, 'best_mAP.pth')
+        assert runner.meta['hook_msgs']['best_ckpt'] == osp.realpath(real_path)
+        assert osp.exists(link_path)
+        assert runner.meta['hook_msgs']['best_score'] == 0.7
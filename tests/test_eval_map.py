@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from mmdet.core.evaluation.mean_ap import (eval_map, tpfp_default,
+                                           tpfp_vectorized)
+
+
+def _random_bboxes(rng, num, scale=100):
+    xy = rng.uniform(0, scale, (num, 2))
+    wh = rng.uniform(2, scale / 2, (num, 2))
+    return np.hstack([xy, xy + wh]).astype(np.float32)
+
+
+def _dummy_results(num_imgs=20, num_classes=3, seed=0):
+    rng = np.random.RandomState(seed)
+    det_results, annotations = [], []
+    for i in range(num_imgs):
+        num_gts = rng.randint(0, 6)
+        gt_bboxes = _random_bboxes(rng, num_gts)
+        gt_labels = rng.randint(0, num_classes, num_gts)
+        ann = dict(bboxes=gt_bboxes, labels=gt_labels)
+        if i % 2 == 0:
+            ann['bboxes_ignore'] = _random_bboxes(rng, 2)
+            ann['labels_ignore'] = rng.randint(0, num_classes, 2)
+        annotations.append(ann)
+        img_dets = []
+        for c in range(num_classes):
+            num_dets = rng.randint(0, 8)
+            dets = _random_bboxes(rng, num_dets)
+            cls_gts = gt_bboxes[gt_labels == c]
+            if len(cls_gts) > 0:
+                # make some of the dets hit gts of this class
+                inds = rng.randint(0, len(cls_gts), num_dets // 2)
+                dets[:len(inds)] = cls_gts[inds] + rng.normal(
+                    0, 2, (len(inds), 4))
+            scores = rng.rand(num_dets, 1)
+            img_dets.append(np.hstack([dets, scores]).astype(np.float32))
+        det_results.append(img_dets)
+    return det_results, annotations
+
+
+def test_tpfp_vectorized():
+    rng = np.random.RandomState(0)
+    gt_bboxes = _random_bboxes(rng, 5)
+    gt_bboxes_ignore = _random_bboxes(rng, 2)
+    det_bboxes = np.vstack([gt_bboxes + 1, _random_bboxes(rng, 5)])
+    det_bboxes = np.hstack([det_bboxes, rng.rand(10, 1)]).astype(np.float32)
+    area_ranges = [(0, 32**2), (32**2, 1e10)]
+
+    tp, fp = tpfp_default(
+        det_bboxes, gt_bboxes, gt_bboxes_ignore, area_ranges=area_ranges)
+    all_gts = np.vstack([gt_bboxes, gt_bboxes_ignore])
+    gt_ignore_inds = np.array([False] * 5 + [True] * 2)
+    vec_tp, vec_fp = tpfp_vectorized(
+        det_bboxes,
+        np.zeros(10, dtype=np.int64),
+        all_gts,
+        np.zeros(7, dtype=np.int64),
+        gt_ignore_inds,
+        area_ranges=area_ranges)
+    assert np.array_equal(tp, vec_tp)
+    assert np.array_equal(fp, vec_fp)
+
+    # dets of an image without gts are all false positives
+    vec_tp, vec_fp = tpfp_vectorized(det_bboxes, np.ones(10), all_gts,
+                                     np.zeros(7), gt_ignore_inds)
+    assert vec_tp.sum() == 0 and vec_fp.sum() == 10
+
+    # no gts at all
+    vec_tp, vec_fp = tpfp_vectorized(det_bboxes, np.zeros(10), np.zeros(
+        (0, 4)), np.zeros(0))
+    assert vec_tp.sum() == 0 and vec_fp.sum() == 10
+
+
+@pytest.mark.parametrize('scale_ranges', [None, [(0, 32), (32, 1e5)]])
+@pytest.mark.parametrize('iou_thr', [0.3, 0.5, 0.75])
+def test_eval_map_vectorized(scale_ranges, iou_thr):
+    det_results, annotations = _dummy_results()
+    mean_ap, results = eval_map(
+        det_results,
+        annotations,
+        scale_ranges=scale_ranges,
+        iou_thr=iou_thr,
+        logger='silent',
+        nproc=2)
+    vec_mean_ap, vec_results = eval_map(
+        det_results,
+        annotations,
+        scale_ranges=scale_ranges,
+        iou_thr=iou_thr,
+        logger='silent',
+        vectorized=True)
+    assert np.allclose(mean_ap, vec_mean_ap)
+    for res, vec_res in zip(results, vec_results):
+        assert np.array_equal(res['num_gts'], vec_res['num_gts'])
+        assert res['num_dets'] == vec_res['num_dets']
+        assert np.allclose(res['recall'], vec_res['recall'])
+        assert np.allclose(res['precision'], vec_res['precision'])
+        assert np.allclose(res['ap'], vec_res['ap'])
+
+    # other tpfp functions are evaluated image by image in process
+    mean_ap, _ = eval_map(
+        det_results, annotations, dataset='det', logger='silent', nproc=2)
+    vec_mean_ap, _ = eval_map(
+        det_results,
+        annotations,
+        dataset='det',
+        logger='silent',
+        vectorized=True)
+    assert np.allclose(mean_ap, vec_mean_ap)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from mmdet.core.evaluation import eval_recalls
+from mmdet.core.evaluation.bbox_overlaps import bbox_overlaps
+
+
+def _greedy_recalls(gts, proposals, proposal_nums, iou_thrs):
+    """Match the gts with the proposals of each image one pair at a time."""
+    matched_ious = [[] for _ in proposal_nums]
+    for img_gts, img_proposals in zip(gts, proposals):
+        sort_inds = np.argsort(img_proposals[:, 4])[::-1]
+        all_ious = bbox_overlaps(img_gts, img_proposals[sort_inds, :4])
+        for k, proposal_num in enumerate(proposal_nums):
+            ious = all_ious[:, :proposal_num].copy()
+            if ious.size == 0:
+                matched_ious[k].extend([0] * len(img_gts))
+                continue
+            for _ in range(len(img_gts)):
+                gt_idx, prop_idx = np.unravel_index(ious.argmax(), ious.shape)
+                matched_ious[k].append(ious[gt_idx, prop_idx])
+                ious[gt_idx, :] = -1
+                ious[:, prop_idx] = -1
+    matched_ious = np.array(matched_ious)
+    return (matched_ious[:, None] >= iou_thrs[:, None]).mean(axis=2)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_eval_recalls(seed):
+    rng = np.random.RandomState(seed)
+    gts, proposals = [], []
+    for _ in range(20):
+        num_gts = rng.randint(0, 10)
+        num_proposals = rng.randint(0, 40)
+        # boxes on a coarse grid have many tied ious
+        gts.append(rng.randint(0, 10, (num_gts, 4)).cumsum(axis=1) * 10.)
+        bboxes = rng.randint(0, 10, (num_proposals, 4)).cumsum(axis=1) * 10.
+        scores = rng.rand(num_proposals, 1)
+        proposals.append(np.hstack([bboxes, scores]))
+    proposal_nums = np.array([1, 5, 20, 100])
+    iou_thrs = np.array([0, 0.3, 0.5, 0.7, 0.9, 1])
+    recalls = eval_recalls(
+        gts, proposals, proposal_nums, iou_thrs, logger='silent')
+    assert recalls.shape == (len(proposal_nums), len(iou_thrs))
+    assert np.allclose(
+        recalls, _greedy_recalls(gts, proposals, proposal_nums, iou_thrs))
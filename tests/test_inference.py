@@ -0,0 +1,147 @@
+import asyncio
+import gc
+import os.path as osp
+import weakref
+
+import mmcv
+import numpy as np
+import pytest
+
+from mmdet.apis import (BatchInferenceServer, InferenceSession,
+                        async_inference_detector, inference_detector,
+                        init_detector)
+
+
+@pytest.fixture(scope='module')
+def model():
+    config_file = osp.join(
+        osp.dirname(__file__), '../configs/ssd/ssd300_coco.py')
+    return init_detector(config_file, device='cpu')
+
+
+def test_inference_session(model):
+    img_file = osp.join(osp.dirname(__file__), '../demo/demo.jpg')
+    img = mmcv.imread(img_file)
+    session = InferenceSession(model, num_workers=2)
+
+    result = session(img_file)
+    assert len(result) == model.bbox_head.num_classes
+    # images are loaded from files or passed directly
+    for bboxes, expected_bboxes in zip(session(img), result):
+        assert np.allclose(bboxes, expected_bboxes, atol=1e-3)
+
+    # a batch gives the results of each image
+    results = session([img_file, img, img_file])
+    assert len(results) == 3
+    for batch_result in results:
+        for bboxes, expected_bboxes in zip(batch_result, result):
+            assert np.allclose(bboxes, expected_bboxes, atol=1e-3)
+
+
+def test_inference_detector(model):
+    img_file = osp.join(osp.dirname(__file__), '../demo/demo.jpg')
+    result = inference_detector(model, img_file)
+    assert len(result) == model.bbox_head.num_classes
+    results = inference_detector(model, [img_file, mmcv.imread(img_file)])
+    assert len(results) == 2
+    # the session is built once and reused
+    from mmdet.apis.inference import _inference_sessions
+    assert len(_inference_sessions) == 1
+    session = _inference_sessions[model]
+    inference_detector(model, img_file)
+    assert _inference_sessions[model] is session
+
+    # the session is rebuilt when the test pipeline changes
+    model.cfg.data.test.pipeline[1].img_scale = (320, 320)
+    try:
+        inference_detector(model, img_file)
+        assert _inference_sessions[model] is not session
+        assert _inference_sessions[model].test_pipeline.transforms[
+            1].img_scale == [(320, 320)]
+    finally:
+        model.cfg.data.test.pipeline[1].img_scale = (300, 300)
+
+
+def test_inference_detector_release():
+    config_file = osp.join(
+        osp.dirname(__file__), '../configs/ssd/ssd300_coco.py')
+    img_file = osp.join(osp.dirname(__file__), '../demo/demo.jpg')
+    model = init_detector(config_file, device='cpu')
+    inference_detector(model, img_file)
+    # the cached session does not keep the model alive
+    model_ref = weakref.ref(model)
+    del model
+    gc.collect()
+    assert model_ref() is None
+
+
+def test_batch_inference_server(model):
+    img_file = osp.join(osp.dirname(__file__), '../demo/demo.jpg')
+    img = mmcv.imread(img_file)
+    expected_result = InferenceSession(model)(img)
+
+    async def serve(imgs):
+        async with BatchInferenceServer(
+                model, max_batch_size=2, max_wait_time=1) as server:
+            results = await asyncio.gather(*[server(img) for img in imgs])
+            return results, server.get_stats()
+
+    results, stats = asyncio.run(serve([img_file, img, img]))
+    assert len(results) == 3
+    for result in results:
+        for bboxes, expected_bboxes in zip(result, expected_result):
+            assert np.allclose(bboxes, expected_bboxes, atol=1e-3)
+    # concurrent requests are coalesced into batches
+    assert stats['batch_sizes'] == {1: 1, 2: 1}
+    assert stats['max_queue_depth'] == 3
+    assert stats['queue_depth'] == 0
+    assert set(stats['latency']) == set(BatchInferenceServer.stages)
+    for latency in stats['latency'].values():
+        assert latency['p50'] <= latency['p95'] <= latency['max']
+
+    # concurrent calls of async_inference_detector share the batches
+    async def serve_detector(imgs):
+        async with BatchInferenceServer(
+                model, max_batch_size=3, max_wait_time=1) as server:
+            results = await asyncio.gather(*[
+                async_inference_detector(model, img, server=server)
+                for img in imgs
+            ])
+            return results, server.get_stats()
+
+    results, stats = asyncio.run(serve_detector([img_file, img, img]))
+    assert len(results) == 3
+    for result in results:
+        for bboxes, expected_bboxes in zip(result, expected_result):
+            assert np.allclose(bboxes, expected_bboxes, atol=1e-3)
+    assert stats['batch_sizes'] == {3: 1}
+
+    # an error is raised to the callers of the batch
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(serve(['not_exist.jpg']))
+
+
+def test_batch_inference_server_close(model):
+    img_file = osp.join(osp.dirname(__file__), '../demo/demo.jpg')
+    img = mmcv.imread(img_file)
+
+    async def close_with_pending(imgs):
+        server = BatchInferenceServer(model, max_batch_size=1)
+        requests = [asyncio.ensure_future(server(img)) for img in imgs]
+        await asyncio.sleep(0.05)
+        await server.close()
+        # every request is resolved once the server is closed
+        done, pending = await asyncio.wait(requests, timeout=2)
+        assert not pending
+        return [
+            request.exception() or request.result() for request in requests
+        ]
+
+    results = asyncio.run(close_with_pending([img] * 6))
+    assert len(results) == 6
+    # the dispatched batches are done and the others are rejected
+    assert not isinstance(results[0], Exception)
+    assert isinstance(results[-1], RuntimeError)
+    assert all(
+        isinstance(result, RuntimeError) for result in results
+        if isinstance(result, Exception))
@@ -3,6 +3,9 @@ import pytest
 import torch
 
 from mmdet.core import BboxOverlaps2D, bbox_overlaps
+from mmdet.core.evaluation.bbox_overlaps import batched_bbox_overlaps
+from mmdet.core.evaluation.bbox_overlaps import \
+    bbox_overlaps as np_bbox_overlaps
 
 
 def test_bbox_overlaps_2d(eps=1e-7):
@@ -103,3 +106,68 @@ def test_bbox_overlaps_2d(eps=1e-7):
     ious = bbox_overlaps(bboxes1, bboxes2, 'iof', eps=eps)
     assert torch.all(ious >= -1) and torch.all(ious <= 1)
     assert ious.size() == (bboxes1.size(0), bboxes2.size(0))
+
+
+def _loop_bbox_overlaps(bboxes1, bboxes2, mode='iou', eps=1e-6):
+    """The row by row implementation of the numpy bbox_overlaps."""
+    bboxes1 = bboxes1.astype(np.float32)
+    bboxes2 = bboxes2.astype(np.float32)
+    area1 = (bboxes1[:, 2] - bboxes1[:, 0]) * (bboxes1[:, 3] - bboxes1[:, 1])
+    area2 = (bboxes2[:, 2] - bboxes2[:, 0]) * (bboxes2[:, 3] - bboxes2[:, 1])
+    ious = np.zeros((bboxes1.shape[0], bboxes2.shape[0]), dtype=np.float32)
+    for i in range(bboxes1.shape[0]):
+        x_start = np.maximum(bboxes1[i, 0], bboxes2[:, 0])
+        y_start = np.maximum(bboxes1[i, 1], bboxes2[:, 1])
+        x_end = np.minimum(bboxes1[i, 2], bboxes2[:, 2])
+        y_end = np.minimum(bboxes1[i, 3], bboxes2[:, 3])
+        overlap = np.maximum(x_end - x_start, 0) * np.maximum(
+            y_end - y_start, 0)
+        union = area1[i] + area2 - overlap if mode == 'iou' else area1[i]
+        ious[i] = overlap / np.maximum(union, eps)
+    return ious
+
+
+def _random_np_bboxes(rng, num):
+    xy = rng.uniform(0, 100, (num, 2))
+    wh = rng.uniform(0, 50, (num, 2))
+    return np.hstack([xy, xy + wh])
+
+
+@pytest.mark.parametrize('mode', ['iou', 'iof'])
+def test_np_bbox_overlaps(mode):
+    rng = np.random.RandomState(0)
+    for rows, cols in [(7, 13), (13, 7), (0, 5), (5, 0)]:
+        bboxes1 = _random_np_bboxes(rng, rows)
+        bboxes2 = _random_np_bboxes(rng, cols)
+        expected_ious = _loop_bbox_overlaps(bboxes1, bboxes2, mode)
+        for chunk_size in [None, 1, 10]:
+            ious = np_bbox_overlaps(
+                bboxes1, bboxes2, mode, chunk_size=chunk_size)
+            assert ious.dtype == np.float32
+            assert np.array_equal(ious, expected_ious)
+        # the aligned ious are the diagonal
+        num = min(rows, cols)
+        ious = np_bbox_overlaps(
+            bboxes1[:num], bboxes2[:num], mode, is_aligned=True)
+        assert np.array_equal(ious, np.diag(expected_ious[:num, :num]))
+
+    with pytest.raises(AssertionError):
+        np_bbox_overlaps(bboxes1, bboxes2, 'giou')
+
+
+@pytest.mark.parametrize('mode', ['iou', 'iof'])
+def test_batched_bbox_overlaps(mode):
+    rng = np.random.RandomState(0)
+    # the last block is computed alone
+    shapes = [(3, 5), (0, 4), (6, 0), (1, 1), (0, 0), (8, 2), (40, 30)]
+    bboxes1_list = [_random_np_bboxes(rng, rows) for rows, _ in shapes]
+    bboxes2_list = [_random_np_bboxes(rng, cols) for _, cols in shapes]
+    for chunk_size in [None, 1, 7]:
+        ious_list = batched_bbox_overlaps(
+            bboxes1_list, bboxes2_list, mode, chunk_size=chunk_size)
+        assert len(ious_list) == len(shapes)
+        for ious, bboxes1, bboxes2 in zip(ious_list, bboxes1_list,
+                                          bboxes2_list):
+            assert np.array_equal(ious,
+                                  _loop_bbox_overlaps(bboxes1, bboxes2, mode))
+    assert batched_bbox_overlaps([], []) == []
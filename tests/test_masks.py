@@ -1,8 +1,12 @@
+import mmcv
 import numpy as np
+import pycocotools.mask as maskUtils
 import pytest
 import torch
 
-from mmdet.core import BitmapMasks, PolygonMasks
+from mmdet.core import BitmapMasks, PolygonMasks, RLEMasks
+from mmdet.core.mask.structures import (bitmap_to_counts, polygon_to_bitmap,
+                                        rle_string_to_counts)
 
 
 def dummy_raw_bitmap_masks(size):
@@ -550,6 +554,26 @@ def test_polygon_mask_crop_and_resize():
     assert cropped_resized_masks.width == 56
     assert cropped_resized_masks.to_ndarray().shape == (5, 56, 56)
 
+    # the flattened polygons give the same masks as the per polygon loop
+    raw_masks = dummy_raw_polygon_masks((3, 28, 28))
+    raw_masks[1].append(np.random.uniform(0, 28, 8))
+    polygon_masks = PolygonMasks(raw_masks, 28, 28)
+    cropped_resized_masks = polygon_masks.crop_and_resize(
+        dummy_bbox, (28, 21), inds)
+    expected_masks = polygon_masks._crop_and_resize_per_polygon(
+        dummy_bbox, (28, 21), inds)
+    for mask, expected_mask in zip(cropped_resized_masks, expected_masks):
+        assert len(mask) == len(expected_mask)
+        for p, expected_p in zip(mask, expected_mask):
+            assert np.array_equal(p, expected_p)
+    assert np.array_equal(cropped_resized_masks.to_ndarray(),
+                          expected_masks.to_ndarray())
+
+    # no bbox to crop
+    cropped_resized_masks = polygon_masks.crop_and_resize(
+        np.zeros((0, 4), dtype=np.float32), (28, 28), [])
+    assert cropped_resized_masks.to_ndarray().shape == (0, 28, 28)
+
 
 def test_polygon_mask_area():
     # area of empty polygon masks
@@ -591,6 +615,16 @@ def test_polygon_mask_to_ndarray():
     assert isinstance(ndarray_masks, np.ndarray)
     assert ndarray_masks.shape == (3, 28, 28)
 
+    # objects with multiple polygons are merged
+    raw_masks[0].append(np.random.uniform(0, 28, 10))
+    polygon_masks = PolygonMasks(raw_masks, 28, 28)
+    ndarray_masks = polygon_masks.to_ndarray()
+    assert ndarray_masks.dtype == bool
+    assert ndarray_masks.flags.c_contiguous
+    for ndarray_mask, polygons in zip(ndarray_masks, raw_masks):
+        assert np.array_equal(ndarray_mask,
+                              polygon_to_bitmap(polygons, 28, 28))
+
 
 def test_polygon_to_tensor():
     # empty polygon masks to tensor
@@ -628,3 +662,122 @@ def test_polygon_mask_iter():
     polygon_masks = PolygonMasks(raw_masks, 28, 28)
     for i, polygon_mask in enumerate(polygon_masks):
         assert np.equal(polygon_mask, raw_masks[i]).all()
+
+
+def dummy_raw_rle_masks(size):
+    """
+    Args:
+        size (tuple): expected shape of dummy masks, (N, H, W)
+
+    Return:
+        ndarray: dummy masks of random boxes, some of them empty or full
+    """
+    num_obj, height, width = size
+    masks = np.zeros(size, dtype=np.uint8)
+    for i in range(num_obj):
+        x1, y1 = np.random.randint(0, width), np.random.randint(0, height)
+        x2 = np.random.randint(x1, width + 1)
+        y2 = np.random.randint(y1, height + 1)
+        masks[i, y1:y2, x1:x2] = 1
+    if num_obj > 1:
+        masks[0] = 1
+        masks[1] = 0
+    return masks
+
+
+def test_rle_mask_init():
+    # init with empty ndarray masks
+    rle_masks = RLEMasks(np.empty((0, 28, 28), dtype=np.uint8), 28, 28)
+    assert len(rle_masks) == 0
+    assert rle_masks.to_ndarray().shape == (0, 28, 28)
+
+    # init with bitmaps, COCO RLEs and uncompressed counts
+    raw_masks = dummy_raw_rle_masks((3, 28, 35))
+    rle_masks = RLEMasks(raw_masks, 28, 35)
+    assert len(rle_masks) == 3
+    assert (rle_masks.to_ndarray() == raw_masks).all()
+    coco_rles = [maskUtils.encode(np.asfortranarray(m)) for m in raw_masks]
+    for rles in (coco_rles, rle_masks.masks):
+        assert all(
+            np.equal(counts, expected_counts).all()
+            for counts, expected_counts in zip(
+                RLEMasks(rles, 28, 35), rle_masks))
+    # all zeros and all ones
+    assert rle_masks.masks[0].tolist() == [0, 28 * 35]
+    assert rle_masks.masks[1].tolist() == [28 * 35]
+
+
+def test_rle_string_to_counts():
+    for _ in range(10):
+        raw_mask = dummy_raw_bitmap_masks((45, 37))
+        rle = maskUtils.encode(np.asfortranarray(raw_mask))
+        counts = rle_string_to_counts(rle['counts'])
+        assert counts.sum() == 45 * 37
+        assert np.equal(counts, bitmap_to_counts(raw_mask)).all()
+
+
+def test_rle_mask_geometric_transforms():
+    raw_masks = dummy_raw_rle_masks((4, 28, 35))
+    bitmap_masks = BitmapMasks(raw_masks, 28, 35)
+    rle_masks = RLEMasks(raw_masks, 28, 35)
+
+    def assert_same(rle_results, bitmap_results):
+        assert isinstance(rle_results, RLEMasks)
+        assert rle_results.height == bitmap_results.height
+        assert rle_results.width == bitmap_results.width
+        assert (rle_results.to_ndarray() == bitmap_results.masks).all()
+
+    for scale in [(56, 72), (14, 14), (100, 70)]:
+        assert_same(rle_masks.rescale(scale), bitmap_masks.rescale(scale))
+    resized_masks = rle_masks.resize((41, 17))
+    assert (resized_masks.to_ndarray() == np.stack([
+        mmcv.imresize(m, (17, 41), interpolation='nearest') for m in raw_masks
+    ])).all()
+    for flip_direction in ['horizontal', 'vertical', 'diagonal']:
+        assert_same(
+            rle_masks.flip(flip_direction), bitmap_masks.flip(flip_direction))
+    assert_same(rle_masks.pad((56, 56)), bitmap_masks.pad((56, 56)))
+    bbox = np.array([10, 5, 30, 18])
+    assert_same(rle_masks.crop(bbox), bitmap_masks.crop(bbox))
+    assert_same(
+        rle_masks.expand(56, 56, 10, 12), bitmap_masks.expand(56, 56, 10, 12))
+    for direction in ['horizontal', 'vertical']:
+        for offset in [-10, 7, 2.5]:
+            assert_same(
+                rle_masks.translate((28, 35), offset, direction),
+                bitmap_masks.translate((28, 35), offset, direction))
+        assert_same(
+            rle_masks.shear((28, 35), 0.3, direction),
+            bitmap_masks.shear((28, 35), 0.3, direction))
+    assert_same(
+        rle_masks.rotate((28, 35), 30, scale=0.8),
+        bitmap_masks.rotate((28, 35), 30, scale=0.8))
+
+    # transforms of empty masks
+    empty_masks = RLEMasks([], 28, 35)
+    assert empty_masks.rescale((56, 72)).to_ndarray().shape == (0, 56, 70)
+    assert len(empty_masks.flip()) == 0
+    assert empty_masks.crop(bbox).to_ndarray().shape == (0, 13, 20)
+
+
+def test_rle_mask_area_and_to_tensor():
+    raw_masks = dummy_raw_rle_masks((3, 28, 28))
+    rle_masks = RLEMasks(raw_masks, 28, 28)
+    assert (rle_masks.areas == raw_masks.sum((1, 2))).all()
+    tensor_masks = rle_masks.to_tensor(dtype=torch.uint8, device='cpu')
+    assert tensor_masks.shape == (3, 28, 28)
+    assert (tensor_masks.numpy() == raw_masks).all()
+    assert isinstance(rle_masks.to_bitmap(), BitmapMasks)
+    empty_masks = RLEMasks([], 28, 28)
+    assert empty_masks.areas.shape == (0, )
+    assert empty_masks.to_tensor(torch.uint8, 'cpu').shape == (0, 28, 28)
+
+
+def test_rle_mask_index():
+    raw_masks = dummy_raw_rle_masks((3, 28, 28))
+    rle_masks = RLEMasks(raw_masks, 28, 28)
+    assert (rle_masks[0].to_ndarray() == raw_masks[[0]]).all()
+    assert (rle_masks[[0, 2]].to_ndarray() == raw_masks[[0, 2]]).all()
+    keep = np.array([True, False, True])
+    assert (rle_masks[keep].to_ndarray() == raw_masks[keep]).all()
+    assert len(rle_masks[1:]) == 2
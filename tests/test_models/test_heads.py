@@ -2,13 +2,14 @@ import mmcv
 import numpy as np
 import torch
 
-from mmdet.core import bbox2roi, build_assigner, build_sampler
+from mmdet.core import (batched_multiclass_nms, bbox2roi, build_assigner,
+                        build_sampler, encode_mask_results, multiclass_nms)
 from mmdet.core.evaluation.bbox_overlaps import bbox_overlaps
 from mmdet.models.dense_heads import (AnchorHead, CornerHead, FCOSHead,
                                       FSAFHead, GuidedAnchorHead, PAAHead,
-                                      SABLRetinaHead, TransformerHead,
-                                      VFNetHead, YOLACTHead, YOLACTProtonet,
-                                      YOLACTSegmHead, paa_head)
+                                      RetinaHead, SABLRetinaHead,
+                                      TransformerHead, VFNetHead, YOLACTHead,
+                                      YOLACTProtonet, YOLACTSegmHead, paa_head)
 from mmdet.models.dense_heads.paa_head import levels_to_images
 from mmdet.models.roi_heads.bbox_heads import BBoxHead, SABLHead
 from mmdet.models.roi_heads.mask_heads import FCNMaskHead, MaskIoUHead
@@ -312,6 +313,198 @@ def test_anchor_head_loss():
     assert onegt_box_loss.item() > 0, 'box loss should be non-zero'
 
 
+def test_anchor_head_batched_get_targets():
+    """Tests the targets of the batched assignment are the same as the per
+    image ones."""
+    s = 256
+    img_metas = [{
+        'img_shape': (s - 40 * i, s - 16 * i, 3),
+        'scale_factor': 1,
+        'pad_shape': (s, s, 3)
+    } for i in range(3)]
+    cfg = mmcv.Config(
+        dict(
+            assigner=dict(
+                type='MaxIoUAssigner',
+                pos_iou_thr=0.5,
+                neg_iou_thr=0.4,
+                min_pos_iou=0,
+                ignore_iof_thr=0.5,
+                gt_chunk_size=4),
+            allowed_border=0,
+            pos_weight=-1,
+            debug=False))
+    self = RetinaHead(
+        num_classes=4, in_channels=1, stacked_convs=1, train_cfg=cfg)
+    featmap_sizes = [(s // stride[1], s // stride[0])
+                     for stride in self.anchor_generator.strides]
+    anchor_list, valid_flag_list = self.get_anchors(featmap_sizes, img_metas,
+                                                    'cpu')
+
+    rng = torch.Generator().manual_seed(0)
+    gt_bboxes = []
+    for num_gts in (30, 0, 5):
+        xy = torch.rand(num_gts, 2, generator=rng) * (s - 32)
+        wh = torch.rand(num_gts, 2, generator=rng) * 64 + 8
+        gt_bboxes.append(torch.cat([xy, xy + wh], dim=1))
+    gt_labels = [torch.randint(0, 4, (len(bboxes), )) for bboxes in gt_bboxes]
+    gt_bboxes_ignore = [torch.Tensor([[0, 0, 64, 64]])] * 3
+
+    targets = self.get_targets(anchor_list, valid_flag_list, gt_bboxes,
+                               img_metas, gt_bboxes_ignore, gt_labels)
+    self.train_cfg.batched_assign = False
+    expected_targets = self.get_targets(anchor_list, valid_flag_list,
+                                        gt_bboxes, img_metas, gt_bboxes_ignore,
+                                        gt_labels)
+    for level_targets, expected_level_targets in zip(targets[:4],
+                                                     expected_targets[:4]):
+        for target, expected_target in zip(level_targets,
+                                           expected_level_targets):
+            assert torch.equal(target, expected_target)
+    assert targets[4:] == expected_targets[4:]
+
+    # images with more gts than gpu_assign_thr are assigned one by one
+    self.train_cfg.batched_assign = True
+    assert self._batched_assign(gt_bboxes)
+    self.assigner.gpu_assign_thr = 10
+    assert not self._batched_assign(gt_bboxes)
+    self.assigner.gpu_assign_thr = 30
+    assert self._batched_assign(gt_bboxes)
+
+
+def test_anchor_head_batched_get_bboxes():
+    """Tests batched post-processing gives the same detections as the per
+    image one."""
+    img_metas = [{
+        'img_shape': (256 - 16 * i, 240 - 8 * i, 3),
+        'scale_factor':
+        np.array([1.5 + i, 1.2, 1.5 + i, 1.2], dtype=np.float32),
+        'pad_shape': (256, 256, 3)
+    } for i in range(3)]
+    test_cfg = mmcv.Config(
+        dict(
+            nms_pre=100,
+            min_bbox_size=0,
+            score_thr=0.05,
+            nms=dict(type='nms', iou_threshold=0.5),
+            max_per_img=20))
+    per_img_cfg = mmcv.Config(dict(test_cfg, batched_postprocess=False))
+    heads = [
+        AnchorHead(num_classes=4, in_channels=1, test_cfg=test_cfg),
+        # softmax classifier
+        AnchorHead(
+            num_classes=4,
+            in_channels=1,
+            loss_cls=dict(
+                type='CrossEntropyLoss', use_sigmoid=False, loss_weight=1.0),
+            test_cfg=test_cfg),
+        # coder decoding one image at a time
+        FSAFHead(
+            num_classes=4,
+            in_channels=1,
+            stacked_convs=1,
+            feat_channels=8,
+            anchor_generator=dict(
+                type='AnchorGenerator',
+                octave_base_scale=1,
+                scales_per_octave=1,
+                ratios=[1.0],
+                strides=[8, 16, 32, 64, 128]),
+            bbox_coder=dict(type='TBLRBBoxCoder', normalizer=4.0),
+            reg_decoded_bbox=True,
+            test_cfg=test_cfg)
+    ]
+    for self in heads:
+        feat = [
+            torch.rand(3, 1, 256 // stride_h, 256 // stride_w)
+            for stride_w, stride_h in self.anchor_generator.strides
+        ]
+        cls_scores, bbox_preds = self.forward(feat)
+        for rescale in [True, False]:
+            batched_results = self.get_bboxes(
+                cls_scores, bbox_preds, img_metas, rescale=rescale)
+            results = self.get_bboxes(
+                cls_scores,
+                bbox_preds,
+                img_metas,
+                per_img_cfg,
+                rescale=rescale)
+            assert len(batched_results) == len(results) == 3
+            for (batched_dets,
+                 batched_labels), (dets,
+                                   labels) in zip(batched_results, results):
+                assert batched_dets.shape == dets.shape
+                assert torch.equal(batched_dets, dets)
+                assert torch.equal(batched_labels, labels)
+
+            batched_results = self.get_bboxes(
+                cls_scores,
+                bbox_preds,
+                img_metas,
+                rescale=rescale,
+                with_nms=False)
+            results = self.get_bboxes(
+                cls_scores,
+                bbox_preds,
+                img_metas,
+                per_img_cfg,
+                rescale=rescale,
+                with_nms=False)
+            for (batched_bboxes,
+                 batched_scores), (bboxes,
+                                   scores) in zip(batched_results, results):
+                assert torch.equal(batched_bboxes, bboxes)
+                # vectorized activations may differ in the last bit
+                assert torch.allclose(batched_scores, scores)
+
+
+def test_batched_multiclass_nms():
+    """Tests the boxes of different images do not suppress each other in
+    batched NMS, including class agnostic NMS."""
+    # the same boxes in both images, the second box of a different class
+    multi_bboxes = torch.Tensor([[[0, 0, 10, 10], [1, 1, 10, 10]]] * 2)
+    multi_scores = torch.Tensor([[[0.9, 0., 0.], [0., 0.8, 0.]]] * 2)
+    for nms_cfg in [
+            dict(type='nms', iou_threshold=0.5),
+            dict(type='nms', iou_threshold=0.5, class_agnostic=True)
+    ]:
+        results = batched_multiclass_nms(multi_bboxes, multi_scores, 0.05,
+                                         nms_cfg)
+        assert len(results) == 2
+        for (dets, labels), bboxes, scores in zip(results, multi_bboxes,
+                                                  multi_scores):
+            expected_dets, expected_labels = multiclass_nms(
+                bboxes, scores, 0.05, nms_cfg)
+            assert torch.equal(dets, expected_dets)
+            assert torch.equal(labels, expected_labels)
+            num_dets = 1 if nms_cfg.get('class_agnostic', False) else 2
+            assert len(dets) == num_dets
+
+    # pairs of boxes of IoUs close to the threshold in the last image and
+    # class of a batch, which are sensitive to the precision of the boxes
+    rng = torch.Generator().manual_seed(0)
+    nms_cfg = dict(type='nms', iou_threshold=0.5)
+    multi_bboxes = torch.zeros(8, 3, 4)
+    multi_scores = torch.zeros(8, 3, 81)
+    multi_scores[7, :, 79] = torch.Tensor([0.9, 0.8, 0.7])
+    for _ in range(50):
+        x1y1 = torch.rand(2, generator=rng) * 1000 + 100
+        wh = torch.rand(2, generator=rng) * 100 + 50
+        bbox = torch.cat([x1y1, x1y1 + wh])
+        # an IoU of 0.5 when shifted by a third of the width
+        shift = wh[0] / 3 + (torch.rand(1, generator=rng)[0] - 0.5) * 1e-2
+        shifted_bbox = bbox + shift * torch.Tensor([1, 0, 1, 0])
+        multi_bboxes[7] = torch.stack(
+            [bbox, shifted_bbox,
+             torch.Tensor([0, 0, 1333, 800])])
+        dets, labels = batched_multiclass_nms(multi_bboxes, multi_scores, 0.05,
+                                              nms_cfg)[7]
+        expected_dets, expected_labels = multiclass_nms(
+            multi_bboxes[7], multi_scores[7], 0.05, nms_cfg)
+        assert torch.equal(dets, expected_dets)
+        assert torch.equal(labels, expected_labels)
+
+
 def test_fsaf_head_loss():
     """Tests anchor head loss when truth is empty and non-empty."""
     s = 256
@@ -903,6 +1096,31 @@ def test_mask_head_loss():
     assert onegt_mask_iou_loss.item() >= 0
 
 
+def test_mask_head_get_seg_masks_rle():
+    """Test pasting masks into RLEs directly."""
+    self = FCNMaskHead(num_classes=4)
+    torch.manual_seed(0)
+    mask_pred = torch.randn(5, 4, 28, 28)
+    # boxes of the resized image, the last ones overlap the border
+    det_bboxes = torch.Tensor([[10.5, 20.2, 80.3, 60.7, 0.9],
+                               [0, 0, 10, 10, 0.8], [5, 6, 5, 30, 0.7],
+                               [90, 40, 130, 75, 0.6], [95, 70, 110, 80, 0.5]])
+    det_labels = torch.LongTensor([0, 2, 2, 3, 1])
+    ori_shape = (60, 50, 3)
+    scale_factor = np.array([2, 1.25, 2, 1.25], dtype=np.float32)
+    for rescale in (True, False):
+        bitmap_cfg = mmcv.Config(dict(mask_thr_binary=0.5))
+        rle_cfg = mmcv.Config(dict(mask_thr_binary=0.5, mask_format='rle'))
+        bitmaps = self.get_seg_masks(mask_pred, det_bboxes, det_labels,
+                                     bitmap_cfg, ori_shape, scale_factor,
+                                     rescale)
+        rles = self.get_seg_masks(mask_pred, det_bboxes, det_labels, rle_cfg,
+                                  ori_shape, scale_factor, rescale)
+        assert [len(segms) for segms in rles] == [1, 1, 2, 1]
+        assert encode_mask_results(rles) == rles
+        assert rles == encode_mask_results(bitmaps)
+
+
 def _dummy_bbox_sampling(proposal_list, gt_bboxes, gt_labels):
     """Create sample results that can be passed to BBoxHead.get_targets."""
     num_imgs = 1
@@ -0,0 +1,121 @@
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from mmdet.core.anchor import build_anchor_generator
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the anchor grid cache on RetinaNet multi-scale '
+        'training shapes')
+    parser.add_argument(
+        '--iters', type=int, default=500, help='number of training iterations')
+    parser.add_argument(
+        '--imgs-per-gpu', type=int, default=2, help='images per batch')
+    parser.add_argument(
+        '--cache-size', type=int, default=256, help='size of the grid cache')
+    parser.add_argument(
+        '--device', default='cuda' if torch.cuda.is_available() else 'cpu')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def synthetic_batches(iters, imgs_per_gpu, rng, size_divisor=32):
+    """Image shapes of the RetinaNet multi-scale training pipeline.
+
+    The short edge is sampled from (640, 672, ..., 800) with the long edge
+    capped at 1333, and the batch is padded to the largest image.
+    """
+    short_edges = np.arange(640, 801, 32)
+    aspect_ratios = np.array([4 / 3, 3 / 2, 3 / 4, 16 / 9])
+    batches = []
+    for _ in range(iters):
+        short_edge = rng.choice(short_edges)
+        img_shapes = []
+        for _ in range(imgs_per_gpu):
+            ratio = rng.choice(aspect_ratios)
+            h, w = short_edge, short_edge * ratio
+            scale = min(1., 1333 / max(h, w))
+            h, w = int(h * scale + 0.5), int(w * scale + 0.5)
+            if ratio < 1:
+                h, w = w, h
+            img_shapes.append((h, w))
+        pad_h = max(
+            int(np.ceil(h / size_divisor)) * size_divisor
+            for h, _ in img_shapes)
+        pad_w = max(
+            int(np.ceil(w / size_divisor)) * size_divisor
+            for _, w in img_shapes)
+        featmap_sizes = [(int(np.ceil(pad_h / s)), int(np.ceil(pad_w / s)))
+                         for s in (8, 16, 32, 64, 128)]
+        batches.append((featmap_sizes, img_shapes))
+    return batches
+
+
+def get_anchors(anchor_generator, featmap_sizes, img_shapes, device):
+    """What ``AnchorHead.get_anchors`` does for a batch."""
+    anchors = anchor_generator.grid_anchors(featmap_sizes, device)
+    flags = [
+        anchor_generator.valid_flags(featmap_sizes, img_shape, device)
+        for img_shape in img_shapes
+    ]
+    return anchors, flags
+
+
+def run(anchor_generator, batches, device):
+    if device != 'cpu':
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    for featmap_sizes, img_shapes in batches:
+        get_anchors(anchor_generator, featmap_sizes, img_shapes, device)
+    if device != 'cpu':
+        torch.cuda.synchronize()
+    return time.perf_counter() - start
+
+
+def main():
+    args = parse_args()
+    rng = np.random.RandomState(args.seed)
+    batches = synthetic_batches(args.iters, args.imgs_per_gpu, rng)
+    cfg = dict(
+        type='AnchorGenerator',
+        octave_base_scale=4,
+        scales_per_octave=3,
+        ratios=[0.5, 1.0, 2.0],
+        strides=[8, 16, 32, 64, 128])
+    uncached = build_anchor_generator(dict(cfg, cache_size=0))
+    cached = build_anchor_generator(dict(cfg, cache_size=args.cache_size))
+
+    # warm up
+    run(uncached, batches[:10], args.device)
+    run(cached, batches[:10], args.device)
+    cached.grid_cache.clear()
+
+    uncached_time = run(uncached, batches, args.device)
+    cached_time = run(cached, batches, args.device)
+    num_shapes = len({tuple(sizes[0]) for sizes, _ in batches})
+    print(f'{args.iters} iterations of {args.imgs_per_gpu} images on '
+          f'{args.device}, {num_shapes} distinct padded shapes')
+    print(f'without cache: {uncached_time * 1000 / args.iters:.3f} ms/iter')
+    print(f'with cache:    {cached_time * 1000 / args.iters:.3f} ms/iter, '
+          f'{cached.grid_cache.info()}')
+    print(f'speedup: {uncached_time / cached_time:.1f}x')
+
+    for featmap_sizes, img_shapes in batches[:20]:
+        expected = get_anchors(uncached, featmap_sizes, img_shapes,
+                               args.device)
+        results = get_anchors(cached, featmap_sizes, img_shapes, args.device)
+        for expected_anchor, anchor in zip(expected[0], results[0]):
+            assert torch.equal(expected_anchor, anchor)
+        for expected_flags, flags in zip(expected[1], results[1]):
+            for expected_flag, flag in zip(expected_flags, flags):
+                assert torch.equal(expected_flag, flag)
+    print('anchors and valid flags are identical')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from mmdet.apis import BatchInferenceServer, InferenceSession, init_detector
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the CPU throughput and latency of '
+        'BatchInferenceServer under concurrent requests')
+    parser.add_argument(
+        '--config', default='configs/ssd/ssd300_coco.py', help='config file')
+    parser.add_argument(
+        '--num-requests', type=int, default=32, help='number of requests')
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=8,
+        help='number of clients sending requests one after another')
+    parser.add_argument(
+        '--max-batch-size',
+        type=int,
+        default=8,
+        help='maximum number of images in a batch')
+    parser.add_argument(
+        '--max-wait-time',
+        type=float,
+        default=0.005,
+        help='maximum time in seconds to wait for a batch to fill')
+    parser.add_argument(
+        '--img-shape',
+        type=int,
+        nargs=2,
+        default=[480, 640],
+        help='shape (h, w) of the input images')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+async def run_clients(infer, imgs, concurrency):
+    """Send the images from ``concurrency`` clients, each sending its next
+    request when the previous one is answered."""
+    latencies = [None] * len(imgs)
+    results = [None] * len(imgs)
+
+    async def client(inds):
+        for i in inds:
+            start = time.perf_counter()
+            results[i] = await infer(imgs[i])
+            latencies[i] = time.perf_counter() - start
+
+    clients = [
+        client(range(i, len(imgs), concurrency)) for i in range(concurrency)
+    ]
+    start = time.perf_counter()
+    await asyncio.gather(*clients)
+    return time.perf_counter() - start, np.array(latencies), results
+
+
+def report(name, elapsed, latencies):
+    print(f'{name:<12}{len(latencies) / elapsed:>10.2f} img/s'
+          f'{np.percentile(latencies, 50) * 1000:>12.0f} ms'
+          f'{np.percentile(latencies, 95) * 1000:>12.0f} ms')
+
+
+def main():
+    args = parse_args()
+    rng = np.random.RandomState(args.seed)
+    model = init_detector(args.config, device='cpu')
+    imgs = [
+        rng.randint(0, 256, (*args.img_shape, 3), dtype=np.uint8)
+        for _ in range(args.num_requests)
+    ]
+    session = InferenceSession(model)
+    # warm up
+    session(imgs[:2])
+
+    async def serve_sequential():
+        # the requests are served one by one, as by an ``asyncio.Lock``
+        # around ``inference_detector``
+        lock = asyncio.Lock()
+
+        async def sequential(img):
+            async with lock:
+                return await asyncio.get_event_loop().run_in_executor(
+                    None, session, img)
+
+        return await run_clients(sequential, imgs, args.concurrency)
+
+    async def serve():
+        async with BatchInferenceServer(
+                model,
+                max_batch_size=args.max_batch_size,
+                max_wait_time=args.max_wait_time) as server:
+            outputs = await run_clients(server, imgs, args.concurrency)
+            return outputs, server.get_stats()
+
+    print(f'{args.num_requests} requests of {args.img_shape} images from '
+          f'{args.concurrency} concurrent clients')
+    print(f'{"":<12}{"throughput":>14}{"p50 latency":>15}'
+          f'{"p95 latency":>15}')
+    seq_time, seq_latencies, expected_results = asyncio.run(serve_sequential())
+    report('sequential', seq_time, seq_latencies)
+    (batch_time, batch_latencies, results), stats = asyncio.run(serve())
+    report('batched', batch_time, batch_latencies)
+    print(f'throughput speedup: {seq_time / batch_time:.2f}x')
+    print(f'batch sizes: {stats["batch_sizes"]}, '
+          f'max queue depth: {stats["max_queue_depth"]}')
+    for stage, latency in stats['latency'].items():
+        print(f'{stage:<12}' + ' '.join(f'{key} {value * 1000:.0f}ms'
+                                        for key, value in latency.items()))
+
+    for result, expected_result in zip(results, expected_results):
+        for bboxes, expected_bboxes in zip(result, expected_result):
+            assert np.allclose(bboxes, expected_bboxes, atol=1e-3)
+    print('results of the server match those of the sequential inference')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import time
+
+import mmcv
+import numpy as np
+import torch
+from mmcv.parallel import collate
+
+from mmdet.datasets.pipelines import Compose
+from mmdet.models import build_detector
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the test-time augmentation of a detector with '
+        'the augmentations of the same shape batched against one by one')
+    parser.add_argument(
+        '--config',
+        default='configs/mask_rcnn/mask_rcnn_r50_fpn_1x_coco.py',
+        help='config of the detector, tested with random weights')
+    parser.add_argument(
+        '--img-shape',
+        type=int,
+        nargs=2,
+        default=[480, 640],
+        help='h w of the test image')
+    parser.add_argument(
+        '--img-scales',
+        type=int,
+        nargs='+',
+        default=[1333, 800, 1333, 640],
+        help='img_scale of MultiScaleFlipAug as a flat list of pairs')
+    parser.add_argument(
+        '--score-thr',
+        type=float,
+        default=0.,
+        help='score threshold of the detections, low enough to keep the '
+        'detections of the random weights')
+    parser.add_argument(
+        '--repeat', type=int, default=3, help='forwards per mode')
+    parser.add_argument(
+        '--threads', type=int, default=1, help='number of torch threads')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def build_inputs(cfg, args):
+    """Run the test pipeline with flip on a random image."""
+    test_pipeline = cfg.data.test.pipeline
+    test_pipeline[0] = dict(type='LoadImageFromWebcam')
+    test_pipeline[1].update(
+        img_scale=[tuple(s) for s in np.array(args.img_scales).reshape(-1, 2)],
+        flip=True)
+    rng = np.random.RandomState(args.seed)
+    h, w = args.img_shape
+    img = rng.randint(0, 256, (h, w, 3)).astype(np.uint8)
+    data = collate([Compose(test_pipeline)(dict(img=img))], samples_per_gpu=1)
+    data['img_metas'] = [img_metas.data[0] for img_metas in data['img_metas']]
+    return data
+
+
+def main():
+    args = parse_args()
+    torch.set_num_threads(args.threads)
+    cfg = mmcv.Config.fromfile(args.config)
+    cfg.model.pretrained = None
+    cfg.model.train_cfg = None
+    if 'rcnn' in cfg.model.test_cfg:
+        cfg.model.test_cfg.rcnn.score_thr = args.score_thr
+    else:
+        cfg.model.test_cfg.score_thr = args.score_thr
+    torch.manual_seed(args.seed)
+    model = build_detector(cfg.model)
+    model.eval()
+    data = build_inputs(cfg, args)
+
+    results, times = {}, {}
+    for batched in (False, True):
+        model.test_cfg.batched_aug_test = batched
+        with torch.no_grad():
+            results[batched] = model(return_loss=False, rescale=True, **data)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                model(return_loss=False, rescale=True, **data)
+        times[batched] = (time.perf_counter() - start) / args.repeat
+
+    expected, actual = results[False][0], results[True][0]
+    if isinstance(expected, tuple):
+        expected, actual = expected[0], actual[0]
+    # the rounding errors of the batched forward may swap detections of
+    # close scores, which the random weights give plenty of
+    scores = np.sort(np.concatenate([bboxes[:, 4] for bboxes in expected]))
+    batched_scores = np.sort(
+        np.concatenate([bboxes[:, 4] for bboxes in actual]))
+    assert np.allclose(scores, batched_scores, atol=1e-5)
+    num_dets = len(scores)
+
+    num_augs = len(data['img'])
+    print(f'{model.__class__.__name__}, {num_augs} augmentations, '
+          f'{num_dets} detections: one by one {times[False] * 1000:.0f} ms, '
+          f'batched {times[True] * 1000:.0f} ms '
+          f'({times[False] / times[True]:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+import argparse
+import time
+
+import numpy as np
+
+from mmdet.core.evaluation.bbox_overlaps import (batched_bbox_overlaps,
+                                                 bbox_overlaps)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the numpy bbox_overlaps of the evaluation')
+    parser.add_argument(
+        '--num-dets', type=int, default=1000, help='number of detections')
+    parser.add_argument(
+        '--num-gts', type=int, default=100, help='number of gts')
+    parser.add_argument(
+        '--num-imgs',
+        type=int,
+        default=5000,
+        help='number of images of the batched benchmark')
+    parser.add_argument(
+        '--dets-per-img',
+        type=int,
+        default=20,
+        help='detections of a class per image of the batched benchmark')
+    parser.add_argument(
+        '--gts-per-img',
+        type=int,
+        default=3,
+        help='gts of a class per image of the batched benchmark')
+    parser.add_argument(
+        '--repeat', type=int, default=10, help='number of repeated runs')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def loop_bbox_overlaps(bboxes1, bboxes2, mode='iou', eps=1e-6):
+    """The row by row implementation that bbox_overlaps used to be."""
+    bboxes1 = bboxes1.astype(np.float32)
+    bboxes2 = bboxes2.astype(np.float32)
+    rows = bboxes1.shape[0]
+    cols = bboxes2.shape[0]
+    ious = np.zeros((rows, cols), dtype=np.float32)
+    if rows * cols == 0:
+        return ious
+    exchange = False
+    if bboxes1.shape[0] > bboxes2.shape[0]:
+        bboxes1, bboxes2 = bboxes2, bboxes1
+        ious = np.zeros((cols, rows), dtype=np.float32)
+        exchange = True
+    area1 = (bboxes1[:, 2] - bboxes1[:, 0]) * (bboxes1[:, 3] - bboxes1[:, 1])
+    area2 = (bboxes2[:, 2] - bboxes2[:, 0]) * (bboxes2[:, 3] - bboxes2[:, 1])
+    for i in range(bboxes1.shape[0]):
+        x_start = np.maximum(bboxes1[i, 0], bboxes2[:, 0])
+        y_start = np.maximum(bboxes1[i, 1], bboxes2[:, 1])
+        x_end = np.minimum(bboxes1[i, 2], bboxes2[:, 2])
+        y_end = np.minimum(bboxes1[i, 3], bboxes2[:, 3])
+        overlap = np.maximum(x_end - x_start, 0) * np.maximum(
+            y_end - y_start, 0)
+        if mode == 'iou':
+            union = area1[i] + area2 - overlap
+        else:
+            union = area1[i] if not exchange else area2
+        union = np.maximum(union, eps)
+        ious[i, :] = overlap / union
+    if exchange:
+        ious = ious.T
+    return ious
+
+
+def random_bboxes(rng, num):
+    xy = rng.uniform(0, 1000, (num, 2))
+    wh = rng.uniform(10, 300, (num, 2))
+    return np.hstack([xy, xy + wh]).astype(np.float32)
+
+
+def timeit(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = func()
+        times.append(time.perf_counter() - start)
+    return min(times), results
+
+
+def main():
+    args = parse_args()
+    rng = np.random.RandomState(args.seed)
+    dets = random_bboxes(rng, args.num_dets)
+    gts = random_bboxes(rng, args.num_gts)
+    for mode in ['iou', 'iof']:
+        loop_time, expected_ious = timeit(
+            lambda: loop_bbox_overlaps(dets, gts, mode), args.repeat)
+        vec_time, ious = timeit(lambda: bbox_overlaps(dets, gts, mode),
+                                args.repeat)
+        assert np.array_equal(ious, expected_ious)
+        print(f'{args.num_dets} dets x {args.num_gts} gts ({mode}): '
+              f'loop {loop_time * 1000:.2f} ms, '
+              f'vectorized {vec_time * 1000:.2f} ms, '
+              f'speedup {loop_time / vec_time:.1f}x')
+
+    dets_list = [
+        random_bboxes(rng, rng.randint(0, 2 * args.dets_per_img + 1))
+        for _ in range(args.num_imgs)
+    ]
+    gts_list = [
+        random_bboxes(rng, rng.randint(0, 2 * args.gts_per_img + 1))
+        for _ in range(args.num_imgs)
+    ]
+    loop_time, expected_ious = timeit(
+        lambda:
+        [loop_bbox_overlaps(d, g) for d, g in zip(dets_list, gts_list)],
+        args.repeat)
+    per_img_time, _ = timeit(
+        lambda: [bbox_overlaps(d, g) for d, g in zip(dets_list, gts_list)],
+        args.repeat)
+    batched_time, ious = timeit(
+        lambda: batched_bbox_overlaps(dets_list, gts_list), args.repeat)
+    for img_ious, expected_img_ious in zip(ious, expected_ious):
+        assert np.array_equal(img_ious, expected_img_ious)
+    print(f'{args.num_imgs} images of ~{args.dets_per_img} dets x '
+          f'~{args.gts_per_img} gts: loop {loop_time * 1000:.1f} ms, '
+          f'vectorized per image {per_img_time * 1000:.1f} ms, '
+          f'batched {batched_time * 1000:.1f} ms, '
+          f'speedup {loop_time / batched_time:.1f}x')
+    print('ious are identical')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import math
+import os.path as osp
+import tempfile
+import time
+from collections import defaultdict
+
+import mmcv
+import numpy as np
+
+from mmdet.datasets import ClassBalancedDataset, CocoDataset
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark computing the repeat factors of '
+        'ClassBalancedDataset from the category index against calling '
+        'get_cat_ids for each image')
+    parser.add_argument(
+        '--num-images', type=int, default=20000, help='number of images')
+    parser.add_argument(
+        '--num-classes',
+        type=int,
+        default=1203,
+        help='number of categories, 1203 as LVIS v1')
+    parser.add_argument(
+        '--anns-per-image',
+        type=float,
+        default=10.,
+        help='mean number of annotations per image')
+    parser.add_argument(
+        '--oversample-thr',
+        type=float,
+        default=1e-3,
+        help='oversample_thr of ClassBalancedDataset, 1e-3 as the LVIS '
+        'configs')
+    parser.add_argument(
+        '--compact-ann',
+        action='store_true',
+        help='build the dataset with compact annotations')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def synthetic_coco_json(filename, args):
+    """Write a COCO style annotation file of long-tailed categories."""
+    rng = np.random.RandomState(args.seed)
+    images = [
+        dict(id=i, width=640, height=480, file_name=f'{i}.jpg')
+        for i in range(args.num_images)
+    ]
+    num_anns = rng.poisson(args.anns_per_image, args.num_images)
+    cat_probs = 1. / np.arange(1, args.num_classes + 1)
+    cat_ids = rng.choice(
+        args.num_classes, num_anns.sum(), p=cat_probs / cat_probs.sum()) + 1
+    img_ids = np.repeat(np.arange(args.num_images), num_anns)
+    annotations = [
+        dict(
+            id=i + 1,
+            image_id=int(img_id),
+            category_id=int(cat_id),
+            area=100.,
+            bbox=[10., 10., 10., 10.],
+            iscrowd=0)
+        for i, (img_id, cat_id) in enumerate(zip(img_ids, cat_ids))
+    ]
+    categories = [
+        dict(id=i + 1, name=f'class_{i}') for i in range(args.num_classes)
+    ]
+    mmcv.dump(
+        dict(images=images, annotations=annotations, categories=categories),
+        filename)
+
+
+def per_image_repeat_factors(dataset, repeat_thr, filter_empty_gt=True):
+    """The repeat factors computed by calling ``get_cat_ids`` for each image
+    twice, as ClassBalancedDataset did."""
+    category_freq = defaultdict(int)
+    num_images = len(dataset)
+    for idx in range(num_images):
+        cat_ids = set(dataset.get_cat_ids(idx))
+        if len(cat_ids) == 0 and not filter_empty_gt:
+            cat_ids = set([len(dataset.CLASSES)])
+        for cat_id in cat_ids:
+            category_freq[cat_id] += 1
+    for k, v in category_freq.items():
+        category_freq[k] = v / num_images
+    category_repeat = {
+        cat_id: max(1.0, math.sqrt(repeat_thr / cat_freq))
+        for cat_id, cat_freq in category_freq.items()
+    }
+    repeat_factors = []
+    for idx in range(num_images):
+        cat_ids = set(dataset.get_cat_ids(idx))
+        if len(cat_ids) == 0 and not filter_empty_gt:
+            cat_ids = set([len(dataset.CLASSES)])
+        repeat_factor = 1
+        if len(cat_ids) > 0:
+            repeat_factor = max(
+                {category_repeat[cat_id]
+                 for cat_id in cat_ids})
+        repeat_factors.append(repeat_factor)
+    return repeat_factors
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ann_file = osp.join(tmp_dir, 'synthetic.json')
+        synthetic_coco_json(ann_file, args)
+        dataset = CocoDataset(
+            ann_file=ann_file,
+            pipeline=[],
+            classes=tuple(f'class_{i}' for i in range(args.num_classes)),
+            compact_ann=args.compact_ann)
+
+        start = time.perf_counter()
+        expected = per_image_repeat_factors(dataset, args.oversample_thr)
+        per_image_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        repeat_factor_dataset = ClassBalancedDataset(dataset,
+                                                     args.oversample_thr)
+        vectorized_time = time.perf_counter() - start
+        assert np.array_equal(
+            repeat_factor_dataset._get_repeat_factors(dataset,
+                                                      args.oversample_thr),
+            expected)
+
+        cache_dir = osp.join(tmp_dir, 'cache')
+        ClassBalancedDataset(dataset, args.oversample_thr, cache_dir=cache_dir)
+        start = time.perf_counter()
+        cached_dataset = ClassBalancedDataset(
+            dataset, args.oversample_thr, cache_dir=cache_dir)
+        cached_time = time.perf_counter() - start
+        assert cached_dataset.repeat_indices == \
+            repeat_factor_dataset.repeat_indices
+
+    print(f'{len(dataset)} images, {len(repeat_factor_dataset)} after '
+          f'repeating: per image get_cat_ids {per_image_time * 1000:.0f} ms, '
+          f'category index {vectorized_time * 1000:.0f} ms '
+          f'({per_image_time / vectorized_time:.1f}x), '
+          f'cached {cached_time * 1000:.0f} ms '
+          f'({per_image_time / cached_time:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
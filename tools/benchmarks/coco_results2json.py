@@ -0,0 +1,106 @@
+import argparse
+import os.path as osp
+import tempfile
+import time
+
+import mmcv
+import numpy as np
+
+from mmdet.datasets import CocoDataset
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark converting detection results to COCO json '
+        'with the per box loop and the columnar arrays')
+    parser.add_argument(
+        '--num-imgs', type=int, default=5000, help='number of images')
+    parser.add_argument(
+        '--num-classes',
+        type=int,
+        default=1203,
+        help='number of classes, 1203 for LVIS v1')
+    parser.add_argument(
+        '--max-per-img',
+        type=int,
+        default=300,
+        help='number of detections per image')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def synthetic_results(num_imgs, num_classes, max_per_img, rng):
+    results = []
+    for _ in range(num_imgs):
+        labels = rng.randint(0, num_classes, max_per_img)
+        x1y1 = rng.uniform(0, 600, size=(max_per_img, 2))
+        wh = rng.uniform(1, 200, size=(max_per_img, 2))
+        scores = rng.uniform(size=(max_per_img, 1))
+        bboxes = np.hstack([x1y1, x1y1 + wh, scores]).astype(np.float32)
+        results.append([bboxes[labels == i] for i in range(num_classes)])
+    return results
+
+
+def per_box_det2json(dataset, results):
+    """The per box conversion that ``_det2json`` used to do."""
+    json_results = []
+    for idx in range(len(dataset)):
+        img_id = dataset.img_ids[idx]
+        result = results[idx]
+        for label in range(len(result)):
+            bboxes = result[label]
+            for i in range(bboxes.shape[0]):
+                data = dict()
+                data['image_id'] = img_id
+                data['bbox'] = dataset.xyxy2xywh(bboxes[i])
+                data['score'] = float(bboxes[i][4])
+                data['category_id'] = dataset.cat_ids[label]
+                json_results.append(data)
+    return json_results
+
+
+def main():
+    args = parse_args()
+    rng = np.random.RandomState(args.seed)
+    results = synthetic_results(args.num_imgs, args.num_classes,
+                                args.max_per_img, rng)
+    # only the ids are needed to convert the results
+    dataset = CocoDataset.__new__(CocoDataset)
+    dataset.img_ids = list(range(1, args.num_imgs + 1))
+    dataset.cat_ids = list(range(1, args.num_classes + 1))
+    dataset.data_infos = dataset.img_ids
+    print(f'{args.num_imgs} images, {args.num_classes} classes, '
+          f'{args.num_imgs * args.max_per_img} boxes')
+
+    tmp_dir = tempfile.TemporaryDirectory()
+    per_box_file = osp.join(tmp_dir.name, 'per_box.bbox.json')
+    start = time.perf_counter()
+    json_results = per_box_det2json(dataset, results)
+    convert_time = time.perf_counter() - start
+    mmcv.dump(json_results, per_box_file)
+    per_box_time = time.perf_counter() - start
+    print(f'per box: convert {convert_time:.2f} s, '
+          f'convert + dump {per_box_time:.2f} s')
+    del json_results
+
+    start = time.perf_counter()
+    dets = dataset._det2array(results)
+    convert_time = time.perf_counter() - start
+    start = time.perf_counter()
+    columnar_file = dataset.results2json(results,
+                                         osp.join(tmp_dir.name,
+                                                  'columnar'))['bbox']
+    columnar_time = time.perf_counter() - start
+    print(f'columnar: convert {convert_time:.2f} s, '
+          f'convert + dump {columnar_time:.2f} s')
+    print(f'speedup of convert + dump: {per_box_time / columnar_time:.1f}x')
+
+    with open(per_box_file) as f1, open(columnar_file) as f2:
+        assert f1.read() == f2.read(), 'json files differ'
+    print(f'json files are identical, {len(dets)} boxes')
+    tmp_dir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
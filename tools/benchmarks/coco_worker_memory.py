@@ -0,0 +1,104 @@
+import argparse
+import os
+import time
+from collections import defaultdict
+
+from torch.utils.data import DataLoader, Dataset
+
+from mmdet.datasets import DATASETS
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark host memory of dataloader workers reading '
+        'COCO style annotations with and without compact annotations')
+    parser.add_argument('ann_file', help='COCO style annotation file')
+    parser.add_argument(
+        '--dataset-type', default='CocoDataset', help='type of the dataset')
+    parser.add_argument(
+        '--workers', type=int, default=8, help='number of workers')
+    parser.add_argument(
+        '--epochs',
+        type=int,
+        default=1,
+        help='passes over the annotations of all images')
+    parser.add_argument(
+        '--compact-ann-dir',
+        help='directory to dump and memory-map the compact annotations')
+    args = parser.parse_args()
+    return args
+
+
+def memory_usage():
+    """Get RSS and unique set size (private pages) of this process in MB."""
+    usage = dict(rss=0, uss=0)
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            key, value = line.split(':', 1)
+            if key == 'Rss':
+                usage['rss'] += int(value.split()[0])
+            elif key in ['Private_Clean', 'Private_Dirty']:
+                usage['uss'] += int(value.split()[0])
+    return {key: value / 1024 for key, value in usage.items()}
+
+
+class AnnotationReader(Dataset):
+    """Read annotations of a dataset as a training dataloader would."""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, idx):
+        self.dataset.get_ann_info(idx)
+        self.dataset.get_cat_ids(idx)
+        return os.getpid(), memory_usage()
+
+
+def benchmark(dataset, num_workers, epochs):
+    reader = AnnotationReader(dataset)
+    # collate_fn is identity to avoid converting the stats to tensors
+    data_loader = DataLoader(
+        reader,
+        batch_size=1,
+        shuffle=True,
+        num_workers=num_workers,
+        collate_fn=lambda batch: batch[0])
+    worker_usage = defaultdict(dict)
+    start = time.perf_counter()
+    for _ in range(epochs):
+        for pid, usage in data_loader:
+            worker_usage[pid] = usage
+    elapsed = time.perf_counter() - start
+    return worker_usage, elapsed
+
+
+def main():
+    args = parse_args()
+    dataset_cls = DATASETS.get(args.dataset_type)
+    settings = [('COCO api', dict()), ('compact', dict(compact_ann=True))]
+    if args.compact_ann_dir is not None:
+        settings.append(
+            ('compact mmap', dict(compact_ann_dir=args.compact_ann_dir)))
+    for name, kwargs in settings:
+        dataset = dataset_cls(ann_file=args.ann_file, pipeline=[], **kwargs)
+        main_usage = memory_usage()
+        worker_usage, elapsed = benchmark(dataset, args.workers, args.epochs)
+        rss = sum(u['rss'] for u in worker_usage.values()) / len(worker_usage)
+        uss = sum(u['uss'] for u in worker_usage.values()) / len(worker_usage)
+        print(f'{name}: main process RSS {main_usage["rss"]:.0f} MB, '
+              f'per worker RSS {rss:.0f} MB, '
+              f'per worker private {uss:.0f} MB, '
+              f'{len(dataset) * args.epochs / elapsed:.0f} img/s')
+        if dataset.compact_anns is not None:
+            nbytes = dataset.compact_anns.nbytes / 1024**2
+            print(f'{name}: compact annotations take {nbytes:.0f} MB')
+        del dataset
+    print('Private memory is what each worker really adds on top of the '
+          'pages shared with the main process.')
+
+
+if __name__ == '__main__':
+    main()
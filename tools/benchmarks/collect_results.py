@@ -0,0 +1,120 @@
+import argparse
+import os.path as osp
+import resource
+import tempfile
+import time
+
+import numpy as np
+import torch.distributed as dist
+import torch.multiprocessing as mp
+
+from mmdet.apis.test import (ChunkedResults, ChunkedResultWriter,
+                             collect_results_cpu, collect_results_gpu,
+                             get_tmpdir)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the peak memory of rank 0 when collecting '
+        'instance segmentation results over a gloo process group')
+    parser.add_argument(
+        '--num-imgs', type=int, default=1000, help='number of images')
+    parser.add_argument(
+        '--num-classes', type=int, default=1203, help='number of classes')
+    parser.add_argument(
+        '--num-dets', type=int, default=300, help='detections per image')
+    parser.add_argument(
+        '--world-size', type=int, default=2, help='number of ranks')
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=50,
+        help='number of results in each chunk file')
+    args = parser.parse_args()
+    return args
+
+
+def rss():
+    """Get the current and the peak RSS of this process in MB."""
+    with open('/proc/self/statm') as f:
+        current = int(f.read().split()[1]) * resource.getpagesize()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return current / 2**20, peak / 2**20
+
+
+def synthetic_result(idx, num_classes, num_dets, rng):
+    """Mask results of an image, with RLEs of about 300 bytes like LVIS."""
+    labels = rng.randint(0, num_classes, num_dets)
+    bbox_results, segm_results = [], []
+    for label in range(num_classes):
+        num = int((labels == label).sum())
+        bboxes = rng.rand(num, 5).astype(np.float32)
+        bboxes[:, 4] = idx
+        bbox_results.append(bboxes)
+        segm_results.append([
+            dict(size=[800, 1333], counts=rng.bytes(300)) for _ in range(num)
+        ])
+    return bbox_results, segm_results
+
+
+def run(rank, world_size, mode, args, tmpdir, queue):
+    dist.init_process_group(
+        'gloo',
+        init_method=f'file://{osp.join(tmpdir, mode)}',
+        rank=rank,
+        world_size=world_size)
+    rng = np.random.RandomState(rank)
+    inds = range(rank, args.num_imgs, world_size)
+    chunk_dir = get_tmpdir(osp.join(tmpdir, f'{mode}_chunks'))
+    start_rss, _ = rss()
+    start = time.perf_counter()
+    if mode == 'chunked':
+        results = ChunkedResultWriter(chunk_dir, args.chunk_size)
+    else:
+        results = []
+    for idx in inds:
+        results.extend(
+            [synthetic_result(idx, args.num_classes, args.num_dets, rng)])
+    if mode == 'chunked':
+        results.flush()
+        dist.barrier()
+        results = ChunkedResults(chunk_dir, args.num_imgs, args.chunk_size,
+                                 world_size) if rank == 0 else None
+    elif mode == 'cpu':
+        results = collect_results_cpu(results, args.num_imgs, chunk_dir)
+    else:
+        results = collect_results_gpu(results, args.num_imgs)
+    if rank == 0:
+        # consume the results in dataset order, e.g. to format them
+        for idx, (bbox_results, _) in enumerate(results):
+            assert all((bboxes[:, 4] == idx).all() for bboxes in bbox_results)
+        elapsed = time.perf_counter() - start
+        queue.put((elapsed, rss()[1] - start_rss))
+        if mode == 'chunked':
+            results.close()
+    dist.barrier()
+    dist.destroy_process_group()
+
+
+def main():
+    args = parse_args()
+    ctx = mp.get_context('spawn')
+    queue = ctx.SimpleQueue()
+    print(f'{args.num_imgs} images with {args.num_dets} masks each over '
+          f'{args.world_size} gloo ranks')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for mode in ['cpu', 'gpu', 'chunked']:
+            mp.spawn(
+                run,
+                args=(args.world_size, mode, args, tmpdir, queue),
+                nprocs=args.world_size)
+            elapsed, peak = queue.get()
+            name = 'gpu (cpu tensors)' if mode == 'gpu' else mode
+            print(
+                f'{name:<20} time {elapsed:.1f}s, '
+                f'rank 0 peak RSS increase {peak:.0f}MB',
+                flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import time
+
+import numpy as np
+
+from mmdet.core import eval_map
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the pool based and vectorized eval_map')
+    parser.add_argument(
+        '--num-imgs', type=int, default=5000, help='number of images')
+    parser.add_argument(
+        '--num-classes', type=int, default=200, help='number of classes')
+    parser.add_argument(
+        '--num-gts', type=int, default=10, help='max gts per image')
+    parser.add_argument(
+        '--num-dets',
+        type=int,
+        default=100,
+        help='number of detections per image')
+    parser.add_argument(
+        '--nproc', type=int, default=4, help='processes of the pool path')
+    parser.add_argument(
+        '--scale-ranges',
+        action='store_true',
+        help='whether to evaluate with COCO-style scale ranges')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def random_boxes(rng, num, scale=800):
+    xy = rng.uniform(0, scale, (num, 2))
+    wh = rng.uniform(4, scale / 4, (num, 2))
+    return np.hstack([xy, xy + wh]).astype(np.float32)
+
+
+def synthetic_results(num_imgs, num_classes, num_gts, num_dets, seed=0):
+    """Generate detections that partially overlap with random gts."""
+    rng = np.random.RandomState(seed)
+    det_results, annotations = [], []
+    for _ in range(num_imgs):
+        n = rng.randint(1, num_gts + 1)
+        gt_bboxes = random_boxes(rng, n)
+        gt_labels = rng.randint(0, num_classes, n)
+        annotations.append(
+            dict(
+                bboxes=gt_bboxes,
+                labels=gt_labels,
+                bboxes_ignore=random_boxes(rng, 1),
+                labels_ignore=rng.randint(0, num_classes, 1)))
+        det_labels = np.concatenate(
+            [gt_labels,
+             rng.randint(0, num_classes, max(num_dets - n, 0))])
+        det_bboxes = np.concatenate(
+            [gt_bboxes, random_boxes(rng, max(num_dets - n, 0))])
+        det_bboxes += rng.normal(0, 4, det_bboxes.shape).astype(np.float32)
+        scores = rng.rand(det_bboxes.shape[0], 1).astype(np.float32)
+        det_bboxes = np.hstack([det_bboxes, scores])
+        det_results.append(
+            [det_bboxes[det_labels == i] for i in range(num_classes)])
+    return det_results, annotations
+
+
+def main():
+    args = parse_args()
+    det_results, annotations = synthetic_results(args.num_imgs,
+                                                 args.num_classes,
+                                                 args.num_gts, args.num_dets,
+                                                 args.seed)
+    scale_ranges = [(0, 32), (32, 96),
+                    (96, 1e5)] if args.scale_ranges else None
+
+    start = time.perf_counter()
+    pool_map, _ = eval_map(
+        det_results,
+        annotations,
+        scale_ranges=scale_ranges,
+        logger='silent',
+        nproc=args.nproc)
+    pool_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vec_map, _ = eval_map(
+        det_results,
+        annotations,
+        scale_ranges=scale_ranges,
+        logger='silent',
+        vectorized=True)
+    vec_time = time.perf_counter() - start
+
+    print(f'pool (nproc={args.nproc}): {pool_time:.2f} s, mAP: {pool_map}')
+    print(f'vectorized: {vec_time:.2f} s, mAP: {vec_map}')
+    print(f'speedup: {pool_time / vec_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
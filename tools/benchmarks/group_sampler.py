@@ -0,0 +1,169 @@
+import argparse
+import math
+import time
+import tracemalloc
+
+import numpy as np
+import torch
+
+from mmdet.datasets.samplers import DistributedGroupSampler, GroupSampler
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the index generation of the group samplers')
+    parser.add_argument(
+        '--num-samples',
+        type=int,
+        default=10000000,
+        help='number of samples of the dataset')
+    parser.add_argument(
+        '--samples-per-gpu', type=int, default=2, help='images per batch')
+    parser.add_argument(
+        '--num-replicas', type=int, default=8, help='number of processes')
+    parser.add_argument(
+        '--start-iter',
+        type=int,
+        default=100000,
+        help='iteration to resume from')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+class FlagDataset(object):
+
+    def __init__(self, flag):
+        self.flag = flag
+
+    def __len__(self):
+        return len(self.flag)
+
+
+def group_sampler_indices(sampler):
+    """What ``GroupSampler.__iter__`` used to do."""
+    indices = []
+    for i, size in enumerate(sampler.group_sizes):
+        if size == 0:
+            continue
+        indice = np.where(sampler.flag == i)[0]
+        np.random.shuffle(indice)
+        num_extra = int(np.ceil(size / sampler.samples_per_gpu)
+                        ) * sampler.samples_per_gpu - len(indice)
+        indice = np.concatenate([indice, np.random.choice(indice, num_extra)])
+        indices.append(indice)
+    indices = np.concatenate(indices)
+    spg = sampler.samples_per_gpu
+    indices = [
+        indices[i * spg:(i + 1) * spg]
+        for i in np.random.permutation(range(len(indices) // spg))
+    ]
+    indices = np.concatenate(indices)
+    return iter(indices.astype(np.int64).tolist())
+
+
+def distributed_group_sampler_indices(sampler):
+    """What ``DistributedGroupSampler.__iter__`` used to do."""
+    g = torch.Generator()
+    g.manual_seed(sampler.epoch)
+    spg = sampler.samples_per_gpu
+    indices = []
+    for i, size in enumerate(sampler.group_sizes):
+        if size > 0:
+            indice = np.where(sampler.flag == i)[0]
+            indice = indice[list(
+                torch.randperm(int(size), generator=g).numpy())].tolist()
+            extra = int(math.ceil(size * 1.0 / spg / sampler.num_replicas)
+                        ) * spg * sampler.num_replicas - len(indice)
+            tmp = indice.copy()
+            for _ in range(extra // size):
+                indice.extend(tmp)
+            indice.extend(tmp[:extra % size])
+            indices.extend(indice)
+    indices = [
+        indices[j]
+        for i in list(torch.randperm(len(indices) // spg, generator=g))
+        for j in range(i * spg, (i + 1) * spg)
+    ]
+    offset = sampler.num_samples * sampler.rank
+    return iter(indices[offset:offset + sampler.num_samples])
+
+
+def measure(make_iter, skip=0):
+    """Time to the first batch, time of the whole epoch and peak memory.
+
+    The peak memory is traced in a second pass since tracing slows down the
+    allocations.
+    """
+    start = time.perf_counter()
+    it = make_iter()
+    for _ in range(skip):
+        next(it)
+    indices = [next(it)]
+    first_time = time.perf_counter() - start
+    indices.extend(it)
+    total_time = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in make_iter():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return indices, first_time, total_time, peak
+
+
+def report(name, old, new):
+    old_indices, old_first, old_total, old_peak = old
+    new_indices, new_first, new_total, new_peak = new
+    assert old_indices == new_indices
+    print(f'{name}:')
+    print(f'  first batch: {old_first:.2f} s -> {new_first:.3f} s')
+    print(f'  full epoch:  {old_total:.2f} s -> {new_total:.2f} s '
+          f'({old_total / new_total:.1f}x)')
+    print(f'  peak memory: {old_peak / 2**20:.0f} MB -> '
+          f'{new_peak / 2**20:.0f} MB')
+
+
+def main():
+    args = parse_args()
+    rng = np.random.RandomState(args.seed)
+    # about 2/3 of COCO images are landscape
+    flag = (rng.rand(args.num_samples) < 0.33).astype(np.uint8)
+    dataset = FlagDataset(flag)
+    spg = args.samples_per_gpu
+    skip = args.start_iter * spg
+    print(f'{args.num_samples} samples, {spg} samples per gpu, '
+          f'resuming from iter {args.start_iter}')
+
+    sampler = GroupSampler(dataset, spg)
+
+    # both passes of the same epoch draw the same indices
+    def old_group_iter():
+        np.random.seed(args.seed)
+        return group_sampler_indices(sampler)
+
+    def new_group_iter():
+        np.random.seed(args.seed)
+        sampler.set_start_iter(args.start_iter)
+        return iter(sampler)
+
+    old = measure(old_group_iter, skip)
+    new = measure(new_group_iter)
+    report('GroupSampler', old, new)
+
+    sampler = DistributedGroupSampler(
+        dataset, spg, num_replicas=args.num_replicas, rank=1)
+    sampler.set_epoch(1)
+
+    def new_distributed_iter():
+        sampler.set_start_iter(args.start_iter)
+        return iter(sampler)
+
+    old = measure(lambda: distributed_group_sampler_indices(sampler), skip)
+    new = measure(new_distributed_iter)
+    report(f'DistributedGroupSampler ({args.num_replicas} replicas)', old, new)
+    print('the indices are identical')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+import argparse
+import time
+
+import numpy as np
+import torch
+from mmcv.parallel import collate
+
+from mmdet.apis import InferenceSession, init_detector
+from mmdet.datasets import replace_ImageToTensor
+from mmdet.datasets.pipelines import Compose
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the CPU latency and throughput of '
+        'inference_detector and InferenceSession')
+    parser.add_argument(
+        '--config', default='configs/ssd/ssd300_coco.py', help='config file')
+    parser.add_argument(
+        '--batch-sizes',
+        type=int,
+        nargs='+',
+        default=[1, 2, 4, 8, 16],
+        help='numbers of images per call')
+    parser.add_argument(
+        '--img-shape',
+        type=int,
+        nargs=2,
+        default=[480, 640],
+        help='shape (h, w) of the input images')
+    parser.add_argument(
+        '--num-workers',
+        type=int,
+        default=4,
+        help='number of preprocessing threads of the session')
+    parser.add_argument(
+        '--preprocess-only',
+        action='store_true',
+        help='only benchmark the preprocessing of the images')
+    parser.add_argument(
+        '--repeat', type=int, default=3, help='number of repeated runs')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def per_call_prepare(model, img):
+    """The preprocessing of inference_detector, which rebuilt the test
+    pipeline every call."""
+    cfg = model.cfg.copy()
+    cfg.data.test.pipeline = [
+        dict(pipeline) for pipeline in cfg.data.test.pipeline
+    ]
+    cfg.data.test.pipeline[0]['type'] = 'LoadImageFromWebcam'
+    cfg.data.test.pipeline = replace_ImageToTensor(cfg.data.test.pipeline)
+    test_pipeline = Compose(cfg.data.test.pipeline)
+    data = test_pipeline(dict(img=img))
+    data = collate([data], samples_per_gpu=1)
+    data['img_metas'] = [img_metas.data[0] for img_metas in data['img_metas']]
+    data['img'] = [img.data[0] for img in data['img']]
+    return data
+
+
+def per_call_inference_detector(model, img):
+    data = per_call_prepare(model, img)
+    with torch.no_grad():
+        result = model(return_loss=False, rescale=True, **data)[0]
+    return result
+
+
+def timeit(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    args = parse_args()
+    rng = np.random.RandomState(args.seed)
+    model = init_detector(args.config, device='cpu')
+    session = InferenceSession(model, num_workers=args.num_workers)
+    max_batch_size = max(args.batch_sizes)
+    imgs = [
+        rng.randint(0, 256, (*args.img_shape, 3), dtype=np.uint8)
+        for _ in range(max_batch_size)
+    ]
+    # warm up
+    session(imgs[:2])
+
+    pipeline_time = timeit(
+        lambda: Compose(replace_ImageToTensor(model.cfg.data.test.pipeline)),
+        args.repeat)
+    print(f'building the test pipeline: {pipeline_time * 1000:.2f} ms')
+    benchmarks = [('preprocessing', per_call_prepare, session.prepare)]
+    if not args.preprocess_only:
+        benchmarks.append(('inference', per_call_inference_detector, session))
+    for name, per_call_func, session_func in benchmarks:
+        print(f'{name:<12}{"per call":>22}{"session":>22}{"speedup":>10}')
+        for batch_size in args.batch_sizes:
+            batch = imgs[:batch_size]
+            per_call_time = timeit(
+                lambda: [per_call_func(model, img) for img in batch],
+                args.repeat)
+            session_time = timeit(lambda: session_func(batch), args.repeat)
+            per_call_str = (f'{per_call_time * 1000:.1f}ms '
+                            f'{batch_size / per_call_time:.1f}img/s')
+            session_str = (f'{session_time * 1000:.1f}ms '
+                           f'{batch_size / session_time:.1f}img/s')
+            print(f'{f"batch {batch_size}":<12}{per_call_str:>22}'
+                  f'{session_str:>22}{per_call_time / session_time:>9.2f}x')
+    if args.preprocess_only:
+        return
+
+    results = session(imgs[:2])
+    expected_results = [
+        per_call_inference_detector(model, img) for img in imgs[:2]
+    ]
+    for result, expected_result in zip(results, expected_results):
+        for bboxes, expected_bboxes in zip(result, expected_result):
+            assert np.allclose(bboxes, expected_bboxes, atol=1e-3)
+    print('results of the session match those of the per call inference')
+
+
+if __name__ == '__main__':
+    main()
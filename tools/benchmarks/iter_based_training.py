@@ -0,0 +1,104 @@
+import argparse
+import time
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+from mmdet.datasets import build_dataloader
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the data loading throughput of epoch-based '
+        'and iteration-based training over epoch boundaries')
+    parser.add_argument(
+        '--num-imgs', type=int, default=200, help='images per epoch')
+    parser.add_argument(
+        '--epochs', type=int, default=5, help='number of epochs')
+    parser.add_argument(
+        '--samples-per-gpu', type=int, default=2, help='images per batch')
+    parser.add_argument(
+        '--workers-per-gpu', type=int, default=4, help='number of workers')
+    parser.add_argument(
+        '--load-time',
+        type=float,
+        default=0.01,
+        help='cpu time to load an image in seconds')
+    parser.add_argument(
+        '--step-time',
+        type=float,
+        default=0.05,
+        help='time of a training step in seconds, which is spent waiting '
+        'like for the gpu')
+    args = parser.parse_args()
+    return args
+
+
+class SyntheticDataset(Dataset):
+    """Images whose loading keeps the cpu busy for ``load_time``."""
+
+    def __init__(self, num_imgs, load_time):
+        self.load_time = load_time
+        # the aspect ratio groups of the images
+        self.flag = (np.arange(num_imgs) % 3 == 0).astype(np.uint8)
+
+    def __len__(self):
+        return len(self.flag)
+
+    def __getitem__(self, idx):
+        img = np.zeros((256, 256, 3), dtype=np.float32)
+        start = time.perf_counter()
+        while time.perf_counter() - start < self.load_time:
+            img += 1
+        return dict(img=torch.from_numpy(img), idx=idx)
+
+
+def train(data_loader, num_iters, step_time, epoch_based):
+    """Run the training steps and record the wait for each batch."""
+    waits = []
+    data_iter = iter(data_loader)
+    start = time.perf_counter()
+    for i in range(num_iters):
+        if epoch_based and i > 0 and i % len(data_loader) == 0:
+            # what EpochBasedRunner does at the end of an epoch
+            data_iter = iter(data_loader)
+        wait_start = time.perf_counter()
+        next(data_iter)
+        waits.append(time.perf_counter() - wait_start)
+        time.sleep(step_time)
+    return time.perf_counter() - start, np.array(waits)
+
+
+def main():
+    args = parse_args()
+    dataset = SyntheticDataset(args.num_imgs, args.load_time)
+    print(f'{args.epochs} epochs of {args.num_imgs} images, '
+          f'{args.workers_per_gpu} workers, {args.samples_per_gpu} images '
+          'per batch')
+    for runner_type in ['EpochBasedRunner', 'IterBasedRunner']:
+        epoch_based = runner_type == 'EpochBasedRunner'
+        data_loader = build_dataloader(
+            dataset,
+            args.samples_per_gpu,
+            args.workers_per_gpu,
+            dist=False,
+            seed=0,
+            runner_type=runner_type,
+            persistent_workers=not epoch_based)
+        iters_per_epoch = len(data_loader)
+        num_iters = iters_per_epoch * args.epochs
+        total_time, waits = train(data_loader, num_iters, args.step_time,
+                                  epoch_based)
+        # the first batch of each epoch but the first one
+        boundary = waits[iters_per_epoch::iters_per_epoch]
+        steady = np.delete(waits, np.arange(0, num_iters, iters_per_epoch))
+        imgs_per_sec = num_iters * args.samples_per_gpu / total_time
+        print(f'{runner_type}: {imgs_per_sec:.1f} images/s, '
+              f'data wait at epoch boundaries {boundary.mean() * 1000:.0f} '
+              f'ms (max {boundary.max() * 1000:.0f} ms), '
+              f'otherwise {steady.mean() * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
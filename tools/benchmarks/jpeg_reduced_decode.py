@@ -0,0 +1,97 @@
+import argparse
+import copy
+import os.path as osp
+import tempfile
+import timeit
+
+import cv2
+import numpy as np
+from mmcv.utils import build_from_cfg
+
+from mmdet.datasets.builder import PIPELINES
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark loading and resizing JPEG images decoded at '
+        'a reduced resolution against the full resolution')
+    parser.add_argument(
+        '--shapes',
+        type=int,
+        nargs='+',
+        default=[2160, 3840, 1080, 1920, 480, 640],
+        help='image shapes as a flat list of h w pairs')
+    parser.add_argument(
+        '--img-scale',
+        type=int,
+        nargs=2,
+        default=[1333, 800],
+        help='img_scale of Resize')
+    parser.add_argument(
+        '--repeat', type=int, default=20, help='loads per shape')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def synthetic_jpeg(filename, h, w, rng):
+    """Write a JPEG image of smooth blobs and noise, with the entropy of a
+    photo rather than of pure noise."""
+    img = cv2.resize(
+        rng.randint(0, 256, (h // 32 + 1, w // 32 + 1, 3)).astype(np.uint8),
+        (w, h),
+        interpolation=cv2.INTER_CUBIC)
+    img = np.clip(img + rng.normal(0, 8, img.shape), 0, 255).astype(np.uint8)
+    cv2.imwrite(filename, img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+
+
+def main():
+    args = parse_args()
+    img_scale = tuple(args.img_scale)
+    resize = build_from_cfg(
+        dict(type='Resize', img_scale=img_scale, keep_ratio=True), PIPELINES)
+    full_load = build_from_cfg(dict(type='LoadImageFromFile'), PIPELINES)
+    reduced_load = build_from_cfg(
+        dict(type='LoadImageFromFile', target_scale=img_scale), PIPELINES)
+
+    rng = np.random.RandomState(args.seed)
+    shapes = np.array(args.shapes).reshape(-1, 2)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for h, w in shapes:
+            filename = f'{h}x{w}.jpg'
+            synthetic_jpeg(osp.join(tmp_dir, filename), h, w, rng)
+            results = dict(
+                img_prefix=tmp_dir,
+                img_info=dict(filename=filename),
+                gt_bboxes=np.array([[w * 0.1, h * 0.2, w * 0.7, h * 0.9]],
+                                   dtype=np.float32),
+                bbox_fields=['gt_bboxes'])
+
+            def full(results=results):
+                return resize(full_load(copy.deepcopy(results)))
+
+            def reduced(results=results):
+                return resize(reduced_load(copy.deepcopy(results)))
+
+            expected, actual = full(), reduced()
+            assert actual['img_shape'] == expected['img_shape']
+            assert actual['ori_shape'] == expected['ori_shape']
+            assert np.allclose(
+                actual['gt_bboxes'], expected['gt_bboxes'], atol=1e-2)
+            mse = np.mean(
+                (actual['img'].astype(np.float64) - expected['img'])**2)
+            psnr = 10 * np.log10(255**2 / max(mse, 1e-12))
+
+            full_time = timeit.timeit(full, number=args.repeat) / args.repeat
+            reduced_time = timeit.timeit(
+                reduced, number=args.repeat) / args.repeat
+            print(f'{h}x{w} -> {actual["img_shape"][0]}x'
+                  f'{actual["img_shape"][1]}: full decode + Resize '
+                  f'{full_time * 1000:.1f} ms, reduced decode + Resize '
+                  f'{reduced_time * 1000:.1f} ms '
+                  f'({full_time / reduced_time:.1f}x), '
+                  f'PSNR {psnr:.1f} dB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import multiprocessing as mp
+import resource
+import time
+
+import mmcv
+import numpy as np
+import torch
+
+from mmdet.core import encode_mask_results
+from mmdet.models.roi_heads.mask_heads import FCNMaskHead
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark pasting the masks of the detections into RLEs '
+        'against pasting image sized bitmaps and encoding them')
+    parser.add_argument(
+        '--num-dets', type=int, default=100, help='detections per image')
+    parser.add_argument(
+        '--img-shape',
+        type=int,
+        nargs=2,
+        default=[800, 1333],
+        help='h w of the image the masks are pasted into')
+    parser.add_argument(
+        '--num-classes', type=int, default=80, help='number of classes')
+    parser.add_argument(
+        '--repeat', type=int, default=10, help='images to process')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def dummy_detections(args):
+    """Mask predictions and boxes of COCO-like sizes for one image."""
+    rng = np.random.RandomState(args.seed)
+    h, w = args.img_shape
+    sizes = np.exp(
+        rng.uniform(np.log(16), np.log(min(h, w) / 2), (args.num_dets, 2)))
+    x0 = rng.uniform(0, w - sizes[:, 0])
+    y0 = rng.uniform(0, h - sizes[:, 1])
+    bboxes = np.stack([x0, y0, x0 + sizes[:, 0], y0 + sizes[:, 1]], axis=1)
+    det_bboxes = torch.from_numpy(
+        np.hstack([bboxes, rng.rand(args.num_dets, 1)]).astype(np.float32))
+    det_labels = torch.from_numpy(
+        rng.randint(0, args.num_classes, args.num_dets))
+    torch.manual_seed(args.seed)
+    mask_pred = torch.randn(args.num_dets, args.num_classes, 28, 28)
+    return mask_pred, det_bboxes, det_labels
+
+
+def run(mask_format, args, queue):
+    """Paste and encode the masks of one image ``args.repeat`` times and
+    report the time and the increase of the peak RSS in MB."""
+    mask_head = FCNMaskHead(num_classes=args.num_classes)
+    rcnn_test_cfg = mmcv.Config(
+        dict(mask_thr_binary=0.5, mask_format=mask_format))
+    mask_pred, det_bboxes, det_labels = dummy_detections(args)
+    ori_shape = tuple(args.img_shape) + (3, )
+
+    def process():
+        segm_results = mask_head.get_seg_masks(mask_pred, det_bboxes,
+                                               det_labels, rcnn_test_cfg,
+                                               ori_shape, 1.0, True)
+        # as in single_gpu_test
+        return encode_mask_results(segm_results)
+
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        results = process()
+    elapsed = (time.perf_counter() - start) / args.repeat
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((results, elapsed, (peak_rss - base_rss) / 1024))
+
+
+def main():
+    args = parse_args()
+    torch.set_num_threads(1)
+    # each mode runs in a fresh process so that its peak memory is measured
+    # without the allocations of the other one
+    ctx = mp.get_context('spawn')
+    stats = {}
+    for mask_format in ('bitmap', 'rle'):
+        queue = ctx.Queue()
+        process = ctx.Process(target=run, args=(mask_format, args, queue))
+        process.start()
+        stats[mask_format] = queue.get()
+        process.join()
+
+    bitmap_results, bitmap_time, bitmap_mem = stats['bitmap']
+    rle_results, rle_time, rle_mem = stats['rle']
+    assert rle_results == bitmap_results
+    h, w = args.img_shape
+    print(f'{args.num_dets} detections on {h}x{w}: '
+          f'bitmap + encode {bitmap_time * 1000:.1f} ms, '
+          f'peak +{bitmap_mem:.1f} MB; '
+          f'rle {rle_time * 1000:.1f} ms, peak +{rle_mem:.1f} MB '
+          f'({bitmap_time / rle_time:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
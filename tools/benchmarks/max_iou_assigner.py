@@ -0,0 +1,137 @@
+import argparse
+import math
+import time
+
+import torch
+
+from mmdet.core import MaxIoUAssigner, build_anchor_generator
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the per image and the batched MaxIoUAssigner '
+        'on crowded images')
+    parser.add_argument(
+        '--num-imgs', type=int, default=2, help='number of images per batch')
+    parser.add_argument(
+        '--num-gts',
+        type=int,
+        default=500,
+        help='maximum number of gts per image')
+    parser.add_argument(
+        '--img-shape',
+        type=int,
+        nargs=2,
+        default=[800, 1088],
+        help='padded image shape (h, w)')
+    parser.add_argument(
+        '--gt-chunk-size',
+        type=int,
+        default=64,
+        help='number of gts whose overlaps are computed at a time')
+    parser.add_argument(
+        '--repeat', type=int, default=5, help='number of repeated runs')
+    parser.add_argument(
+        '--device', default='cuda' if torch.cuda.is_available() else 'cpu')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def synthetic_crowd(num_imgs, num_gts, img_shape, device, rng):
+    """Small and densely packed gts like in CrowdHuman or SKU-110K."""
+    h, w = img_shape
+    gt_bboxes_list = []
+    for _ in range(num_imgs):
+        num = int(
+            torch.randint(num_gts // 2, num_gts + 1, (1, ), generator=rng))
+        wh = torch.rand(num, 2, generator=rng) * 80 + 16
+        xy = torch.rand(num, 2, generator=rng) * (torch.tensor([w, h]) - wh)
+        gt_bboxes_list.append(torch.cat([xy, xy + wh], dim=1).to(device))
+    return gt_bboxes_list
+
+
+def timeit(func, repeat, device):
+    times = []
+    for _ in range(repeat):
+        if device != 'cpu':
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        results = func()
+        if device != 'cpu':
+            torch.cuda.synchronize()
+        times.append(time.perf_counter() - start)
+    return min(times), results
+
+
+def main():
+    args = parse_args()
+    rng = torch.Generator().manual_seed(args.seed)
+    # RetinaNet anchors
+    anchor_generator = build_anchor_generator(
+        dict(
+            type='AnchorGenerator',
+            octave_base_scale=4,
+            scales_per_octave=3,
+            ratios=[0.5, 1.0, 2.0],
+            strides=[8, 16, 32, 64, 128]))
+    h, w = args.img_shape
+    featmap_sizes = [(-(-h // s), -(-w // s)) for s in (8, 16, 32, 64, 128)]
+    anchors = torch.cat(
+        anchor_generator.grid_anchors(featmap_sizes, args.device))
+    gt_bboxes_list = synthetic_crowd(args.num_imgs, args.num_gts,
+                                     args.img_shape, args.device, rng)
+    print(f'{args.num_imgs} images, {len(anchors)} anchors, '
+          f'{[len(gt_bboxes) for gt_bboxes in gt_bboxes_list]} gts')
+
+    cfg = dict(pos_iou_thr=0.5, neg_iou_thr=0.4, min_pos_iou=0)
+    per_image_assigner = MaxIoUAssigner(**cfg)
+    batched_assigner = MaxIoUAssigner(**cfg, gt_chunk_size=args.gt_chunk_size)
+
+    def per_image():
+        return [
+            per_image_assigner.assign(anchors, gt_bboxes)
+            for gt_bboxes in gt_bboxes_list
+        ]
+
+    def batched():
+        return batched_assigner.assign_batch(anchors, gt_bboxes_list)
+
+    def memory(func):
+        if args.device == 'cpu':
+            return ''
+        torch.cuda.reset_peak_memory_stats()
+        func()
+        peak_memory = torch.cuda.max_memory_allocated() / 2**20
+        return f', peak memory {peak_memory:.0f}MB'
+
+    per_image_time, expected_results = timeit(per_image, args.repeat,
+                                              args.device)
+    print(f'per image: {per_image_time * 1000:.1f} ms{memory(per_image)}')
+    if args.device != 'cpu':
+        per_image_assigner.gpu_assign_thr = 1
+        cpu_time, _ = timeit(per_image, args.repeat, args.device)
+        print(f'per image with CPU fallback: {cpu_time * 1000:.1f} ms')
+    batched_time, results = timeit(batched, args.repeat, args.device)
+    print(f'batched with gt_chunk_size={args.gt_chunk_size}: '
+          f'{batched_time * 1000:.1f} ms{memory(batched)}')
+    print(f'speedup: {per_image_time / batched_time:.1f}x')
+    max_num_gts = max(len(gt_bboxes) for gt_bboxes in gt_bboxes_list)
+    if args.gt_chunk_size > 0:
+        chunk_size = args.gt_chunk_size
+    else:
+        chunk_size = math.ceil(max_num_gts / args.num_imgs)
+    overlaps_size = len(anchors) * anchors.element_size() / 2**20
+    per_image_size = max_num_gts * overlaps_size
+    batched_size = args.num_imgs * min(chunk_size, max_num_gts) * overlaps_size
+    print(f'overlaps held at a time: per image {per_image_size:.0f}MB, '
+          f'batched {batched_size:.0f}MB')
+
+    for result, expected_result in zip(results, expected_results):
+        assert torch.equal(result.gt_inds, expected_result.gt_inds)
+        assert torch.equal(result.max_overlaps, expected_result.max_overlaps)
+    print('assign results are identical')
+
+
+if __name__ == '__main__':
+    main()
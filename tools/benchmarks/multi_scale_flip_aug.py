@@ -0,0 +1,94 @@
+import argparse
+import copy
+import timeit
+
+import numpy as np
+import torch
+from mmcv.utils import build_from_cfg
+
+from mmdet.datasets.builder import PIPELINES
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark MultiScaleFlipAug with the preprocessing '
+        'shared by the flips of each scale against running it for each flip')
+    parser.add_argument(
+        '--shapes',
+        type=int,
+        nargs='+',
+        default=[480, 640, 1080, 1920],
+        help='image shapes as a flat list of h w pairs')
+    parser.add_argument(
+        '--img-scales',
+        type=int,
+        nargs='+',
+        default=[1333, 640, 1333, 800, 1333, 960],
+        help='img_scale of MultiScaleFlipAug as a flat list of pairs')
+    parser.add_argument(
+        '--flip-directions',
+        nargs='+',
+        default=['horizontal'],
+        help='flip directions of MultiScaleFlipAug')
+    parser.add_argument(
+        '--repeat', type=int, default=10, help='samples per shape')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    img_norm_cfg = dict(
+        mean=[123.675, 116.28, 103.53],
+        std=[58.395, 57.12, 57.375],
+        to_rgb=True)
+    img_scales = [tuple(s) for s in np.array(args.img_scales).reshape(-1, 2)]
+    # the test pipeline of coco_detection.py after LoadImageFromFile
+    transform = dict(
+        type='MultiScaleFlipAug',
+        img_scale=img_scales,
+        flip=True,
+        flip_direction=args.flip_directions,
+        transforms=[
+            dict(type='Resize', keep_ratio=True),
+            dict(type='RandomFlip'),
+            dict(type='Normalize', **img_norm_cfg),
+            dict(type='Pad', size_divisor=32),
+            dict(type='ImageToTensor', keys=['img']),
+            dict(type='Collect', keys=['img']),
+        ])
+    separate = build_from_cfg(transform, PIPELINES)
+    shared = build_from_cfg(dict(transform, share_preprocess=True), PIPELINES)
+    num_augs = len(img_scales) * (len(args.flip_directions) + 1)
+
+    rng = np.random.RandomState(args.seed)
+    shapes = np.array(args.shapes).reshape(-1, 2)
+    for h, w in shapes:
+        img = rng.randint(0, 256, (h, w, 3)).astype(np.uint8)
+        results = dict(
+            img=img,
+            img_shape=img.shape,
+            ori_shape=img.shape,
+            pad_shape=img.shape,
+            img_fields=['img'],
+            filename=None,
+            ori_filename=None)
+
+        expected = separate(copy.deepcopy(results))['img']
+        actual = shared(copy.deepcopy(results))['img']
+        assert len(actual) == len(expected) == num_augs
+        assert all(torch.equal(a, b) for a, b in zip(actual, expected))
+
+        separate_time = timeit.timeit(
+            lambda: separate(results.copy()), number=args.repeat) / args.repeat
+        shared_time = timeit.timeit(
+            lambda: shared(results.copy()), number=args.repeat) / args.repeat
+        print(f'{h}x{w}, {num_augs} augmentations: '
+              f'separate {separate_time * 1000:.1f} ms, '
+              f'shared {shared_time * 1000:.1f} ms '
+              f'({separate_time / shared_time:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import timeit
+
+import numpy as np
+from mmcv.utils import build_from_cfg
+
+from mmdet.datasets.builder import PIPELINES
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the fused PhotoMetricDistortionNormalize '
+        'against PhotoMetricDistortion + Normalize')
+    parser.add_argument(
+        '--shapes',
+        type=int,
+        nargs='+',
+        default=[300, 300, 480, 640, 800, 1333],
+        help='image shapes as a flat list of h w pairs')
+    parser.add_argument(
+        '--repeat', type=int, default=100, help='samples per shape')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    img_norm_cfg = dict(
+        mean=[123.675, 116.28, 103.53],
+        std=[58.395, 57.12, 57.375],
+        to_rgb=True)
+    distortion = build_from_cfg(dict(type='PhotoMetricDistortion'), PIPELINES)
+    normalize = build_from_cfg(
+        dict(type='Normalize', **img_norm_cfg), PIPELINES)
+    fused = build_from_cfg(
+        dict(type='PhotoMetricDistortionNormalize', **img_norm_cfg), PIPELINES)
+
+    def separate(img):
+        # to_float32=True of LoadImageFromFile
+        results = dict(img=img.astype(np.float32), img_fields=['img'])
+        return normalize(distortion(results))['img']
+
+    def fused_transform(img):
+        return fused(dict(img=img, img_fields=['img']))['img']
+
+    rng = np.random.RandomState(args.seed)
+    shapes = np.array(args.shapes).reshape(-1, 2)
+    for h, w in shapes:
+        # no pixel is darkened below 0, where the HSV conversions of
+        # PhotoMetricDistortion are lossy
+        img = rng.randint(40, 256, (h, w, 3)).astype(np.uint8)
+        max_diff = 0
+        for seed in range(args.repeat):
+            np.random.seed(seed)
+            expected = separate(img)
+            np.random.seed(seed)
+            max_diff = max(max_diff,
+                           np.abs(fused_transform(img) - expected).max())
+        assert max_diff < 1e-3
+
+        np.random.seed(args.seed)
+        separate_time = timeit.timeit(
+            lambda: separate(img), number=args.repeat) / args.repeat
+        np.random.seed(args.seed)
+        fused_time = timeit.timeit(
+            lambda: fused_transform(img), number=args.repeat) / args.repeat
+        print(f'{h}x{w}: PhotoMetricDistortion + Normalize '
+              f'{separate_time * 1000:.2f} ms, '
+              f'PhotoMetricDistortionNormalize {fused_time * 1000:.2f} ms '
+              f'({separate_time / fused_time:.1f}x), '
+              f'max abs diff {max_diff:.1e}')
+
+
+if __name__ == '__main__':
+    main()
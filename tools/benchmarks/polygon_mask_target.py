@@ -0,0 +1,130 @@
+import argparse
+import time
+
+import mmcv
+import numpy as np
+import torch
+
+from mmdet.core import PolygonMasks, mask_target
+from mmdet.core.mask.structures import polygon_to_bitmap
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the mask targets of polygon masks')
+    parser.add_argument(
+        '--num-imgs', type=int, default=2, help='number of images per batch')
+    parser.add_argument(
+        '--num-rois', type=int, default=512, help='number of RoIs per image')
+    parser.add_argument(
+        '--pos-fraction',
+        type=float,
+        default=0.25,
+        help='fraction of the positive RoIs')
+    parser.add_argument(
+        '--num-gts', type=int, default=15, help='number of objects per image')
+    parser.add_argument(
+        '--mask-size', type=int, default=28, help='size of the mask targets')
+    parser.add_argument(
+        '--repeat', type=int, default=10, help='number of repeated runs')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def synthetic_polygons(num_gts, img_shape, rng):
+    """COCO-like objects of 1 to 3 parts with 8 to 64 vertices each."""
+    h, w = img_shape
+    masks = []
+    for _ in range(num_gts):
+        cx, cy = rng.uniform(0, w), rng.uniform(0, h)
+        radius = rng.uniform(10, 200)
+        polys = []
+        for _ in range(rng.choice([1, 1, 1, 2, 3])):
+            num_points = rng.randint(8, 65)
+            angles = np.sort(rng.uniform(0, 2 * np.pi, num_points))
+            radii = radius * rng.uniform(0.5, 1, num_points)
+            xs = np.clip(cx + radii * np.cos(angles), 0, w)
+            ys = np.clip(cy + radii * np.sin(angles), 0, h)
+            polys.append(np.stack([xs, ys], axis=1).ravel())
+        masks.append(polys)
+    return PolygonMasks(masks, h, w)
+
+
+def per_polygon_mask_target(pos_proposals_list, pos_assigned_gt_inds_list,
+                            gt_masks_list, cfg):
+    """The per polygon loop that ``mask_target`` used to run."""
+    mask_size = (cfg.mask_size, cfg.mask_size)
+    mask_targets = []
+    for pos_proposals, pos_assigned_gt_inds, gt_masks in zip(
+            pos_proposals_list, pos_assigned_gt_inds_list, gt_masks_list):
+        proposals_np = pos_proposals.cpu().numpy()
+        maxh, maxw = gt_masks.height, gt_masks.width
+        proposals_np[:, [0, 2]] = np.clip(proposals_np[:, [0, 2]], 0, maxw)
+        proposals_np[:, [1, 3]] = np.clip(proposals_np[:, [1, 3]], 0, maxh)
+        inds = pos_assigned_gt_inds.cpu().numpy()
+        resized_masks = gt_masks._crop_and_resize_per_polygon(
+            proposals_np, mask_size, inds)
+        bitmap_masks = np.stack([
+            polygon_to_bitmap(polys, *mask_size)
+            for polys in resized_masks.masks
+        ])
+        mask_targets.append(torch.from_numpy(bitmap_masks).float())
+    return torch.cat(mask_targets)
+
+
+def timeit(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = func()
+        times.append(time.perf_counter() - start)
+    return min(times), results
+
+
+def main():
+    args = parse_args()
+    rng = np.random.RandomState(args.seed)
+    img_shape = (800, 1216)
+    num_pos = int(args.num_rois * args.pos_fraction)
+    gt_masks_list = [
+        synthetic_polygons(args.num_gts, img_shape, rng)
+        for _ in range(args.num_imgs)
+    ]
+    pos_proposals_list = []
+    pos_assigned_gt_inds_list = []
+    for gt_masks in gt_masks_list:
+        gt_bboxes = np.array([[
+            polys[0][0::2].min(), polys[0][1::2].min(), polys[0][0::2].max(),
+            polys[0][1::2].max()
+        ] for polys in gt_masks.masks])
+        inds = rng.randint(0, len(gt_masks), num_pos)
+        # jittered gt boxes like the positive proposals of the RPN
+        wh = gt_bboxes[inds, 2:] - gt_bboxes[inds, :2]
+        jitter = rng.uniform(-0.1, 0.1, (num_pos, 4)) * np.tile(wh, 2)
+        pos_proposals_list.append(
+            torch.from_numpy(gt_bboxes[inds] + jitter).float())
+        pos_assigned_gt_inds_list.append(torch.from_numpy(inds))
+    cfg = mmcv.Config(dict(mask_size=args.mask_size))
+    num_polys = sum(
+        len(polys) for gt_masks in gt_masks_list for polys in gt_masks)
+    print(f'{args.num_imgs} images, {num_pos} positive RoIs and '
+          f'{args.num_gts} objects ({num_polys} polygons) per image')
+
+    per_polygon_time, expected_targets = timeit(
+        lambda: per_polygon_mask_target(
+            pos_proposals_list, pos_assigned_gt_inds_list, gt_masks_list, cfg),
+        args.repeat)
+    print(f'per polygon: {per_polygon_time * 1000:.1f} ms')
+    batched_time, mask_targets = timeit(
+        lambda: mask_target(pos_proposals_list, pos_assigned_gt_inds_list,
+                            gt_masks_list, cfg), args.repeat)
+    print(f'flattened polygons: {batched_time * 1000:.1f} ms')
+    print(f'speedup: {per_polygon_time / batched_time:.1f}x')
+
+    assert torch.equal(mask_targets, expected_targets)
+    print('mask targets are identical')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+import argparse
+import os.path as osp
+import tempfile
+import time
+
+import mmcv
+import numpy as np
+
+from mmdet.core.evaluation.bbox_overlaps import bbox_overlaps
+from mmdet.datasets import CocoDataset
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the proposal_fast evaluation of CocoDataset')
+    parser.add_argument(
+        '--num-imgs', type=int, default=2000, help='number of images')
+    parser.add_argument(
+        '--max-gts', type=int, default=20, help='max number of gts per image')
+    parser.add_argument(
+        '--num-proposals',
+        type=int,
+        default=1000,
+        help='number of proposals per image')
+    parser.add_argument(
+        '--proposal-nums',
+        type=int,
+        nargs='+',
+        default=[100, 300, 1000],
+        help='numbers of top proposals')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def per_image_gt_bboxes(dataset):
+    """The per image lookups that ``fast_eval_recall`` used to do."""
+    gt_bboxes = []
+    for i in range(len(dataset.img_ids)):
+        ann_ids = dataset.coco.get_ann_ids(img_ids=dataset.img_ids[i])
+        ann_info = dataset.coco.load_anns(ann_ids)
+        if len(ann_info) == 0:
+            gt_bboxes.append(np.zeros((0, 4)))
+            continue
+        bboxes = []
+        for ann in ann_info:
+            if ann.get('ignore', False) or ann['iscrowd']:
+                continue
+            x1, y1, w, h = ann['bbox']
+            bboxes.append([x1, y1, x1 + w, y1 + h])
+        bboxes = np.array(bboxes, dtype=np.float32)
+        if bboxes.shape[0] == 0:
+            bboxes = np.zeros((0, 4))
+        gt_bboxes.append(bboxes)
+    return gt_bboxes
+
+
+def per_image_recalls(gts, proposals, proposal_nums, iou_thrs):
+    """The per image and per proposal num greedy matching that
+    ``eval_recalls`` used to do."""
+    all_ious = []
+    for i in range(len(gts)):
+        scores = proposals[i][:, 4]
+        sort_idx = np.argsort(scores)[::-1]
+        img_proposal = proposals[i][sort_idx, :]
+        prop_num = min(img_proposal.shape[0], proposal_nums[-1])
+        if gts[i] is None or gts[i].shape[0] == 0:
+            ious = np.zeros((0, img_proposal.shape[0]), dtype=np.float32)
+        else:
+            ious = bbox_overlaps(gts[i], img_proposal[:prop_num, :4])
+        all_ious.append(ious)
+
+    total_gt_num = sum([ious.shape[0] for ious in all_ious])
+    _ious = np.zeros((proposal_nums.size, total_gt_num), dtype=np.float32)
+    for k, proposal_num in enumerate(proposal_nums):
+        tmp_ious = np.zeros(0)
+        for i in range(len(all_ious)):
+            ious = all_ious[i][:, :proposal_num].copy()
+            gt_ious = np.zeros((ious.shape[0]))
+            if ious.size == 0:
+                tmp_ious = np.hstack((tmp_ious, gt_ious))
+                continue
+            for j in range(ious.shape[0]):
+                gt_max_overlaps = ious.argmax(axis=1)
+                max_ious = ious[np.arange(0, ious.shape[0]), gt_max_overlaps]
+                gt_idx = max_ious.argmax()
+                gt_ious[j] = max_ious[gt_idx]
+                box_idx = gt_max_overlaps[gt_idx]
+                ious[gt_idx, :] = -1
+                ious[:, box_idx] = -1
+            tmp_ious = np.hstack((tmp_ious, gt_ious))
+        _ious[k, :] = tmp_ious
+
+    _ious = np.fliplr(np.sort(_ious, axis=1))
+    recalls = np.zeros((proposal_nums.size, iou_thrs.size))
+    for i, thr in enumerate(iou_thrs):
+        recalls[:, i] = (_ious >= thr).sum(axis=1) / float(total_gt_num)
+    return recalls
+
+
+def synthetic_coco(num_imgs, max_gts, rng):
+    images, annotations = [], []
+    for i in range(num_imgs):
+        images.append(
+            dict(id=i, width=640, height=480, file_name=f'{i:012d}.jpg'))
+        for _ in range(rng.randint(0, max_gts + 1)):
+            w, h = rng.uniform(4, 300, 2)
+            x1, y1 = rng.uniform(0, 640 - w), rng.uniform(0, 480 - h)
+            annotations.append(
+                dict(
+                    id=len(annotations) + 1,
+                    image_id=i,
+                    category_id=1,
+                    bbox=[x1, y1, w, h],
+                    area=w * h,
+                    iscrowd=int(rng.rand() < 0.01)))
+    return dict(
+        images=images,
+        annotations=annotations,
+        categories=[dict(id=1, name='person')])
+
+
+def synthetic_proposals(gt_bboxes, num_proposals, rng):
+    """Proposals around the gts like those of an RPN."""
+    proposals = []
+    for bboxes in gt_bboxes:
+        num_hits = num_proposals // 4 if len(bboxes) else 0
+        xy = rng.uniform(0, 480, (num_proposals, 2))
+        wh = rng.uniform(4, 300, (num_proposals, 2))
+        img_proposals = np.hstack([xy, xy + wh])
+        if num_hits:
+            inds = rng.randint(0, len(bboxes), num_hits)
+            wh = np.tile(bboxes[inds, 2:] - bboxes[inds, :2], 2)
+            img_proposals[:num_hits] = bboxes[inds] + rng.normal(
+                0, 0.1, (num_hits, 4)) * wh
+        scores = rng.rand(num_proposals, 1)
+        proposals.append(np.hstack([img_proposals, scores]).astype(np.float32))
+    return proposals
+
+
+def main():
+    args = parse_args()
+    rng = np.random.RandomState(args.seed)
+    proposal_nums = np.array(args.proposal_nums)
+    iou_thrs = np.linspace(.5, 0.95, 10)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ann_file = osp.join(tmpdir, 'ann.json')
+        mmcv.dump(synthetic_coco(args.num_imgs, args.max_gts, rng), ann_file)
+        dataset = CocoDataset(
+            ann_file, pipeline=[], classes=('person', ), test_mode=True)
+
+    start = time.perf_counter()
+    gt_bboxes = per_image_gt_bboxes(dataset)
+    lookup_time = time.perf_counter() - start
+    proposals = synthetic_proposals(gt_bboxes, args.num_proposals, rng)
+    num_gts = sum(len(bboxes) for bboxes in gt_bboxes)
+    print(f'{args.num_imgs} images, {num_gts} gts, '
+          f'{args.num_proposals} proposals per image')
+
+    start = time.perf_counter()
+    expected_recalls = per_image_recalls(gt_bboxes, proposals, proposal_nums,
+                                         iou_thrs)
+    per_image_time = time.perf_counter() - start + lookup_time
+    print(f'per image:  {per_image_time:.2f} s '
+          f'(gt lookup {lookup_time:.2f} s)')
+
+    times = []
+    for _ in range(2):
+        start = time.perf_counter()
+        ar = dataset.fast_eval_recall(
+            proposals, proposal_nums, iou_thrs, logger='silent')
+        times.append(time.perf_counter() - start)
+    print(f'batched:    {times[0]:.2f} s (first call), '
+          f'{times[1]:.2f} s (cached gt index)')
+    print(f'speedup: {per_image_time / times[0]:.1f}x, '
+          f'{per_image_time / times[1]:.1f}x')
+
+    expected_ar = expected_recalls.mean(axis=1)
+    assert np.array_equal(ar, expected_ar)
+    print('AR@N: ' + ', '.join(f'{num} {value:.4f}'
+                               for num, value in zip(proposal_nums, ar)))
+    print('AR@N is identical')
+
+
+if __name__ == '__main__':
+    main()
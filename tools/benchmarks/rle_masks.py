@@ -0,0 +1,122 @@
+import argparse
+import time
+
+import numpy as np
+
+from mmdet.core import BitmapMasks
+from mmdet.datasets.pipelines import (LoadAnnotations, Pad, RandomCrop,
+                                      RandomFlip, Resize)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the memory and the speed of the mask '
+        'transforms with bitmap and RLE masks')
+    parser.add_argument(
+        '--num-gts', type=int, default=300, help='number of objects')
+    parser.add_argument(
+        '--img-shape',
+        type=int,
+        nargs=2,
+        default=[480, 640],
+        help='original image shape (h, w)')
+    parser.add_argument(
+        '--repeat', type=int, default=5, help='number of repeated runs')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def synthetic_results(num_gts, img_shape, rng):
+    """A crowded image annotated with polygons like LVIS."""
+    h, w = img_shape
+    masks = []
+    bboxes = []
+    for _ in range(num_gts):
+        cx, cy = rng.uniform(0, w), rng.uniform(0, h)
+        radius = rng.uniform(5, 100)
+        num_points = rng.randint(8, 65)
+        angles = np.sort(rng.uniform(0, 2 * np.pi, num_points))
+        radii = radius * rng.uniform(0.5, 1, num_points)
+        xs = np.clip(cx + radii * np.cos(angles), 0, w)
+        ys = np.clip(cy + radii * np.sin(angles), 0, h)
+        masks.append([np.stack([xs, ys], axis=1).ravel().tolist()])
+        bboxes.append([xs.min(), ys.min(), xs.max(), ys.max()])
+    return dict(
+        img_info=dict(height=h, width=w),
+        ann_info=dict(
+            bboxes=np.array(bboxes, dtype=np.float32),
+            labels=np.zeros(num_gts, dtype=np.int64),
+            masks=masks),
+        img=np.zeros((h, w, 3), dtype=np.uint8),
+        img_shape=(h, w, 3),
+        ori_shape=(h, w, 3),
+        bbox_fields=[],
+        mask_fields=[])
+
+
+def masks_nbytes(masks):
+    if isinstance(masks, BitmapMasks):
+        return masks.masks.nbytes
+    return sum(counts.nbytes for counts in masks.masks)
+
+
+def run_pipeline(transforms, results, repeat):
+    """Run the transforms and record the time and the mask memory of each
+    step."""
+    times = np.full(len(transforms), np.inf)
+    for _ in range(repeat):
+        step_results = results.copy()
+        step_results['bbox_fields'] = []
+        step_results['mask_fields'] = []
+        np.random.seed(0)
+        nbytes = []
+        for i, transform in enumerate(transforms):
+            start = time.perf_counter()
+            step_results = transform(step_results)
+            times[i] = min(times[i], time.perf_counter() - start)
+            nbytes.append(masks_nbytes(step_results['gt_masks']))
+    return times, nbytes, step_results['gt_masks']
+
+
+def main():
+    args = parse_args()
+    rng = np.random.RandomState(args.seed)
+    results = synthetic_results(args.num_gts, args.img_shape, rng)
+
+    def transforms(rle_masks):
+        return [
+            LoadAnnotations(with_mask=True, rle_masks=rle_masks),
+            Resize(img_scale=(1333, 800), keep_ratio=True),
+            RandomFlip(flip_ratio=1.0),
+            Pad(size_divisor=32),
+            RandomCrop(crop_size=(800, 800))
+        ]
+
+    names = [type(t).__name__ for t in transforms(False)]
+    bitmap_times, bitmap_nbytes, bitmap_masks = run_pipeline(
+        transforms(False), results, args.repeat)
+    rle_times, rle_nbytes, rle_masks = run_pipeline(
+        transforms(True), results, args.repeat)
+
+    print(f'{args.num_gts} objects on a {args.img_shape} image')
+    print(f'{"transform":<16}{"bitmap":>20}{"rle":>20}{"speedup":>10}')
+    for name, bitmap_time, rle_time, bitmap_size, rle_size in zip(
+            names, bitmap_times, rle_times, bitmap_nbytes, rle_nbytes):
+        bitmap_str = f'{bitmap_time * 1000:.1f}ms {bitmap_size / 2**20:.1f}MB'
+        rle_str = f'{rle_time * 1000:.1f}ms {rle_size / 2**20:.2f}MB'
+        print(f'{name:<16}{bitmap_str:>20}{rle_str:>20}'
+              f'{bitmap_time / rle_time:>9.1f}x')
+    bitmap_total = bitmap_times.sum()
+    rle_total = rle_times.sum()
+    print(f'total: bitmap {bitmap_total * 1000:.1f}ms, '
+          f'rle {rle_total * 1000:.1f}ms, '
+          f'speedup {bitmap_total / rle_total:.1f}x, peak mask memory '
+          f'{max(bitmap_nbytes) / max(rle_nbytes):.0f}x smaller')
+
+    assert (rle_masks.to_ndarray() == bitmap_masks.masks).all()
+    print('transformed masks are identical')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import tempfile
+import time
+from functools import partial
+
+import matplotlib
+import numpy as np
+import torch
+from mmcv.parallel import DataContainer, MMDataParallel, collate
+from torch.utils.data import DataLoader, Dataset
+
+from mmdet.apis import single_gpu_test
+from mmdet.models.detectors.base import BaseDetector
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the throughput of single_gpu_test with the '
+        'results encoded and painted by background threads')
+    parser.add_argument(
+        '--num-images', type=int, default=40, help='number of test images')
+    parser.add_argument(
+        '--img-shape',
+        type=int,
+        nargs=2,
+        default=[800, 1216],
+        help='h w of the images')
+    parser.add_argument(
+        '--num-dets', type=int, default=30, help='detections per image')
+    parser.add_argument(
+        '--infer-time',
+        type=float,
+        default=0.1,
+        help='seconds of the simulated model inference, which releases the '
+        'GIL as waiting for the GPU does')
+    parser.add_argument(
+        '--workers',
+        type=int,
+        nargs='+',
+        default=[0, 1, 2],
+        help='numbers of result workers to compare')
+    parser.add_argument(
+        '--no-show-dir',
+        action='store_true',
+        help='only encode the masks without painting the results')
+    args = parser.parse_args()
+    return args
+
+
+class SyntheticDataset(Dataset):
+
+    def __init__(self, num_images, img_shape):
+        self.num_images = num_images
+        self.img_shape = tuple(img_shape)
+
+    def __getitem__(self, idx):
+        h, w = self.img_shape
+        img_meta = dict(
+            img_shape=(h, w, 3),
+            ori_shape=(h, w, 3),
+            ori_filename=f'{idx}.jpg',
+            img_norm_cfg=dict(
+                mean=[123.675, 116.28, 103.53],
+                std=[58.395, 57.12, 57.375],
+                to_rgb=True))
+        img = torch.randn(3, h, w)
+        return dict(
+            img=[img], img_metas=[DataContainer(img_meta, cpu_only=True)])
+
+    def __len__(self):
+        return self.num_images
+
+
+class SimulatedDetector(BaseDetector):
+    """Sleep as the inference and return COCO-like box and mask results."""
+
+    CLASSES = tuple(f'class_{i}' for i in range(80))
+
+    def __init__(self, num_dets, infer_time):
+        super().__init__()
+        self.num_dets = num_dets
+        self.infer_time = infer_time
+        self.rng = np.random.RandomState(0)
+
+    def extract_feat(self, imgs):
+        pass
+
+    def aug_test(self, imgs, img_metas, **kwargs):
+        pass
+
+    def simple_test(self, img, img_metas, **kwargs):
+        time.sleep(self.infer_time)
+        h, w = img_metas[0]['ori_shape'][:2]
+        labels = self.rng.randint(0, len(self.CLASSES), self.num_dets)
+        sizes = self.rng.uniform(16, min(h, w) / 2, (self.num_dets, 2))
+        x0 = self.rng.uniform(0, w - sizes[:, 0])
+        y0 = self.rng.uniform(0, h - sizes[:, 1])
+        bbox_results = [
+            np.zeros((0, 5), dtype=np.float32) for _ in self.CLASSES
+        ]
+        segm_results = [[] for _ in self.CLASSES]
+        for i, label in enumerate(labels):
+            x1, y1 = x0[i] + sizes[i, 0], y0[i] + sizes[i, 1]
+            bbox = np.array([[x0[i], y0[i], x1, y1, 0.9]], dtype=np.float32)
+            bbox_results[label] = np.vstack([bbox_results[label], bbox])
+            mask = np.zeros((h, w), dtype=bool)
+            mask[int(y0[i]):int(y1), int(x0[i]):int(x1)] = True
+            segm_results[label].append(mask)
+        return [(bbox_results, segm_results)]
+
+
+def main():
+    args = parse_args()
+    matplotlib.use('Agg')
+    torch.set_num_threads(1)
+    data_loader = DataLoader(
+        SyntheticDataset(args.num_images, args.img_shape),
+        batch_size=1,
+        collate_fn=partial(collate, samples_per_gpu=1))
+
+    throughputs = {}
+    expected = None
+    for result_workers in args.workers:
+        model = MMDataParallel(
+            SimulatedDetector(args.num_dets, args.infer_time))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out_dir = None if args.no_show_dir else tmp_dir
+            start = time.perf_counter()
+            results = single_gpu_test(
+                model,
+                data_loader,
+                out_dir=out_dir,
+                result_workers=result_workers)
+            elapsed = time.perf_counter() - start
+        if expected is None:
+            expected = results
+        for (bboxes, segms), (expected_bboxes,
+                              expected_segms) in zip(results, expected):
+            assert segms == expected_segms
+            assert all(
+                np.array_equal(a, b) for a, b in zip(bboxes, expected_bboxes))
+        throughputs[result_workers] = args.num_images / elapsed
+        print()
+
+    base = throughputs[args.workers[0]]
+    for result_workers, throughput in throughputs.items():
+        print(f'result_workers={result_workers}: {throughput:.2f} images/s '
+              f'({throughput / base:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
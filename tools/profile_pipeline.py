@@ -0,0 +1,88 @@
+import argparse
+
+import mmcv
+import numpy as np
+from mmcv import Config, DictAction
+from torch.utils.data import DataLoader
+
+from mmdet.core.utils import get_pipeline_profilers
+from mmdet.datasets.builder import build_dataset
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Profile the transforms of the train pipeline')
+    parser.add_argument('config', help='train config file path')
+    parser.add_argument(
+        '--num-samples',
+        type=int,
+        default=200,
+        help='number of samples to load')
+    parser.add_argument(
+        '--num-workers',
+        type=int,
+        default=0,
+        help='number of dataloader workers, whose stats are aggregated')
+    parser.add_argument(
+        '--sort-by-time',
+        action='store_true',
+        help='sort the transforms by their time instead of the pipeline '
+        'order')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument(
+        '--cfg-options',
+        nargs='+',
+        action=DictAction,
+        help='override some settings in the used config, the key-value pair '
+        'in xxx=yyy format will be merged into config file.')
+    args = parser.parse_args()
+    return args
+
+
+def enable_profile(data_cfg):
+    """Set ``profile_pipeline=True`` for the datasets with a pipeline."""
+    if isinstance(data_cfg, (list, tuple)):
+        for cfg in data_cfg:
+            enable_profile(cfg)
+    elif 'dataset' in data_cfg:
+        enable_profile(data_cfg.dataset)
+    elif 'datasets' in data_cfg:
+        enable_profile(data_cfg.datasets)
+    else:
+        data_cfg.profile_pipeline = True
+
+
+def drop_batch(batch):
+    """Skip the collation, which is not a transform of the pipeline."""
+    return None
+
+
+def main():
+    args = parse_args()
+    cfg = Config.fromfile(args.config)
+    if args.cfg_options is not None:
+        cfg.merge_from_dict(args.cfg_options)
+    enable_profile(cfg.data.train)
+    dataset = build_dataset(cfg.data.train)
+
+    rng = np.random.RandomState(args.seed)
+    num_samples = min(args.num_samples, len(dataset))
+    indices = rng.choice(len(dataset), num_samples, replace=False).tolist()
+    data_loader = DataLoader(
+        dataset,
+        batch_size=1,
+        sampler=indices,
+        num_workers=args.num_workers,
+        collate_fn=drop_batch)
+    progress_bar = mmcv.ProgressBar(num_samples)
+    for _ in data_loader:
+        progress_bar.update()
+    print()
+
+    sort_by = 'time' if args.sort_by_time else None
+    for profiler in get_pipeline_profilers(dataset):
+        print(profiler.summary(sort_by))
+
+
+if __name__ == '__main__':
+    main()
@@ -10,7 +10,7 @@ from mmcv.parallel import MMDataParallel, MMDistributedDataParallel
 from mmcv.runner import (get_dist_info, init_dist, load_checkpoint,
                          wrap_fp16_model)
 
-from mmdet.apis import multi_gpu_test, single_gpu_test
+from mmdet.apis import ChunkedResults, multi_gpu_test, single_gpu_test
 from mmdet.datasets import (build_dataloader, build_dataset,
                             replace_ImageToTensor)
 from mmdet.models import build_detector
@@ -47,6 +47,12 @@ def parse_args():
         type=float,
         default=0.3,
         help='score threshold (default: 0.3)')
+    parser.add_argument(
+        '--result-workers',
+        type=int,
+        default=0,
+        help='number of background threads encoding and painting the results '
+        'while the model runs, only used by non-distributed testing')
     parser.add_argument(
         '--gpu-collect',
         action='store_true',
@@ -55,6 +61,12 @@ def parse_args():
         '--tmpdir',
         help='tmp directory used for collecting results from multiple '
         'workers, available when gpu-collect is not specified')
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        help='if specified, workers dump their results to tmpdir in chunks '
+        'of this size during testing, which are then loaded lazily instead '
+        'of being collected at once')
     parser.add_argument(
         '--cfg-options',
         nargs='+',
@@ -98,6 +110,18 @@ def parse_args():
     return args
 
 
+def build_incremental_evaluator(dataset, eval_kwargs):
+    """Build the incremental evaluator of a dataset if it supports the
+    evaluation arguments, else None."""
+    if not hasattr(dataset, 'incremental_evaluator'):
+        return None
+    try:
+        return dataset.incremental_evaluator(**eval_kwargs)
+    except (KeyError, TypeError):
+        # metrics or arguments only supported by ``dataset.evaluate``
+        return None
+
+
 def main():
     args = parse_args()
 
@@ -170,6 +194,12 @@ def main():
 
     # build the model and load checkpoint
     cfg.model.train_cfg = None
+    # the masks are encoded to RLEs by the test loops anyway, so the mask head
+    # can paste them into RLEs directly without image sized bitmaps
+    test_cfg = cfg.model.get('test_cfg') or cfg.get('test_cfg')
+    rcnn_test_cfg = test_cfg.get('rcnn') if test_cfg else None
+    if isinstance(rcnn_test_cfg, dict) and 'mask_thr_binary' in rcnn_test_cfg:
+        rcnn_test_cfg.setdefault('mask_format', 'rle')
     model = build_detector(cfg.model, test_cfg=cfg.get('test_cfg'))
     fp16_cfg = cfg.get('fp16', None)
     if fp16_cfg is not None:
@@ -186,15 +216,24 @@ def main():
 
     if not distributed:
         model = MMDataParallel(model, device_ids=[0])
-        outputs = single_gpu_test(model, data_loader, args.show, args.show_dir,
-                                  args.show_score_thr)
+        outputs = single_gpu_test(
+            model,
+            data_loader,
+            args.show,
+            args.show_dir,
+            args.show_score_thr,
+            result_workers=args.result_workers)
     else:
         model = MMDistributedDataParallel(
             model.cuda(),
             device_ids=[torch.cuda.current_device()],
             broadcast_buffers=False)
-        outputs = multi_gpu_test(model, data_loader, args.tmpdir,
-                                 args.gpu_collect)
+        outputs = multi_gpu_test(
+            model,
+            data_loader,
+            args.tmpdir,
+            args.gpu_collect,
+            chunk_size=args.chunk_size)
 
     rank, _ = get_dist_info()
     if rank == 0:
@@ -202,17 +241,36 @@ def main():
             print(f'\nwriting results to {args.out}')
             mmcv.dump(outputs, args.out)
         kwargs = {} if args.eval_options is None else args.eval_options
-        if args.format_only:
-            dataset.format_results(outputs, **kwargs)
         if args.eval:
             eval_kwargs = cfg.get('evaluation', {}).copy()
             # hard-code way to remove EvalHook args
             for key in [
                     'interval', 'tmpdir', 'start', 'gpu_collect', 'save_best',
-                    'rule'
+                    'rule', 'incremental'
             ]:
                 eval_kwargs.pop(key, None)
             eval_kwargs.update(dict(metric=args.eval, **kwargs))
+        if isinstance(outputs, ChunkedResults):
+            chunked_outputs = outputs
+            evaluator = None
+            if args.eval and not args.format_only:
+                evaluator = build_incremental_evaluator(dataset, eval_kwargs)
+            if evaluator is not None:
+                # the chunks are evaluated one by one without being kept
+                for start in range(0, len(chunked_outputs), args.chunk_size):
+                    end = min(start + args.chunk_size, len(chunked_outputs))
+                    evaluator.process(chunked_outputs[start:end],
+                                      list(range(start, end)))
+                chunked_outputs.close()
+                print(evaluator.evaluate())
+                return
+            if args.format_only or args.eval:
+                # datasets format and evaluate lists of results
+                outputs = list(chunked_outputs)
+            chunked_outputs.close()
+        if args.format_only:
+            dataset.format_results(outputs, **kwargs)
+        if args.eval:
             print(dataset.evaluate(outputs, **eval_kwargs))
 
 